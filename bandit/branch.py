@@ -41,3 +41,133 @@ create branches and explore different outcomes based on their inputs.
 
 Branch ID: A unique identifier for the branch.
 """
+
+import uuid
+from typing import TYPE_CHECKING, Optional
+
+from bandit.main import TimeBandit
+
+if TYPE_CHECKING:
+    from bandit.compare import Divergence
+    from bandit.merge import MergeResult
+
+
+class Branch(TimeBandit):
+    """
+    A TimeBandit that diverges from a parent simulation at its current time.
+
+    The branch shares the parent's objects and history through copy-on-write.
+    Creating a branch does not copy anything, objects are copied the first
+    time the branch or the parent writes to them, and the history entries
+    from before the divergence are shared. The branch computes its own copy
+    of the parent's metrics, without their sink.
+
+    Parameters
+    ----------
+    parent (TimeBandit):
+        The simulation to branch from
+    name (str, optional):
+        A name for the branch, defaults to the branch ID
+
+    Attributes
+    ----------
+    id (str):
+        A unique identifier for the branch
+    name (str):
+        The name of the branch
+    parent (TimeBandit):
+        The simulation the branch diverged from
+    divergence (str):
+        The parent's clock time at the point of divergence
+
+    Methods
+    -------
+    update():
+        Update the branch.
+    run(steps: int):
+        Run the branch for a given number of steps.
+    state():
+        Return the state of the branch.
+    compare() -> Divergence:
+        Compare the history of the branch with the history of its parent.
+    merge(prefer: str = "ours", apply: bool = True) -> MergeResult:
+        Merge the changes of the branch into its parent.
+    reseed(seed: int):
+        Draw other random numbers than the parent from now on.
+    """
+
+    def __init__(self, parent: TimeBandit, name: Optional[str] = None) -> None:
+        self.__dict__.update(parent.__dict__)
+        self.id = uuid.uuid4().hex
+        self.name = name or self.id
+        self.parent = parent
+        self.divergence = parent.clock.time
+        self.space = parent.space.fork()
+        if self.space.clock is not None:
+            self.clock = self.space.clock
+        else:
+            self.clock = parent.clock.clone()
+        self.time = parent.time.fork()
+        if parent.snapshots is not None:
+            self.snapshots = parent.snapshots.clone()
+        if parent.metrics is not None:
+            self.metrics = parent.metrics.clone()
+
+    def __repr__(self) -> str:
+        return f"Branch({self.name} @ {self.divergence})"
+
+    def compare(self) -> "Divergence":
+        """
+        Compare the history of the branch with the history of its parent,
+        see bandit.compare.
+
+        Returns
+        -------
+        Divergence:
+            The objects that differ and how far apart they are, at every
+            step both histories hold
+        """
+        from bandit.compare import compare
+
+        return compare(self.parent, self)
+
+    def merge(self, prefer: str = "ours", apply: bool = True) -> "MergeResult":
+        """
+        Merge the changes the branch made since its divergence into the
+        space of its parent, see bandit.merge.
+
+        Parameters
+        ----------
+        prefer (str):
+            "ours" to keep the parent's value of conflicting fields, "theirs"
+            to take the branch's value
+        apply (bool):
+            Whether to write the changes, False to only find them
+
+        Returns
+        -------
+        MergeResult:
+            The fields written, the objects added and removed, and the
+            conflicts
+        """
+        from bandit.merge import merge
+
+        return merge(self.parent, self, prefer=prefer, apply=apply)
+
+    def reseed(self, seed: int) -> None:
+        """
+        Gives the objects of the branch random streams with another seed, see
+        bandit.rng. Until then the branch draws the same numbers as its
+        parent.
+
+        Parameters
+        ----------
+        seed (int):
+            The seed of the new streams
+        """
+        from bandit.rng import RandomStreams
+
+        if self.space.rng is None:
+            self.space.rng = RandomStreams(seed)
+        else:
+            self.space.rng = self.space.rng.reseed(seed)
@@ -0,0 +1,555 @@
+"""
+Binary checkpoints of a Space or a TimeBandit.
+
+A checkpoint is a single file holding every object in a space:
+
+    MAGIC | header length (uint64) | JSON header | padding | arrays | pickle
+
+The header describes the space, the object classes and where every array
+starts. Arrays are written raw and 64-byte aligned, so loading maps the file
+into memory (copy-on-write) instead of reading it, and pages are only read
+when they are used.
+
+Every object is split into:
+- the UUID and clock of every object, one array each. Compact identities
+  get a handle from the registry of the loading process, and the handles
+  held in histories and states are pickled as UUIDs and mapped to it, see
+  bandit.identity
+- numeric attributes (int, float, bool or NumPy arrays of the same shape),
+  one array per attribute and class
+- Column fields of a columnar space, written straight from the block arrays
+  and mapped back as the block arrays on load
+- connections and interactions, as pairs of object indexes and an edge type,
+  put back in an EdgeStore if the space had one
+- every other attribute, pickled in one blob for the whole checkpoint.
+  References to objects in the checkpoint are pickled as their index, so
+  they point to the restored objects on load. States interned by a
+  StateStore are shared by every history that holds them, so they are
+  pickled once
+
+The scheduler, physics, effects, random streams and the settings of the
+spatial grid of the space are pickled, and the grid is filled on load.
+
+A TimeBandit is saved with its history, its snapshots, its metrics and
+whether it records states. Snapshots are saved as checkpoints in memory, see
+bandit.snapshot, and the metrics without their sink.
+
+The master clock of a shared-clock space is saved in the header, and the
+objects get views of it again on load, at the time they were saved.
+
+Edges to objects that are not in the checkpoint are not saved. A fork is
+saved with everything it can see, and loaded as a root space.
+
+Example
+-------
+    save(bandit, "run.ckpt")
+    bandit = load("run.ckpt")
+"""
+
+import importlib
+import io
+import json
+import mmap
+import pickle
+import struct
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterable, Optional, Union
+
+import numpy as np
+from anarchy import Anarchy
+
+from bandit.clock import Clock, ClockView
+from bandit.columnar import ColumnBlock
+from bandit.edges import EdgeStore
+from bandit.object import Object
+from bandit.space import Space
+
+if TYPE_CHECKING:
+    from bandit.main import TimeBandit
+
+MAGIC = b"BANDIT\x00\x01"
+VERSION = 1
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sQ")
+
+# Attributes saved explicitly, never as numeric or pickled attributes
+_STRUCTURAL = {
+    "clock",
+    "id",
+    "connections",
+    "interactions",
+    "_owner",
+    "_owner_epoch",
+    "_edges_epoch",
+    "_column_block",
+    "_column_row",
+    "_rng",
+}
+
+# Attributes of the per-object history, left out with history=False
+_HISTORY = {
+    "buffer": deque,
+    "id_index": dict,
+    "_history_start": lambda: 0,
+    "_history_latest": lambda: None,
+    "_history_since_keyframe": lambda: 0,
+    "_history_digests": dict,
+    "_history_store": lambda: None,
+}
+
+_EDGES = ("connections", "interactions")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _import_class(path: str) -> type:
+    module, _, qualname = path.partition(":")
+    cls = importlib.import_module(module)
+    for name in qualname.split("."):
+        cls = getattr(cls, name)
+    return cls
+
+
+def _numeric(values: list) -> Union[np.ndarray, None]:
+    """
+    Returns the values as one array if they are all numbers of one type or
+    arrays of one shape, None otherwise.
+    """
+    first = values[0]
+    kind = type(first)
+    if kind in (int, float, bool):
+        if all(type(value) is kind for value in values):
+            try:
+                return np.array(values, dtype=np.int64 if kind is int else kind)
+            except OverflowError:
+                return None
+        return None
+    if isinstance(first, np.ndarray) and first.ndim and first.dtype.kind in "biuf":
+        if all(
+            isinstance(value, np.ndarray)
+            and value.dtype == first.dtype
+            and value.shape == first.shape
+            for value in values
+        ):
+            return np.stack(values)
+    return None
+
+
+class _Pickler(pickle.Pickler):
+    """
+    Pickles objects in the checkpoint as their index.
+    """
+
+    def __init__(self, file: BinaryIO, index: dict[str, int]) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.index = index
+
+    def persistent_id(self, obj: Any) -> Union[int, None]:
+        if isinstance(obj, Object):
+            return self.index.get(obj.id.root)
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    """
+    Resolves object indexes to the restored objects.
+    """
+
+    def __init__(self, file: BinaryIO, objects: list[Object]) -> None:
+        super().__init__(file)
+        self.objects = objects
+
+    def persistent_load(self, index: int) -> Object:
+        return self.objects[index]
+
+
+def _write(
+    path: Union[str, BinaryIO],
+    space: Space,
+    bandit: "TimeBandit" = None,
+    history: bool = True,
+) -> Union[str, BinaryIO]:
+    """
+    Writes a checkpoint to a file, or to a seekable binary file object, e.g.
+    a BytesIO for a snapshot held in memory.
+    """
+    objects = list(space.objects)
+    index = {obj.id.root: i for i, obj in enumerate(objects)}
+    arrays: dict[str, np.ndarray] = {}
+    extra: dict[str, Any] = {"objects": []}
+
+    arrays["uuids"] = np.array([obj.id.uuid for obj in objects], dtype=str)
+    arrays["cycle"] = np.array([obj.clock.cycle for obj in objects], dtype=np.int64)
+    arrays["step"] = np.array([obj.clock.step for obj in objects], dtype=np.int64)
+    arrays["steps_per_cycle"] = np.array(
+        [obj.clock.steps_per_cycle for obj in objects], dtype=np.int64
+    )
+
+    groups: dict[type, list[int]] = {}
+    for i, obj in enumerate(objects):
+        groups.setdefault(type(obj), []).append(i)
+
+    classes = []
+    for number, (cls, members) in enumerate(groups.items()):
+        prefix = f"class{number}"
+        arrays[f"{prefix}.members"] = np.array(members, dtype=np.int64)
+        states = []
+        for i in members:
+            state = objects[i].__getstate__()
+            states.append(
+                {
+                    name: value
+                    for name, value in state.items()
+                    if name not in _STRUCTURAL and (history or name not in _HISTORY)
+                }
+            )
+
+        numeric = []
+        names = [name for name in states[0] if all(name in s for s in states)]
+        for name in names:
+            array = _numeric([state[name] for state in states])
+            if array is not None:
+                arrays[f"{prefix}.{name}"] = array
+                numeric.append(name)
+                for state in states:
+                    del state[name]
+
+        columns = []
+        if space.columns is not None and cls in space.columns:
+            block = space.columns[cls]
+            rows = np.array([block.index[objects[i].id.root] for i in members])
+            for name, column in block.columns.items():
+                arrays[f"{prefix}.column.{name}"] = column[rows]
+                columns.append(name)
+
+        extra["objects"].append(states)
+        identity = objects[members[0]].id
+        classes.append(
+            {
+                "class": _class_path(cls),
+                "identity": _class_path(getattr(identity, "kind", type(identity))),
+                "numeric": numeric,
+                "columns": columns,
+            }
+        )
+
+    edge_types: dict[str, int] = {}
+    for kind in _EDGES:
+        pairs, types = [], []
+        for i, obj in enumerate(objects):
+            for root, edge in getattr(obj, kind).items():
+                target = index.get(root)
+                if target is not None and edge.node is not None:
+                    pairs.append((i, target))
+                    types.append(edge_types.setdefault(edge.edge_type, len(edge_types)))
+        arrays[f"{kind}.pairs"] = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        arrays[f"{kind}.types"] = np.array(types, dtype=np.int32)
+
+    header = {
+        "version": VERSION,
+        "history": history,
+        "space": {
+            "class": _class_path(type(space)),
+            "columnar": space.columns is not None,
+            "synchronous": getattr(space, "synchronous", False),
+            "edges": getattr(space, "edges", None) is not None,
+            "clock": _clock_info(space.clock),
+        },
+        "classes": classes,
+        "edge_types": list(edge_types),
+    }
+    extra["scheduler"] = space.scheduler
+    extra["physics"] = space.physics
+    extra["effects"] = space.effects
+    extra["rng"] = space.rng
+    # The settings of the grid, it is filled again on load
+    extra["spatial"] = space.spatial.clone() if space.spatial is not None else None
+    if bandit is not None:
+        header["bandit"] = _clock_info(bandit.clock)
+        extra["time"] = bandit.time
+        extra["snapshots"] = bandit.snapshots
+        extra["metrics"] = bandit.metrics
+        extra["record"] = bandit.record
+
+    blob = io.BytesIO()
+    _Pickler(blob, index).dump(extra)
+    blob = blob.getbuffer()
+
+    offset = 0
+    layout = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = [offset, array.dtype.str, list(array.shape)]
+        offset = _align(offset + array.nbytes)
+    header["arrays"] = layout
+    header["pickle"] = [offset, blob.nbytes]
+
+    encoded = json.dumps(header).encode()
+    start = _align(_PREFIX.size + len(encoded))
+    with open(path, "wb") if isinstance(path, str) else nullcontext(path) as f:
+        f.write(_PREFIX.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(start + layout[name][0])
+            f.write(array.data)
+        f.seek(start + offset)
+        f.write(blob)
+    return path
+
+
+def _clock_info(clock: Optional[Clock]) -> Optional[dict]:
+    if clock is None:
+        return None
+    return {
+        "cycle": clock.cycle,
+        "step": clock.step,
+        "steps_per_cycle": clock.steps_per_cycle,
+    }
+
+
+def _restore_clock(info: dict) -> Clock:
+    clock = Clock(info["steps_per_cycle"])
+    clock._cycle = info["cycle"]
+    clock._step = info["step"]
+    return clock
+
+
+def _read(path: Union[str, bytes]) -> tuple[Space, dict, dict]:
+    """
+    Reads a checkpoint from a file, or from the bytes of a checkpoint written
+    to memory.
+    """
+    if isinstance(path, str):
+        with open(path, "rb") as f:
+            # Private copy-on-write pages, arrays are writable and never flushed
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    else:
+        # A private copy, so the arrays are writable and the bytes unchanged
+        data = bytearray(path)
+        path = "<memory>"
+    magic, length = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a TimeBandit checkpoint")
+    header = json.loads(bytes(data[_PREFIX.size : _PREFIX.size + length]))
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {header['version']}")
+
+    start = _align(_PREFIX.size + length)
+
+    def array(name: str) -> np.ndarray:
+        offset, dtype, shape = header["arrays"][name]
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        return np.frombuffer(
+            data, dtype=dtype, count=count, offset=start + offset
+        ).reshape(shape)
+
+    uuids = array("uuids").tolist()
+    cycles = array("cycle").tolist()
+    steps = array("step").tolist()
+    steps_per_cycle = array("steps_per_cycle").tolist()
+
+    info = header["space"]
+    space = _import_class(info["class"])(
+        columnar=info["columnar"],
+        synchronous=info["synchronous"],
+        edges=EdgeStore() if info.get("edges") else None,
+    )
+    if info.get("clock") is not None:
+        space.clock = _restore_clock(info["clock"])
+    objects: list[Object] = [None] * len(uuids)
+    now = time.time()
+
+    groups = []
+    for number, info in enumerate(header["classes"]):
+        prefix = f"class{number}"
+        cls = _import_class(info["class"])
+        kind = _import_class(info["identity"])
+        members = array(f"{prefix}.members").tolist()
+        numeric = {}
+        for name in info["numeric"]:
+            values = array(f"{prefix}.{name}")
+            numeric[name] = values.tolist() if values.ndim == 1 else values
+        for position, i in enumerate(members):
+            obj = cls.__new__(cls)
+            attributes = obj.__dict__
+            for name, values in numeric.items():
+                attributes[name] = values[position]
+            clock = Clock(steps_per_cycle[i])
+            clock._cycle = cycles[i]
+            clock._step = steps[i]
+            clock._start_time = now
+            identity = kind.from_uuid(uuids[i])
+            identity.update(clock)
+            attributes["clock"] = clock
+            attributes["id"] = identity
+            attributes["connections"] = Anarchy(anarchy_name="connections")
+            attributes["interactions"] = Anarchy(anarchy_name="interactions")
+            attributes["_owner"] = space
+            attributes["_owner_epoch"] = 0
+            objects[i] = obj
+        columns = {name: array(f"{prefix}.column.{name}") for name in info["columns"]}
+        groups.append((cls, members, columns))
+
+    offset, size = header["pickle"]
+    blob = memoryview(data)[start + offset : start + offset + size]
+    extra = _Unpickler(io.BytesIO(blob), objects).load()
+    blob.release()
+
+    for (cls, members, columns), states in zip(groups, extra["objects"]):
+        for i, state in zip(members, states):
+            objects[i].__dict__.update(state)
+            if not header["history"]:
+                for name, default in _HISTORY.items():
+                    objects[i].__dict__[name] = default()
+                objects[i]._history_store = cls.state_store
+
+    for obj in objects:
+        dict.__setitem__(space, obj.id.root, obj)
+        if space.edges is not None:
+            space.edges.bind(obj)
+
+    for cls, members, columns in groups:
+        if columns:
+            space.columns.blocks[cls] = ColumnBlock.from_columns(
+                cls, [objects[i] for i in members], columns
+            )
+
+    edge_types = header["edge_types"]
+    for kind in _EDGES:
+        pairs = array(f"{kind}.pairs").tolist()
+        types = array(f"{kind}.types").tolist()
+        for (source, target), edge_type in zip(pairs, types):
+            getattr(objects[source], kind).add(
+                objects[target].id.root, objects[target], edge_types[edge_type]
+            )
+
+    if space.clock is not None:
+        for obj in objects:
+            if "_column_block" not in obj.__dict__:
+                obj.clock = ClockView.follow(space.clock, obj.clock, obj.clock_rate)
+
+    space.scheduler = extra["scheduler"]
+    space.physics = extra.get("physics")
+    space.effects = extra.get("effects")
+    space.rng = extra.get("rng")
+    space.spatial = extra.get("spatial")
+    space._topology = len(objects)
+    if space.spatial is not None:
+        space.spatial.refresh(space)
+    return space, header, extra
+
+
+def save(
+    target: Union[Space, "TimeBandit"], path: str, history: bool = True
+) -> str:
+    """
+    Writes a checkpoint of a Space or a TimeBandit to a single file.
+
+    Parameters
+    ----------
+    target (Space | TimeBandit):
+        The space or simulation to save
+    path (str):
+        The file to write
+    history (bool):
+        Whether to save the history of every object. The history of a
+        TimeBandit is always saved
+
+    Returns
+    -------
+    str:
+        The path of the checkpoint
+    """
+    if isinstance(target, Space):
+        return _write(path, target, history=history)
+    return _write(path, target.space, target, history=history)
+
+
+def load(path: str) -> Union[Space, "TimeBandit"]:
+    """
+    Loads a checkpoint written by save().
+
+    Numeric arrays are mapped from the file, copy-on-write, instead of read.
+    A Branch is loaded as a TimeBandit.
+
+    Parameters
+    ----------
+    path (str):
+        The checkpoint file
+
+    Returns
+    -------
+    Space | TimeBandit:
+        The restored space, or simulation if a TimeBandit was saved
+    """
+    space, header, extra = _read(path)
+    info = header.get("bandit")
+    if info is None:
+        return space
+
+    from bandit.main import TimeBandit
+
+    bandit = TimeBandit(
+        space,
+        snapshots=extra.get("snapshots"),
+        metrics=extra.get("metrics"),
+        record=extra.get("record", True),
+    )
+    if space.clock is None:
+        bandit.clock = _restore_clock(info)
+    bandit.time = extra["time"]
+    return bandit
+
+
+def save_objects(objects: Iterable[Object], path: str) -> str:
+    """
+    Writes a checkpoint of objects that are not in a space.
+
+    Parameters
+    ----------
+    objects (Iterable[Object]):
+        The objects to save
+    path (str):
+        The file to write
+
+    Returns
+    -------
+    str:
+        The path of the checkpoint
+    """
+    space = Space()
+    for obj in objects:
+        dict.__setitem__(space, obj.id.root, obj)
+    return _write(path, space)
+
+
+def load_objects(path: str) -> list[Object]:
+    """
+    Loads the objects of a checkpoint, without their space.
+
+    Parameters
+    ----------
+    path (str):
+        The checkpoint file
+
+    Returns
+    -------
+    list[Object]:
+        The restored objects, in the order they were saved
+    """
+    space, _, _ = _read(path)
+    objects = list(space.objects)
+    for obj in objects:
+        obj._owner = None
+    return objects
@@ -1,4 +1,21 @@
+"""
+Clocks that count the cycles and steps of a simulation.
+
+Every Object owns a Clock by default and steps it on every update. In a Space
+created with ``shared_clock=True`` the space owns one master Clock, stepped
+once per tick, and every object gets a ClockView of it instead.
+
+A view has its own steps per cycle and an offset, so an object added later
+keeps counting from its own time, and a rate other than 1 lets an object run
+faster or slower than the simulation. Objects with the same steps per cycle,
+offset and rate share one view, and the master refreshes its views when it
+steps, so a tick costs one update per distinct view instead of one per
+object, and reading an object's cycle or step is an attribute lookup.
+"""
+
 import time
+from typing import Optional
+from weakref import WeakValueDictionary
 
 from bandit.data import ClockState, Cycle, Step
 
@@ -12,11 +29,15 @@ class Clock:
     update()
         Steps the clock by 1 step.
         Updates the object's step and cycle properties.
+    advance(steps)
+        Steps the clock by several steps at once.
     reset()
         Resets the clock to the starting time.
     clone()
         Returns a clone of the clock with the same steps_per_cycle and current
         time in the simulation
+    view(steps_per_cycle, offset, rate)
+        Returns a shared ClockView that follows the clock
 
     Properties
     -----------
@@ -26,6 +47,8 @@ class Clock:
         The current step number.
     time
         The current time in the format of "{cycle}:{step}".
+    ticks
+        The number of steps since 1:0.
     real_time
         The real time since the clock was started.
 
@@ -34,6 +57,9 @@ class Clock:
     - Improve clone() logic
     """
 
+    _time: Optional[str] = None
+    _views: Optional["WeakValueDictionary"] = None
+
     def __init__(self, steps_per_cycle: int = 10) -> None:
         """
         Initializes the clock.
@@ -48,6 +74,7 @@ class Clock:
         self._cycle: Cycle = 1
         self._step: Step = 0
         self._start_time = time.time()
+        self._time: Optional[str] = None
 
     def update(self) -> None:
         """
@@ -58,6 +85,29 @@ class Clock:
         if self._step >= self.steps_per_cycle:
             self._cycle += 1
             self._step = 0
+        self._time = None
+        if self._views:
+            for view in self._views.values():
+                view._sync()
+
+    def advance(self, steps: int) -> None:
+        """
+        Steps the clock by several steps at once, e.g. to catch up with the
+        ticks an object slept through.
+
+        Parameters
+        ----------
+        steps (int):
+            The number of steps, nothing happens for 0 or less
+        """
+        if steps <= 0:
+            return
+        cycles, self._step = divmod(self._step + steps, self.steps_per_cycle)
+        self._cycle += cycles
+        self._time = None
+        if self._views:
+            for view in self._views.values():
+                view._sync()
 
     def clone(self) -> "Clock":
         """
@@ -80,25 +130,76 @@ class Clock:
         """
         self._cycle: Cycle = 1
         self._step: Step = 0
+        self._time = None
+        if self._views:
+            for view in self._views.values():
+                view._sync()
+
+    def view(
+        self, steps_per_cycle: int = 10, offset: int = 0, rate: float = 1
+    ) -> "ClockView":
+        """
+        Returns a view that follows this clock, shared by every caller asking
+        for the same steps_per_cycle, offset and rate.
+
+        Parameters
+        ----------
+        steps_per_cycle (int):
+            The number of steps per cycle of the view
+        offset (int):
+            The number of steps the view is ahead of this clock
+        rate (float):
+            The number of steps the view counts per step of this clock
+
+        Returns
+        -------
+        ClockView:
+            The view
+        """
+        if self._views is None:
+            self._views = WeakValueDictionary()
+        key = (steps_per_cycle, offset, rate)
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = ClockView(self, steps_per_cycle, offset, rate)
+        return view
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles the clock without its views, views are pickled by reference
+        to their master.
+        """
+        return {**self.__dict__, "_views": None}
 
     def __str__(self) -> str:
         """
         Returns the current time in the format of "{cycle}:{step}".
         """
-        return f"{self._cycle}:{self._step}"
+        return self.time
 
     def __repr__(self) -> str:
         """
         Returns the current time in the format of "{cycle}:{step}".
         """
-        return f"{self._cycle}:{self._step}"
+        return self.time
 
     @property
-    def time(self) -> float:
+    def time(self) -> str:
         """
         Returns the current time in the format of "{cycle}:{step}".
+
+        The string is formatted once per step.
         """
-        return f"{self._cycle}:{self._step}"
+        if self._time is None:
+            self._time = f"{self._cycle}:{self._step}"
+        return self._time
+
+    @property
+    def ticks(self) -> int:
+        """
+        Returns the number of steps since 1:0.
+        """
+        return (self._cycle - 1) * self.steps_per_cycle + self._step
 
     @property
     def real_time(self) -> float:
@@ -127,3 +228,122 @@ class Clock:
         Returns the current state of the clock.
         """
         return ClockState(cycle=self._cycle, step=self._step)
+
+
+class ClockView(Clock):
+    """
+    A Clock that follows a master clock instead of counting its own steps.
+
+    The view counts ``offset + rate * master.ticks`` steps, with its own
+    steps per cycle. Views are shared: the master hands out one view per
+    steps per cycle, offset and rate, and refreshes its views when it steps.
+    Stepping a view does nothing, and a view cannot be reset, see detach().
+
+    Views are created by Clock.view() or ClockView.follow(), not directly.
+
+    Attributes
+    ----------
+    master (Clock):
+        The clock the view follows
+    offset (int):
+        The number of steps the view is ahead of the master
+    rate (float):
+        The number of steps the view counts per step of the master
+
+    Methods
+    -------
+    follow(master: Clock, clock: Clock, rate: float = 1) -> ClockView:
+        Returns a view of a master that continues from the time of a clock
+    rebind(master: Clock) -> ClockView:
+        Returns the same view of another master
+    detach() -> Clock:
+        Returns an independent Clock at the time of the view
+    """
+
+    def __init__(
+        self, master: Clock, steps_per_cycle: int, offset: int, rate: float
+    ) -> None:
+        self.master = master
+        self.steps_per_cycle = steps_per_cycle
+        self.offset = offset
+        self.rate = rate
+        self._start_time = master._start_time
+        self._sync()
+
+    @classmethod
+    def follow(cls, master: Clock, clock: Clock, rate: float = 1) -> "ClockView":
+        """
+        Returns a view of a master that continues from the time of a clock.
+
+        Parameters
+        ----------
+        master (Clock):
+            The clock to follow
+        clock (Clock):
+            The clock the view replaces
+        rate (float):
+            The number of steps the view counts per step of the master
+
+        Returns
+        -------
+        ClockView:
+            The view, at the same time as clock
+        """
+        offset = clock.ticks - _scale(master.ticks, rate)
+        return master.view(clock.steps_per_cycle, offset, rate)
+
+    def _sync(self) -> None:
+        """
+        Reads the time of the master, called by the master when it steps.
+        """
+        ticks = self.offset + _scale(self.master.ticks, self.rate)
+        self._cycle, self._step = divmod(ticks, self.steps_per_cycle)
+        self._cycle += 1
+        self._time = None
+
+    def update(self) -> None:
+        """
+        The view follows the master clock, nothing to update.
+        """
+        pass
+
+    def advance(self, steps: int) -> None:
+        """
+        The view follows the master clock, nothing to advance.
+        """
+        pass
+
+    def reset(self) -> None:
+        """
+        Views are shared and cannot be reset, detach() the view first.
+        """
+        raise RuntimeError("A ClockView cannot be reset, detach() it first")
+
+    def clone(self) -> "ClockView":
+        """
+        Returns the view itself, views are shared.
+        """
+        return self
+
+    def rebind(self, master: Clock) -> "ClockView":
+        """
+        Returns the same view of another master, e.g. of a clone of the
+        master taken when a space was forked.
+        """
+        return master.view(self.steps_per_cycle, self.offset, self.rate)
+
+    def detach(self) -> Clock:
+        """
+        Returns an independent Clock at the time of the view.
+        """
+        clock = Clock(self.steps_per_cycle)
+        clock._cycle, clock._step = self._cycle, self._step
+        clock._start_time = self._start_time
+        return clock
+
+    def __reduce__(self) -> tuple:
+        return self.master.view, (self.steps_per_cycle, self.offset, self.rate)
+
+
+def _scale(ticks: int, rate: float) -> int:
+    return ticks if rate == 1 else int(ticks * rate)
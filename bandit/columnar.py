@@ -0,0 +1,687 @@
+"""
+Columnar storage for the numeric fields of homogeneous objects.
+
+A Space created with ``columnar=True`` moves the Column fields of every object
+into a ColumnBlock, one block per object class. Each block keeps its fields,
+and the cycle and step of every object's clock, in contiguous NumPy arrays.
+
+Objects stay regular Object instances. Reading or writing a Column attribute
+goes through the block, so existing per-object code keeps working while a
+class can also define an ``_update_batch`` classmethod that updates the whole
+population in one vectorized call.
+
+Objects updated through ``_update_batch`` skip the per-object update, so their
+own temporal buffer is not extended. Their history is the space-level history
+recorded by the TimeBandit.
+
+Synchronous Updates
+-------------------
+Between ``begin()`` and ``swap()`` a block is double-buffered. Reads return a
+read-only view of the front arrays, the state at the start of the tick, and
+writes go to back arrays. In-place operators on a whole column or on the
+vector field of one object (``block.position += block.velocity``) compute a
+new array and write it like an assignment. Changing part of a view in place
+(``block.position[:, 0] += 1``) is not possible while buffering. ``swap()`` makes the written back arrays the new
+front by swapping references, so every object sees its neighbours as they
+were at the start of the tick, no matter the update order.
+
+A column written row by row copies the front into its back array once, on the
+first write of the tick, so unwritten rows keep their value. A column assigned
+as a whole through the block (``block.position = ...``) is not copied at all.
+Columns that are not written keep their front array. Only Column fields are
+buffered, other attributes are still updated in place.
+
+Example
+-------
+    class Ball(Object):
+        position = Column(3)
+        velocity = Column(3)
+        mass = Column()
+
+        def __init__(self, position, velocity, mass):
+            super().__init__()
+            self.position = position
+            self.velocity = velocity
+            self.mass = mass
+
+        def _update(self):
+            self.position = self.position + self.velocity
+
+        @classmethod
+        def _update_batch(cls, block):
+            block.position += block.velocity
+
+    space = Space(columnar=True)
+    space.add_object(Ball([0, 0, 0], [1, 0, 0], 1))
+    space.update()
+"""
+
+import operator
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional
+
+import numpy as np
+
+from bandit import profile as _profile
+from bandit.clock import Clock
+from bandit.identity import Identity
+from bandit.object import Object
+
+if TYPE_CHECKING:
+    from bandit.rng import RandomStreams
+
+
+class Column:
+    """
+    Descriptor declaring a numeric field that can be stored in a ColumnBlock.
+
+    Outside of a columnar Space the value is stored on the instance as is.
+    Inside a columnar Space the value lives in the block's array for the
+    field, and reads return a view of the object's row.
+
+    Parameters
+    ----------
+    width (int):
+        The number of values in the field. A width of 1 is a scalar field,
+        anything larger is a vector field (e.g. 3 for a position).
+    dtype (np.dtype):
+        The dtype of the column array.
+    """
+
+    def __init__(self, width: int = 1, dtype: Any = np.float64) -> None:
+        self.width = width
+        self.dtype = np.dtype(dtype)
+        self.name = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj: "Object", objtype: type = None) -> Any:
+        if obj is None:
+            return self
+        block = obj.__dict__.get("_column_block")
+        if block is None:
+            try:
+                return obj.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name) from None
+        return block.get(self.name, obj._column_row)
+
+    def __set__(self, obj: "Object", value: Any) -> None:
+        block = obj.__dict__.get("_column_block")
+        if block is None:
+            obj.__dict__[self.name] = value
+        else:
+            block.set(self.name, obj._column_row, value)
+
+    def shape(self, capacity: int) -> tuple:
+        """
+        Returns the shape of a column array holding capacity rows.
+        """
+        return (capacity,) if self.width == 1 else (capacity, self.width)
+
+
+class _FrontView(np.ndarray):
+    """
+    A read-only view of a front array during a synchronous tick.
+
+    In-place operators return a new array instead of writing to the view, so
+    ``block.position += ...`` ends in an assignment that goes to the back
+    array. Every other operation returns a plain ndarray.
+    """
+
+    def __array_wrap__(
+        self, array: np.ndarray, context: Any = None, return_scalar: bool = False
+    ) -> Any:
+        if return_scalar:
+            return array[()]
+        return array.view(np.ndarray)
+
+
+def _out_of_place(function: Any) -> Any:
+    def method(self: _FrontView, other: Any) -> np.ndarray:
+        return function(self.view(np.ndarray), other)
+
+    return method
+
+
+_IN_PLACE = {
+    "__iadd__": operator.add,
+    "__isub__": operator.sub,
+    "__imul__": operator.mul,
+    "__itruediv__": operator.truediv,
+    "__ifloordiv__": operator.floordiv,
+    "__imod__": operator.mod,
+    "__ipow__": operator.pow,
+    "__imatmul__": operator.matmul,
+    "__iand__": operator.and_,
+    "__ior__": operator.or_,
+    "__ixor__": operator.xor,
+    "__ilshift__": operator.lshift,
+    "__irshift__": operator.rshift,
+}
+for _name, _function in _IN_PLACE.items():
+    setattr(_FrontView, _name, _out_of_place(_function))
+del _name, _function
+
+
+@lru_cache(maxsize=None)
+def columns_of(cls: type) -> dict[str, Column]:
+    """
+    Returns the Column fields declared on a class and its bases.
+
+    Parameters
+    ----------
+    cls (type):
+        The object class
+
+    Returns
+    -------
+    dict[str, Column]:
+        The Column descriptors by field name, in declaration order
+    """
+    fields = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if isinstance(value, Column):
+                fields[name] = value
+    return fields
+
+
+class ColumnClock(Clock):
+    """
+    A Clock whose cycle and step live in a ColumnBlock row.
+
+    Behaves like the object's original Clock, but stepping the block's clock
+    arrays steps every ColumnClock in the block at once.
+    """
+
+    def __init__(self, block: "ColumnBlock", row: int, start_time: float) -> None:
+        self._block = block
+        self._row = row
+        self._start_time = start_time
+
+    @property
+    def steps_per_cycle(self) -> int:
+        return int(self._block._steps_per_cycle[self._row])
+
+    @property
+    def _cycle(self) -> int:
+        return int(self._block._cycle[self._row])
+
+    @_cycle.setter
+    def _cycle(self, value: int) -> None:
+        self._block._cycle[self._row] = value
+
+    @property
+    def _step(self) -> int:
+        return int(self._block._step[self._row])
+
+    @_step.setter
+    def _step(self, value: int) -> None:
+        self._block._step[self._row] = value
+
+    @property
+    def time(self) -> str:
+        return f"{self._cycle}:{self._step}"
+
+
+class ColumnIdentity(Identity):
+    """
+    An Identity whose temporal ID is derived from a ColumnClock on access.
+
+    Batched updates step the clock arrays without touching the objects, so the
+    temporal ID is formatted on request instead of on every update. It has
+    the same form as the temporal ID of the identity it replaces.
+    """
+
+    def __init__(
+        self, root: Any, clock: ColumnClock, kind: type = Identity
+    ) -> None:
+        self.root = root
+        self.kind = kind
+        self._clock = clock
+
+    @property
+    def temporal(self) -> Any:
+        return self.kind.make_temporal(self.root, self._clock.cycle, self._clock.step)
+
+    def update(self, clock: "Clock") -> None:
+        """
+        The temporal ID always reflects the column clock, nothing to update.
+        """
+        pass
+
+
+def _same_view(value: np.ndarray, view: np.ndarray) -> bool:
+    """
+    Whether an array is the view of a column the block returned, the same
+    memory in the same layout.
+    """
+    return (
+        value.__array_interface__["data"][0] == view.__array_interface__["data"][0]
+        and value.shape == view.shape
+        and value.strides == view.strides
+        and value.dtype == view.dtype
+    )
+
+
+class ColumnBlock:
+    """
+    Contiguous column storage for every object of one class in a Space.
+
+    Column fields are available as attributes that return a view over the
+    populated rows, e.g. ``block.position`` is an ``(size, 3)`` array.
+    Assigning to one of those attributes writes the whole column.
+
+    Parameters
+    ----------
+    cls (type):
+        The object class stored in the block
+    capacity (int):
+        The initial number of rows to allocate
+
+    Attributes
+    ----------
+    objects (list[Object]):
+        The objects in the block, in row order
+    index (dict):
+        The row of every object by root ID
+    size (int):
+        The number of populated rows
+    batched (bool):
+        Whether the class defines an _update_batch hook
+
+    Methods
+    -------
+    add(obj: Object) -> None:
+        Moves the Column fields and clock of an object into the block
+    remove(obj: Object) -> None:
+        Moves an object's fields back onto the object and frees its row
+    get(name: str, row: int) -> Any:
+        Returns the value of a field for one row
+    set(name: str, row: int, value: Any) -> None:
+        Sets the value of a field for one row
+    step_clocks() -> None:
+        Steps the clock of every object in the block
+    update() -> None:
+        Runs the batch update hook and steps the clocks
+    begin() -> None:
+        Starts double-buffering writes for a synchronous tick
+    swap() -> None:
+        Makes the values written since begin() the current values
+
+    Properties
+    ----------
+    cycle
+        The cycle of every object in the block
+    step
+        The step of every object in the block
+    rng
+        The random streams of the space of the block, see bandit.rng
+    """
+
+    def __init__(self, cls: type, capacity: int = 1024) -> None:
+        self.cls = cls
+        self.fields = columns_of(cls)
+        self.objects: list["Object"] = []
+        self.index: dict = {}
+        self.size = 0
+        self.capacity = capacity
+        self.columns = {
+            name: np.zeros(column.shape(capacity), dtype=column.dtype)
+            for name, column in self.fields.items()
+        }
+        self._cycle = np.ones(capacity, dtype=np.int64)
+        self._step = np.zeros(capacity, dtype=np.int64)
+        self._steps_per_cycle = np.ones(capacity, dtype=np.int64)
+        self.batched = (
+            cls._update_batch.__func__ is not Object._update_batch.__func__
+        )
+        self.buffering = False
+        self._back: dict[str, np.ndarray] = {}
+        self._written: dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_columns(
+        cls, object_class: type, objects: list["Object"], columns: dict
+    ) -> "ColumnBlock":
+        """
+        Returns a block that uses existing arrays as its columns.
+
+        Used to restore checkpoints without copying the arrays. The objects
+        must not hold their Column fields and row i of every array belongs to
+        objects[i].
+
+        Parameters
+        ----------
+        object_class (type):
+            The object class stored in the block
+        objects (list[Object]):
+            The objects in row order
+        columns (dict[str, np.ndarray]):
+            One array per Column field, with one row per object
+
+        Returns
+        -------
+        ColumnBlock:
+            The block, full to capacity
+        """
+        block = cls(object_class, capacity=0)
+        block.columns.update(columns)
+        size = len(objects)
+        block._cycle = np.array([obj.clock.cycle for obj in objects], dtype=np.int64)
+        block._step = np.array([obj.clock.step for obj in objects], dtype=np.int64)
+        block._steps_per_cycle = np.array(
+            [obj.clock.steps_per_cycle for obj in objects], dtype=np.int64
+        )
+        block.capacity = size
+        for row, obj in enumerate(objects):
+            obj.__dict__["_column_block"] = block
+            obj._column_row = row
+            obj.clock = ColumnClock(block, row, obj.clock._start_time)
+            obj.id = ColumnIdentity(obj.id.root, obj.clock, type(obj.id))
+            block.index[obj.id.root] = row
+        block.objects = list(objects)
+        block.size = size
+        return block
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            view = columns[name][: self.size]
+            if self.buffering:
+                view.flags.writeable = False
+                return view.view(_FrontView)
+            return view
+        raise AttributeError(name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in self.__dict__.get("fields", ()):
+            if self.buffering:
+                self._back_buffer(name, partial=False)[: self.size] = value
+                return
+            view = self.columns[name][: self.size]
+            if isinstance(value, np.ndarray):
+                # In-place operators on a block view hand the view back
+                if _same_view(value, view):
+                    return
+                if np.may_share_memory(value, view):
+                    # e.g. a reordered view of the column
+                    value = value.copy()
+            view[...] = value
+        else:
+            super().__setattr__(name, value)
+
+    def _back_buffer(self, name: str, partial: bool = True) -> np.ndarray:
+        """
+        Returns the array that receives writes to a column during this tick.
+
+        For a partial write the front values are copied in first, so rows
+        that are not written keep their value after the swap.
+        """
+        back = self._written.get(name)
+        if back is None:
+            front = self.columns[name]
+            back = self._back.pop(name, None)
+            if back is None or back.shape != front.shape:
+                back = np.empty_like(front)
+            if partial:
+                np.copyto(back[: self.size], front[: self.size])
+            self._written[name] = back
+        return back
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self) -> None:
+        """
+        Doubles the capacity of every array in the block.
+        """
+        self.capacity = max(1, self.capacity * 2)
+
+        def grown(array: np.ndarray, fill: int = 0) -> np.ndarray:
+            new = np.full((self.capacity,) + array.shape[1:], fill, array.dtype)
+            new[: self.size] = array[: self.size]
+            return new
+
+        for name in self.columns:
+            self.columns[name] = grown(self.columns[name])
+        for name in self._written:
+            self._written[name] = grown(self._written[name])
+        self._back.clear()
+        self._cycle = grown(self._cycle, 1)
+        self._step = grown(self._step)
+        self._steps_per_cycle = grown(self._steps_per_cycle, 1)
+
+    def add(self, obj: "Object") -> None:
+        """
+        Moves the Column fields and clock of an object into the block.
+
+        Parameters
+        ----------
+        obj (Object):
+            The object to add, must be an instance of the block's class
+        """
+        if self.size == self.capacity:
+            self._grow()
+        row = self.size
+        for name in self.fields:
+            if name in obj.__dict__:
+                self.set(name, row, obj.__dict__.pop(name))
+        clock = obj.clock
+        self._cycle[row] = clock.cycle
+        self._step[row] = clock.step
+        self._steps_per_cycle[row] = clock.steps_per_cycle
+
+        obj.__dict__["_column_block"] = self
+        obj._column_row = row
+        obj.clock = ColumnClock(self, row, clock._start_time)
+        obj.id = ColumnIdentity(obj.id.root, obj.clock, type(obj.id))
+        self.objects.append(obj)
+        self.index[obj.id.root] = row
+        self.size += 1
+
+    def remove(self, obj: "Object") -> None:
+        """
+        Moves an object's fields back onto the object and frees its row.
+
+        The last row is moved into the freed row to keep the block contiguous.
+
+        Parameters
+        ----------
+        obj (Object):
+            The object to remove
+        """
+        if self.buffering:
+            raise RuntimeError("Objects cannot be removed during a synchronous tick")
+        row = self.index.pop(obj.id.root)
+        for name in self.fields:
+            obj.__dict__[name] = self.get(name, row, copy=True)
+        clock = obj.clock.clone()
+        identity = obj.id.kind.__new__(obj.id.kind)
+        identity.root = obj.id.root
+        identity.update(clock)
+        del obj.__dict__["_column_block"]
+        del obj._column_row
+        obj.clock = clock
+        obj.id = identity
+
+        last = self.size - 1
+        if row != last:
+            moved = self.objects[last]
+            for column in self.columns.values():
+                column[row] = column[last]
+            for array in (self._cycle, self._step, self._steps_per_cycle):
+                array[row] = array[last]
+            self.objects[row] = moved
+            moved._column_row = row
+            moved.clock._row = row
+            self.index[moved.id.root] = row
+        self.objects.pop()
+        self.size -= 1
+
+    def get(self, name: str, row: int, copy: bool = False) -> Any:
+        """
+        Returns the value of a field for one row.
+
+        Scalar fields return a Python number, vector fields return a view of
+        the row unless copy is True. The view is read-only while buffering.
+        """
+        value = self.columns[name][row]
+        if value.ndim == 0:
+            return value.item()
+        if copy:
+            return value.copy()
+        if self.buffering:
+            value.flags.writeable = False
+            return value.view(_FrontView)
+        return value
+
+    def set(self, name: str, row: int, value: Any) -> None:
+        """
+        Sets the value of a field for one row.
+
+        Iterables that are not arrays (e.g. fizicks Vectors) are unpacked.
+        """
+        if not isinstance(value, np.ndarray) and hasattr(value, "__iter__"):
+            value = tuple(value)
+        if self.buffering:
+            self._back_buffer(name)[row] = value
+        else:
+            self.columns[name][row] = value
+
+    def step_clocks(self) -> None:
+        """
+        Steps the clock of every object in the block.
+        """
+        step = self._step[: self.size]
+        step += 1
+        rolled = step >= self._steps_per_cycle[: self.size]
+        self._cycle[: self.size] += rolled
+        step[rolled] = 0
+
+    def update(self) -> None:
+        """
+        Runs the batch update hook and steps the clocks.
+        """
+        self.cls._update_batch(self)
+        self.step_clocks()
+
+    def begin(self) -> None:
+        """
+        Starts double-buffering writes for a synchronous tick.
+        """
+        self.buffering = True
+
+    def swap(self) -> None:
+        """
+        Makes the values written since begin() the current values.
+
+        The written back arrays become the front arrays and the old front
+        arrays are kept to receive the writes of the next tick.
+        """
+        for name, back in self._written.items():
+            self._back[name] = self.columns[name]
+            self.columns[name] = back
+        self._written.clear()
+        self.buffering = False
+
+    @property
+    def cycle(self) -> np.ndarray:
+        return self._cycle[: self.size]
+
+    @property
+    def step(self) -> np.ndarray:
+        return self._step[: self.size]
+
+    @property
+    def rng(self) -> Optional["RandomStreams"]:
+        owner = self.objects[0]._owner if self.objects else None
+        return getattr(owner, "rng", None)
+
+
+class ColumnStore:
+    """
+    The ColumnBlocks of a columnar Space, one per object class.
+
+    Methods
+    -------
+    add(obj: Object) -> bool:
+        Adds an object to the block of its class if it declares Column fields
+    remove(obj: Object) -> None:
+        Removes an object from its block
+    batched(obj: Object) -> bool:
+        Whether an object is updated by its block's batch hook
+    update() -> None:
+        Runs the batch update of every batched block
+    begin() -> None:
+        Starts double-buffering every block for a synchronous tick
+    swap() -> None:
+        Swaps the buffers of every block at the end of a synchronous tick
+    """
+
+    def __init__(self) -> None:
+        self.blocks: dict[type, ColumnBlock] = {}
+
+    def __getitem__(self, cls: type) -> ColumnBlock:
+        return self.blocks[cls]
+
+    def __contains__(self, cls: type) -> bool:
+        return cls in self.blocks
+
+    def add(self, obj: "Object") -> bool:
+        """
+        Adds an object to the block of its class if it declares Column fields.
+
+        Returns
+        -------
+        bool:
+            Whether the object was added to a block
+        """
+        cls = type(obj)
+        if not columns_of(cls):
+            return False
+        block = self.blocks.get(cls)
+        if block is None:
+            block = self.blocks[cls] = ColumnBlock(cls)
+        block.add(obj)
+        return True
+
+    def remove(self, obj: "Object") -> None:
+        """
+        Removes an object from its block, if it is in one.
+        """
+        block = obj.__dict__.get("_column_block")
+        if block is not None:
+            block.remove(obj)
+
+    def batched(self, obj: "Object") -> bool:
+        """
+        Whether an object is updated by its block's batch hook.
+        """
+        block = obj.__dict__.get("_column_block")
+        return block is not None and block.batched
+
+    def update(self) -> None:
+        """
+        Runs the batch update of every batched block.
+        """
+        for block in self.blocks.values():
+            if block.batched and block.size:
+                with _profile.phase("block.update", block.cls):
+                    block.update()
+
+    def begin(self) -> None:
+        """
+        Starts double-buffering every block for a synchronous tick.
+        """
+        for block in self.blocks.values():
+            block.begin()
+
+    def swap(self) -> None:
+        """
+        Swaps the buffers of every block at the end of a synchronous tick.
+        """
+        for block in self.blocks.values():
+            block.swap()
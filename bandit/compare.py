@@ -0,0 +1,382 @@
+"""
+Comparison of the timelines of a simulation and its branches.
+
+``compare(a, b)`` walks the histories of two simulations side by side and
+returns a Divergence: for every step both timelines hold, the objects whose
+states differ and the L2 distance between the numeric fields of their
+states. ``compare_branches(parent, branches)`` compares a simulation with
+every one of its branches.
+
+The walk never compares whole space states. Each stored delta already names
+the objects that changed in its step, so only those objects are compared
+again, and every other object keeps the result of the previous step:
+
+- entries a branch still shares with its parent are reconstructed once,
+  and the steps before the divergence cost nothing more
+- keyframes with equal content digests are equal as a whole, see
+  ``DeltaHistory.digest()``
+- distances are computed for all the changed objects of a step at once,
+  one array per state layout, see bandit.state
+
+Example
+-------
+    branch = bandit.branch()
+    branch.space[root].speed = 2
+    bandit.run(100)
+    branch.run(100)
+
+    divergence = compare(bandit, branch)        # or branch.compare()
+    divergence.first                            # the first step that differs
+    divergence.distance                         # [T] distance of the space
+    divergence.changed[-1]                      # the objects that differ now
+"""
+
+import math
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Union
+
+import numpy as np
+
+from bandit.history import _MISSING, Delta, DeltaHistory, _equal, patch
+from bandit.state import _vector, schema_of
+
+if TYPE_CHECKING:
+    from bandit.main import TimeBandit
+
+Timeline = Union["TimeBandit", DeltaHistory]
+
+_SCALARS = {int, float, str, bool, bytes, type(None)}
+
+
+class Divergence:
+    """
+    The differences between two timelines, step by step.
+
+    Attributes
+    ----------
+    times (list):
+        The temporal IDs of the steps held by both timelines, oldest first
+    changed (list[frozenset]):
+        The root IDs of the objects whose states differ at every step,
+        objects in only one of the timelines included
+    distances (list[dict]):
+        The L2 distance between the numeric fields of the states of every
+        differing object that is in both timelines, at every step
+    distance (np.ndarray):
+        The L2 distance between the numeric fields of the whole space at
+        every step
+
+    Methods
+    -------
+    first_difference(root: Any = None) -> Any:
+        Returns the temporal ID of the first step where an object differs
+
+    Properties
+    ----------
+    first
+        The temporal ID of the first step where the timelines differ
+    objects
+        The root IDs of every object that differs at some step
+    """
+
+    def __init__(
+        self, times: list, changed: list[frozenset], distances: list[dict]
+    ) -> None:
+        self.times = times
+        self.changed = changed
+        self.distances = distances
+        totals: dict[int, float] = {}
+        self.distance = np.array(
+            [
+                totals[id(step)]
+                if id(step) in totals
+                else totals.setdefault(id(step), _norm(step.values()))
+                for step in distances
+            ],
+            dtype=np.float64,
+        )
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __repr__(self) -> str:
+        return f"Divergence({len(self)} steps, first={self.first!r})"
+
+    @property
+    def first(self) -> Any:
+        """
+        The temporal ID of the first step where the timelines differ, None if
+        they never do.
+        """
+        return self.first_difference()
+
+    @property
+    def objects(self) -> set:
+        """
+        The root IDs of every object that differs at some step.
+        """
+        objects = set()
+        seen = set()
+        for changed in self.changed:
+            if id(changed) not in seen:
+                seen.add(id(changed))
+                objects |= changed
+        return objects
+
+    def first_difference(self, root: Any = None) -> Any:
+        """
+        Returns the temporal ID of the first step where an object differs.
+
+        Parameters
+        ----------
+        root (Any, optional):
+            The root ID of the object, any object by default
+
+        Returns
+        -------
+        Any:
+            The temporal ID, None if the object never differs
+        """
+        for time, changed in zip(self.times, self.changed):
+            if (root in changed) if root is not None else changed:
+                return time
+        return None
+
+
+def _norm(values: Iterable[float]) -> float:
+    return math.sqrt(math.fsum(value * value for value in values))
+
+
+def _history(timeline: Timeline) -> DeltaHistory:
+    history = getattr(timeline, "time", timeline)
+    if not isinstance(history, DeltaHistory):
+        raise TypeError(f"Cannot compare {type(timeline).__name__}")
+    return history
+
+
+def _objects(state: Optional[Mapping]) -> Mapping:
+    if state is None:
+        return {}
+    return state.get("object_states", {})
+
+
+class _Cursor:
+    """
+    Walks the stored states of a history from oldest to newest, collecting
+    the roots of the objects that changed since the last comparison. None
+    stands for every object.
+    """
+
+    def __init__(self, history: DeltaHistory) -> None:
+        self.history = history
+        self.entries = iter(history.buffer)
+        self.entry: Optional[tuple] = None
+        self.state: Optional[Mapping] = None
+        self.previous: Optional[Mapping] = None
+        self.step: Optional[set] = None
+        self.touched: Optional[set] = None
+
+    def advance(self, other: Optional["_Cursor"] = None) -> bool:
+        """
+        Moves to the next stored state. A state the other cursor just
+        reconstructed from the same entry is shared instead of rebuilt.
+        """
+        entry = next(self.entries, None)
+        if entry is None:
+            return False
+        previous = self.state
+        _, is_keyframe, payload = entry
+        if other is not None and other.entry is entry and other.previous is previous:
+            state, step = other.state, other.step
+        elif is_keyframe:
+            state, step = payload, _replaced(previous, payload)
+        elif not payload:
+            state, step = previous, set()
+        else:
+            state, step = patch(previous, payload), _changed(payload)
+        self.entry, self.previous, self.state, self.step = entry, previous, state, step
+        if self.touched is not None:
+            if step is None:
+                self.touched = None
+            else:
+                self.touched |= step
+        return True
+
+    @property
+    def time(self) -> Any:
+        return self.entry[0]
+
+    def digest(self) -> Optional[bytes]:
+        """
+        Returns the stored digest of the current state, if it is known.
+        """
+        return self.history._history_digests.get(self.time)
+
+
+def _changed(delta: Delta) -> Optional[set]:
+    """
+    Returns the roots of the objects a delta changes.
+    """
+    objects = delta.get("object_states")
+    if objects is None:
+        return set()
+    return set(objects) if isinstance(objects, Delta) else None
+
+
+def _replaced(previous: Optional[Mapping], keyframe: Mapping) -> Optional[set]:
+    """
+    Returns the roots of the objects whose state in a keyframe is not the
+    state they had before it.
+    """
+    if previous is None:
+        return None
+    before, after = _objects(previous), _objects(keyframe)
+    roots = {root for root, state in after.items() if before.get(root) is not state}
+    roots.update(root for root in before if root not in after)
+    return roots
+
+
+def _same(a: Any, b: Any) -> bool:
+    """
+    Whether two object states are equal, field by field.
+    """
+    if a is b:
+        return True
+    kind = type(a)
+    if kind is not type(b):
+        return False
+    if kind in _SCALARS:
+        return a == b
+    if isinstance(a, Mapping):
+        if len(a) != len(b):
+            return False
+        for key, value in a.items():
+            other = b.get(key, _MISSING)
+            if value is not other and not _same(value, other):
+                return False
+        return True
+    return _equal(a, b)
+
+
+def _distances(pairs: list[tuple[Any, Mapping, Mapping]]) -> dict[Any, float]:
+    """
+    Returns the L2 distance between the numeric fields of pairs of states,
+    one array per state layout.
+    """
+    groups: dict[tuple, list] = {}
+    for pair in pairs:
+        state = pair[1]
+        groups.setdefault((type(state), tuple(state)), []).append(pair)
+
+    result = {}
+    for group in groups.values():
+        roots = [root for root, _, _ in group]
+        try:
+            schema = schema_of(group[0][1])
+            a = schema.array([state for _, state, _ in group])
+            b = schema.array([state for _, _, state in group])
+            values = np.sqrt(np.square(a - b, dtype=np.float64).sum(axis=1))
+            result.update(zip(roots, values.tolist()))
+        except (KeyError, IndexError, TypeError, ValueError):
+            for root, a, b in group:
+                a, b = _vector(a)[1], _vector(b)[1]
+                if a.shape == b.shape:
+                    result[root] = float(np.sqrt(np.square(a - b, dtype=np.float64).sum()))
+                else:
+                    result[root] = math.nan
+    return result
+
+
+def compare(a: Timeline, b: Timeline) -> Divergence:
+    """
+    Compares the histories of two simulations, step by step.
+
+    Steps are matched by temporal ID, steps held by only one of the
+    timelines are skipped.
+
+    Parameters
+    ----------
+    a (TimeBandit | DeltaHistory):
+        The first simulation, e.g. the parent of a branch, or its history
+    b (TimeBandit | DeltaHistory):
+        The second simulation or history
+
+    Returns
+    -------
+    Divergence:
+        The differing objects and distances at every common step
+    """
+    first, second = _Cursor(_history(a)), _Cursor(_history(b))
+    common = second.history.id_index
+
+    times: list = []
+    changed: list[frozenset] = []
+    distances: list[dict] = []
+    differ: Optional[set] = None
+    distance: dict[Any, float] = {}
+    current_changed, current_distances = frozenset(), {}
+
+    while first.advance():
+        if first.time not in common:
+            continue
+        while second.advance(first):
+            if second.time == first.time:
+                break
+        else:
+            break
+
+        before, after = _objects(first.state), _objects(second.state)
+        if first.state is second.state or (
+            first.digest() is not None and first.digest() == second.digest()
+        ):
+            recheck = ()
+            if differ or differ is None:
+                differ, distance = set(), {}
+                current_changed, current_distances = frozenset(), {}
+        elif differ is None or first.touched is None or second.touched is None:
+            differ, distance = set(), {}
+            recheck = before.keys() | after.keys()
+        else:
+            recheck = first.touched | second.touched
+
+        if recheck:
+            pairs = []
+            for root in recheck:
+                old, new = before.get(root), after.get(root)
+                distance.pop(root, None)
+                if _same(old, new):
+                    differ.discard(root)
+                else:
+                    differ.add(root)
+                    if old is not None and new is not None:
+                        pairs.append((root, old, new))
+            distance.update(_distances(pairs))
+            current_changed, current_distances = frozenset(differ), dict(distance)
+
+        times.append(first.time)
+        changed.append(current_changed)
+        distances.append(current_distances)
+        first.touched, second.touched = set(), set()
+
+    return Divergence(times, changed, distances)
+
+
+def compare_branches(
+    parent: Timeline, branches: Iterable[Timeline]
+) -> list[Divergence]:
+    """
+    Compares a simulation with each of its branches.
+
+    Parameters
+    ----------
+    parent (TimeBandit | DeltaHistory):
+        The simulation the branches diverged from
+    branches (Iterable[TimeBandit | DeltaHistory]):
+        The branches
+
+    Returns
+    -------
+    list[Divergence]:
+        One Divergence per branch, in order
+    """
+    return [compare(parent, branch) for branch in branches]
@@ -0,0 +1,298 @@
+"""
+Content addressing of states.
+
+``encode()`` turns a state into a canonical byte string: mappings and sets
+are sorted, arrays and tensors are reduced to their dtype, shape and raw
+data, and the result is written with marshal, which is fast and never
+refers back to an equal value it already wrote. Two states that compare
+equal and hold the same types encode to the same bytes, whatever the order
+they were built in. ``digest()`` hashes that encoding with BLAKE2b into 16
+bytes, so states can be compared, deduplicated or used as keys by their
+digest alone.
+
+A StateStore interns states by digest: the first state with some content is
+kept and every equal state after it is replaced by that one object. A
+DeltaHistory with a store interns its keyframes, so an object that sits in
+the same state for a long time stores one state and a pointer per keyframe.
+See bandit.history.
+
+Example
+-------
+    digest({"a": 1, "b": [1.0, 2.0]}) == digest({"b": [1.0, 2.0], "a": 1})
+
+    store = StateStore()
+    digest, state = store.intern(state)
+"""
+
+import hashlib
+import marshal
+import pickle
+from collections.abc import Mapping
+from typing import Any, Optional
+
+import numpy as np
+
+DIGEST_SIZE = 16
+
+# No references between equal values, unlike later marshal versions
+_MARSHAL_VERSION = 2
+
+_SCALARS = {int, float, str, bytes, bool, type(None)}
+_SEQUENCES = {list, tuple}
+_FLAT = _SCALARS | _SEQUENCES
+
+# Starts the canonical form of sets, arrays and objects
+_TAG = Ellipsis
+
+
+def _sorted(items: list) -> list:
+    try:
+        items.sort()
+    except TypeError:
+        # Keys or set items of mixed types, ordered by their encoding
+        items.sort(key=lambda item: _dumps(item))
+    return items
+
+
+def _canonical(value: Any, path: set) -> Any:
+    """
+    Returns a form of a value that marshal encodes the same for every equal
+    value: scalars, lists, tuples and dicts with their keys sorted. Sets,
+    arrays and objects become tuples starting with a tag.
+
+    The IDs of the containers being encoded are kept in path, a container
+    inside itself can not be encoded.
+    """
+    cls = type(value)
+    if cls in _SCALARS:
+        return value
+    key = id(value)
+    if key in path:
+        raise ValueError(f"Cannot encode a {cls.__name__} that contains itself")
+    path.add(key)
+    result = _canonical_container(value, cls, path)
+    path.discard(key)
+    return result
+
+
+def _canonical_container(value: Any, cls: type, path: set) -> Any:
+    if cls is dict or isinstance(value, Mapping):
+        items = _sorted(
+            [
+                (
+                    key if type(key) in _SCALARS else _canonical(key, path),
+                    item if type(item) in _SCALARS else _canonical(item, path),
+                )
+                for key, item in value.items()
+            ]
+        )
+        try:
+            return dict(items)
+        except TypeError:
+            # Keys whose canonical form is not hashable
+            return (_TAG, "mapping", tuple(items))
+    if cls is list or cls is tuple:
+        return cls(
+            item if type(item) in _SCALARS else _canonical(item, path) for item in value
+        )
+    if cls is set or cls is frozenset:
+        return (_TAG, "set", tuple(_sorted([_canonical(item, path) for item in value])))
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            items = [_canonical(item, path) for item in value.ravel().tolist()]
+            return (_TAG, "array", value.dtype.str, value.shape, tuple(items))
+        return (_TAG, "array", value.dtype.str, value.shape, value.tobytes())
+    if isinstance(value, np.generic):
+        return _canonical(value.item(), path)
+    for base in (bool, int, float, str, bytes):
+        if isinstance(value, base):
+            # Subclasses of scalars, e.g. enums
+            return (_TAG, _qualified_name(cls), base(value))
+    if _is_tensor(value):
+        return _canonical(value.detach().cpu().numpy(), path)
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(item, path) for item in value)
+    if hasattr(value, "__dict__"):
+        return (_TAG, _qualified_name(cls), _canonical(vars(value), path))
+    return (_TAG, _qualified_name(cls), pickle.dumps(value, protocol=5))
+
+
+def _flat(value: dict) -> Optional[dict]:
+    """
+    Returns a dict with its keys sorted if it only holds scalar keys, and
+    scalars or sequences of scalars, so that it is canonical as it is, or
+    None otherwise.
+    """
+    if not set(map(type, value)) <= _SCALARS:
+        return None
+    result = {}
+    for key in sorted(value):
+        item = value[key]
+        cls = type(item)
+        if cls not in _SCALARS and (
+            cls not in _SEQUENCES or not set(map(type, item)) <= _SCALARS
+        ):
+            return None
+        result[key] = item
+    return result
+
+
+def _qualified_name(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _is_tensor(value: Any) -> bool:
+    return type(value).__module__.startswith("torch") and hasattr(value, "detach")
+
+
+def _dumps(value: Any) -> bytes:
+    return marshal.dumps(value, _MARSHAL_VERSION)
+
+
+def encode(value: Any) -> bytes:
+    """
+    Returns the canonical encoding of a state.
+
+    Mappings and sets are encoded sorted, so equal mappings encode the same
+    whatever their insertion order. Arrays and tensors are encoded by dtype,
+    shape and raw data. Other objects are encoded by their class and
+    attributes, or pickled as they are if they have no attributes.
+
+    Parameters
+    ----------
+    value (Any):
+        The state or value to encode
+
+    Returns
+    -------
+    bytes:
+        The encoding
+
+    Raises
+    ------
+    ValueError:
+        If the state contains itself
+    """
+    cls = type(value)
+    if cls in _SCALARS:
+        return _dumps(value)
+    if cls is dict:
+        # Most object states, the same encoding as _canonical() in a single
+        # pass over the keys
+        try:
+            flat = _flat(value)
+        except TypeError:
+            # Keys of mixed types
+            flat = None
+        if flat is not None:
+            return _dumps(flat)
+    return _dumps(_canonical(value, set()))
+
+
+def digest(value: Any) -> bytes:
+    """
+    Returns the BLAKE2b digest of the canonical encoding of a state.
+
+    Parameters
+    ----------
+    value (Any):
+        The state or value to hash
+
+    Returns
+    -------
+    bytes:
+        The 16 byte digest
+    """
+    return hashlib.blake2b(encode(value), digest_size=DIGEST_SIZE).digest()
+
+
+class StateStore:
+    """
+    Interns states by the digest of their content.
+
+    The store keeps one state per digest, with a count of the references to
+    it. Histories release their references when they drop a state, and a
+    state is forgotten once nothing references it.
+
+    Attributes
+    ----------
+    hits (int):
+        The number of interned states that were already in the store
+    misses (int):
+        The number of interned states that were new
+
+    Methods
+    -------
+    intern(state: Any) -> tuple[bytes, Any]:
+        Returns the digest of a state and the stored state with that content
+    retain(digest: bytes) -> None:
+        Adds a reference to a stored state
+    release(digest: bytes) -> None:
+        Drops a reference to a stored state
+    get(digest: bytes) -> Any:
+        Returns the stored state with a digest
+    """
+
+    def __init__(self) -> None:
+        self._states: dict[bytes, list] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return digest in self._states
+
+    def intern(self, state: Any) -> tuple[bytes, Any]:
+        """
+        Returns the digest of a state and the stored state with that content.
+
+        The state is stored if no equal state is, and a reference to the
+        stored state is added either way.
+
+        Parameters
+        ----------
+        state (Any):
+            The state, treated as immutable from now on
+
+        Returns
+        -------
+        tuple[bytes, Any]:
+            The digest and the stored state
+        """
+        key = digest(state)
+        entry = self._states.get(key)
+        if entry is None:
+            self._states[key] = [state, 1]
+            self.misses += 1
+            return key, state
+        entry[1] += 1
+        self.hits += 1
+        return key, entry[0]
+
+    def retain(self, digest: bytes) -> None:
+        """
+        Adds a reference to a stored state, e.g. for a copied history.
+        """
+        entry = self._states.get(digest)
+        if entry is not None:
+            entry[1] += 1
+
+    def release(self, digest: bytes) -> None:
+        """
+        Drops a reference to a stored state, forgetting it after the last.
+        """
+        entry = self._states.get(digest)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._states[digest]
+
+    def get(self, digest: bytes) -> Any:
+        """
+        Returns the stored state with a digest.
+
+        Raises KeyError if no state with the digest is stored.
+        """
+        return self._states[digest][0]
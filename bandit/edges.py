@@ -0,0 +1,737 @@
+"""
+Compact edge storage for the connections and interactions of a Space.
+
+By default every object keeps its edges in two Anarchy dicts, with one edge
+object per edge holding a reference to the other object and a type string.
+A Space created with ``edges=EdgeStore()`` keeps all of its edges in NumPy
+arrays instead:
+
+- objects get a dense integer node ID when they are added to the space
+- edge types are interned, so an edge is a (source, target, label) triple
+  of integers
+- the edges of each kind are sorted by source and target, so they double as
+  a CSR adjacency: the targets of node i are ``targets[indptr[i]:indptr[i + 1]]``
+
+``Object.connections`` and ``Object.interactions`` become EdgeViews. They
+are read and written like the Anarchy they replace, over the edges of the
+object in the store. Queries over the whole graph are vectorized:
+
+    space = Space(edges=EdgeStore())
+    ...
+    sources, targets, labels = space.edges.edges("connections")
+    indptr, targets, labels = space.edges.csr("connections")
+    space.edges.degree("interactions", incoming=True)
+    owners, targets, labels = space.edges.gather("connections", ids)
+
+New edges are kept in a small pending table, and removed edges are only
+marked as removed. The sorted arrays are rebuilt when the pending changes
+outgrow a fraction of the edges, or when a vectorized query needs them.
+Removing an object from the space removes its edges in both directions and
+gives the object back Anarchy edges.
+
+A fork shares the arrays of its parent and copies them on its first change.
+Like Anarchy edges, an object sees its own edges as they were when its space
+last edited it.
+"""
+
+import copy
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Iterator, NamedTuple, Optional
+
+import numpy as np
+from anarchy import Anarchy
+
+if TYPE_CHECKING:
+    from bandit.object import Object
+
+KINDS = ("connections", "interactions")
+
+# Pending changes of one kind that trigger a rebuild of its sorted arrays,
+# at least, or a quarter of its edges
+_REBUILD = 1 << 16
+
+
+class Edge(NamedTuple):
+    """
+    An edge read from an EdgeView, with the fields of an Anarchy edge.
+    """
+
+    node_id: Any
+    node: Optional["Object"]
+    edge_type: str
+
+
+class _Edges:
+    """
+    The edges of one kind, as arrays sorted by source and target with the
+    CSR offsets of every source, plus the edges added since the last rebuild.
+
+    Removed edges keep their place with a label of -1 until the next
+    rebuild. Only the labels and the pending edges change in place, so
+    clones share the other arrays.
+    """
+
+    def __init__(self) -> None:
+        self.source = np.empty(0, dtype=np.int64)
+        self.target = np.empty(0, dtype=np.int64)
+        self.label = np.empty(0, dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.offsets = [0]
+        self.pending: dict[int, dict[int, int]] = {}
+        self.changes = 0
+        self.stale = False
+        self.shared = False
+
+    def clone(self) -> "_Edges":
+        clone = copy.copy(self)
+        clone.shared = self.shared = True
+        return clone
+
+    def own(self) -> None:
+        """
+        Copies the arrays changed in place if they are shared with a clone.
+        """
+        if self.shared:
+            self.label = self.label.copy()
+            self.pending = {source: dict(row) for source, row in self.pending.items()}
+            self.shared = False
+
+    @property
+    def dirty(self) -> bool:
+        return self.changes > 0 or self.stale
+
+    def position(self, source: int, target: int) -> int:
+        """
+        Returns the index of an edge in the sorted arrays, or -1.
+        """
+        offsets = self.offsets
+        if source + 1 >= len(offsets):
+            return -1
+        low, high = offsets[source], offsets[source + 1]
+        if low == high:
+            return -1
+        index = low + int(np.searchsorted(self.target[low:high], target))
+        if index < high and self.target[index] == target:
+            return index
+        return -1
+
+    def find(self, source: int, target: int) -> int:
+        """
+        Returns the label of an edge, or -1.
+        """
+        row = self.pending.get(source)
+        if row is not None and target in row:
+            return row[target]
+        index = self.position(source, target)
+        return int(self.label[index]) if index >= 0 else -1
+
+    def add(self, source: int, target: int, label: int) -> None:
+        self.own()
+        self.pending.setdefault(source, {})[target] = label
+        self.changes += 1
+
+    def remove(self, source: int, target: int) -> bool:
+        row = self.pending.get(source)
+        if row is not None and target in row:
+            self.own()
+            row = self.pending[source]
+            del row[target]
+            if not row:
+                del self.pending[source]
+            self.changes -= 1
+            return True
+        index = self.position(source, target)
+        if index < 0 or self.label[index] < 0:
+            return False
+        self.own()
+        self.label[index] = -1
+        self.changes += 1
+        return True
+
+    def row(self, source: int, alive: list[bool]) -> list[tuple[int, int]]:
+        """
+        Returns the targets and labels of the live edges of a source.
+        """
+        result = []
+        offsets = self.offsets
+        if source + 1 < len(offsets):
+            low, high = offsets[source], offsets[source + 1]
+            if low < high:
+                result = list(
+                    zip(self.target[low:high].tolist(), self.label[low:high].tolist())
+                )
+                if self.changes:
+                    result = [edge for edge in result if edge[1] >= 0]
+        row = self.pending.get(source)
+        if row:
+            result.extend(row.items())
+        if self.stale:
+            result = [edge for edge in result if alive[edge[0]]]
+        return result
+
+    def rebuild(self, alive: np.ndarray) -> None:
+        """
+        Merges the pending edges, drops the removed ones and the edges of
+        dead nodes, and sorts the arrays by source and target.
+        """
+        keep = self.label >= 0
+        if self.stale:
+            keep &= alive[self.source] & alive[self.target]
+        sources, targets, labels = self.source[keep], self.target[keep], self.label[keep]
+
+        if self.pending:
+            count = sum(len(row) for row in self.pending.values())
+            added_sources = np.fromiter(
+                (source for source, row in self.pending.items() for _ in row),
+                dtype=np.int64,
+                count=count,
+            )
+            added_targets = np.fromiter(
+                (target for row in self.pending.values() for target in row),
+                dtype=np.int64,
+                count=count,
+            )
+            added_labels = np.fromiter(
+                (label for row in self.pending.values() for label in row.values()),
+                dtype=np.int32,
+                count=count,
+            )
+            live = alive[added_sources] & alive[added_targets]
+            sources = np.concatenate([sources, added_sources[live]])
+            targets = np.concatenate([targets, added_targets[live]])
+            labels = np.concatenate([labels, added_labels[live]])
+
+        order = np.lexsort((targets, sources))
+        self.source = sources[order]
+        self.target = targets[order]
+        self.label = labels[order]
+        self.indptr = np.zeros(len(alive) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.source, minlength=len(alive)), out=self.indptr[1:])
+        self.offsets = self.indptr.tolist()
+        self.pending = {}
+        self.changes = 0
+        self.stale = False
+        self.shared = False
+
+    def extend(self, size: int) -> None:
+        """
+        Pads the CSR offsets to a number of nodes added since the rebuild.
+        """
+        missing = size + 1 - len(self.indptr)
+        if missing > 0:
+            self.indptr = np.concatenate(
+                [self.indptr, np.full(missing, self.indptr[-1], dtype=np.int64)]
+            )
+            self.offsets = self.offsets + [self.offsets[-1]] * missing
+
+
+class EdgeStore:
+    """
+    The connections and interactions of a Space in NumPy arrays, with
+    integer node IDs and interned edge types.
+
+    Attributes
+    ----------
+    roots (list):
+        The root ID of every node ID, removed nodes included
+    labels (list[str]):
+        The edge type of every label
+
+    Methods
+    -------
+    bind(object: Object) -> None:
+        Registers an object and replaces its edges with views of the store
+    unbind(object: Object) -> None:
+        Gives an object back Anarchy edges with its current edges
+    add_node(object: Object) -> int:
+        Registers an object, returns its node ID
+    remove_node(root: Any) -> None:
+        Removes a node and its edges in both directions
+    index(root: Any) -> int:
+        Returns the node ID of a root ID
+    label(edge_type: str) -> int:
+        Returns the label of an edge type, interning it
+    add(kind: str, source: Any, target: Any, edge_type: str, node: Object = None) -> bool:
+        Adds an edge between two root IDs unless it exists
+    remove(kind: str, source: Any, target: Any) -> bool:
+        Removes an edge between two root IDs
+    get(kind: str, source: Any, target: Any) -> Optional[str]:
+        Returns the type of an edge, or None
+    edges(kind: str, edge_type: str = None) -> tuple[np.ndarray, ...]:
+        Returns the sources, targets and labels of every edge
+    csr(kind: str) -> tuple[np.ndarray, ...]:
+        Returns the CSR offsets, targets and labels of every edge
+    degree(kind: str, incoming: bool = False) -> np.ndarray:
+        Returns the number of edges of every node ID
+    gather(kind: str, ids: np.ndarray) -> tuple[np.ndarray, ...]:
+        Returns the edges of many nodes at once
+    between(kind: str, rows: dict, edge_types: Iterable[str] = None) -> dict:
+        Returns the edges between the keys of rows as row numbers
+    count(kind: str) -> int:
+        Returns the number of edges of a kind
+    clone() -> EdgeStore:
+        Returns a copy-on-write copy of the store, for forks
+
+    Properties
+    ----------
+    size
+        The number of node IDs, the length of the degree arrays
+    """
+
+    def __init__(self) -> None:
+        self.roots: list = []
+        self.labels: list[str] = []
+        self._ids: dict[Any, int] = {}
+        self._labels: dict[str, int] = {}
+        self._nodes: list = []
+        self._alive: list[bool] = []
+        self._kinds = {kind: _Edges() for kind in KINDS}
+        self._shared = False
+
+    def clone(self) -> "EdgeStore":
+        """
+        Returns a copy of the store that shares the arrays of this one until
+        either of them changes.
+        """
+        clone = copy.copy(self)
+        clone._kinds = {kind: edges.clone() for kind, edges in self._kinds.items()}
+        clone._shared = self._shared = True
+        return clone
+
+    def _own(self) -> None:
+        """
+        Copies the node and label tables if they are shared with a clone.
+        """
+        if self._shared:
+            self.roots = list(self.roots)
+            self.labels = list(self.labels)
+            self._ids = dict(self._ids)
+            self._labels = dict(self._labels)
+            self._nodes = list(self._nodes)
+            self._alive = list(self._alive)
+            self._shared = False
+
+    @property
+    def size(self) -> int:
+        """
+        The number of node IDs given out, the length of the degree arrays.
+        """
+        return len(self.roots)
+
+    def count(self, kind: str) -> int:
+        """
+        Returns the number of edges of a kind.
+        """
+        return len(self._rebuilt(kind).source)
+
+    def index(self, root: Any) -> int:
+        """
+        Returns the node ID of a root ID.
+
+        Raises
+        ------
+        KeyError:
+            If the root is not a node of the store
+        """
+        return self._ids[root]
+
+    def label(self, edge_type: str) -> int:
+        """
+        Returns the label of an edge type, interning it on first use.
+        """
+        label = self._labels.get(edge_type)
+        if label is None:
+            self._own()
+            label = self._labels[edge_type] = len(self.labels)
+            self.labels.append(edge_type)
+        return label
+
+    def _node(self, root: Any, node: Optional["Object"] = None) -> int:
+        """
+        Returns the node ID of a root ID, giving out a new one if needed.
+        """
+        id = self._ids.get(root)
+        if id is None:
+            self._own()
+            id = self._ids[root] = len(self.roots)
+            self.roots.append(root)
+            self._nodes.append(node)
+            self._alive.append(True)
+        elif node is not None and self._nodes[id] is not node:
+            self._own()
+            self._nodes[id] = node
+        return id
+
+    def add_node(self, object: "Object") -> int:
+        """
+        Registers an object as a node, or updates the object of its node.
+
+        Returns
+        -------
+        int:
+            The node ID
+        """
+        return self._node(object.id.root, object)
+
+    def remove_node(self, root: Any) -> None:
+        """
+        Removes a node. Its edges in both directions are dropped on the next
+        rebuild, they are hidden until then.
+        """
+        id = self._ids.get(root)
+        if id is None:
+            return
+        self._own()
+        del self._ids[root]
+        self._nodes[id] = None
+        self._alive[id] = False
+        for edges in self._kinds.values():
+            edges.stale = True
+
+    def bind(self, object: "Object") -> None:
+        """
+        Registers an object and replaces its connections and interactions
+        with views of the store. Edges already in an Anarchy are moved to the
+        store, views of another store, like the store of the parent of a
+        fork, are replaced as is.
+        """
+        root = object.id.root
+        self.add_node(object)
+        for kind in KINDS:
+            edges = object.__dict__.get(kind)
+            if isinstance(edges, EdgeView) and edges.store is self:
+                continue
+            if isinstance(edges, Anarchy):
+                for target, edge in edges.items():
+                    if edge.node is not None:
+                        self.add(kind, root, target, edge.edge_type, edge.node)
+            object.__dict__[kind] = EdgeView(self, kind, root)
+
+    def unbind(self, object: "Object") -> None:
+        """
+        Gives an object back Anarchy edges holding its current edges.
+        """
+        for kind in KINDS:
+            edges = object.__dict__.get(kind)
+            anarchy = Anarchy(anarchy_name=kind)
+            if isinstance(edges, EdgeView):
+                for target, edge in edges.items():
+                    anarchy.add(target, edge.node, edge.edge_type)
+            object.__dict__[kind] = anarchy
+
+    def _rebuild(self, kind: str) -> None:
+        self._kinds[kind].rebuild(np.array(self._alive, dtype=bool))
+
+    def _rebuilt(self, kind: str) -> _Edges:
+        """
+        Returns the edges of a kind with their sorted arrays up to date.
+        """
+        edges = self._kinds[kind]
+        if edges.dirty:
+            self._rebuild(kind)
+        edges.extend(self.size)
+        return edges
+
+    def add(
+        self,
+        kind: str,
+        source: Any,
+        target: Any,
+        edge_type: str,
+        node: Optional["Object"] = None,
+    ) -> bool:
+        """
+        Adds an edge between two root IDs. An existing edge keeps its type.
+
+        Parameters
+        ----------
+        kind (str):
+            "connections" or "interactions"
+        source (Any):
+            The root ID of the object the edge belongs to
+        target (Any):
+            The root ID of the other object
+        edge_type (str):
+            The type of the edge
+        node (Object, optional):
+            The other object, returned as the node of the edge
+
+        Returns
+        -------
+        bool:
+            Whether the edge was added
+        """
+        edges = self._kinds[kind]
+        source, target = self._node(source), self._node(target, node)
+        if edges.find(source, target) >= 0:
+            return False
+        edges.add(source, target, self.label(edge_type))
+        if edges.changes > max(_REBUILD, len(edges.source) // 4):
+            self._rebuild(kind)
+        return True
+
+    def remove(self, kind: str, source: Any, target: Any) -> bool:
+        """
+        Removes an edge between two root IDs.
+
+        Returns
+        -------
+        bool:
+            Whether there was an edge to remove
+        """
+        ids = self._ids
+        if source not in ids or target not in ids:
+            return False
+        edges = self._kinds[kind]
+        removed = edges.remove(ids[source], ids[target])
+        if edges.changes > max(_REBUILD, len(edges.source) // 4):
+            self._rebuild(kind)
+        return removed
+
+    def get(self, kind: str, source: Any, target: Any) -> Optional[str]:
+        """
+        Returns the type of the edge between two root IDs, or None.
+        """
+        ids = self._ids
+        if source not in ids or target not in ids:
+            return None
+        label = self._kinds[kind].find(ids[source], ids[target])
+        return self.labels[label] if label >= 0 else None
+
+    def _row(self, kind: str, root: Any) -> list[tuple[int, int]]:
+        """
+        Returns the target node IDs and labels of the live edges of a root.
+        """
+        id = self._ids.get(root)
+        if id is None:
+            return []
+        return self._kinds[kind].row(id, self._alive)
+
+    def edges(
+        self, kind: str, edge_type: Optional[str] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns every edge of a kind, sorted by source and target node IDs.
+
+        The arrays are read-only and valid until the store changes.
+
+        Parameters
+        ----------
+        kind (str):
+            "connections" or "interactions"
+        edge_type (str, optional):
+            Only return the edges of this type
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, np.ndarray]:
+            The source node IDs, target node IDs and labels
+        """
+        edges = self._rebuilt(kind)
+        arrays = edges.source, edges.target, edges.label
+        if edge_type is not None:
+            mask = edges.label == self._labels.get(edge_type, -1)
+            arrays = tuple(array[mask] for array in arrays)
+        return _readonly(*arrays)
+
+    def csr(self, kind: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the edges of a kind as a CSR adjacency.
+
+        The targets and labels of node i are ``targets[indptr[i]:indptr[i + 1]]``
+        and ``labels[indptr[i]:indptr[i + 1]]``. The arrays are read-only and
+        valid until the store changes.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, np.ndarray]:
+            The offsets, of length size + 1, target node IDs and labels
+        """
+        edges = self._rebuilt(kind)
+        return _readonly(edges.indptr, edges.target, edges.label)
+
+    def degree(self, kind: str, incoming: bool = False) -> np.ndarray:
+        """
+        Returns the number of outgoing or incoming edges of every node ID.
+        """
+        edges = self._rebuilt(kind)
+        if incoming:
+            return np.bincount(edges.target, minlength=self.size)
+        return np.diff(edges.indptr)
+
+    def gather(
+        self, kind: str, ids: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the outgoing edges of many nodes at once.
+
+        Parameters
+        ----------
+        kind (str):
+            "connections" or "interactions"
+        ids (np.ndarray):
+            The node IDs, see index()
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, np.ndarray]:
+            For every edge, the position in ids of its source, its target
+            node ID and its label
+        """
+        edges = self._rebuilt(kind)
+        ids = np.asarray(ids, dtype=np.int64)
+        starts = edges.indptr[ids]
+        lengths = edges.indptr[ids + 1] - starts
+        owners = np.repeat(np.arange(len(ids)), lengths)
+        offsets = np.arange(len(owners)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = np.repeat(starts, lengths) + offsets
+        return owners, edges.target[positions], edges.label[positions]
+
+    def between(
+        self, kind: str, rows: dict, edge_types: Optional[Any] = None
+    ) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns the edges whose ends are both keys of rows, per edge type.
+
+        Parameters
+        ----------
+        kind (str):
+            "connections" or "interactions"
+        rows (dict):
+            A row number for every root ID of interest
+        edge_types (Iterable[str], optional):
+            The edge types to return, all by default
+
+        Returns
+        -------
+        dict[str, tuple[np.ndarray, np.ndarray]]:
+            The source and target rows of the edges of every edge type
+        """
+        sources, targets, labels = self.edges(kind)
+        lookup = np.full(self.size, -1, dtype=np.int64)
+        ids = self._ids
+        for root, row in rows.items():
+            id = ids.get(root)
+            if id is not None:
+                lookup[id] = row
+        sources, targets = lookup[sources], lookup[targets]
+        keep = (sources >= 0) & (targets >= 0)
+        result = {}
+        for edge_type in self.labels if edge_types is None else edge_types:
+            label = self._labels.get(edge_type)
+            if label is None:
+                continue
+            mask = keep & (labels == label)
+            if mask.any():
+                result[edge_type] = (sources[mask], targets[mask])
+        return result
+
+
+def _readonly(*arrays: np.ndarray) -> tuple[np.ndarray, ...]:
+    """
+    Returns read-only views of arrays.
+    """
+    views = []
+    for array in arrays:
+        view = array.view()
+        view.flags.writeable = False
+        views.append(view)
+    return tuple(views)
+
+
+class EdgeView(Mapping):
+    """
+    The connections or interactions of one object in an EdgeStore.
+
+    Read and written like an Anarchy: keys are the root IDs of the other
+    objects and values are Edges with the other object and the edge type.
+
+    Methods
+    -------
+    add(node_id: Any, node: Object, edge_type: str = "directed") -> None:
+        Adds an edge to another object unless it exists
+    remove(node_id: Any) -> None:
+        Removes the edge to another object
+    get(node_id: Any) -> Optional[Edge]:
+        Returns the edge to another object, or None
+    edges() -> dict:
+        Returns the edges by root ID
+    """
+
+    __slots__ = ("store", "name", "root")
+
+    def __init__(self, store: EdgeStore, name: str, root: Any) -> None:
+        self.store = store
+        self.name = name
+        self.root = root
+
+    def __getitem__(self, node_id: Any) -> Edge:
+        edge_type = self.store.get(self.name, self.root, node_id)
+        if edge_type is None:
+            raise KeyError(node_id)
+        store = self.store
+        return Edge(node_id, store._nodes[store._ids[node_id]], edge_type)
+
+    def __contains__(self, node_id: Any) -> bool:
+        return self.store.get(self.name, self.root, node_id) is not None
+
+    def __iter__(self) -> Iterator:
+        roots = self.store.roots
+        return iter([roots[target] for target, _ in self.store._row(self.name, self.root)])
+
+    def __len__(self) -> int:
+        return len(self.store._row(self.name, self.root))
+
+    def __repr__(self) -> str:
+        return f"EdgeView({self.name}, {self.root}, {len(self)} edges)"
+
+    def values(self) -> list[Edge]:
+        store = self.store
+        roots, nodes, labels = store.roots, store._nodes, store.labels
+        new = tuple.__new__
+        return [
+            new(Edge, (roots[target], nodes[target], labels[label]))
+            for target, label in store._row(self.name, self.root)
+        ]
+
+    def items(self) -> list[tuple[Any, Edge]]:
+        return [(edge.node_id, edge) for edge in self.values()]
+
+    def get(self, node_id: Any, default: Any = None) -> Optional[Edge]:
+        try:
+            return self[node_id]
+        except KeyError:
+            return default
+
+    def add(
+        self,
+        node_id: Any,
+        node: Optional["Object"] = None,
+        edge_type: str = "directed",
+        reciprocal: bool = False,
+        **kwargs,
+    ) -> None:
+        """
+        Adds an edge to another object, unless there is one already.
+
+        Reciprocal edges are not supported, add the other edge to the other
+        object instead.
+        """
+        if reciprocal:
+            raise ValueError("EdgeStore edges cannot be reciprocal")
+        self.store.add(self.name, self.root, node_id, edge_type, node)
+
+    def remove(self, node_id: Any) -> None:
+        """
+        Removes the edge to another object, if there is one.
+        """
+        self.store.remove(self.name, self.root, node_id)
+
+    def edges(self) -> dict[Any, Edge]:
+        """
+        Returns the edges of the object by root ID.
+        """
+        return dict(self.items())
+
+    def __call__(self) -> dict[Any, Edge]:
+        return self.edges()
@@ -1,14 +1,494 @@
-
 """
-A persistent, conditional, or temporal effect that influences an object during 
+A persistent, conditional, or temporal effect that influences an object during
 it's update step.
 
-An effect is the result of an interaction in the simulation, like a 
+An effect is the result of an interaction in the simulation, like a
 force being applied to a ball in space, or a change in temperature in a room.
 
-The interaction of force on the object incurs an effect on the object that 
+The interaction of force on the object incurs an effect on the object that
 continues based on the rules of the effect.
 
 A ball in space would continue forever in the direction opposite the force
 applied to it, given no other influences or interactions.
-"""
\ No newline at end of file
+
+Effect Engine
+-------------
+A Space created with ``effects=EffectEngine()`` applies its effects at the
+start of every ``update()``, before the physics step and the object updates.
+An effect targets one object and is active from its start tick until its stop
+tick, stop excluded. An effect without a stop is persistent. An effect with a
+condition is only applied on the ticks the condition holds for its target.
+
+The engine counts its own ticks, one per ``Space.update()``, which are the
+ticks of the clock of a shared-clock space. Effects waiting to start sit in a
+heap ordered by start tick and active effects with a stop tick sit in a heap
+ordered by stop tick, so each tick only pops the effects that start or stop
+on it. Effects that are not active yet or have expired cost nothing.
+
+Active effects are grouped by class and every group is applied with one call
+to the class's ``apply_batch()``. The default calls ``apply()`` once per
+effect, Push and Decay also apply to the Column fields of a columnar space in
+one vectorized operation per block.
+
+Example
+-------
+    space = Space(effects=EffectEngine(), physics=Physics())
+    space.add_effect(Push(ball, (0, -0.1, 0)))              # forever
+    space.add_effect(Decay(room, "temperature", 0.05, duration=10))
+    space.add_effect(
+        Push(ball, (1, 0, 0), start=5, condition=Below("velocity", 2.0))
+    )
+
+Effects are pickled with checkpoints, so conditions must be picklable, e.g.
+module level functions or instances like Below rather than lambdas.
+"""
+
+import heapq
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+import numpy as np
+
+from bandit import profile as _profile
+
+if TYPE_CHECKING:
+    from bandit.columnar import ColumnBlock
+    from bandit.object import Object
+    from bandit.space import Space
+
+Condition = Callable[["Object"], bool]
+
+
+class Effect:
+    """
+    An effect on one object, active between two ticks.
+
+    Subclasses implement apply(), and can override apply_batch() to apply
+    every active effect of the class at once.
+
+    Parameters
+    ----------
+    target (Object | Any):
+        The object the effect applies to, or its root ID
+    start (int, optional):
+        The first tick the effect applies on, the next tick by default
+    stop (int, optional):
+        The tick the effect stops on, not applied. Never by default
+    duration (int, optional):
+        The number of ticks the effect lasts, instead of stop
+    condition (Callable[[Object], bool], optional):
+        Only apply the effect on the ticks this returns True for the target
+
+    Attributes
+    ----------
+    target (Any):
+        The root ID of the target object
+    sequence (int):
+        The registration order of the effect in its engine, None before
+
+    Methods
+    -------
+    apply(target: Object) -> None:
+        Applies the effect to its target for one tick
+    apply_batch(space: Space, effects: list[Effect]) -> None:
+        Applies active effects of the class for one tick
+    """
+
+    def __init__(
+        self,
+        target: Any,
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+        duration: Optional[int] = None,
+        condition: Optional[Condition] = None,
+    ) -> None:
+        if stop is not None and duration is not None:
+            raise ValueError("Give either stop or duration, not both")
+        self.target = target.id.root if hasattr(target, "id") else target
+        self.start = start
+        self.stop = stop
+        self.duration = duration
+        self.condition = condition
+        self.sequence: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(target={self.target}, "
+            f"start={self.start}, stop={self.stop})"
+        )
+
+    def apply(self, target: "Object") -> None:
+        """
+        Applies the effect to its target for one tick.
+
+        Parameters
+        ----------
+        target (Object):
+            The target, writable by the space
+        """
+        raise NotImplementedError("Subclass must implement apply method")
+
+    @classmethod
+    def apply_batch(cls, space: "Space", effects: list["Effect"]) -> None:
+        """
+        Applies active effects of the class for one tick.
+
+        Called once per tick with every active effect of the class whose
+        condition holds. Override to apply them in one vectorized call.
+
+        Parameters
+        ----------
+        space (Space):
+            The space the effects apply in
+        effects (list[Effect]):
+            The effects to apply, in registration order
+        """
+        for effect in effects:
+            target = space.edit(space[effect.target])
+            target.touch()
+            effect.apply(target)
+
+
+def _by_block(
+    space: "Space", effects: list[Effect], attribute: str
+) -> tuple[dict[int, tuple["ColumnBlock", list, list]], list]:
+    """
+    Splits effects between the ones on a Column field of their target and
+    the others.
+
+    Returns
+    -------
+    tuple[dict, list]:
+        The block, rows and effects of every block by id, and the remaining
+        (target, effect) pairs
+    """
+    blocks: dict[int, tuple["ColumnBlock", list, list]] = {}
+    plain = []
+    for effect in effects:
+        target = space[effect.target]
+        block = target.__dict__.get("_column_block")
+        if block is not None and attribute in block.fields:
+            group = blocks.get(id(block))
+            if group is None:
+                group = blocks[id(block)] = (block, [], [])
+            group[1].append(target._column_row)
+            group[2].append(effect)
+        else:
+            target = space.edit(target)
+            target.touch()
+            plain.append((target, effect))
+    return blocks, plain
+
+
+class Push(Effect):
+    """
+    Queues a force in the debt of the target on every tick, see
+    bandit.physics.
+
+    Parameters
+    ----------
+    target (Object | Any):
+        The object to push, or its root ID
+    force (Iterable[float]):
+        The force queued on every tick
+    attribute (str):
+        The attribute holding the queued forces, a list or a Column
+    **kwargs:
+        start, stop, duration and condition, see Effect
+    """
+
+    def __init__(
+        self,
+        target: Any,
+        force: Iterable[float],
+        attribute: str = "debt",
+        **kwargs,
+    ) -> None:
+        super().__init__(target, **kwargs)
+        self.force = tuple(force)
+        self.attribute = attribute
+
+    def apply(self, target: "Object") -> None:
+        getattr(target, self.attribute).append(self.force)
+
+    @classmethod
+    def apply_batch(cls, space: "Space", effects: list["Push"]) -> None:
+        for attribute in dict.fromkeys(effect.attribute for effect in effects):
+            same = [effect for effect in effects if effect.attribute == attribute]
+            blocks, plain = _by_block(space, same, attribute)
+            for block, rows, group in blocks.values():
+                forces = np.array([effect.force for effect in group])
+                column = block.columns[attribute]
+                np.add.at(column, rows, forces.reshape((len(rows),) + column.shape[1:]))
+            for target, effect in plain:
+                effect.apply(target)
+
+
+class Decay(Effect):
+    """
+    Multiplies a numeric attribute of the target by 1 - rate on every tick.
+
+    Parameters
+    ----------
+    target (Object | Any):
+        The object to change, or its root ID
+    attribute (str):
+        The attribute that decays
+    rate (float):
+        The fraction lost on every tick
+    **kwargs:
+        start, stop, duration and condition, see Effect
+    """
+
+    def __init__(self, target: Any, attribute: str, rate: float, **kwargs) -> None:
+        super().__init__(target, **kwargs)
+        self.attribute = attribute
+        self.rate = rate
+
+    def apply(self, target: "Object") -> None:
+        setattr(
+            target, self.attribute, getattr(target, self.attribute) * (1 - self.rate)
+        )
+
+    @classmethod
+    def apply_batch(cls, space: "Space", effects: list["Decay"]) -> None:
+        for attribute in dict.fromkeys(effect.attribute for effect in effects):
+            same = [effect for effect in effects if effect.attribute == attribute]
+            blocks, plain = _by_block(space, same, attribute)
+            for block, rows, group in blocks.values():
+                factors = np.array([1 - effect.rate for effect in group])
+                column = block.columns[attribute]
+                factors = factors.reshape((len(rows),) + (1,) * (column.ndim - 1))
+                np.multiply.at(column, rows, factors)
+            for target, effect in plain:
+                effect.apply(target)
+
+
+class Below:
+    """
+    A picklable condition, true while an attribute of the target is below a
+    limit. Vector attributes are compared by their length.
+
+    Parameters
+    ----------
+    attribute (str):
+        The attribute to compare
+    limit (float):
+        The limit, excluded
+    """
+
+    def __init__(self, attribute: str, limit: float) -> None:
+        self.attribute = attribute
+        self.limit = limit
+
+    def __call__(self, target: "Object") -> bool:
+        value = getattr(target, self.attribute)
+        if not np.isscalar(value):
+            value = np.linalg.norm(np.asarray(tuple(value), dtype=np.float64))
+        return value < self.limit
+
+
+class EffectEngine:
+    """
+    Schedules the effects of a Space by tick and applies the active ones in
+    one batch per effect class.
+
+    Attributes
+    ----------
+    tick (int):
+        The number of ticks applied, the tick of the last apply()
+
+    Methods
+    -------
+    add(effect: Effect) -> Effect:
+        Registers an effect
+    remove(effect: Effect) -> None:
+        Unregisters an effect, whether it started or not
+    active(kind: type = None) -> list[Effect]:
+        Returns the active effects, of one class or all
+    apply(space: Space) -> None:
+        Starts, stops and applies the effects of the next tick
+    clone() -> EffectEngine:
+        Returns an independent copy of the engine, for forks
+    """
+
+    def __init__(self) -> None:
+        self.tick = 0
+        self._sequence = 0
+        self._waiting: list[tuple[int, int, Effect]] = []
+        self._expiring: list[tuple[int, int, Effect]] = []
+        self._groups: dict[type, dict[int, Effect]] = {}
+        self._conditional: dict[type, dict[int, Effect]] = {}
+        self._removed: set[int] = set()
+        self._topology: Optional[int] = None
+
+    def __len__(self) -> int:
+        """
+        The number of effects that are active or waiting to start.
+        """
+        active = sum(
+            len(group)
+            for groups in (self._groups, self._conditional)
+            for group in groups.values()
+        )
+        return active + len(self._waiting) - len(self._removed)
+
+    def clone(self) -> "EffectEngine":
+        """
+        Returns a copy of the engine whose effects can be added and removed
+        independently. The effects themselves are shared.
+        """
+        clone = EffectEngine.__new__(EffectEngine)
+        clone.__dict__.update(self.__dict__)
+        clone._waiting = list(self._waiting)
+        clone._expiring = list(self._expiring)
+        clone._groups = {kind: dict(group) for kind, group in self._groups.items()}
+        clone._conditional = {
+            kind: dict(group) for kind, group in self._conditional.items()
+        }
+        clone._removed = set(self._removed)
+        return clone
+
+    def add(self, effect: Effect) -> Effect:
+        """
+        Registers an effect.
+
+        An effect without a start starts on the next tick. An effect whose
+        start has passed starts on the next tick too, and keeps its stop.
+
+        Parameters
+        ----------
+        effect (Effect):
+            The effect, registered in one engine only
+
+        Returns
+        -------
+        Effect:
+            The effect
+        """
+        if effect.start is None:
+            effect.start = self.tick + 1
+        if effect.duration is not None:
+            effect.stop = effect.start + effect.duration
+        effect.sequence = self._sequence
+        self._sequence += 1
+        heapq.heappush(self._waiting, (effect.start, effect.sequence, effect))
+        return effect
+
+    def remove(self, effect: Effect) -> None:
+        """
+        Unregisters an effect, whether it started or not.
+
+        An effect that did not start yet is dropped when its start comes.
+        """
+        for groups in (self._groups, self._conditional):
+            group = groups.get(type(effect))
+            if group is not None and group.pop(effect.sequence, None) is not None:
+                return
+        if any(entry[1] == effect.sequence for entry in self._waiting):
+            self._removed.add(effect.sequence)
+
+    def active(self, kind: Optional[type] = None) -> list[Effect]:
+        """
+        Returns the active effects, of one class or all.
+
+        Parameters
+        ----------
+        kind (type, optional):
+            The effect class, subclasses are separate classes
+
+        Returns
+        -------
+        list[Effect]:
+            The effects in registration order
+        """
+        effects = []
+        for groups in (self._groups, self._conditional):
+            for cls, group in groups.items():
+                if kind is None or cls is kind:
+                    effects.extend(group.values())
+        return sorted(effects, key=lambda effect: effect.sequence)
+
+    def _start(self, tick: int, space: "Space") -> None:
+        """
+        Activates the effects that start on or before a tick. Effects whose
+        target left the space while they waited are dropped.
+        """
+        waiting = self._waiting
+        while waiting and waiting[0][0] <= tick:
+            _, sequence, effect = heapq.heappop(waiting)
+            if sequence in self._removed:
+                self._removed.discard(sequence)
+                continue
+            if effect.target not in space:
+                continue
+            if effect.stop is not None:
+                if effect.stop <= tick:
+                    continue
+                heapq.heappush(self._expiring, (effect.stop, sequence, effect))
+            groups = self._groups if effect.condition is None else self._conditional
+            groups.setdefault(type(effect), {})[sequence] = effect
+
+    def _stop(self, tick: int) -> None:
+        """
+        Deactivates the effects that stop on or before a tick.
+        """
+        expiring = self._expiring
+        while expiring and expiring[0][0] <= tick:
+            _, sequence, effect = heapq.heappop(expiring)
+            groups = self._groups if effect.condition is None else self._conditional
+            group = groups.get(type(effect))
+            if group is not None:
+                group.pop(sequence, None)
+                if not group:
+                    del groups[type(effect)]
+
+    def _forget(self, space: "Space") -> None:
+        """
+        Drops the active effects whose target left the space.
+        """
+        for groups in (self._groups, self._conditional):
+            for kind in list(groups):
+                group = groups[kind]
+                for sequence in [
+                    sequence
+                    for sequence, effect in group.items()
+                    if effect.target not in space
+                ]:
+                    del group[sequence]
+                if not group:
+                    del groups[kind]
+
+    def apply(self, space: "Space") -> None:
+        """
+        Starts, stops and applies the effects of the next tick.
+
+        Called by Space.update() at the start of every tick. Every effect
+        class with active effects gets one apply_batch() call. Effects on
+        objects that left the space are dropped.
+
+        Parameters
+        ----------
+        space (Space):
+            The space the effects apply in
+        """
+        self.tick += 1
+        tick = self.tick
+        self._start(tick, space)
+        self._stop(tick)
+        if space._topology != self._topology:
+            self._forget(space)
+            self._topology = space._topology
+
+        for kind in dict.fromkeys([*self._groups, *self._conditional]):
+            effects = list(self._groups.get(kind, {}).values())
+            conditional = self._conditional.get(kind)
+            if conditional:
+                effects.extend(
+                    effect
+                    for effect in conditional.values()
+                    if effect.condition(space[effect.target])
+                )
+                effects.sort(key=lambda effect: effect.sequence)
+            if effects:
+                with _profile.phase("effect.apply", kind):
+                    kind.apply_batch(space, effects)
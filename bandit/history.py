@@ -0,0 +1,486 @@
+"""
+Delta-encoded temporal history.
+
+A DeltaHistory is a drop-in TemporalObject that stores a full keyframe every
+``keyframe_interval`` states and only the changed keys of every state in
+between. Any state in the buffer is reconstructed on demand by patching the
+nearest earlier keyframe forward.
+
+Nested mappings are diffed recursively, so a space state where a handful of
+objects changed stores only those objects, and only their changed fields.
+
+Reconstructed states share every unchanged value with the stored states.
+States pushed into the history are treated as immutable.
+
+With a StateStore, keyframes are interned by the digest of their content, so
+equal keyframes, within one history or across histories sharing the store,
+are stored once. ``digest()`` returns the content digest of any stored
+state, to compare states across steps or branches without comparing them
+value by value. See bandit.content.
+"""
+
+import copy
+import uuid
+from collections import deque
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
+from temporal import TemporalObject
+
+from bandit.content import digest as content_digest
+
+if TYPE_CHECKING:
+    from bandit.content import StateStore
+
+
+class _Removed:
+    """
+    Marks a key that was removed from a mapping between two states.
+    """
+
+    def __repr__(self) -> str:
+        return "REMOVED"
+
+    def __reduce__(self) -> str:
+        return "REMOVED"
+
+
+REMOVED = _Removed()
+_MISSING = object()
+
+
+class Delta(dict):
+    """
+    The changed keys of a mapping between two states.
+
+    Values are the new value of the key, REMOVED for a removed key, or a nested
+    Delta for a mapping value that changed.
+    """
+
+
+# Shared by every step that did not change the state
+_UNCHANGED = Delta()
+
+
+def _equal(a: Any, b: Any) -> bool:
+    """
+    Whether two state values are equal, including array-like values.
+    """
+    if type(a) is not type(b):
+        return False
+    try:
+        result = a == b
+        return bool(result.all()) if hasattr(result, "all") else bool(result)
+    except Exception:
+        return False
+
+
+def diff(old: Mapping, new: Mapping) -> Delta:
+    """
+    Returns the changes needed to turn one state into another.
+
+    Parameters
+    ----------
+    old (Mapping):
+        The previous state
+    new (Mapping):
+        The next state
+
+    Returns
+    -------
+    Delta:
+        The changed keys, empty if the states are equal
+    """
+    delta = Delta()
+    follows = getattr(new, "follows", None)
+    if follows is not None and follows(old):
+        # A view that knows its changes relative to old, e.g. a StateView
+        for key in new.changed:
+            value = new.get(key, _MISSING)
+            if value is _MISSING:
+                if key in old:
+                    delta[key] = REMOVED
+            else:
+                _diff_value(delta, key, old.get(key, _MISSING), value)
+        return delta
+
+    added = 0
+    for key, value in new.items():
+        previous = old.get(key, _MISSING)
+        if previous is value:
+            continue
+        if previous is _MISSING:
+            added += 1
+        _diff_value(delta, key, previous, value)
+
+    if len(old) > len(new) - added:
+        for key in old:
+            if key not in new:
+                delta[key] = REMOVED
+    return delta
+
+
+def _diff_value(delta: Delta, key: Any, previous: Any, value: Any) -> None:
+    """
+    Adds the change of one key to a Delta.
+    """
+    if previous is value:
+        return
+    if previous is _MISSING:
+        delta[key] = value
+    elif isinstance(value, Mapping) and isinstance(previous, Mapping):
+        nested = diff(previous, value)
+        if nested:
+            delta[key] = nested
+    elif not _equal(previous, value):
+        delta[key] = value
+
+
+def patch(state: Mapping, delta: Delta) -> dict:
+    """
+    Returns a new state with a Delta applied.
+
+    Only the mappings along changed keys are copied, every other value is
+    shared with the original state.
+
+    Parameters
+    ----------
+    state (Mapping):
+        The state to patch, left unchanged
+    delta (Delta):
+        The changes to apply
+
+    Returns
+    -------
+    dict:
+        The patched state
+    """
+    if isinstance(state, dict) and type(state) is not dict:
+        result = copy.copy(state)
+    else:
+        result = dict(state)
+    for key, value in delta.items():
+        if value is REMOVED:
+            result.pop(key, None)
+        elif isinstance(value, Delta):
+            result[key] = patch(state.get(key, {}), value)
+        else:
+            result[key] = value
+    return result
+
+
+class DeltaHistory(TemporalObject):
+    """
+    A TemporalObject that stores keyframes and per-step diffs.
+
+    Every ``keyframe_interval`` states a full keyframe is stored, the states
+    in between are stored as a Delta from the previous state. The buffer
+    always starts with a keyframe. When the oldest keyframe is evicted, the
+    next state is rebased into a keyframe.
+
+    Parameters
+    ----------
+    temporal_depth (int):
+        The maximum number of states to store
+    keyframe_interval (int):
+        The number of states between two keyframes. Higher values use less
+        memory but make random access to older states slower.
+    store (StateStore, optional):
+        Interns the keyframes by content, see bandit.content
+
+    Attributes
+    ----------
+    buffer (deque):
+        The stored entries as (temporal_id, is_keyframe, state or Delta)
+    id_index (dict):
+        The absolute position of every state by temporal ID
+
+    Methods
+    -------
+    update(object_state: dict, temporal_id: str) -> str:
+        Adds a state to the history
+    get(key: str, relative_index: int = 0) -> Any:
+        Returns a value from the state at the given relative index
+    keyframes() -> int:
+        Returns the number of stored keyframes
+    digest(index: int | str) -> bytes:
+        Returns the content digest of a stored state
+    truncate(temporal_id: str = None):
+        Drops the states stored after a temporal ID
+    fork() -> DeltaHistory:
+        Returns a history that shares every stored state with this one
+
+    Properties
+    ----------
+    current
+        The most recent state
+    """
+
+    def __init__(
+        self,
+        temporal_depth: int = 100,
+        keyframe_interval: int = 10,
+        store: Optional["StateStore"] = None,
+    ) -> None:
+        super().__init__(temporal_depth)
+        self.buffer = deque()
+        self.id_index = {}
+        self.temporal_depth = temporal_depth
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._history_start = 0
+        self._history_latest = None
+        self._history_since_keyframe = 0
+        self._history_store = store
+        self._history_digests: dict[Any, bytes] = {}
+
+    def update(self, object_state: dict, temporal_id: str = None) -> str:
+        """
+        Adds a state to the history.
+
+        Parameters
+        ----------
+        object_state (dict):
+            The state to add to the history
+        temporal_id (str, optional):
+            The temporal ID of the state. A random ID is used if not provided.
+
+        Returns
+        -------
+        str:
+            The temporal ID of the state
+        """
+        if temporal_id is None:
+            temporal_id = str(uuid.uuid4())
+
+        if (
+            not self.buffer
+            or self._history_since_keyframe + 1 >= self.keyframe_interval
+        ):
+            if self._history_store is not None:
+                object_state = self._intern(temporal_id, object_state)
+            self.buffer.append((temporal_id, True, object_state))
+            self._history_since_keyframe = 0
+        else:
+            delta = diff(self._history_latest, object_state) or _UNCHANGED
+            self.buffer.append((temporal_id, False, delta))
+            self._history_digests.pop(temporal_id, None)
+            self._history_since_keyframe += 1
+
+        self.id_index[temporal_id] = self._history_start + len(self.buffer) - 1
+        self._history_latest = object_state
+
+        if len(self.buffer) > self.temporal_depth:
+            self._evict()
+
+        return temporal_id
+
+    def _intern(self, temporal_id: Any, state: dict) -> dict:
+        """
+        Returns the stored keyframe equal to a state, recording its digest.
+        """
+        key, state = self._history_store.intern(state)
+        self._history_digests[temporal_id] = key
+        return state
+
+    def _evict(self) -> None:
+        """
+        Drops the oldest state, rebasing the next state into a keyframe.
+        """
+        temporal_id, is_keyframe, state = self.buffer.popleft()
+        if self.id_index.get(temporal_id) == self._history_start:
+            del self.id_index[temporal_id]
+        self._history_start += 1
+        key = self._history_digests.pop(temporal_id, None)
+        if is_keyframe and key is not None and self._history_store is not None:
+            self._history_store.release(key)
+
+        if self.buffer and not self.buffer[0][1]:
+            next_id, _, delta = self.buffer[0]
+            state = patch(state, delta)
+            if self._history_store is not None:
+                self._history_digests.pop(next_id, None)
+                state = self._intern(next_id, state)
+            self.buffer[0] = (next_id, True, state)
+
+    def _reconstruct(self, position: int) -> dict:
+        """
+        Returns the state at an absolute position in the history.
+        """
+        index = position - self._history_start
+        if index == len(self.buffer) - 1:
+            return self._history_latest
+
+        keyframe = index
+        while not self.buffer[keyframe][1]:
+            keyframe -= 1
+        state = self.buffer[keyframe][2]
+        for i in range(keyframe + 1, index + 1):
+            state = patch(state, self.buffer[i][2])
+        return state
+
+    def _get_by_temporal_id(self, temporal_id: str) -> dict:
+        """
+        Returns the state with the given temporal ID, or None.
+        """
+        position = self.id_index.get(temporal_id)
+        if position is None:
+            return None
+        return self._reconstruct(position)
+
+    def __getitem__(self, index: int | slice | str | tuple) -> dict:
+        """
+        Returns the state at the given index.
+
+        An integer is a relative index where 0 is the current state, a string
+        or tuple is a temporal ID, and a slice is a range of relative indices.
+        """
+        if isinstance(index, int):
+            index = abs(index)
+            if index >= len(self.buffer):
+                raise IndexError("Index out of range")
+            return self._reconstruct(self._history_start + len(self.buffer) - 1 - index)
+        elif isinstance(index, slice):
+            start, stop, step = index.indices(len(self.buffer))
+            return [self[i] for i in range(start, stop, step)]
+        elif isinstance(index, (str, tuple)):
+            return self._get_by_temporal_id(index)
+        else:
+            raise TypeError("Invalid argument type")
+
+    def __setitem__(self, key: str, value: dict) -> None:
+        raise TypeError("DeltaHistory is append-only, use update()")
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("DeltaHistory is append-only")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.id_index
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Iterates over the stored states from oldest to newest.
+        """
+        state = None
+        for _, is_keyframe, payload in self.buffer:
+            state = payload if is_keyframe else patch(state, payload)
+            yield state
+
+    def _copy_history(self, other: "DeltaHistory") -> None:
+        """
+        Makes this history a copy of another that shares its stored entries.
+
+        Entries are immutable, so only the containers are copied.
+        """
+        self.buffer = deque(other.buffer)
+        self.id_index = dict(other.id_index)
+        self.temporal_depth = other.temporal_depth
+        self.keyframe_interval = other.keyframe_interval
+        self._history_start = other._history_start
+        self._history_latest = other._history_latest
+        self._history_since_keyframe = other._history_since_keyframe
+        self._history_store = other._history_store
+        self._history_digests = dict(other._history_digests)
+        if self._history_store is not None:
+            for temporal_id, is_keyframe, _ in self.buffer:
+                key = self._history_digests.get(temporal_id)
+                if is_keyframe and key is not None:
+                    self._history_store.retain(key)
+
+    def truncate(self, temporal_id: Any = None) -> None:
+        """
+        Drops the states stored after a temporal ID, e.g. when a simulation
+        is rewound to it. Every state is dropped without a temporal ID.
+
+        Parameters
+        ----------
+        temporal_id (Any, optional):
+            The temporal ID of the state to keep as the most recent one
+
+        Raises
+        ------
+        KeyError:
+            If the temporal ID is not in the history
+        """
+        if temporal_id is not None and temporal_id not in self.id_index:
+            raise KeyError(temporal_id)
+        buffer = self.buffer
+        while buffer and buffer[-1][0] != temporal_id:
+            entry_id, is_keyframe, _ = buffer.pop()
+            if self.id_index.get(entry_id) == self._history_start + len(buffer):
+                del self.id_index[entry_id]
+            key = self._history_digests.pop(entry_id, None)
+            if is_keyframe and key is not None and self._history_store is not None:
+                self._history_store.release(key)
+
+        if not buffer:
+            self._history_latest = None
+            self._history_since_keyframe = 0
+            return
+        keyframe = len(buffer) - 1
+        while not buffer[keyframe][1]:
+            keyframe -= 1
+        state = buffer[keyframe][2]
+        for i in range(keyframe + 1, len(buffer)):
+            state = patch(state, buffer[i][2])
+        self._history_latest = state
+        self._history_since_keyframe = len(buffer) - 1 - keyframe
+
+    def fork(self) -> "DeltaHistory":
+        """
+        Returns a history that shares every stored state with this one.
+
+        Both histories can be extended independently after the fork.
+        """
+        history = DeltaHistory(self.temporal_depth, self.keyframe_interval)
+        history._copy_history(self)
+        return history
+
+    def digest(self, index: int | str | tuple = 0) -> bytes:
+        """
+        Returns the content digest of a stored state.
+
+        Digests of keyframes are known, other digests are computed once and
+        cached. Two states have the same digest when they are equal.
+
+        Parameters
+        ----------
+        index (int | str | tuple):
+            A relative index, 0 for the current state, or a temporal ID
+
+        Returns
+        -------
+        bytes:
+            The digest, see bandit.content
+        """
+        if isinstance(index, int):
+            index = abs(index)
+            if index >= len(self.buffer):
+                raise IndexError("Index out of range")
+            temporal_id = self.buffer[len(self.buffer) - 1 - index][0]
+        else:
+            temporal_id = index
+            if temporal_id not in self.id_index:
+                raise KeyError(temporal_id)
+        key = self._history_digests.get(temporal_id)
+        if key is None:
+            key = content_digest(self[temporal_id])
+            self._history_digests[temporal_id] = key
+        return key
+
+    def keyframes(self) -> int:
+        """
+        Returns the number of stored keyframes.
+        """
+        return sum(1 for entry in self.buffer if entry[1])
+
+    @property
+    def current(self) -> dict:
+        """
+        Returns the most recent state.
+        """
+        if not self.buffer:
+            raise IndexError("History is empty")
+        return self._history_latest
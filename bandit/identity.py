@@ -2,10 +2,28 @@
 Identity module for handling object identities in the simulation.
 
 Including creation and handling of the root and temporal IDs
+
+Compact Identities
+------------------
+An Identity formats a new "{root}.{cycle}.{step}" string on every update, and
+its root is a 32 character hex UUID. A CompactIdentity uses a dense integer
+handle from an IdentityRegistry as its root instead, keeps the UUID in the
+registry, and uses ``(handle, cycle, step)`` tuples as temporal IDs. Small
+integers and tuples of them are cheap to build and hash, so the update loop
+and every dict keyed by roots or temporal IDs do less work. Strings are only
+formatted on request with ``format()``.
+
+Objects use compact identities when their class sets
+``compact_identity = True``, see bandit.object.
+
+Handles are only meaningful within a process. They are Handle integers that
+pickle as their UUID and unpickle as the handle of that UUID in the registry
+of the loading process, so the roots and temporal IDs held anywhere, in
+histories, states or edges, are mapped to the local handles on load.
 """
 
 import uuid
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Union
 
 if TYPE_CHECKING:
     from bandit.clock import Clock
@@ -26,6 +44,17 @@ class Identity:
     -------
     update(clock: Clock) -> None
         Updates the temporal ID of the object based on the current clock.
+    format(temporal: bool = True) -> str
+        Returns the temporal or root ID as a string.
+    from_uuid(uuid: str) -> Identity
+        Returns an identity for an existing UUID.
+    make_temporal(root, cycle: int, step: int)
+        Returns the temporal ID of a root at a time.
+
+    Properties
+    ----------
+    uuid : str
+        The globally unique ID of the object.
     """
 
     def __init__(self) -> None:
@@ -51,8 +80,234 @@ class Identity:
         else:
             return self.temporal
 
+    @classmethod
+    def from_uuid(cls, uuid_hex: str) -> "Identity":
+        """
+        Returns an identity for an existing UUID, at the first step.
+        """
+        identity = cls.__new__(cls)
+        identity.root = uuid_hex
+        identity.temporal = cls.make_temporal(uuid_hex, 1, 0)
+        return identity
+
+    @staticmethod
+    def make_temporal(root: str, cycle: int, step: int) -> str:
+        """
+        Returns the temporal ID of a root at a time.
+        """
+        return f"{root}.{cycle}.{step}"
+
     def update(self, clock: "Clock") -> None:
         """
         Updates the temporal ID of the object based on the current clock.
         """
         self.temporal = f"{self.root}.{clock.cycle}.{clock.step}"
+
+    def format(self, temporal: bool = True) -> str:
+        """
+        Returns the temporal or root ID as a string.
+        """
+        return format_id(self.temporal if temporal else self.root)
+
+    @property
+    def uuid(self) -> str:
+        """
+        The globally unique ID of the object.
+        """
+        return format_id(self.root)
+
+
+class Handle(int):
+    """
+    The integer handle of a UUID in the registry of the process.
+
+    A Handle pickles as its UUID, and unpickles as the handle of that UUID in
+    the registry of the process that loads it, registering it if needed.
+    """
+
+    __slots__ = ()
+
+    def __reduce__(self) -> tuple:
+        return _handle, (registry.uuid(self),)
+
+    def __repr__(self) -> str:
+        return int.__repr__(self)
+
+
+def _handle(uuid_hex: str) -> "Handle":
+    return registry.register(uuid_hex)
+
+
+class IdentityRegistry:
+    """
+    Assigns dense integer handles to UUIDs.
+
+    Handles are assigned in order from 0 and never reused. Every handle is one
+    Handle object, so equal roots are also identical.
+
+    Methods
+    -------
+    register(uuid: str = None) -> Handle
+        Returns the handle of a UUID, registering it if needed.
+    claim(handle: int, uuid: str) -> int
+        Registers a UUID under a given handle.
+    uuid(handle: int) -> str
+        Returns the UUID of a handle.
+    """
+
+    def __init__(self) -> None:
+        self._uuids: list[Optional[str]] = []
+        self._handles: dict[str, Handle] = {}
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def __contains__(self, uuid: str) -> bool:
+        return uuid in self._handles
+
+    def register(self, uuid_hex: Optional[str] = None) -> Handle:
+        """
+        Returns the handle of a UUID, registering it if needed.
+
+        Parameters
+        ----------
+        uuid_hex : str, optional
+            The UUID, a new one is generated if not provided.
+
+        Returns
+        -------
+        Handle
+            The handle of the UUID.
+        """
+        if uuid_hex is None:
+            uuid_hex = uuid.uuid4().hex
+        handle = self._handles.get(uuid_hex)
+        if handle is None:
+            handle = self._handles[uuid_hex] = Handle(len(self._uuids))
+            self._uuids.append(uuid_hex)
+        return handle
+
+    def claim(self, handle: int, uuid_hex: str) -> int:
+        """
+        Registers a UUID under a given handle.
+
+        Parameters
+        ----------
+        handle : int
+            The handle the UUID had when it was pickled.
+        uuid_hex : str
+            The UUID.
+
+        Returns
+        -------
+        int
+            The handle.
+
+        Raises
+        ------
+        ValueError
+            If the handle or the UUID is already registered differently.
+        """
+        current = self._handles.get(uuid_hex)
+        if current == handle:
+            return handle
+        if current is not None or (
+            handle < len(self._uuids) and self._uuids[handle] is not None
+        ):
+            raise ValueError(f"Handle {handle} is already used by another UUID")
+        if handle >= len(self._uuids):
+            self._uuids.extend([None] * (handle + 1 - len(self._uuids)))
+        handle = Handle(handle)
+        self._uuids[handle] = uuid_hex
+        self._handles[uuid_hex] = handle
+        return handle
+
+    def uuid(self, handle: int) -> str:
+        """
+        Returns the UUID of a handle.
+        """
+        uuid_hex = self._uuids[handle] if handle < len(self._uuids) else None
+        if uuid_hex is None:
+            raise KeyError(handle)
+        return uuid_hex
+
+
+registry = IdentityRegistry()
+
+
+class CompactIdentity(Identity):
+    """
+    An Identity with an integer root and tuple temporal IDs.
+
+    Attributes
+    ----------
+    root : Handle
+        The handle of the object in the registry.
+    temporal : tuple
+        The temporal ID as (root, cycle, step).
+
+    The UUID is kept in the registry, see the uuid property.
+
+    Parameters
+    ----------
+    uuid_hex : str, optional
+        The UUID of the object, a new one is generated if not provided.
+    """
+
+    def __init__(self, uuid_hex: Optional[str] = None) -> None:
+        self.root: Handle = registry.register(uuid_hex)
+        self.temporal: tuple[int, int, int] = (self.root, 1, 0)
+
+    @staticmethod
+    def make_temporal(root: int, cycle: int, step: int) -> tuple[int, int, int]:
+        """
+        Returns the temporal ID of a root at a time.
+        """
+        return (root, cycle, step)
+
+    @classmethod
+    def from_uuid(cls, uuid_hex: str) -> "CompactIdentity":
+        """
+        Returns an identity for an existing UUID, at the first step.
+        """
+        return cls(uuid_hex)
+
+    def update(self, clock: "Clock") -> None:
+        """
+        Updates the temporal ID of the object based on the current clock.
+        """
+        self.temporal = (self.root, clock.cycle, clock.step)
+
+    def __getstate__(self) -> dict:
+        return {**self.__dict__, "uuid": self.uuid}
+
+    def __setstate__(self, state: dict) -> None:
+        state = dict(state)
+        root = state["root"] = registry.register(state.pop("uuid"))
+        state["temporal"] = (root, *state["temporal"][1:])
+        self.__dict__.update(state)
+
+
+def format_id(value: Union[str, int, tuple]) -> str:
+    """
+    Formats a root or temporal ID as a string.
+
+    Compact IDs are formatted with the UUID of their handle, so the result
+    matches the IDs of a non-compact Identity.
+
+    Parameters
+    ----------
+    value : str | int | tuple
+        A root or temporal ID.
+
+    Returns
+    -------
+    str
+        The ID as "{root}" or "{root}.{cycle}.{step}".
+    """
+    if isinstance(value, tuple):
+        root, cycle, step = value
+        return f"{registry.uuid(root)}.{cycle}.{step}"
+    if isinstance(value, int):
+        return registry.uuid(value)
+    return value
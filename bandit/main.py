@@ -1,8 +1,17 @@
-from temporal import TemporalObject
+from typing import TYPE_CHECKING, Iterator, Optional
 
+from bandit import profile as _profile
 from bandit.clock import Clock
+from bandit.history import DeltaHistory
 from bandit.space import Space
 
+if TYPE_CHECKING:
+    from bandit.branch import Branch
+    from bandit.content import StateStore
+    from bandit.metrics import Metrics
+    from bandit.snapshot import Snapshot, Snapshots
+    from bandit.trajectory import TrajectoryLog
+
 
 class TimeBandit:
     """
@@ -14,39 +23,280 @@ class TimeBandit:
         The space to simulate.
     temporal_depth (int):
         The depth of the temporal object.
+    keyframe_interval (int):
+        The number of steps between two full keyframes in the history. The
+        steps in between only store what changed.
+    store (StateStore, optional):
+        Interns the keyframes of the history by content, see bandit.content
+    snapshots (Snapshots, optional):
+        Keeps a copy of the space every few steps, to seek() back to any
+        earlier step, see bandit.snapshot
+    metrics (Metrics, optional):
+        Reduces the space to aggregate values after every step, see
+        bandit.metrics
+    record (bool):
+        Whether to build the state of the space and keep it in the history
+        on every step. Without it only the metrics are computed
+
+    The simulation uses the clock of a space with a shared clock, and its own
+    Clock otherwise.
 
     Methods
     -------
     update():
         Update the simulation.
-    run(steps: int):
+    run(steps: int, sink: TrajectoryLog = None):
         Run the simulation for a given number of steps.
+    stream(steps: int) -> Iterator[tuple[str, dict]]:
+        Run the simulation and yield the metrics of every step.
     state():
         Return the state of the simulation.
+    seek(cycle: int, step: int = 0):
+        Restore the simulation to another step.
+    branch(name: str = None):
+        Return a Branch that diverges from the simulation at the current time.
+    save(path: str, history: bool = True):
+        Write a binary checkpoint of the simulation to a file.
+    load(path: str):
+        Load a simulation from a checkpoint file.
     """
 
-    def __init__(self, space: Space, temporal_depth: int = 100):
-        self.time = TemporalObject(temporal_depth)
-        self.clock = Clock()
+    def __init__(
+        self,
+        space: Space,
+        temporal_depth: int = 100,
+        keyframe_interval: int = 10,
+        store: Optional["StateStore"] = None,
+        snapshots: Optional["Snapshots"] = None,
+        metrics: Optional["Metrics"] = None,
+        record: bool = True,
+    ):
+        self.time = DeltaHistory(temporal_depth, keyframe_interval, store)
+        self.clock = space.clock if space.clock is not None else Clock()
         self.space = space
+        self.snapshots = snapshots
+        self.metrics = metrics
+        self.record = record
 
     def update(self) -> None:
         """
         Update the simulation.
+
+        With Snapshots, the first update takes a snapshot of the initial
+        space, and an update after seek() drops the snapshots of the steps
+        after it. The phases of the update are timed by an enabled Profiler,
+        see bandit.profile.
+        """
+        snapshots = self.snapshots
+        with _profile.phase("tick"):
+            if snapshots is not None:
+                snapshots.discard(self.clock.ticks)
+                if not snapshots:
+                    snapshots.capture(self)
+            self._tick()
+            if snapshots is not None and snapshots.due(self.clock.ticks):
+                with _profile.phase("tick.snapshot"):
+                    snapshots.capture(self)
+
+    def _tick(self) -> None:
+        """
+        Steps the clock and the space, records the state and computes the
+        metrics.
         """
-        self.clock.update()
+        if self.clock is not self.space.clock:
+            self.clock.update()
         self.space.update()
-        self.time.update(self.space.state(), self.clock.time)
+        if self.record:
+            with _profile.phase("tick.state"):
+                state = self.space.state()
+            with _profile.phase("tick.history"):
+                self.time.update(state, self.clock.time)
+        if self.metrics is not None:
+            with _profile.phase("tick.metrics"):
+                self.metrics.observe(self.space, self.clock.time)
 
-    def run(self, steps: int) -> None:
+    def run(self, steps: int, sink: Optional["TrajectoryLog"] = None) -> None:
         """
         Run the simulation for a given number of steps.
+
+        Parameters
+        ----------
+        steps (int):
+            The number of steps to run
+        sink (TrajectoryLog, optional):
+            Receives the time and state of every step through
+            ``sink.append(time, state)``, e.g. to keep the whole run on disk
         """
         for _ in range(steps):
             self.update()
+            if sink is not None:
+                sink.append(self.clock.time, self.state())
+
+    def stream(self, steps: int) -> Iterator[tuple[str, dict]]:
+        """
+        Run the simulation for a given number of steps and yield the metrics
+        of every step as they are computed.
+
+        Parameters
+        ----------
+        steps (int):
+            The number of steps to run
+
+        Yields
+        ------
+        tuple[str, dict]:
+            The time of the step and the values of the metrics
+
+        Raises
+        ------
+        ValueError:
+            If the simulation has no metrics
+        """
+        if self.metrics is None:
+            raise ValueError("The simulation has no metrics")
+        for _ in range(steps):
+            self.update()
+            yield self.metrics.time, self.metrics.latest
 
     def state(self) -> dict:
         """
-        Return the state of the simulation.
+        Return the state of the simulation. Without recording, the state is
+        built from the space on every call.
         """
+        if not self.record:
+            return self.space.state()
         return self.time.current
+
+    def seek(self, cycle: int, step: int = 0) -> dict:
+        """
+        Restore the simulation to another step.
+
+        The space, its objects and the clocks are restored from the latest
+        snapshot at or before the step, and the steps after the snapshot are
+        simulated again, see bandit.snapshot. A later step is reached from
+        the current step when it is closer than the latest snapshot. The
+        history is truncated to the step. Snapshots of later steps are kept,
+        so seeking forward again is as fast, until the simulation is updated.
+
+        Parameters
+        ----------
+        cycle (int):
+            The cycle of the step
+        step (int):
+            The step in the cycle
+
+        Returns
+        -------
+        dict:
+            The state of the simulation at the step
+
+        Raises
+        ------
+        ValueError:
+            If the step is earlier than the current step and every snapshot
+        """
+        ticks = (cycle - 1) * self.clock.steps_per_cycle + step
+        if ticks < 0:
+            raise ValueError(f"Cannot seek to {cycle}:{step}")
+        snapshots = self.snapshots
+        if snapshots is not None and not snapshots:
+            snapshots.capture(self)
+        snapshot = snapshots.find(ticks) if snapshots is not None else None
+        current = self.clock.ticks
+        if current > ticks or (snapshot is not None and snapshot.ticks > current):
+            if snapshot is None:
+                raise ValueError(f"No snapshot at or before {cycle}:{step}")
+            self._restore(snapshot)
+
+        while self.clock.ticks < ticks:
+            with _profile.phase("tick"):
+                self._tick()
+                if (
+                    snapshots is not None
+                    and snapshots.due(self.clock.ticks)
+                    and self.clock.ticks > snapshots.latest.ticks
+                ):
+                    snapshots.capture(self)
+        return self.state()
+
+    def _restore(self, snapshot: "Snapshot") -> None:
+        """
+        Replaces the space and the clock with a copy of a snapshot, and drops
+        the history after it.
+        """
+        self.space = snapshot.restore()
+        if snapshot.clock is None:
+            self.clock = self.space.clock
+        else:
+            self.clock = snapshot.clock.clone()
+        time = self.clock.time
+        if time in self.time:
+            self.time.truncate(time)
+        else:
+            self.time.truncate()
+            if self.record:
+                self.time.update(self.space.state(), time)
+
+    def branch(self, name: str = None) -> "Branch":
+        """
+        Return a Branch that diverges from the simulation at the current time.
+
+        Parameters
+        ----------
+        name (str, optional):
+            A name for the branch
+
+        Returns
+        -------
+        Branch:
+            The branch, sharing the space and history with this simulation
+            until either side changes them
+        """
+        from bandit.branch import Branch
+
+        return Branch(self, name)
+
+    def save(self, path: str, history: bool = True) -> str:
+        """
+        Write a binary checkpoint of the simulation to a file.
+
+        The space, clock, history, snapshots and metrics are saved, see
+        bandit.checkpoint. The sink of the metrics is not saved.
+
+        Parameters
+        ----------
+        path (str):
+            The file to write
+        history (bool):
+            Whether to save the history of every object
+
+        Returns
+        -------
+        str:
+            The path of the checkpoint
+        """
+        from bandit.checkpoint import save
+
+        return save(self, path, history)
+
+    @classmethod
+    def load(cls, path: str) -> "TimeBandit":
+        """
+        Load a simulation from a checkpoint file written by save().
+
+        Parameters
+        ----------
+        path (str):
+            The checkpoint file
+
+        Returns
+        -------
+        TimeBandit:
+            The restored simulation
+        """
+        from bandit.checkpoint import load
+
+        bandit = load(path)
+        if not isinstance(bandit, TimeBandit):
+            raise ValueError(f"{path} is a checkpoint of a Space")
+        return bandit
@@ -0,0 +1,350 @@
+"""
+Three-way merges of a branch back into the simulation it diverged from.
+
+``merge(parent, branch)`` compares every object the branch changed with the
+object as it was at the divergence and as it is in the parent now, and
+writes the changes of the branch into the parent, attribute by attribute
+and edge by edge. A field that both sides changed to different values is a
+conflict: it is reported, and keeps the parent's value unless
+``prefer="theirs"``. Objects one side removed while the other changed them
+are conflicts too.
+
+Only the objects the branch changed are visited. The copy-on-write layer of
+Space already knows them: a fork only holds the objects it added or copied
+and the keys of the objects it removed, every other object is still shared
+with the parent as it was at the fork. The objects at the fork are read from
+the versions the parent keeps for its forks, see Space._lookup_at, so the
+cost of a merge grows with the number of objects the branch changed, not
+with the size of the world. The changes are planned first and written
+afterwards, one edit per object.
+
+Attributes are merged one level deep: a list both sides changed is a
+conflict even if they changed different items. Clocks, identities and
+histories are not merged, the parent records the merged states from its
+next step on.
+
+Example
+-------
+    branch = bandit.branch()
+    branch.space.edit(branch.space[root]).speed = 2
+    branch.space.add_object(Ball())
+
+    result = merge(bandit, branch)      # or branch.merge()
+    result.changed                      # {root: ["speed"]}
+    result.added                        # [ball_root]
+    result.conflicts                    # [Conflict(root, "speed", 1, 3, 2)]
+"""
+
+import copy
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional, Union
+
+from anarchy import Anarchy
+
+from bandit.compare import _same
+from bandit.history import _MISSING
+from bandit.object import _CLONED, Object
+from bandit.space import ABSENT, Space
+
+if TYPE_CHECKING:
+    from bandit.main import TimeBandit
+
+Timeline = Union["TimeBandit", Space]
+
+_KINDS = ("connections", "interactions")
+
+
+class Conflict(NamedTuple):
+    """
+    A change of the branch that contradicts a change of the parent.
+
+    The field is the name of an attribute, a ``(kind, target)`` tuple for an
+    edge, with kind "connections" or "interactions", or None when one side
+    removed the object the other side changed. Missing values are None.
+    """
+
+    root: Any
+    field: Any
+    base: Any
+    ours: Any
+    theirs: Any
+
+
+class MergeResult:
+    """
+    The changes a merge applied and the conflicts it found.
+
+    Attributes
+    ----------
+    changed (dict[Any, list]):
+        The fields of the branch written into every object of the parent,
+        attribute names and ``(kind, target)`` tuples for edges
+    added (list):
+        The root IDs of the objects the branch added
+    removed (list):
+        The root IDs of the objects the branch removed
+    conflicts (list[Conflict]):
+        The conflicting fields, see Conflict
+
+    Properties
+    ----------
+    clean
+        Whether the merge found no conflicts
+    """
+
+    def __init__(self) -> None:
+        self.changed: dict[Any, list] = {}
+        self.added: list = []
+        self.removed: list = []
+        self.conflicts: list[Conflict] = []
+
+    def __repr__(self) -> str:
+        return (
+            f"MergeResult({len(self.changed)} changed, {len(self.added)} added, "
+            f"{len(self.removed)} removed, {len(self.conflicts)} conflicts)"
+        )
+
+    @property
+    def clean(self) -> bool:
+        """
+        Whether the merge found no conflicts.
+        """
+        return not self.conflicts
+
+
+def _space(timeline: Timeline) -> Space:
+    space = getattr(timeline, "space", timeline)
+    if not isinstance(space, Space):
+        raise TypeError(f"Cannot merge {type(timeline).__name__}")
+    return space
+
+
+def _fields(object: Any) -> dict:
+    """
+    Returns the attributes of an object that are merged field by field.
+    """
+    if object is ABSENT:
+        return {}
+    return {
+        name: value
+        for name, value in object.__dict__.items()
+        if name[0] != "_" and name not in _CLONED
+    }
+
+
+def _edges(object: Any, kind: str, space: Optional[Space] = None) -> dict:
+    """
+    Returns the edge types of an object by target root ID. Anarchy edges
+    keep pointing to removed objects, edges to objects that are not in the
+    space are left out.
+    """
+    edges = object.__dict__.get(kind) if object is not ABSENT else None
+    if not edges:
+        return {}
+    return {
+        target: edge.edge_type
+        for target, edge in edges.items()
+        if edge.node is not None
+        and (space is None or space._lookup(target) is not ABSENT)
+    }
+
+
+def _unchanged(base: Any, other: Any, space: Space) -> bool:
+    """
+    Whether an object has the fields and edges it had at the fork.
+    """
+    if base is other:
+        return True
+    return _same(_fields(base), _fields(other)) and all(
+        _edges(base, kind) == _edges(other, kind, space) for kind in _KINDS
+    )
+
+
+def _missing(value: Any) -> Any:
+    return None if value is _MISSING else value
+
+
+def _three_way(
+    root: Any,
+    base: dict,
+    ours: dict,
+    theirs: dict,
+    prefer: str,
+    conflicts: list,
+    field: Any = None,
+) -> dict:
+    """
+    Returns the values of the branch to write, _MISSING for values it
+    removed, and collects the conflicts.
+    """
+    changes = {}
+    keys = list(theirs)
+    keys.extend(key for key in base if key not in theirs)
+    for key in keys:
+        old, new = base.get(key, _MISSING), theirs.get(key, _MISSING)
+        if old is new or _same(old, new):
+            continue
+        current = ours.get(key, _MISSING)
+        if current is not old and not _same(old, current):
+            if current is new or _same(current, new):
+                continue
+            name = key if field is None else (field, key)
+            conflicts.append(
+                Conflict(root, name, _missing(old), _missing(current), _missing(new))
+            )
+            if prefer != "theirs":
+                continue
+        changes[key] = new
+    return changes
+
+
+def _value(space: Space, value: Any) -> Any:
+    """
+    Returns a value of the branch as the parent should hold it: references
+    to objects point to the parent's objects, other values are copied one
+    level deep like in Object.clone().
+    """
+    if isinstance(value, Object):
+        return space.get(value.id.root, value)
+    return copy.copy(value)
+
+
+def merge(
+    parent: Timeline, branch: Timeline, prefer: str = "ours", apply: bool = True
+) -> MergeResult:
+    """
+    Merges the changes a branch made since its divergence into its parent.
+
+    Parameters
+    ----------
+    parent (TimeBandit | Space):
+        The simulation the branch diverged from, or its space
+    branch (TimeBandit | Space):
+        The branch, or the space forked from the parent's space
+    prefer (str):
+        "ours" to keep the parent's value of conflicting fields, "theirs" to
+        take the branch's value
+    apply (bool):
+        Whether to write the changes, False to only find them
+
+    Returns
+    -------
+    MergeResult:
+        The fields written, the objects added and removed, and the conflicts
+
+    Raises
+    ------
+    ValueError:
+        If the branch was not forked from the parent
+    """
+    if prefer not in ("ours", "theirs"):
+        raise ValueError(f"Unknown merge preference: {prefer!r}")
+    target, fork = _space(parent), _space(branch)
+    if fork._parent is not target:
+        raise ValueError("The branch was not forked from the parent")
+
+    epoch = fork._fork_epoch
+    result = MergeResult()
+    conflicts = result.conflicts
+    additions, removals = [], []
+    plans: list[tuple[Any, dict, dict]] = []
+
+    roots = list(dict.keys(fork))
+    roots.extend(root for root in fork._hidden if not dict.__contains__(fork, root))
+    for root in roots:
+        theirs = fork._lookup(root)
+        base = target._lookup_at(root, epoch)
+        if theirs is base:
+            continue
+        ours = target._lookup(root)
+
+        if theirs is ABSENT:
+            if base is ABSENT or ours is ABSENT:
+                continue
+            if not _unchanged(base, ours, target):
+                conflicts.append(Conflict(root, None, base, ours, None))
+                if prefer != "theirs":
+                    continue
+            removals.append(root)
+            continue
+        if ours is ABSENT:
+            if base is not ABSENT:
+                if _unchanged(base, theirs, fork):
+                    continue
+                conflicts.append(Conflict(root, None, base, None, theirs))
+                if prefer != "theirs":
+                    continue
+            additions.append(theirs)
+            continue
+
+        fields = _three_way(
+            root, _fields(base), _fields(ours), _fields(theirs), prefer, conflicts
+        )
+        edges = {}
+        for kind in _KINDS:
+            changes = _three_way(
+                root,
+                _edges(base, kind),
+                _edges(ours, kind, target),
+                _edges(theirs, kind, fork),
+                prefer,
+                conflicts,
+                kind,
+            )
+            if changes:
+                edges[kind] = changes
+        if fields or edges:
+            plans.append((root, fields, edges))
+
+    result.removed = removals
+    result.added = [theirs.id.root for theirs in additions]
+    for root, fields, edges in plans:
+        result.changed[root] = list(fields) + [
+            (kind, key) for kind, changes in edges.items() for key in changes
+        ]
+    if not apply:
+        return result
+
+    for root in removals:
+        target.remove_object(target[root])
+
+    added = []
+    for theirs in additions:
+        clone = theirs.clone()
+        for kind in _KINDS:
+            clone.__dict__[kind] = Anarchy(anarchy_name=kind)
+        target.add_object(clone)
+        added.append(clone)
+        edges = {kind: _edges(theirs, kind, fork) for kind in _KINDS}
+        plans.append((clone.id.root, {}, {kind: e for kind, e in edges.items() if e}))
+    for clone in added:
+        for name, value in _fields(clone).items():
+            if isinstance(value, Object):
+                clone.__dict__[name] = _value(target, value)
+
+    topology = False
+    for root, fields, edges in plans:
+        object = target.edit(target[root])
+        object.touch()
+        for name, value in fields.items():
+            if value is _MISSING:
+                object.__dict__.pop(name, None)
+            else:
+                setattr(object, name, _value(target, value))
+        for kind, changes in edges.items():
+            view = getattr(object, kind)
+            for key, edge_type in changes.items():
+                view.remove(key)
+                topology = True
+                if edge_type is _MISSING:
+                    continue
+                node = target.get(key)
+                if node is None:
+                    # The parent removed the other object
+                    conflicts.append(Conflict(root, (kind, key), None, None, edge_type))
+                    if root in result.changed:
+                        result.changed[root].remove((kind, key))
+                    continue
+                view.add(key, node, edge_type)
+    if topology:
+        target._topology += 1
+    return result
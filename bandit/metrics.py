@@ -0,0 +1,398 @@
+"""
+Aggregate metrics of a running simulation, computed every tick.
+
+A TimeBandit created with ``metrics=Metrics(...)`` reduces its space to a few
+values after every tick, e.g. the mean velocity, the number of objects per
+class or the total energy, and sends them to a sink. With ``record=False``
+the full state of the space is not built or kept at all, so the cost of a
+tick and the memory of a run depend on the number of metrics rather than the
+size of the world.
+
+A reducer reads a field of every object, or of every object of a class. In
+a columnar space the Column fields of a block are read as one array, see
+bandit.columnar, so reducing them costs no Python call per object. The
+blocks and objects a reducer reads are only collected again when objects are
+added or removed.
+
+The values of every tick go to the sink of the metrics through
+``sink.append(time, values)``, e.g. a TrajectoryLog to write them to disk, and
+``TimeBandit.stream()`` yields them as the simulation runs.
+
+Example
+-------
+    def energy(ball):
+        # reads one object, or every row of a column block at once
+        return 0.5 * ball.mass * (ball.velocity**2).sum(-1)
+
+    metrics = Metrics(
+        speed=Mean("velocity", Ball),
+        count=Count(),
+        energy=Sum(energy),
+        sink=TrajectoryLog("metrics.traj"),
+    )
+    bandit = TimeBandit(space, record=False, metrics=metrics)
+    bandit.run(1_000_000)
+
+    for time, values in bandit.stream(100):
+        print(time, values["energy"])
+"""
+
+import copy
+import weakref
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from bandit.columnar import ColumnBlock
+    from bandit.space import Space
+    from bandit.trajectory import TrajectoryLog
+
+
+class Reducer:
+    """
+    Reduces a space to one value. Subclasses implement reduce(), or a
+    function of the space is passed.
+
+    Parameters
+    ----------
+    function (Callable[[Space], Any], optional):
+        Returns the value for a space
+
+    Methods
+    -------
+    reduce(space: Space) -> Any:
+        Returns the value for a space
+    clone() -> Reducer:
+        Returns a reducer with the same settings
+    """
+
+    # Attributes rebuilt on use, set by _reset()
+    _cached: tuple = ("_space", "_topology")
+
+    def __init__(self, function: Optional[Callable[["Space"], Any]] = None) -> None:
+        self.function = function
+        self._reset()
+
+    def _reset(self) -> None:
+        self._space: Optional[weakref.ref] = None
+        self._topology: Optional[int] = None
+
+    def __call__(self, space: "Space") -> Any:
+        return self.reduce(space)
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles the settings only, the cache is rebuilt on use.
+        """
+        return {
+            name: value
+            for name, value in self.__dict__.items()
+            if name not in self._cached
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._reset()
+
+    def reduce(self, space: "Space") -> Any:
+        """
+        Returns the value for a space.
+        """
+        if self.function is None:
+            raise NotImplementedError(f"{type(self).__name__} has no function")
+        return self.function(space)
+
+    def clone(self) -> "Reducer":
+        """
+        Returns a reducer with the same settings and no cache.
+        """
+        clone = copy.copy(self)
+        clone._reset()
+        return clone
+
+    def _stale(self, space: "Space") -> bool:
+        """
+        Whether objects were added to or removed from the space since the
+        last call, or the space was replaced.
+        """
+        if (
+            self._space is not None
+            and self._space() is space
+            and self._topology == space._topology
+        ):
+            return False
+        self._space = weakref.ref(space)
+        self._topology = space._topology
+        return True
+
+
+class Count(Reducer):
+    """
+    Counts the objects of a space.
+
+    Parameters
+    ----------
+    cls (type, optional):
+        Only count the instances of a class. Without it, the value is the
+        number of objects of every class, by class name
+    """
+
+    _cached = Reducer._cached + ("_value",)
+
+    def __init__(self, cls: Optional[type] = None) -> None:
+        self.cls = cls
+        super().__init__()
+
+    def _reset(self) -> None:
+        super()._reset()
+        self._value: Any = None
+
+    def reduce(self, space: "Space") -> Union[int, dict[str, int]]:
+        if self._stale(space):
+            if self.cls is None:
+                counts = Counter(type(obj).__name__ for obj in space.values())
+                self._value = dict(counts)
+            else:
+                self._value = sum(isinstance(obj, self.cls) for obj in space.values())
+        return self._value if self.cls is not None else dict(self._value)
+
+
+class Aggregate(Reducer):
+    """
+    Reduces a field of every object of a space, or of every instance of a
+    class, with a NumPy function. Vector fields are reduced per component.
+
+    A field that is a Column of a column block is read from the block as one
+    array. A function field is called with every object, or once with every
+    column block, so an expression of Column fields like
+    ``ball.mass * ball.speed`` works for both.
+
+    Parameters
+    ----------
+    field (str | Callable[[Object | ColumnBlock], Any]):
+        The attribute to reduce, or a function of an object
+    cls (type, optional):
+        Only reduce the instances of a class
+
+    Methods
+    -------
+    values(space: Space) -> np.ndarray:
+        Returns the field of every object, one row per object
+    """
+
+    # The NumPy reduction, called with axis=0
+    _function: Callable = staticmethod(np.sum)
+    # The value of a space without objects
+    _empty: Any = None
+    _cached = Reducer._cached + ("_blocks", "_roots")
+
+    def __init__(
+        self, field: Union[str, Callable[[Any], Any]], cls: Optional[type] = None
+    ) -> None:
+        self.field = field
+        self.cls = cls
+        super().__init__()
+
+    def _reset(self) -> None:
+        super()._reset()
+        self._blocks: list["ColumnBlock"] = []
+        self._roots: list = []
+
+    def _read(self, source: Any) -> Any:
+        if isinstance(self.field, str):
+            return getattr(source, self.field)
+        return self.field(source)
+
+    def _collect(self, space: "Space") -> None:
+        """
+        Collects the blocks and the objects outside of them to read.
+        """
+        blocks = []
+        if space.columns is not None:
+            blocks = [
+                block
+                for cls, block in space.columns.blocks.items()
+                if self._matches(cls)
+                and (not isinstance(self.field, str) or self.field in block.fields)
+            ]
+        self._blocks = blocks
+        read = {id(block) for block in blocks}
+        self._roots = [
+            root
+            for root, obj in space.items()
+            if self._matches(type(obj))
+            and id(obj.__dict__.get("_column_block")) not in read
+        ]
+
+    def _matches(self, cls: type) -> bool:
+        return self.cls is None or issubclass(cls, self.cls)
+
+    def values(self, space: "Space") -> np.ndarray:
+        """
+        Returns the field of every object the reducer reads, one row per
+        object, block rows first.
+        """
+        if self._stale(space):
+            self._collect(space)
+        parts = [np.asarray(self._read(block)) for block in self._blocks if block.size]
+        if self._roots:
+            parts.append(np.asarray([self._read(space[root]) for root in self._roots]))
+        if not parts:
+            return np.zeros(0)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def reduce(self, space: "Space") -> Any:
+        values = self.values(space)
+        if not len(values):
+            return self._empty
+        return self._function(values, axis=0)
+
+
+class Sum(Aggregate):
+    """
+    The sum of a field, 0 without objects. See Aggregate.
+    """
+
+    _function = staticmethod(np.sum)
+    _empty = 0
+
+
+class Mean(Aggregate):
+    """
+    The mean of a field, None without objects. See Aggregate.
+    """
+
+    _function = staticmethod(np.mean)
+
+
+class Min(Aggregate):
+    """
+    The minimum of a field, None without objects. See Aggregate.
+    """
+
+    _function = staticmethod(np.min)
+
+
+class Max(Aggregate):
+    """
+    The maximum of a field, None without objects. See Aggregate.
+    """
+
+    _function = staticmethod(np.max)
+
+
+class Metrics:
+    """
+    Named reducers computed together after every tick of a simulation.
+
+    Parameters
+    ----------
+    sink (TrajectoryLog, optional):
+        Receives the time and values of every tick through
+        ``sink.append(time, values)``
+    **reducers (Reducer):
+        The reducers by name
+
+    Attributes
+    ----------
+    reducers (dict[str, Reducer]):
+        The reducers by name
+    sink (TrajectoryLog):
+        Receives the values of every tick, None by default
+    time (str):
+        The time of the latest values
+    latest (dict):
+        The latest values by name
+
+    Methods
+    -------
+    add(name: str, reducer: Reducer):
+        Adds a reducer
+    remove(name: str):
+        Removes a reducer
+    observe(space: Space, time: str) -> dict:
+        Computes every reducer for a space and sends the values to the sink
+    clone() -> Metrics:
+        Returns metrics with the same reducers and no sink
+    """
+
+    def __init__(
+        self, sink: Optional["TrajectoryLog"] = None, **reducers: Reducer
+    ) -> None:
+        self.reducers: dict[str, Reducer] = {}
+        self.sink = sink
+        self.time: Optional[str] = None
+        self.latest: dict = {}
+        for name, reducer in reducers.items():
+            self.add(name, reducer)
+
+    def __len__(self) -> int:
+        return len(self.reducers)
+
+    def __repr__(self) -> str:
+        return f"Metrics({', '.join(self.reducers)})"
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles the reducers and the latest values without the sink, e.g. in
+        a checkpoint of the simulation.
+        """
+        return {**self.__dict__, "sink": None}
+
+    def add(self, name: str, reducer: Union[Reducer, Callable[["Space"], Any]]) -> None:
+        """
+        Adds a reducer, or a function of the space.
+
+        Parameters
+        ----------
+        name (str):
+            The name of the value
+        reducer (Reducer | Callable[[Space], Any]):
+            The reducer
+        """
+        if not isinstance(reducer, Reducer):
+            reducer = Reducer(reducer)
+        self.reducers[name] = reducer
+
+    def remove(self, name: str) -> None:
+        """
+        Removes a reducer.
+        """
+        del self.reducers[name]
+        self.latest.pop(name, None)
+
+    def observe(self, space: "Space", time: str) -> dict:
+        """
+        Computes every reducer for a space and sends the values to the sink.
+
+        Parameters
+        ----------
+        space (Space):
+            The space to reduce
+        time (str):
+            The time of the space as "cycle:step"
+
+        Returns
+        -------
+        dict:
+            The values by name
+        """
+        values = {name: reducer(space) for name, reducer in self.reducers.items()}
+        self.time = time
+        self.latest = values
+        if self.sink is not None:
+            self.sink.append(time, values)
+        return values
+
+    def clone(self) -> "Metrics":
+        """
+        Returns metrics with clones of the reducers and no sink, e.g. for a
+        branch that must not write to the sink of its parent.
+        """
+        clone = Metrics()
+        clone.reducers = {name: reducer.clone() for name, reducer in self.reducers.items()}
+        clone.time = self.time
+        clone.latest = dict(self.latest)
+        return clone
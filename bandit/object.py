@@ -17,17 +17,40 @@ TODO
 - Finalize update() logic order
 """
 
-import pickle
+import copy
 from abc import abstractmethod
+from typing import TYPE_CHECKING, Optional
 
 from anarchy import Anarchy
-from temporal import TemporalObject
 
+from bandit import profile as _profile
 from bandit.clock import Clock
-from bandit.identity import Identity
+from bandit.history import DeltaHistory
+from bandit.identity import CompactIdentity, Identity
 
+if TYPE_CHECKING:
+    from bandit.columnar import ColumnBlock
+    from bandit.content import StateStore
+    from bandit.rng import Stream
 
-class Object(TemporalObject):
+
+def _clone_edges(edges: Anarchy) -> Anarchy:
+    """
+    Returns a copy of an Anarchy with new edges to the same objects.
+
+    EdgeViews of a Space with an EdgeStore are returned as is, their edges
+    live in the store.
+    """
+    if not isinstance(edges, Anarchy):
+        return edges
+    clone = Anarchy(anarchy_name=edges.name)
+    for node_id, edge in edges.items():
+        if edge.node is not None:
+            clone.add(node_id, edge.node, edge.edge_type)
+    return clone
+
+
+class Object(DeltaHistory):
     """
     A class to represent an object in a simulation.
 
@@ -37,14 +60,29 @@ class Object(TemporalObject):
     During the primary update process, the object will automatically update the
     clock and the temporal_id.
 
+    The object is its own temporal buffer, a DeltaHistory that keeps periodic
+    keyframes of the object state and only the changed fields in between.
+
     Attributes
     ----------
+    compact_identity (bool):
+        Class attribute, use a CompactIdentity with an integer root and
+        tuple temporal IDs instead of UUID strings. See bandit.identity
+    state_store (StateStore):
+        Class attribute, interns the keyframes of every object of the class
+        by content, see bandit.content. None by default
+    clock_rate (float):
+        Class or instance attribute, the number of steps the object counts
+        per step of a shared space clock. See bandit.clock
+    kinematic (bool):
+        Class attribute, a Space with a Physics backend moves the position
+        of the object by its velocity on every tick. See bandit.physics
     step_size (int):
         The number of steps per cycle. For example, if step_size is 5, a cycle
         is counted every 5 steps.
     clock (Clock):
         The clock of the object, contains the relative time of the object in
-        cycles and steps
+        cycles and steps. A ClockView in a Space with a shared clock
     id (Identity):
         The identity of the object including root and temporal IDs
     state ():
@@ -54,14 +92,25 @@ class Object(TemporalObject):
     -------
     _update():
         Custom update method
+    _update_batch(block: ColumnBlock):
+        Optional vectorized update of every object of the class in a
+        columnar Space
     update() -> State:
         Updates the object state and returns the state after the update.
+    touch():
+        Marks the object as about to change outside of update()
+    sleep(ticks: int = None):
+        Skips the next updates of the object in an event-driven Space
+    emit():
+        Wakes the objects connected to this one in an event-driven Space
     _record_state() -> State:
         Returns the current state of the object
+    clone() -> Object:
+        Returns a copy of the object that can be changed independently
     save(path: str) -> str:
-        Pickle object to file, saved to path/root_id
+        Save object to a checkpoint file, saved to path/root_id
     load(path: str) -> "Object":
-        Load object from file
+        Load object from a checkpoint file
 
     Properties
     ----------
@@ -69,8 +118,16 @@ class Object(TemporalObject):
         Returns the cycle of the object
     step: int
         Returns the step of the object
+    rng: Stream
+        Returns the random stream of the object at its current step, in a
+        Space with RandomStreams. See bandit.rng
     """
 
+    compact_identity = False
+    clock_rate = 1
+    kinematic = False
+    state_store: Optional["StateStore"] = None
+
     def __init__(self, step_size: int = 1) -> None:
         """
         Parameters
@@ -78,12 +135,15 @@ class Object(TemporalObject):
         steps_per_cycle (int):
             The number of steps per cycle
         """
-        super().__init__()
+        super().__init__(store=self.state_store)
         self.step_size = step_size
         self.clock = Clock(step_size)
-        self.id = Identity()
+        self.id = CompactIdentity() if self.compact_identity else Identity()
         self.connections = Anarchy(anarchy_name="connections")
         self.interactions = Anarchy(anarchy_name="interactions")
+        self._owner = None
+        self._owner_epoch = 0
+        self._dirty = True
 
     def __str__(self) -> str:
         return f"{self.__class__.__name__}:{self.id.root}"
@@ -98,11 +158,29 @@ class Object(TemporalObject):
         """
         raise NotImplementedError("Subclass must implement _update method")
 
+    @classmethod
+    def _update_batch(cls, block: "ColumnBlock") -> None:
+        """
+        Updates every object of the class in one vectorized call.
+
+        Only used in a columnar Space. A subclass that declares Column fields
+        can override this to update the block's arrays directly, in which case
+        the per-object update is skipped and the block steps the clocks.
+
+        Parameters
+        ----------
+        block (ColumnBlock):
+            The column storage of every object of the class in the space
+        """
+        raise NotImplementedError("Subclass must implement _update_batch method")
+
     def update(self) -> dict:
         """
         Updates the object state and returns the state after the update.
 
-        Updates the clock and the temporal_id.
+        Updates the clock and the temporal_id. A ClockView is stepped by its
+        space, so stepping it here does nothing. While a Profiler is enabled
+        every step is timed, see bandit.profile.
 
         Returns
         -------
@@ -113,21 +191,105 @@ class Object(TemporalObject):
         ----
         - Finalize update() logic order
         """
+        laps = _profile.laps(type(self))
+        self.touch()
         self._update()
+        if laps is not None:
+            laps("object.update")
+
         self.clock.update()
         self.id.update(self.clock)
+        if laps is not None:
+            laps("object.clock")
 
-        return super().update(self.state(), self.id.temporal)
+        state = self.state()
+        if laps is not None:
+            laps("object.state")
+
+        temporal_id = super().update(state, self.id.temporal)
+        self._dirty = False
+        if laps is not None:
+            laps("object.history")
+        return temporal_id
+
+    def touch(self) -> None:
+        """
+        Marks the object as about to change outside of update().
+
+        The space that owns the object only rebuilds the states of changed
+        objects in Space.state(). Call touch() before changing an object
+        directly, update() calls it automatically.
+        """
+        self._dirty = True
+        if self._owner is not None:
+            self._owner._touch(self)
+
+    def sleep(self, ticks: Optional[int] = None) -> None:
+        """
+        Skips the next updates of the object in a Space with an
+        EventScheduler, see bandit.update. Called from _update().
+
+        The object is updated again after the given number of ticks, or when
+        an object in its connections emits. Its clock catches up with the
+        ticks it slept through. In a Space updated on every tick, sleeping
+        does nothing.
+
+        Parameters
+        ----------
+        ticks (int, optional):
+            The number of ticks to skip, None to sleep until an event
+        """
+        self._sleep = -1 if ticks is None else ticks
+
+    def emit(self) -> None:
+        """
+        Wakes every object that has this one in its connections on the next
+        tick, in a Space with an EventScheduler. Called from _update().
+        """
+        self._emitted = True
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles the object without the space that owns it.
+        """
+        return {**self.__dict__, "_owner": None}
+
+    def clone(self) -> "Object":
+        """
+        Returns a copy of the object that can be changed independently.
+
+        Used by Space for copy-on-write. The clock, identity, edges and
+        temporal buffer are copied, the stored history states are shared.
+        Every other attribute is copied one level deep, except references to
+        other objects which stay shared. Override to copy deeper state.
+
+        Returns
+        -------
+        Object:
+            The clone, with the same root ID
+        """
+        clone = copy.copy(self)
+        for name, value in self.__dict__.items():
+            if name not in _CLONED and not isinstance(value, Object):
+                clone.__dict__[name] = copy.copy(value)
+        clone.clock = self.clock.clone()
+        clone.id = copy.copy(self.id)
+        clone.connections = _clone_edges(self.connections)
+        clone.interactions = _clone_edges(self.interactions)
+        clone._copy_history(self)
+        return clone
 
     def save(self, path: str) -> str:
         """
-        Pickle object to file, saved to path/root_id
+        Save object to a checkpoint file, saved to path/root_id
+
+        Connections and interactions are not saved, see bandit.checkpoint to
+        save a whole Space.
         """
+        from bandit.checkpoint import save_objects
+
         try:
-            full_path = f"{path}/{self.id.root}"
-            with open(full_path, "wb") as f:
-                pickle.dump(self, f)
-            return full_path
+            return save_objects([self], f"{path}/{self.id.root}")
         except Exception as e:
             # Handle exceptions and log errors
             print(f"Failed to save object: {e}")
@@ -136,12 +298,12 @@ class Object(TemporalObject):
     @classmethod
     def load(cls, path: str) -> "Object":
         """
-        Load object from file
+        Load object from a checkpoint file
         """
+        from bandit.checkpoint import load_objects
+
         try:
-            with open(path, "rb") as f:
-                obj = pickle.load(f)
-            return obj
+            return load_objects(path)[0]
         except Exception as e:
             # Handle exceptions and log errors
             print(f"Failed to load object: {e}")
@@ -173,3 +335,33 @@ class Object(TemporalObject):
         Returns the relative step of the object
         """
         return self.clock.step
+
+    @property
+    def rng(self) -> "Stream":
+        """
+        Returns the random stream of the object at its current step, see
+        bandit.rng. Draws within one step continue the same stream.
+        """
+        source = getattr(self._owner, "rng", None)
+        if source is None:
+            raise ValueError("The object is not in a Space with random streams")
+        cycle, step = self.clock.cycle, self.clock.step
+        stream = self.__dict__.get("_rng")
+        if stream is None or not stream.follows(source, cycle, step):
+            stream = self.__dict__["_rng"] = source.stream(self.id.root, cycle, step)
+        return stream
+
+
+# Attributes copied explicitly by Object.clone()
+_CLONED = {
+    "clock",
+    "id",
+    "connections",
+    "interactions",
+    "buffer",
+    "id_index",
+    "_history_latest",
+    "_history_store",
+    "_history_digests",
+    "_owner",
+}
@@ -0,0 +1,141 @@
+"""
+Parallel execution of branches across a process pool.
+
+Branches that diverge from the same point share their parent's space and
+history. The branches are handed to every worker once, when the worker starts,
+instead of being pickled with every task. With the "fork" start method
+(the default on Linux) nothing is pickled at all: workers inherit the parent
+state from the calling process and the operating system shares its pages
+until a worker writes to them.
+
+Each task runs one branch and only its result is sent back: the final state
+and any requested metrics. The branches in the calling process are left at
+their point of divergence.
+
+Example
+-------
+    branches = [bandit.branch(name) for name in ("low", "mid", "high")]
+    for result in run_branches(branches, 1000, workers=3,
+                               metrics={"count": lambda b: b.space.object_count}):
+        print(result.name, result.metrics["count"])
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, Callable, Iterator, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from bandit.main import TimeBandit
+
+Metric = Callable[["TimeBandit"], Any]
+
+# Set once per worker process by _init_worker
+_branches: list["TimeBandit"] = []
+_metrics: dict[str, Metric] = {}
+
+
+class BranchResult(NamedTuple):
+    """
+    The outcome of running one branch in a worker.
+
+    Attributes
+    ----------
+    index (int):
+        The position of the branch in the list passed to run_branches
+    id (str):
+        The branch ID
+    name (str):
+        The branch name
+    time (str):
+        The branch clock time after the run
+    state (dict):
+        The final state of the branch, None if not requested
+    metrics (dict):
+        The value of every requested metric after the run
+    """
+
+    index: int
+    id: str
+    name: str
+    time: str
+    state: Optional[dict]
+    metrics: dict[str, Any]
+
+
+def _init_worker(branches: list["TimeBandit"], metrics: dict[str, Metric]) -> None:
+    """
+    Stores the branches and metrics in the worker process.
+    """
+    global _branches, _metrics
+    _branches = branches
+    _metrics = metrics
+
+
+def _run_branch(index: int, steps: int, state: bool) -> BranchResult:
+    """
+    Runs one branch in a worker process and returns its result.
+    """
+    branch = _branches[index]
+    branch.run(steps)
+    return BranchResult(
+        index=index,
+        id=getattr(branch, "id", str(index)),
+        name=getattr(branch, "name", str(index)),
+        time=branch.clock.time,
+        state=branch.state() if state else None,
+        metrics={name: metric(branch) for name, metric in _metrics.items()},
+    )
+
+
+def run_branches(
+    branches: list["TimeBandit"],
+    steps: int,
+    workers: Optional[int] = None,
+    metrics: Optional[dict[str, Metric]] = None,
+    state: bool = True,
+) -> Iterator[BranchResult]:
+    """
+    Runs independent branches in a process pool.
+
+    Results are yielded as soon as each branch finishes, not in the order
+    of the branches. Use BranchResult.index to match them up.
+
+    Parameters
+    ----------
+    branches (list[TimeBandit]):
+        The branches to run, usually created with TimeBandit.branch()
+    steps (int):
+        The number of steps to run every branch for
+    workers (int, optional):
+        The number of worker processes, defaults to the number of CPUs
+    metrics (dict[str, Callable], optional):
+        Functions computed on every branch after its run, by name
+    state (bool):
+        Whether to send back the final state of every branch
+
+    Yields
+    ------
+    BranchResult:
+        The result of each branch, in completion order
+    """
+    if not branches:
+        return
+    workers = min(workers or os.cpu_count() or 1, len(branches))
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = None
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(branches, metrics or {}),
+    ) as executor:
+        futures = [
+            executor.submit(_run_branch, index, steps, state)
+            for index in range(len(branches))
+        ]
+        for future in as_completed(futures):
+            yield future.result()
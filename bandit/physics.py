@@ -0,0 +1,494 @@
+"""
+Vectorized kinematics for the moving objects of a Space.
+
+A Space created with ``physics=Physics()`` moves all of its kinematic objects
+in one NumPy pass per tick, instead of one ``fizicks.Motion.update()`` call
+per object. An object is kinematic when its class sets ``kinematic = True``
+and it has a position and a velocity, as fizicks Vectors, arrays or Column
+fields.
+
+Every tick, before the objects are updated, the backend:
+
+1. Reads the position, velocity, mass and radius of every kinematic object
+2. Sums the forces in the ``debt`` of every object, emptying it, and the
+   forces along its interaction edges, for the interaction types that have a
+   force law
+3. Applies the fizicks motion step to the whole population: border
+   collision, ``velocity += force``, ``position += velocity * dt`` and border
+   collision again
+4. Writes the new positions and velocities back to the objects
+
+Positions and velocities match a ``fizicks.Matter.update()`` call, with the
+debt emptied after it is applied. Two things differ from calling
+``fizicks.Motion.update()`` directly: Motion leaves the debt in place for the
+caller to clear, and it also sets ``acceleration = velocity / mass``. The
+backend writes no acceleration, objects that need it compute it from their
+velocity and mass.
+
+Objects in a column block are integrated straight from the block's arrays, so
+they cost nothing per object, see bandit.columnar. Other objects are read into
+arrays and only the positions and velocities that changed are written back,
+as values of the type they had (e.g. a fizicks Position).
+
+Forces are the change of velocity they cause in one step, like in fizicks.
+An object queues a force by appending it to its ``debt`` during its update,
+and the force is applied on the next tick. Force laws get the masses at both
+ends of an edge, the ones in this module divide by the mass of the object
+they push.
+
+Borders follow fizicks Collision with a Universe: only the x and y axes have
+borders, objects bounce off them, or wrap around in a toroidal universe.
+
+Example
+-------
+    class Ball(Object):
+        kinematic = True
+
+        def __init__(self, position, velocity, mass):
+            super().__init__()
+            self.position = Position(*position)
+            self.velocity = Velocity(*velocity)
+            self.mass = mass
+            self.debt = []
+
+        def _update(self):
+            pass
+
+    space = Space(physics=Physics(Universe(), forces={"spring": Spring(0.1)}))
+    space.add_object(ball1)
+    space.add_object(ball2)
+    space.add_interaction(ball1, ball2, "spring")
+    space.update()
+"""
+
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+import numpy as np
+from fizicks import Vector
+
+if TYPE_CHECKING:
+    from fizicks.universe import Universe
+
+    from bandit.columnar import ColumnBlock
+    from bandit.object import Object
+    from bandit.space import Space
+
+# (offset to the target, distance, mass, target mass) -> force on the source
+ForceLaw = Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+# The axes fizicks has borders on
+_BORDER_AXES = 2
+
+
+class Spring:
+    """
+    A linear spring pulling the source of an edge towards its target.
+
+    Parameters
+    ----------
+    stiffness (float):
+        The force per unit of stretch
+    rest_length (float):
+        The length at which the spring does not pull
+    """
+
+    def __init__(self, stiffness: float, rest_length: float = 0.0) -> None:
+        self.stiffness = stiffness
+        self.rest_length = rest_length
+
+    def __call__(
+        self,
+        offset: np.ndarray,
+        distance: np.ndarray,
+        mass: np.ndarray,
+        other_mass: np.ndarray,
+    ) -> np.ndarray:
+        stretch = distance - self.rest_length
+        scale = self.stiffness * stretch / np.where(distance > 0, distance, 1) / mass
+        return offset * scale[:, None]
+
+
+class Gravity:
+    """
+    Newtonian attraction of the source of an edge towards its target.
+
+    Parameters
+    ----------
+    constant (float):
+        The gravitational constant
+    softening (float):
+        Added to the distance, so objects on top of each other do not get an
+        infinite force
+    """
+
+    def __init__(self, constant: float = 1.0, softening: float = 1e-3) -> None:
+        self.constant = constant
+        self.softening = softening
+
+    def __call__(
+        self,
+        offset: np.ndarray,
+        distance: np.ndarray,
+        mass: np.ndarray,
+        other_mass: np.ndarray,
+    ) -> np.ndarray:
+        softened = distance * distance + self.softening * self.softening
+        scale = self.constant * other_mass / (softened * np.sqrt(softened))
+        return offset * scale[:, None]
+
+
+def _rows(values: list) -> np.ndarray:
+    """
+    Returns positions or velocities as a [N, D] float array.
+    """
+    if isinstance(values[0], Vector):
+        return np.array([(value.x, value.y, value.z) for value in values])
+    if isinstance(values[0], (np.ndarray, list, tuple)):
+        return np.array(values, dtype=np.float64).reshape(len(values), -1)
+    return np.array([tuple(value) for value in values], dtype=np.float64)
+
+
+def _maker(value: Any) -> Callable[[list], Any]:
+    """
+    Returns a function turning a row into a value of the same type as value.
+    """
+    cls = type(value)
+    if isinstance(value, np.ndarray):
+        dtype = value.dtype
+        return lambda row: np.array(row, dtype=dtype)
+    if isinstance(value, (list, tuple)):
+        return cls
+    if cls.__module__ == "fizicks.data":
+        # fizicks vectors only store x, y and z, skipping their __init__
+        # chain makes writing them back about twice as fast
+        new = cls.__new__
+
+        def make(row: list) -> Any:
+            vector = new(cls)
+            vector.x, vector.y, vector.z = row
+            return vector
+
+        return make
+    return lambda row: cls(*row)
+
+
+class Physics:
+    """
+    Integrates the positions and velocities of the kinematic objects of a
+    Space in one vectorized step.
+
+    Parameters
+    ----------
+    universe (Universe, optional):
+        The fizicks universe whose borders objects bounce off or wrap around.
+        No borders without one
+    dt (float):
+        The time step, positions move by velocity * dt per tick
+    forces (dict[str, ForceLaw], optional):
+        The force law of every interaction type. Edges of other types exert
+        no force
+    position (str):
+        The object attribute holding the position
+    velocity (str):
+        The object attribute holding the velocity
+    mass (str):
+        The object attribute holding the mass, 1 when missing
+    radius (str):
+        The object attribute holding the radius, 0 when missing
+    debt (str):
+        The object attribute holding a list of queued forces, or a Column
+        with the summed force of every object
+
+    Methods
+    -------
+    integrate(space: Space) -> None:
+        Moves every kinematic object in the space by one step
+    clone() -> Physics:
+        Returns a backend with the same settings
+    """
+
+    def __init__(
+        self,
+        universe: Optional["Universe"] = None,
+        dt: float = 1.0,
+        forces: Optional[dict[str, ForceLaw]] = None,
+        position: str = "position",
+        velocity: str = "velocity",
+        mass: str = "mass",
+        radius: str = "radius",
+        debt: str = "debt",
+    ) -> None:
+        self.universe = universe
+        self.dt = dt
+        self.forces = dict(forces or {})
+        self.position = position
+        self.velocity = velocity
+        self.mass = mass
+        self.radius = radius
+        self.debt = debt
+        self._reset()
+
+    def _reset(self) -> None:
+        self._topology: Optional[int] = None
+        self._blocks: list["ColumnBlock"] = []
+        self._roots: list = []
+        self._edges: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return sum(block.size for block in self._blocks) + len(self._roots)
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles the settings only, the bodies are collected again on use.
+        """
+        state = dict(self.__dict__)
+        for name in ("_topology", "_blocks", "_roots", "_edges"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._reset()
+
+    def clone(self) -> "Physics":
+        """
+        Returns a backend with the same settings, filled on first use.
+        """
+        return Physics(
+            self.universe,
+            self.dt,
+            self.forces,
+            self.position,
+            self.velocity,
+            self.mass,
+            self.radius,
+            self.debt,
+        )
+
+    def _collect(self, space: "Space") -> None:
+        """
+        Finds the kinematic objects of the space and the force edges between
+        them. Objects in blocks come first, in row order.
+        """
+        names = (self.position, self.velocity)
+        self._blocks = []
+        if space.columns is not None:
+            self._blocks = [
+                block
+                for block in space.columns.blocks.values()
+                if block.cls.kinematic and all(name in block.fields for name in names)
+            ]
+        blocks = set(self._blocks)
+        self._roots = [
+            obj.id.root
+            for obj in space.objects
+            if type(obj).kinematic
+            and obj.__dict__.get("_column_block") not in blocks
+            and all(hasattr(obj, name) for name in names)
+        ]
+
+        rows = {}
+        for block in self._blocks:
+            for obj in block.objects:
+                rows[obj.id.root] = len(rows)
+        for root in self._roots:
+            rows[root] = len(rows)
+
+        edges: dict[str, tuple[list, list]] = {}
+        if self.forces and space.edges is not None:
+            edges = space.edges.between("interactions", rows, self.forces)
+        elif self.forces:
+            for root, row in rows.items():
+                for target, edge in space[root].interactions.items():
+                    if edge.edge_type in self.forces and target in rows:
+                        sources, targets = edges.setdefault(edge.edge_type, ([], []))
+                        sources.append(row)
+                        targets.append(rows[target])
+        self._edges = {
+            kind: (np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64))
+            for kind, (sources, targets) in edges.items()
+        }
+        self._topology = space._topology
+
+    def _column(
+        self, block: "ColumnBlock", name: str, default: float
+    ) -> np.ndarray:
+        if name in block.fields:
+            return getattr(block, name)
+        return np.full(block.size, default)
+
+    def _read(self, objects: list["Object"]) -> tuple[np.ndarray, ...]:
+        """
+        Returns the positions, velocities, forces, masses and radii of every
+        body, clearing the queued forces.
+        """
+        count = len(self)
+        with_mass = bool(self._edges)
+        with_radius = self.universe is not None
+
+        positions, velocities, forces, masses, radii = [], [], [], [], []
+        for block in self._blocks:
+            positions.append(getattr(block, self.position))
+            velocities.append(getattr(block, self.velocity))
+            if self.debt in block.fields:
+                debt = getattr(block, self.debt)
+                forces.append(debt.copy())
+                setattr(block, self.debt, 0)
+            else:
+                forces.append(np.zeros_like(velocities[-1], dtype=np.float64))
+            if with_mass:
+                masses.append(self._column(block, self.mass, 1.0))
+            if with_radius:
+                radii.append(self._column(block, self.radius, 0.0))
+
+        if objects:
+            positions.append(_rows(list(map(attrgetter(self.position), objects))))
+            velocities.append(_rows(list(map(attrgetter(self.velocity), objects))))
+            force = np.zeros(velocities[-1].shape)
+            for row, obj in enumerate(objects):
+                debt = getattr(obj, self.debt, None)
+                if debt:
+                    for queued in debt:
+                        force[row] += tuple(queued)
+                    debt.clear()
+            forces.append(force)
+            if with_mass:
+                masses.append(
+                    np.array([getattr(obj, self.mass, 1.0) for obj in objects])
+                )
+            if with_radius:
+                radii.append(
+                    np.array([getattr(obj, self.radius, 0.0) for obj in objects])
+                )
+
+        def joined(chunks: list, vector: bool = True) -> np.ndarray:
+            if not chunks:
+                return np.ones(count)
+            chunks = [np.asarray(chunk, dtype=np.float64) for chunk in chunks]
+            if vector:
+                chunks = [chunk.reshape(len(chunk), -1) for chunk in chunks]
+            if len(chunks) == 1:
+                return chunks[0].copy()
+            return np.concatenate(chunks)
+
+        return (
+            joined(positions),
+            joined(velocities),
+            joined(forces),
+            joined(masses, vector=False),
+            joined(radii, vector=False),
+        )
+
+    def _accumulate(
+        self, positions: np.ndarray, masses: np.ndarray, forces: np.ndarray
+    ) -> None:
+        """
+        Adds the forces along the interaction edges to the forces.
+        """
+        count, width = forces.shape
+        for kind, (sources, targets) in self._edges.items():
+            if not len(sources):
+                continue
+            offset = positions[targets] - positions[sources]
+            distance = np.sqrt(np.einsum("ij,ij->i", offset, offset))
+            pushed = self.forces[kind](offset, distance, masses[sources], masses[targets])
+            for axis in range(width):
+                forces[:, axis] += np.bincount(
+                    sources, weights=pushed[:, axis], minlength=count
+                )
+
+    def _borders(
+        self, positions: np.ndarray, velocities: np.ndarray, radii: np.ndarray
+    ) -> None:
+        """
+        Resolves border collisions in place, like fizicks Collision.
+        """
+        axes = min(_BORDER_AXES, positions.shape[1])
+        size = np.array(tuple(self.universe.dimensions)[:axes], dtype=np.float64)
+        position = positions[:, :axes]
+        if self.universe.toroidal:
+            position[:] = np.where(
+                position < 0, size, np.where(position > size, 0.0, position)
+            )
+            return
+        radius = radii[:, None]
+        hit = (position - radius < 0) | (position + radius > size)
+        if hit.any():
+            velocity = velocities[:, :axes]
+            velocity[hit] = -velocity[hit]
+            clamped = np.maximum(radius, np.minimum(position, size - radius))
+            position[hit] = clamped[hit]
+
+    def integrate(self, space: "Space") -> None:
+        """
+        Moves every kinematic object in the space by one step.
+
+        Called by Space.update() before the objects are updated. Bodies and
+        force edges are collected again when objects or edges were added or
+        removed through the space.
+
+        Parameters
+        ----------
+        space (Space):
+            The space to integrate
+        """
+        if self._topology != space._topology:
+            self._collect(space)
+        if not len(self):
+            return
+        edit = space.edit
+        objects = [edit(space[root]) for root in self._roots]
+        positions, velocities, forces, masses, radii = self._read(objects)
+        start = len(positions) - len(objects)
+        before = positions[start:].copy(), velocities[start:].copy()
+
+        if self._edges:
+            self._accumulate(positions, masses, forces)
+        if self.universe is not None:
+            self._borders(positions, velocities, radii)
+        velocities += forces
+        positions += velocities * self.dt
+        if self.universe is not None:
+            self._borders(positions, velocities, radii)
+
+        row = 0
+        for block in self._blocks:
+            end = row + block.size
+            for name, values in (
+                (self.position, positions),
+                (self.velocity, velocities),
+            ):
+                column = getattr(block, name)
+                setattr(block, name, values[row:end].reshape(column.shape))
+            row = end
+        if objects:
+            self._write(objects, positions[start:], velocities[start:], before)
+
+    def _write(
+        self,
+        objects: list["Object"],
+        positions: np.ndarray,
+        velocities: np.ndarray,
+        before: tuple[np.ndarray, np.ndarray],
+    ) -> None:
+        """
+        Writes the positions and velocities that changed back to the objects.
+        """
+        for name, values, old in (
+            (self.position, positions, before[0]),
+            (self.velocity, velocities, before[1]),
+        ):
+            changed = np.flatnonzero((values != old).any(axis=1)).tolist()
+            if not changed:
+                continue
+            make, kind = None, None
+            for index, row in zip(changed, values[changed].tolist()):
+                obj = objects[index]
+                # Sleeping objects are not updated this tick
+                obj.touch()
+                value = getattr(obj, name)
+                if type(value) is not kind:
+                    kind = type(value)
+                    make = _maker(value)
+                setattr(obj, name, make(row))
@@ -0,0 +1,497 @@
+"""
+Per-phase profiling of simulation ticks.
+
+A Profiler records the wall time of every phase of a tick while it is
+enabled:
+
+- TimeBandit.update(): ``tick``, around ``space.update``, ``tick.state`` and
+  ``tick.history``
+- Space.update(): ``space.update``, around ``space.effects``,
+  ``space.physics``, ``space.objects``, ``space.columns``, ``space.swap`` and
+  ``space.spatial``, ``effect.apply`` per effect class and ``block.update``
+  per class for every batched column block
+- Object.update(), per object class: ``object.update`` (the user _update),
+  ``object.clock`` (Clock and Identity bookkeeping), ``object.state`` (building
+  the state) and ``object.history`` (the push to the temporal buffer)
+
+With ``allocations=True`` it also records the net number of memory blocks
+allocated by every phase. Counting allocations is slow and multiplies the
+cost of profiling objects.
+
+Phases nest, so the totals of a phase and the phases inside it overlap.
+
+Example
+-------
+    with Profiler() as profiler:
+        bandit.run(100)
+    profiler.stats.by_class()           # the hottest object classes first
+    profiler.stats.query("object.state", "Ball")
+    print(profiler.stats.table())
+    profiler.export_chrome_trace("ticks.json")
+
+The trace opens in chrome://tracing or Perfetto. It holds the tick and space
+phases as nested slices, and a counter per tick with the time spent in every
+object class.
+
+When no profiler is enabled, every instrumented method only checks the
+module-level ``active`` profiler, so profiling costs nothing else.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Optional, Union
+
+# The enabled profiler, None when profiling is off
+active: Optional["Profiler"] = None
+
+
+class PhaseStats:
+    """
+    The time spent in one phase, for one object class or overall.
+
+    Attributes
+    ----------
+    calls (int):
+        The number of times the phase ran
+    total (float):
+        The total wall time in seconds
+    min (float):
+        The shortest run in seconds
+    max (float):
+        The longest run in seconds
+    allocations (int):
+        The net number of memory blocks allocated, if counted
+    """
+
+    __slots__ = ("calls", "total", "min", "max", "allocations")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.allocations = 0
+
+    def add(self, duration: float, allocations: int = 0) -> None:
+        self.calls += 1
+        self.total += duration
+        if duration < self.min:
+            self.min = duration
+        if duration > self.max:
+            self.max = duration
+        self.allocations += allocations
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (
+            f"PhaseStats(calls={self.calls}, total={self.total:.6f}, "
+            f"mean={self.mean:.3g})"
+        )
+
+
+Key = tuple[str, Optional[type]]
+
+
+class ProfileStats:
+    """
+    Queryable statistics of a profiler.
+
+    Attributes
+    ----------
+    phases (dict[tuple[str, type], PhaseStats]):
+        The stats of every phase and object class, the class is None for
+        phases that are not per class
+    ticks (list[float]):
+        The duration of every tick in seconds
+
+    Methods
+    -------
+    query(phase: str = None, cls: type | str = None) -> list[tuple]:
+        Returns the (phase, class name, PhaseStats) of matching phases
+    total(phase: str = None, cls: type | str = None) -> float:
+        Returns the total time of matching phases
+    by_class(phase: str = "object") -> list[tuple[str, float]]:
+        Returns the time spent in every object class, hottest first
+    by_phase() -> list[tuple[str, float]]:
+        Returns the time spent in every phase, summed over classes
+    table() -> str:
+        Returns the stats as a text table
+    """
+
+    def __init__(self, phases: dict[Key, PhaseStats], ticks: list[float]) -> None:
+        self.phases = phases
+        self.ticks = ticks
+
+    def query(
+        self, phase: Optional[str] = None, cls: Union[type, str, None] = None
+    ) -> list[tuple[str, Optional[str], PhaseStats]]:
+        """
+        Returns the stats of matching phases.
+
+        Parameters
+        ----------
+        phase (str, optional):
+            A phase name, or a prefix like "object" for all object phases
+        cls (type | str, optional):
+            An object class or class name
+
+        Returns
+        -------
+        list[tuple[str, str, PhaseStats]]:
+            The phase, class name and stats of every match, longest first
+        """
+        matches = [
+            (name, _class_name(owner), stats)
+            for (name, owner), stats in self.phases.items()
+            if _matches(name, phase) and (cls is None or _is_class(owner, cls))
+        ]
+        return sorted(matches, key=lambda match: match[2].total, reverse=True)
+
+    def total(
+        self, phase: Optional[str] = None, cls: Union[type, str, None] = None
+    ) -> float:
+        """
+        Returns the total time of matching phases in seconds, see query().
+        """
+        return sum(stats.total for _, _, stats in self.query(phase, cls))
+
+    def by_class(self, phase: str = "object") -> list[tuple[str, float]]:
+        """
+        Returns the time spent in every object class, hottest first.
+
+        Parameters
+        ----------
+        phase (str):
+            A phase name or prefix, defaults to every object phase
+
+        Returns
+        -------
+        list[tuple[str, float]]:
+            The class name and total time in seconds
+        """
+        totals: dict[str, float] = {}
+        for _, owner, stats in self.query(phase):
+            if owner is not None:
+                totals[owner] = totals.get(owner, 0.0) + stats.total
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def by_phase(self) -> list[tuple[str, float]]:
+        """
+        Returns the time spent in every phase, summed over classes, in
+        seconds and longest first.
+        """
+        totals: dict[str, float] = {}
+        for (name, _), stats in self.phases.items():
+            totals[name] = totals.get(name, 0.0) + stats.total
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def table(self) -> str:
+        """
+        Returns the stats as a text table, longest phase first.
+        """
+        lines = [
+            f"{'phase':16} {'class':24} {'calls':>9} {'total ms':>10} "
+            f"{'mean us':>10} {'allocs':>9}"
+        ]
+        for name, owner, stats in self.query():
+            lines.append(
+                f"{name:16} {owner or '-':24} {stats.calls:9d} "
+                f"{stats.total * 1e3:10.3f} {stats.mean * 1e6:10.2f} "
+                f"{stats.allocations:9d}"
+            )
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict:
+        """
+        Returns the stats as plain data, e.g. to write as JSON.
+        """
+        return {
+            "ticks": list(self.ticks),
+            "phases": [
+                {"phase": name, "class": _class_name(owner), **stats.as_dict()}
+                for (name, owner), stats in self.phases.items()
+            ],
+        }
+
+
+def _matches(name: str, phase: Optional[str]) -> bool:
+    return phase is None or name == phase or name.startswith(phase + ".")
+
+
+def _class_name(cls: Optional[type]) -> Optional[str]:
+    return None if cls is None else cls.__qualname__
+
+
+def _is_class(owner: Optional[type], cls: Union[type, str]) -> bool:
+    if owner is None:
+        return False
+    return owner is cls if isinstance(cls, type) else owner.__qualname__ == cls
+
+
+class _Phase:
+    """
+    Times one phase, used as a context manager.
+    """
+
+    __slots__ = ("profiler", "name", "cls", "start", "blocks")
+
+    def __init__(self, profiler: "Profiler", name: str, cls: Optional[type]) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.cls = cls
+
+    def __enter__(self) -> "_Phase":
+        self.profiler._depth += 1
+        self.blocks = sys.getallocatedblocks() if self.profiler.allocations else 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        end = time.perf_counter()
+        profiler = self.profiler
+        blocks = sys.getallocatedblocks() - self.blocks if profiler.allocations else 0
+        profiler._add(self.name, self.cls, end - self.start, blocks)
+        profiler._depth -= 1
+        if profiler.trace:
+            profiler._event(self.name, self.cls, self.start, end)
+        if profiler._depth == 0:
+            profiler._end_tick(self.name, end - self.start, end)
+
+
+class _NoPhase:
+    """
+    The phase returned while profiling is off, does nothing.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name: str, cls: Optional[type] = None) -> Union[_Phase, _NoPhase]:
+    """
+    Returns a context manager that times a phase with the active profiler.
+
+    Parameters
+    ----------
+    name (str):
+        The name of the phase
+    cls (type, optional):
+        The object class the phase belongs to
+
+    Returns
+    -------
+    context manager:
+        Records the phase on exit, does nothing if no profiler is enabled
+    """
+    profiler = active
+    if profiler is None:
+        return _NO_PHASE
+    return _Phase(profiler, name, cls)
+
+
+class _Laps:
+    """
+    Times consecutive phases of one object class, each from the end of the
+    previous one. See laps().
+    """
+
+    __slots__ = ("profiler", "cls", "last", "blocks")
+
+    def __init__(self, profiler: "Profiler", cls: type) -> None:
+        self.profiler = profiler
+        self.cls = cls
+        self.blocks = sys.getallocatedblocks() if profiler.allocations else 0
+        self.last = time.perf_counter()
+
+    def __call__(self, name: str) -> None:
+        end = time.perf_counter()
+        profiler = self.profiler
+        blocks = sys.getallocatedblocks() if profiler.allocations else 0
+        duration = end - self.last
+        profiler._add(name, self.cls, duration, blocks - self.blocks)
+        classes = profiler._tick_classes
+        classes[self.cls] = classes.get(self.cls, 0.0) + duration
+        self.blocks = blocks
+        self.last = time.perf_counter()
+
+
+def laps(cls: type) -> Optional[_Laps]:
+    """
+    Returns a timer of the consecutive phases of an object of a class, or
+    None if no profiler is enabled or it does not profile objects.
+
+    Calling the timer with the name of a phase records the time since the
+    previous call, so the phases of Object.update() are timed without a
+    context manager per phase.
+
+    Parameters
+    ----------
+    cls (type):
+        The object class the phases belong to
+
+    Returns
+    -------
+    Callable[[str], None]:
+        Records a phase that ended now, None while objects are not profiled
+    """
+    profiler = active
+    if profiler is None or not profiler.objects:
+        return None
+    return _Laps(profiler, cls)
+
+
+class Profiler:
+    """
+    Records the time spent in every phase of a tick, per object class.
+
+    Only one profiler is enabled at a time. The outermost phase of a call,
+    TimeBandit.update() or Space.update() on its own, counts as a tick.
+
+    Parameters
+    ----------
+    objects (bool):
+        Profile the phases of every Object.update()
+    allocations (bool):
+        Count the net memory blocks allocated by every phase, slow
+    trace (bool):
+        Keep the events for export_chrome_trace()
+
+    Methods
+    -------
+    enable() -> Profiler:
+        Starts profiling
+    disable() -> None:
+        Stops profiling
+    reset() -> None:
+        Clears the recorded stats and events
+    export_chrome_trace(path: str) -> str:
+        Writes the recorded ticks in the Chrome trace event format
+
+    Properties
+    ----------
+    stats
+        The recorded stats, see ProfileStats
+    """
+
+    def __init__(
+        self, objects: bool = True, allocations: bool = False, trace: bool = True
+    ) -> None:
+        self.objects = objects
+        self.allocations = allocations
+        self.trace = trace
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clears the recorded stats and events.
+        """
+        self._phases: dict[Key, PhaseStats] = {}
+        self._ticks: list[float] = []
+        self._events: list[dict] = []
+        self._tick_classes: dict[type, float] = {}
+        self._depth = 0
+        self._origin = time.perf_counter()
+
+    def enable(self) -> "Profiler":
+        """
+        Starts profiling, replacing any other enabled profiler.
+        """
+        global active
+        active = self
+        return self
+
+    def disable(self) -> None:
+        """
+        Stops profiling if this profiler is enabled.
+        """
+        global active
+        if active is self:
+            active = None
+
+    def __enter__(self) -> "Profiler":
+        return self.enable()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.disable()
+
+    @property
+    def stats(self) -> ProfileStats:
+        """
+        The recorded stats.
+        """
+        return ProfileStats(self._phases, self._ticks)
+
+    def _add(self, name: str, cls: Optional[type], duration: float, blocks: int) -> None:
+        stats = self._phases.get((name, cls))
+        if stats is None:
+            stats = self._phases[(name, cls)] = PhaseStats()
+        stats.add(duration, blocks)
+
+    def _event(self, name: str, cls: Optional[type], start: float, end: float) -> None:
+        event = {
+            "name": name,
+            "cat": name.partition(".")[0],
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if cls is not None:
+            event["args"] = {"class": cls.__qualname__}
+        self._events.append(event)
+
+    def _end_tick(self, name: str, duration: float, end: float) -> None:
+        """
+        Closes a tick after its outermost phase.
+        """
+        self._ticks.append(duration)
+        if self.trace and self._tick_classes:
+            self._events.append(
+                {
+                    "name": "object time (ms)",
+                    "ph": "C",
+                    "ts": (end - self._origin) * 1e6,
+                    "pid": os.getpid(),
+                    "args": {
+                        cls.__qualname__: total * 1e3
+                        for cls, total in self._tick_classes.items()
+                    },
+                }
+            )
+        self._tick_classes = {}
+
+    def export_chrome_trace(self, path: str) -> str:
+        """
+        Writes the recorded ticks in the Chrome trace event format.
+
+        Parameters
+        ----------
+        path (str):
+            The JSON file to write
+
+        Returns
+        -------
+        str:
+            The path of the trace
+        """
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self._events, "displayTimeUnit": "ms"}, f)
+        return path
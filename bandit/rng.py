@@ -0,0 +1,373 @@
+"""
+Random numbers that do not depend on the order objects are updated in.
+
+A Space created with ``rng=RandomStreams(seed)`` gives every object its own
+stream of random numbers at every step, ``object.rng``, instead of a share of
+the global ``random`` module. The numbers of a stream are a hash of the seed,
+the root ID of the object, its cycle and step and the position in the stream,
+so they are the same whatever else is drawn before them: in any update order,
+in waves, in batches, after a restore or in a branch.
+
+Nothing is stored between draws. A fork of the space shares its streams, so a
+branch replays exactly the numbers its parent drew, and ``reseed()`` returns
+streams for a different seed at no cost.
+
+A whole population draws at once with the methods of RandomStreams, e.g. in
+an ``_update_batch`` hook. Row i of the result holds the numbers the stream of
+object i would give at its current step, so a batched update draws the same
+numbers as the per-object updates it replaces.
+
+The numbers are produced by a splitmix64 counter hash, in Python integers for
+one object and in NumPy uint64 arrays for a population. Both give the same
+bits, and floats are converted from them the same way.
+
+Example
+-------
+    class Walker(Object):
+        def _update(self):
+            self.x += self.rng.normal(0.0, 1.0)
+
+        @classmethod
+        def _update_batch(cls, block):
+            block.x += block.rng.normal(block, 0.0, 1.0)
+
+    space = Space(rng=RandomStreams(seed=42))
+"""
+
+from hashlib import blake2b
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from bandit.columnar import ColumnBlock
+    from bandit.object import Object
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_GAMMA = 0xD1B54A32D192ED03
+_M1 = 0xBF58476D1CE4E5B9
+_M2 = 0x94D049BB133111EB
+_TWO_PI = 2.0 * np.pi
+
+
+def _mix(z: int) -> int:
+    """
+    The splitmix64 hash of a 64-bit integer.
+    """
+    z = (z + _GOLDEN) & _MASK
+    z = ((z ^ (z >> 30)) * _M1) & _MASK
+    z = ((z ^ (z >> 27)) * _M2) & _MASK
+    return z ^ (z >> 31)
+
+
+def _mix_array(z: np.ndarray) -> np.ndarray:
+    """
+    The splitmix64 hash of every element of a uint64 array, the same bits as
+    _mix().
+    """
+    z = z + np.uint64(_GOLDEN)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(_M1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(_M2)
+    return z ^ (z >> np.uint64(31))
+
+
+def _time(cycle: int, step: int) -> int:
+    return ((cycle & 0xFFFFFFFF) << 32) | (step & 0xFFFFFFFF)
+
+
+def _floats(bits: np.ndarray) -> np.ndarray:
+    return (bits >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+
+def _normals(bits: np.ndarray) -> np.ndarray:
+    """
+    Standard normals from pairs of draws along the last axis, Box-Muller.
+    """
+    u = _floats(bits)
+    radius = np.sqrt(-2.0 * np.log1p(-u[..., 0::2]))
+    return radius * np.cos(_TWO_PI * u[..., 1::2])
+
+
+class Stream:
+    """
+    The random numbers of one object at one step.
+
+    Every call continues from the numbers the previous calls drew. Passing
+    a size returns a NumPy array instead of a single number.
+
+    Attributes
+    ----------
+    source (RandomStreams):
+        The streams the stream belongs to
+    cycle (int):
+        The cycle of the stream
+    step (int):
+        The step of the stream
+    position (int):
+        The number of draws taken so far
+
+    Methods
+    -------
+    random(size: int = None) -> float | np.ndarray:
+        Floats in [0, 1)
+    uniform(low: float, high: float, size: int = None) -> float | np.ndarray:
+        Floats in [low, high)
+    normal(loc: float, scale: float, size: int = None) -> float | np.ndarray:
+        Normally distributed floats
+    integers(low: int, high: int = None, size: int = None) -> int | np.ndarray:
+        Integers in [low, high)
+    choice(sequence: Sequence) -> Any:
+        One element of a sequence
+    """
+
+    __slots__ = ("source", "cycle", "step", "position", "_base")
+
+    def __init__(self, source: "RandomStreams", base: int, cycle: int, step: int) -> None:
+        self.source = source
+        self.cycle = cycle
+        self.step = step
+        self.position = 0
+        self._base = base
+
+    def __repr__(self) -> str:
+        return f"Stream({self.cycle}:{self.step}, position={self.position})"
+
+    def follows(self, source: "RandomStreams", cycle: int, step: int) -> bool:
+        """
+        Whether the stream is the stream of a source at a time.
+        """
+        return self.source is source and self.cycle == cycle and self.step == step
+
+    def _draw(self) -> int:
+        bits = _mix((self._base + self.position * _GAMMA) & _MASK)
+        self.position += 1
+        return bits
+
+    def _draws(self, count: int) -> np.ndarray:
+        positions = np.arange(self.position, self.position + count, dtype=np.uint64)
+        self.position += count
+        return _mix_array(np.uint64(self._base) + positions * np.uint64(_GAMMA))
+
+    def random(self, size: Optional[int] = None) -> Union[float, np.ndarray]:
+        """
+        Returns floats in [0, 1).
+        """
+        if size is None:
+            return (self._draw() >> 11) * 2.0**-53
+        return _floats(self._draws(size))
+
+    def uniform(
+        self, low: float = 0.0, high: float = 1.0, size: Optional[int] = None
+    ) -> Union[float, np.ndarray]:
+        """
+        Returns floats in [low, high).
+        """
+        return low + (high - low) * self.random(size)
+
+    def normal(
+        self, loc: float = 0.0, scale: float = 1.0, size: Optional[int] = None
+    ) -> Union[float, np.ndarray]:
+        """
+        Returns normally distributed floats, two draws each.
+        """
+        values = loc + scale * _normals(self._draws(2 * (size or 1)))
+        return float(values[0]) if size is None else values
+
+    def integers(
+        self, low: int, high: Optional[int] = None, size: Optional[int] = None
+    ) -> Union[int, np.ndarray]:
+        """
+        Returns integers in [low, high), or in [0, low) without high.
+        """
+        if high is None:
+            low, high = 0, low
+        if size is None:
+            return low + int(self.random() * (high - low))
+        return low + (self.random(size) * (high - low)).astype(np.int64)
+
+    def choice(self, sequence: Sequence) -> Any:
+        """
+        Returns one element of a sequence.
+        """
+        return sequence[self.integers(len(sequence))]
+
+
+class RandomStreams:
+    """
+    The random streams of a Space, one per object and step.
+
+    The streams hold no state, every number is computed from the seed, the
+    root ID of the object, its time and the position of the number in the
+    stream.
+
+    Parameters
+    ----------
+    seed (int):
+        The seed of every stream
+
+    Attributes
+    ----------
+    seed (int):
+        The seed of every stream
+
+    Methods
+    -------
+    stream(root: Any, cycle: int, step: int) -> Stream:
+        The stream of an object at a time
+    reseed(seed: int) -> RandomStreams:
+        Streams with another seed
+    random(objects, size: int = None, offset: int = 0) -> np.ndarray:
+        Floats in [0, 1), one row per object
+    uniform(objects, low, high, size: int = None, offset: int = 0) -> np.ndarray:
+        Floats in [low, high), one row per object
+    normal(objects, loc, scale, size: int = None, offset: int = 0) -> np.ndarray:
+        Normally distributed floats, one row per object
+    integers(objects, low, high, size: int = None, offset: int = 0) -> np.ndarray:
+        Integers in [low, high), one row per object
+    """
+
+    def __init__(self, seed: int = 0) -> None:
+        self.seed = seed
+        self._seed_key = _mix(seed & _MASK)
+        self._keys: dict = {}
+
+    def __repr__(self) -> str:
+        return f"RandomStreams(seed={self.seed})"
+
+    def __reduce__(self) -> tuple:
+        return RandomStreams, (self.seed,)
+
+    def key(self, root: Any) -> int:
+        """
+        The 64-bit key of the streams of an object.
+        """
+        key = self._keys.get(root)
+        if key is None:
+            digest = blake2b(str(root).encode(), digest_size=8).digest()
+            key = _mix(self._seed_key ^ int.from_bytes(digest, "little"))
+            self._keys[root] = key
+        return key
+
+    def stream(self, root: Any, cycle: int, step: int) -> Stream:
+        """
+        Returns the stream of an object at a time, from its first draw.
+
+        Parameters
+        ----------
+        root (Any):
+            The root ID of the object
+        cycle (int):
+            The cycle of the object
+        step (int):
+            The step of the object
+
+        Returns
+        -------
+        Stream:
+            The stream
+        """
+        base = _mix(self.key(root) ^ _mix(_time(cycle, step)))
+        return Stream(self, base, cycle, step)
+
+    def reseed(self, seed: int) -> "RandomStreams":
+        """
+        Returns streams with another seed, e.g. for a branch that explores
+        other outcomes than its parent.
+        """
+        return RandomStreams(seed)
+
+    def _bases(self, objects: Union["ColumnBlock", Iterable["Object"]]) -> np.ndarray:
+        """
+        The base of the stream of every object at its current time.
+        """
+        from bandit.columnar import ColumnBlock
+
+        if isinstance(objects, ColumnBlock):
+            members = objects.objects[: objects.size]
+            cycles, steps = objects.cycle, objects.step
+        else:
+            members = list(objects)
+            cycles = np.array([obj.clock.cycle for obj in members], dtype=np.int64)
+            steps = np.array([obj.clock.step for obj in members], dtype=np.int64)
+        keys = np.fromiter(
+            (self.key(obj.id.root) for obj in members), dtype=np.uint64, count=len(members)
+        )
+        times = (cycles.astype(np.uint64) & np.uint64(0xFFFFFFFF)) << np.uint64(32)
+        times |= steps.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+        return _mix_array(keys ^ _mix_array(times))
+
+    def _draws(self, objects: Any, count: int, offset: int) -> np.ndarray:
+        positions = np.arange(offset, offset + count, dtype=np.uint64)
+        bases = self._bases(objects)
+        return _mix_array(bases[:, None] + positions * np.uint64(_GAMMA))
+
+    def random(
+        self, objects: Any, size: Optional[int] = None, offset: int = 0
+    ) -> np.ndarray:
+        """
+        Returns floats in [0, 1) for a population, the numbers ``random()``
+        gives on the stream of every object at its current time.
+
+        Parameters
+        ----------
+        objects (ColumnBlock | Iterable[Object]):
+            The objects, a block draws for its populated rows
+        size (int, optional):
+            The number of floats per object, a (objects, size) array. One
+            float per object by default
+        offset (int):
+            The number of draws of every stream to skip, e.g. the draws taken
+            by an earlier call at the same step
+
+        Returns
+        -------
+        np.ndarray:
+            The floats, one row per object
+        """
+        values = _floats(self._draws(objects, size or 1, offset))
+        return values[:, 0] if size is None else values
+
+    def uniform(
+        self,
+        objects: Any,
+        low: float = 0.0,
+        high: float = 1.0,
+        size: Optional[int] = None,
+        offset: int = 0,
+    ) -> np.ndarray:
+        """
+        Returns floats in [low, high) for a population, see random().
+        """
+        return low + (high - low) * self.random(objects, size, offset)
+
+    def normal(
+        self,
+        objects: Any,
+        loc: float = 0.0,
+        scale: float = 1.0,
+        size: Optional[int] = None,
+        offset: int = 0,
+    ) -> np.ndarray:
+        """
+        Returns normally distributed floats for a population, two draws each,
+        see random().
+        """
+        values = loc + scale * _normals(self._draws(objects, 2 * (size or 1), offset))
+        return values[:, 0] if size is None else values
+
+    def integers(
+        self,
+        objects: Any,
+        low: int,
+        high: Optional[int] = None,
+        size: Optional[int] = None,
+        offset: int = 0,
+    ) -> np.ndarray:
+        """
+        Returns integers in [low, high), or in [0, low) without high, for a
+        population, see random().
+        """
+        if high is None:
+            low, high = 0, low
+        return low + (self.random(objects, size, offset) * (high - low)).astype(np.int64)
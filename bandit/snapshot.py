@@ -0,0 +1,267 @@
+"""
+Snapshots of a running simulation, to rewind it without simulating it again.
+
+A TimeBandit created with ``snapshots=Snapshots(interval)`` keeps a frozen
+copy of its space every ``interval`` steps. ``TimeBandit.seek(cycle, step)``
+restores the nearest snapshot at or before the target and replays the steps
+after it, so a seek costs one copy of the space and at most ``interval``
+updates, however long the run is.
+
+Snapshots are copy-on-write forks of the space, see Space.fork(): taking one
+copies nothing, an object is only copied the first time the simulation
+changes it after the snapshot. Restoring one copies every object once, see
+Space.materialize(). The update order of the objects is recorded with every
+snapshot, so the replay updates them in the same order as the original run.
+
+The copy includes the history of the object, so when every object changes
+every step, each snapshot costs one copy of every object and its history,
+spread over the steps after it. With a history of 100 states, snapshots
+every 100 steps cost about as much as not taking any, every 10 steps about
+15% more per step and every step twice as much. See the snapshot.run case
+of the benchmarks.
+
+Columnar spaces cannot be forked. Their snapshots are checkpoints written
+to memory instead, see bandit.checkpoint: the Column arrays of every block
+copied as they are, and the other attributes pickled. Taking one costs a
+few microseconds per object, and restoring one loads the checkpoint. See the
+snapshot.columnar case of the benchmarks.
+
+The number of snapshots is bounded: once there are more than ``limit`` of
+them, every other one is dropped and the interval doubles. A run of any
+length keeps snapshots spread over its whole length, and they hold at most
+``limit`` copies of every object that changes between two snapshots.
+
+Example
+-------
+    bandit = TimeBandit(space, snapshots=Snapshots(100))
+    bandit.run(1_000_000)
+
+    bandit.seek(5000, 3)        # the simulation as it was at 5000:3
+    bandit.seek(90000, 0)       # scrubbing forward keeps the old future
+    bandit.run(10)              # running from here replaces it
+"""
+
+import io
+from bisect import bisect_right
+from typing import TYPE_CHECKING, Any, Iterator, NamedTuple, Optional
+
+from bandit.clock import Clock
+from bandit.space import Space
+
+if TYPE_CHECKING:
+    from bandit.main import TimeBandit
+
+
+class Snapshot(NamedTuple):
+    """
+    A frozen copy of the space of a simulation at a number of ticks: a fork
+    of the space, or a checkpoint in memory for a columnar space or once
+    pickled. The clock is None when the simulation uses the clock of the
+    space.
+    """
+
+    ticks: int
+    space: Optional[Space]
+    keys: list
+    clock: Optional[Clock]
+    data: Optional[bytes] = None
+
+    def restore(self) -> Space:
+        """
+        Returns a space restored from the snapshot, that shares nothing with
+        it.
+        """
+        if self.data is not None:
+            from bandit.checkpoint import _read
+
+            return _read(self.data)[0]
+        return self.space.materialize(self.keys)
+
+    def compact(self) -> "Snapshot":
+        """
+        Returns the snapshot as a checkpoint in memory, that does not share
+        objects with the space it was taken from.
+        """
+        if self.data is not None:
+            return self
+        from bandit.checkpoint import _write
+
+        # A fork is copied in update order first, a columnar space as it is
+        space = self.space if self.space.columns is not None else self.restore()
+        data = _write(io.BytesIO(), space).getvalue()
+        return self._replace(space=None, data=data)
+
+
+class Snapshots:
+    """
+    The snapshots of a simulation, oldest first.
+
+    Parameters
+    ----------
+    interval (int):
+        The number of steps between two snapshots
+    limit (int):
+        The number of snapshots kept before every other one is dropped
+
+    Attributes
+    ----------
+    interval (int):
+        The current number of steps between two snapshots
+    limit (int):
+        The maximum number of snapshots
+
+    Methods
+    -------
+    due(ticks: int) -> bool:
+        Whether a snapshot is taken at a number of ticks
+    capture(bandit: TimeBandit) -> Snapshot:
+        Takes a snapshot of a simulation at its current time
+    find(ticks: int) -> Snapshot:
+        Returns the latest snapshot at or before a number of ticks
+    discard(after: int):
+        Drops the snapshots after a number of ticks
+    clone() -> Snapshots:
+        Returns snapshots that share the snapshots taken so far
+    """
+
+    def __init__(self, interval: int = 100, limit: int = 64) -> None:
+        if interval < 1:
+            raise ValueError("The snapshot interval must be at least 1")
+        self.interval = interval
+        self.limit = max(2, limit)
+        self._snapshots: list[Snapshot] = []
+        self._ticks: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def __iter__(self) -> Iterator[Snapshot]:
+        return iter(self._snapshots)
+
+    def __repr__(self) -> str:
+        return f"Snapshots({len(self)}, interval={self.interval})"
+
+    @property
+    def latest(self) -> Optional[Snapshot]:
+        """
+        The most recent snapshot, None if there is none.
+        """
+        return self._snapshots[-1] if self._snapshots else None
+
+    def due(self, ticks: int) -> bool:
+        """
+        Whether a snapshot is taken at a number of ticks.
+        """
+        return ticks % self.interval == 0
+
+    def capture(self, bandit: "TimeBandit") -> Snapshot:
+        """
+        Takes a snapshot of a simulation at its current time, replacing the
+        snapshots at the same time or later.
+
+        Parameters
+        ----------
+        bandit (TimeBandit):
+            The simulation
+
+        Returns
+        -------
+        Snapshot:
+            The snapshot
+        """
+        ticks = bandit.clock.ticks
+        self.discard(ticks - 1)
+        space = bandit.space
+        clock = None if bandit.clock is space.clock else bandit.clock.clone()
+        if space.columns is not None:
+            snapshot = Snapshot(ticks, space, list(space.keys()), clock).compact()
+        else:
+            snapshot = Snapshot(ticks, space.fork(), list(space.keys()), clock)
+        self._snapshots.append(snapshot)
+        self._ticks.append(ticks)
+        if len(self._snapshots) > self.limit:
+            self._thin()
+        return snapshot
+
+    def find(self, ticks: int) -> Optional[Snapshot]:
+        """
+        Returns the latest snapshot at or before a number of ticks.
+
+        Parameters
+        ----------
+        ticks (int):
+            The number of ticks since 1:0
+
+        Returns
+        -------
+        Snapshot:
+            The snapshot, None if every snapshot is later
+        """
+        index = bisect_right(self._ticks, ticks)
+        return self._snapshots[index - 1] if index else None
+
+    def discard(self, after: int) -> None:
+        """
+        Drops the snapshots after a number of ticks, e.g. when the simulation
+        continues from an earlier time.
+
+        Parameters
+        ----------
+        after (int):
+            The number of ticks of the latest snapshot to keep
+        """
+        if not self._ticks or self._ticks[-1] <= after:
+            return
+        index = bisect_right(self._ticks, after)
+        dropped = self._snapshots[index:]
+        del self._snapshots[index:]
+        del self._ticks[index:]
+        self._drop(dropped)
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles every snapshot as a checkpoint in memory, so that the pickle
+        does not share objects with the space, e.g. in a checkpoint of the
+        simulation.
+        """
+        state = dict(self.__dict__)
+        state["_snapshots"] = [snapshot.compact() for snapshot in self._snapshots]
+        return state
+
+    def clone(self) -> "Snapshots":
+        """
+        Returns snapshots that share the snapshots taken so far, e.g. for a
+        branch that shares the past of its parent.
+        """
+        clone = Snapshots(self.interval, self.limit)
+        clone._snapshots = list(self._snapshots)
+        clone._ticks = list(self._ticks)
+        return clone
+
+    def _thin(self) -> None:
+        """
+        Drops every other snapshot and doubles the interval. The first
+        snapshot is always kept.
+        """
+        self.interval *= 2
+        first, rest = self._snapshots[:1], self._snapshots[1:]
+        kept = first + [snapshot for snapshot in rest if self.due(snapshot.ticks)]
+        dropped = [snapshot for snapshot in rest if not self.due(snapshot.ticks)]
+        del rest
+        self._snapshots = kept
+        self._ticks = [snapshot.ticks for snapshot in kept]
+        self._drop(dropped)
+
+    def _drop(self, snapshots: list[Snapshot]) -> None:
+        """
+        Releases the versions the parents of dropped snapshots kept for them.
+        The list is emptied, so that the dropped forks are freed first.
+        """
+        parents: dict[int, Any] = {
+            id(snapshot.space._parent): snapshot.space._parent
+            for snapshot in snapshots
+            if snapshot.space is not None
+        }
+        del snapshots[:]
+        for parent in parents.values():
+            parent._prune()
@@ -46,18 +46,281 @@ their connections as edges in a graph.
     room_space.add_connection(chair, table, connection="next to")
     room_space.add_connection(table, lamp, connection="under")
     
+Columnar Storage
+----------------
+A Space created with ``columnar=True`` stores the Column fields of its objects
+in contiguous arrays, one block per object class, see bandit.columnar. Classes
+that define ``_update_batch`` are updated one block at a time instead of one
+object at a time.
+
+A Space created with ``synchronous=True`` is columnar and double-buffered:
+every object reads the Column fields of the space as they were at the start
+of the tick and its writes only become visible after the tick, so the result
+does not depend on the update order. Attributes that are not Column fields
+are still updated in place.
+
+Spatial Index
+-------------
+A Space created with ``spatial=SpatialGrid(cell_size)`` indexes the positions
+of its objects, see bandit.spatial. ``neighbors()`` and ``query_box()`` only
+visit the grid cells around the query, and the grid can rebuild proximity
+interactions every tick.
+
+Effects
+-------
+A Space created with ``effects=EffectEngine()`` applies persistent, temporal
+and conditional effects to its objects at the start of every ``update()``,
+one batch per effect class, see bandit.effect. Effects are added with
+``add_effect()``.
+
+Physics
+-------
+A Space created with ``physics=Physics()`` integrates the positions and
+velocities of its kinematic objects in one vectorized step at the start of
+every ``update()``, before the objects are updated, see bandit.physics.
+Objects in column blocks are integrated in their block's arrays.
+
+Edge Store
+----------
+A Space created with ``edges=EdgeStore()`` keeps the connections and
+interactions of its objects in NumPy arrays with integer node IDs, see
+bandit.edges. ``Object.connections`` and ``Object.interactions`` become views
+of the store, and the whole graph can be read at once, as edge arrays, a CSR
+adjacency or degree arrays.
+
+Random Streams
+--------------
+A Space created with ``rng=RandomStreams(seed)`` gives every object a stream
+of random numbers keyed by its root ID and time, ``object.rng``, see
+bandit.rng. The numbers do not depend on the update order, and a fork draws
+the same numbers as its parent until it is reseeded.
+
+Shared Clock
+------------
+A Space created with ``shared_clock=True`` owns a master Clock, stepped once
+at the start of every ``update()``. Objects added to it get a ClockView of
+the master instead of stepping their own clock, see bandit.clock. A view
+continues from the object's time when it was added and counts at the rate
+set by the object's ``clock_rate``. Removing an object gives it back an
+independent Clock. Objects in column blocks keep their column clocks, which
+are already stepped in one vectorized call.
+
+Forking
+-------
+``space.fork()`` returns a new Space that shares every object with its parent.
+Forking is O(1): the fork reads through to the parent as it was at the fork,
+and only the objects either side writes to are copied (copy-on-write). The
+parent keeps the previous version of any object it changes after a fork for
+as long as the fork is alive.
+
+Objects are written through ``space.edit(object)``, which returns a private
+copy when the object is still shared. ``update()`` and the connection and
+interaction methods do this automatically. Changing a shared object directly
+changes it in every space that shares it.
+
 TODO
 ----
 - Build out Connection and Interaction edges
 - Loading a Space from a SpaceState
 """
 
-from typing import TYPE_CHECKING, Generator
+import weakref
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Generator,
+    Iterable,
+    Iterator,
+    Optional,
+    Union,
+)
+
+from anarchy import Anarchy, AnarchyGraph
 
-from anarchy import AnarchyGraph
+from bandit import profile as _profile
+from bandit.clock import Clock, ClockView
+from bandit.columnar import ColumnStore
 
 if TYPE_CHECKING:
+    from bandit.edges import EdgeStore
+    from bandit.effect import Effect, EffectEngine
     from bandit.object import Object
+    from bandit.physics import Physics
+    from bandit.rng import RandomStreams
+    from bandit.spatial import SpatialGrid
+    from bandit.update import EventScheduler, UpdateScheduler
+
+
+class _Absent:
+    """
+    Marks an object that was not in a space at a point in time.
+    """
+
+    def __repr__(self) -> str:
+        return "ABSENT"
+
+
+ABSENT = _Absent()
+
+
+class _Pending:
+    """
+    An object state that is built on first read and then kept.
+
+    Every view that holds the entry shares the cell, so the state is built
+    once. The space builds it before the object changes.
+    """
+
+    __slots__ = ("object", "state")
+
+    def __init__(self, object: "Object") -> None:
+        self.object = object
+        self.state = None
+
+    def get(self) -> dict:
+        if self.object is not None:
+            self.state = self.object.state()
+            self.object = None
+        return self.state
+
+
+class StateView(Mapping):
+    """
+    A read-only mapping of object states by root ID, returned by Space.state().
+
+    The newest view holds the entries of every object in one dict. A new view
+    takes the dict over and writes only the entries that changed, so building
+    a view costs time proportional to the number of changed objects. The
+    previous view keeps the entries it had for those keys and reads every
+    other entry through the newer views. Reading an older view costs one step
+    per newer view, iterating over it rebuilds its entries once. The state of
+    an object that was changed outside of update() is only built when it is
+    read, or when the object is about to change again.
+
+    Attributes
+    ----------
+    changed (frozenset):
+        The root IDs added, changed or removed since the previous view
+
+    Methods
+    -------
+    follows(view: Mapping) -> bool:
+        Whether changed is relative to the given view
+    summary() -> str:
+        The number of entries and of changed entries
+    """
+
+    def __init__(
+        self,
+        base: Optional["StateView"],
+        own: dict,
+        removed: set,
+    ) -> None:
+        self.changed = frozenset(own).union(removed)
+        self._previous = weakref.ref(base) if base is not None else None
+        # The newer view and the entries it replaced, once this one is older
+        self._next: Optional["StateView"] = None
+        self._undo: Optional[dict] = None
+        if base is None:
+            self._entries = own
+            self._length = len(own)
+            return
+        if base._entries is not None:
+            entries = base._entries
+        else:
+            # The base was already followed by another view, e.g. in a fork
+            entries = base._materialize()
+        undo = {}
+        for key in removed:
+            undo[key] = entries.pop(key, ABSENT)
+        for key, value in own.items():
+            if key not in undo:
+                undo[key] = entries.get(key, ABSENT)
+            entries[key] = value
+        if base._entries is entries:
+            base._entries = None
+            base._undo = undo
+            base._next = self
+        self._entries = entries
+        self._length = len(entries)
+
+    def _materialize(self) -> dict:
+        """
+        Returns a new dict with the entries of the view.
+        """
+        chain = []
+        view = self
+        while view._entries is None:
+            chain.append(view)
+            view = view._next
+        entries = dict(view._entries)
+        for view in reversed(chain):
+            for key, value in view._undo.items():
+                if value is ABSENT:
+                    entries.pop(key, None)
+                else:
+                    entries[key] = value
+        return entries
+
+    def follows(self, view: Mapping) -> bool:
+        """
+        Whether changed is relative to the given view.
+        """
+        return self._previous is not None and self._previous() is view
+
+    def summary(self) -> str:
+        """
+        The number of entries and of changed entries.
+        """
+        return f"StateView({len(self)} objects, {len(self.changed)} changed)"
+
+    def _entry(self, key: Any) -> Any:
+        view = self
+        while view._entries is None:
+            value = view._undo.get(key, view)
+            if value is not view:
+                if value is ABSENT:
+                    raise KeyError(key)
+                return value
+            view = view._next
+        return view._entries[key]
+
+    def __getitem__(self, key: Any) -> dict:
+        value = self._entry(key)
+        return value.get() if type(value) is _Pending else value
+
+    def __contains__(self, key: Any) -> bool:
+        try:
+            self._entry(key)
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator:
+        if self._entries is not None:
+            return iter(list(self._entries))
+        return iter(self._materialize())
+
+    def __reduce__(self) -> tuple:
+        return dict, (dict(self.items()),)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+def _restore_space(cls: type, state: dict, items: dict) -> "Space":
+    """
+    Rebuilds a pickled Space, attributes first so items can be set.
+    """
+    space = cls.__new__(cls)
+    space.__dict__.update(state)
+    dict.update(space, items)
+    return space
 
 
 class Space(AnarchyGraph):
@@ -67,6 +330,38 @@ class Space(AnarchyGraph):
     It is a subclass of AnarchyGraph which is a decentralized graph where an object
     contains its own state and the state of its connections and interactions.
 
+    Parameters
+    ----------
+    columnar (bool):
+        Store the Column fields of objects in contiguous arrays and update
+        classes with an _update_batch hook in one vectorized call
+    scheduler (UpdateScheduler | EventScheduler, optional):
+        Update objects in dependency order, in waves of independent objects,
+        or only the objects that are due, see bandit.update
+    synchronous (bool):
+        Double-buffer the Column fields so every object reads the state at
+        the start of the tick. Implies columnar
+    spatial (SpatialGrid, optional):
+        Index the positions of the objects for neighbour queries
+    shared_clock (bool):
+        Step one clock for the whole space, objects get a view of it
+    physics (Physics, optional):
+        Integrate the motion of the kinematic objects in one vectorized step
+    effects (EffectEngine, optional):
+        Apply the effects on the objects, one batch per effect class
+    edges (EdgeStore, optional):
+        Store the connections and interactions in arrays instead of one
+        Anarchy per object
+    rng (RandomStreams, optional):
+        Give every object its own random stream at every step
+
+    Attributes
+    ----------
+    clock (Clock):
+        The master clock of a shared-clock space, None otherwise
+    rng (RandomStreams):
+        The random streams of the objects, None by default
+
     Methods
     -------
     add_connection(object1, object2, connection)
@@ -77,16 +372,34 @@ class Space(AnarchyGraph):
         Add an interaction between two objects.
     remove_interaction(object1, object2)
         Remove an interaction between two objects.
+    add_effect(effect)
+        Register an effect on an object.
+    remove_effect(effect)
+        Unregister an effect.
     add_object(object)
         Add an object to the space.
     remove_object(object)
         Remove an object from the space.
     get_object(object_id)
         Get an object from the space.
+    edit(object)
+        Return a copy of the object that is private to the space.
+    neighbors(object, radius)
+        Return the objects within a radius of an object or position.
+    query_box(low, high)
+        Return the objects inside an axis-aligned box.
+    fork()
+        Return a copy-on-write fork of the space.
+    materialize(keys=None)
+        Return a space with a copy of every object that shares nothing.
     update()
         Update the space and the objects in the space.
     state()
         Return the state of the space and the state of the objects in the space
+    save(path, history=True)
+        Write a binary checkpoint of the space to a file.
+    load(path)
+        Load a space from a checkpoint file.
 
     Properties
     ----------
@@ -100,8 +413,405 @@ class Space(AnarchyGraph):
         Return the number of objects in the space.
     """
 
-    def __init__(self) -> None:
+    # Bumped whenever an object is replaced by a copy, see _relink()
+    _link_epoch = 0
+
+    def __init__(
+        self,
+        columnar: bool = False,
+        scheduler: Optional[Union["UpdateScheduler", "EventScheduler"]] = None,
+        synchronous: bool = False,
+        spatial: Optional["SpatialGrid"] = None,
+        shared_clock: bool = False,
+        physics: Optional["Physics"] = None,
+        effects: Optional["EffectEngine"] = None,
+        edges: Optional["EdgeStore"] = None,
+        rng: Optional["RandomStreams"] = None,
+    ) -> None:
         super().__init__()
+        self.clock = Clock() if shared_clock else None
+        self.physics = physics
+        self.effects = effects
+        self.edges = edges
+        self.rng = rng
+        self.columns = ColumnStore() if columnar or synchronous else None
+        self.scheduler = scheduler
+        self.synchronous = synchronous
+        self.spatial = spatial
+        self._topology = 0
+        self._parent: Optional["Space"] = None
+        self._fork_epoch = 0
+        self._epoch = 0
+        self._versions: dict[Any, list[tuple[int, Any]]] = {}
+        self._hidden: set = set()
+        self._children: dict[int, weakref.ref] = {}
+        self._changed: dict[Any, "Object"] = {}
+        self._removed: set = set()
+        self._pending: dict[Any, _Pending] = {}
+        self._view: Optional[StateView] = None
+        self._state: Optional[dict] = None
+
+    # Copy-on-write layer
+    #
+    # A root space holds all of its objects. A fork only holds the objects it
+    # added or copied, everything else is read from the parent as it was at
+    # the fork's epoch. Every fork increments the parent's epoch, and the
+    # first change to an object after a fork stores the previous object in
+    # _versions so the forks keep seeing it.
+
+    def _lookup(self, key: Any) -> Any:
+        """
+        Returns the current object for a key, or ABSENT.
+        """
+        value = dict.get(self, key, ABSENT)
+        if value is not ABSENT or self._parent is None or key in self._hidden:
+            return value
+        return self._parent._lookup_at(key, self._fork_epoch)
+
+    def _lookup_at(self, key: Any, epoch: int) -> Any:
+        """
+        Returns the object for a key as it was when fork number epoch was taken.
+        """
+        versions = self._versions.get(key)
+        if versions:
+            index = bisect_left(versions, epoch, key=lambda version: version[0])
+            if index < len(versions):
+                return versions[index][1]
+        return self._lookup(key)
+
+    def _record(self, key: Any) -> None:
+        """
+        Preserves the current object for a key before it changes.
+        """
+        if not self._children:
+            if self._versions:
+                self._versions.clear()
+            return
+        epoch = self._epoch - 1
+        versions = self._versions.setdefault(key, [])
+        if not versions or versions[-1][0] != epoch:
+            versions.append((epoch, self._lookup(key)))
+
+    def _keys(self) -> list:
+        """
+        Returns the keys of the objects currently in the space.
+        """
+        if self._parent is None:
+            return list(dict.keys(self))
+        inherited = self._parent._keys_at(self._fork_epoch)
+        visible = [key for key in inherited if key not in self._hidden]
+        inherited = set(inherited)
+        return visible + [key for key in dict.keys(self) if key not in inherited]
+
+    def _keys_at(self, epoch: int) -> list:
+        """
+        Returns the keys of the objects in the space when fork epoch was taken.
+        """
+        keys = self._keys()
+        if not self._versions:
+            return keys
+        result = [
+            key
+            for key in keys
+            if key not in self._versions or self._lookup_at(key, epoch) is not ABSENT
+        ]
+        return result + [
+            key
+            for key in self._versions
+            if self._lookup(key) is ABSENT and self._lookup_at(key, epoch) is not ABSENT
+        ]
+
+    def __getitem__(self, key: Any) -> "Object":
+        if self._parent is None:
+            return dict.__getitem__(self, key)
+        value = self._lookup(key)
+        if value is ABSENT:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Any, value: "Object") -> None:
+        if self._children:
+            self._record(key)
+        self._hidden.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        if self._lookup(key) is ABSENT:
+            raise KeyError(key)
+        if self._children:
+            self._record(key)
+        if dict.__contains__(self, key):
+            dict.__delitem__(self, key)
+        if self._parent is not None:
+            self._hidden.add(key)
+
+    def __contains__(self, key: Any) -> bool:
+        if self._parent is None:
+            return dict.__contains__(self, key)
+        return self._lookup(key) is not ABSENT
+
+    def __len__(self) -> int:
+        if self._parent is None:
+            return dict.__len__(self)
+        return len(self._keys())
+
+    def __iter__(self) -> Iterator:
+        if self._parent is None:
+            return dict.__iter__(self)
+        return iter(self._keys())
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is ABSENT else value
+
+    def keys(self) -> list:
+        return self._keys() if self._parent is not None else dict.keys(self)
+
+    def values(self) -> list:
+        if self._parent is None:
+            return dict.values(self)
+        return [self._lookup(key) for key in self._keys()]
+
+    def items(self) -> list:
+        if self._parent is None:
+            return dict.items(self)
+        return [(key, self._lookup(key)) for key in self._keys()]
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the space with its own objects and a reference to its parent.
+
+        Forks are not pickled with their parent.
+        """
+        state = {**self.__dict__, "_children": {}}
+        return _restore_space, (self.__class__, state, dict(dict.items(self)))
+
+    def _copy(self) -> "Space":
+        """
+        Returns a space without objects with the settings of this space and
+        clones of its clock and extension points.
+        """
+        space = self.__class__.__new__(self.__class__)
+        space.__dict__.update(self.__dict__)
+        space._parent = None
+        space._fork_epoch = 0
+        space._epoch = 0
+        space._versions = {}
+        space._hidden = set()
+        space._children = {}
+        space._changed = dict(self._changed)
+        space._removed = set(self._removed)
+        space._pending = {}
+        if self.spatial is not None:
+            space.spatial = self.spatial.clone()
+        if self.physics is not None:
+            space.physics = self.physics.clone()
+        if self.scheduler is not None:
+            space.scheduler = self.scheduler.clone()
+        if self.effects is not None:
+            space.effects = self.effects.clone()
+        if self.clock is not None:
+            space.clock = self.clock.clone()
+        if self.edges is not None:
+            space.edges = self.edges.clone()
+        return space
+
+    def fork(self) -> "Space":
+        """
+        Returns a copy-on-write fork of the space.
+
+        The fork shares every object with this space. Objects are copied the
+        first time either space writes to them through edit() or update().
+
+        Returns
+        -------
+        Space:
+            The forked space
+        """
+        if self.columns is not None:
+            raise ValueError("Columnar spaces cannot be forked")
+        fork = self._copy()
+        fork._parent = self
+        fork._fork_epoch = self._epoch
+        if self.edges is not None:
+            # Objects that are not edited again keep viewing the edges as
+            # they are now
+            self.edges = self.edges.clone()
+        self._epoch += 1
+        self._children[id(fork)] = weakref.ref(
+            fork, lambda _, key=id(fork), children=self._children: children.pop(key, None)
+        )
+        return fork
+
+    def materialize(self, keys: Optional[Iterable] = None) -> "Space":
+        """
+        Returns a space that holds a copy of every object of this space and
+        shares nothing with it, e.g. to restore a fork kept as a snapshot.
+
+        Parameters
+        ----------
+        keys (Iterable, optional):
+            The root IDs of the objects in update order, the order of this
+            space by default
+
+        Returns
+        -------
+        Space:
+            The space, without a parent
+        """
+        if self.columns is not None:
+            raise ValueError("Columnar spaces cannot be materialized")
+        space = self._copy()
+        for key in self.keys() if keys is None else keys:
+            space.edit(self._lookup(key))
+        return space
+
+    def _prune(self) -> None:
+        """
+        Drops the versions that no living fork can see anymore, e.g. after
+        forks kept as snapshots were dropped.
+        """
+        epochs = sorted(
+            child._fork_epoch
+            for child in (ref() for ref in list(self._children.values()))
+            if child is not None
+        )
+        if not epochs:
+            self._versions.clear()
+            return
+        for key, versions in list(self._versions.items()):
+            # A version of epoch e is seen by the forks of the epochs after
+            # the previous version, up to e
+            kept, previous = [], -1
+            for version in versions:
+                index = bisect_right(epochs, previous)
+                if index < len(epochs) and epochs[index] <= version[0]:
+                    kept.append(version)
+                previous = version[0]
+            if kept:
+                self._versions[key] = kept
+            else:
+                del self._versions[key]
+
+    def edit(self, object: "Object") -> "Object":
+        """
+        Returns a version of the object that only this space can see.
+
+        The object is returned as is if the space already owns it, otherwise
+        it is cloned and the clone replaces it in the space. The clock of a
+        clone follows the clock of the space.
+
+        Parameters
+        ----------
+        object (Object):
+            The object to edit
+
+        Returns
+        -------
+        Object:
+            The object to write to
+        """
+        if object._owner is self and object._owner_epoch == self._epoch:
+            if self._link_epoch and object.__dict__.get("_edges_epoch") != self._link_epoch:
+                self._relink(object)
+            return object
+        clone = object.clone()
+        clock = clone.clock
+        if isinstance(clock, ClockView) and self.clock not in (None, clock.master):
+            clone.clock = clock.rebind(self.clock)
+        if self.edges is not None:
+            self.edges.bind(clone)
+        clone._owner = self
+        clone._owner_epoch = self._epoch
+        self[clone.id.root] = clone
+        self._link_epoch += 1
+        self._relink(clone)
+        return clone
+
+    def _relink(self, object: "Object") -> None:
+        """
+        Points the Anarchy edges of an object to the objects the space holds
+        now.
+
+        Edges hold the objects they point to, so once an object is replaced
+        by a copy, e.g. after a fork, the edges of other objects still point
+        to the old object. An object is relinked when it is copied, and the
+        next time it is edited after another object was copied, so updates
+        read the same objects with or without forks and a fork only copies
+        the objects that are edited. Edges of objects that are not edited
+        may still point to the object as it was at the fork. Edges in an
+        EdgeStore are looked up by root ID and never go stale.
+
+        Parameters
+        ----------
+        object (Object):
+            An object the space owns
+        """
+        object.__dict__["_edges_epoch"] = self._link_epoch
+        if self.edges is not None:
+            return
+        for kind in ("connections", "interactions"):
+            edges = object.__dict__.get(kind)
+            if not isinstance(edges, Anarchy) or not edges:
+                continue
+            for node_id, edge in list(edges.items()):
+                current = self._lookup(node_id)
+                if current is ABSENT or edge.node is current:
+                    continue
+                finalizer = getattr(edge, "finalizer", None)
+                if finalizer is not None:
+                    finalizer.detach()
+                dict.__delitem__(edges, node_id)
+                edges.add(node_id, current, edge.edge_type)
+                edges[node_id].reciprocal = edge.reciprocal
+
+    def neighbors(
+        self, object: Union["Object", Iterable[float]], radius: float
+    ) -> list["Object"]:
+        """
+        Return the objects within a radius of an object or position.
+
+        Uses the spatial index, see bandit.spatial.
+
+        Parameters
+        ----------
+        object (Object | Iterable[float]):
+            The object, excluded from the result, or a position
+        radius (float):
+            The distance to search
+
+        Returns
+        -------
+        list[Object]:
+            The objects within the radius, nearest first
+        """
+        if self.spatial is None:
+            raise ValueError("Space has no spatial index")
+        return self.spatial.neighbors(self, object, radius)
+
+    def query_box(
+        self, low: Iterable[float], high: Iterable[float]
+    ) -> list["Object"]:
+        """
+        Return the objects inside an axis-aligned box, borders included.
+
+        Uses the spatial index, see bandit.spatial.
+
+        Parameters
+        ----------
+        low (Iterable[float]):
+            The lowest corner of the box
+        high (Iterable[float]):
+            The highest corner of the box
+
+        Returns
+        -------
+        list[Object]:
+            The objects inside the box
+        """
+        if self.spatial is None:
+            raise ValueError("Space has no spatial index")
+        return self.spatial.query_box(self, low, high)
 
     def add_connection(
         self, object1: "Object", object2: "Object", connection: str
@@ -118,13 +828,15 @@ class Space(AnarchyGraph):
         connection : str
             The type of connection between the two objects.
         """
-        object1.connections.add(object2.id.root, object2, connection)
+        self.edit(object1).connections.add(object2.id.root, object2, connection)
+        self._topology += 1
 
     def remove_connection(self, object1: "Object", object2: "Object") -> None:
         """
         Remove a connection between two objects.
         """
-        object1.connections.remove(object2.id.root)
+        self.edit(object1).connections.remove(object2.id.root)
+        self._topology += 1
 
     def add_interaction(
         self, object1: "Object", object2: "Object", interaction: str
@@ -132,13 +844,41 @@ class Space(AnarchyGraph):
         """
         Add an interaction between two objects.
         """
-        object1.interactions.add(object2.id.root, object2, interaction)
+        self.edit(object1).interactions.add(object2.id.root, object2, interaction)
+        self._topology += 1
 
     def remove_interaction(self, object1: "Object", object2: "Object") -> None:
         """
         Remove an interaction between two objects.
         """
-        object1.interactions.remove(object2.id.root)
+        self.edit(object1).interactions.remove(object2.id.root)
+        self._topology += 1
+
+    def add_effect(self, effect: "Effect") -> "Effect":
+        """
+        Register an effect on an object, see bandit.effect.
+
+        Parameters
+        ----------
+        effect (Effect):
+            The effect, with its target, start, stop and condition
+
+        Returns
+        -------
+        Effect:
+            The effect
+        """
+        if self.effects is None:
+            raise ValueError("Space has no effect engine")
+        return self.effects.add(effect)
+
+    def remove_effect(self, effect: "Effect") -> None:
+        """
+        Unregister an effect, whether it started or not.
+        """
+        if self.effects is None:
+            raise ValueError("Space has no effect engine")
+        self.effects.remove(effect)
 
     def add_object(self, object: "Object", **kwargs) -> None:
         """
@@ -150,6 +890,18 @@ class Space(AnarchyGraph):
             The object to add to the space
         """
         self.add_node(object.id.root, object, **kwargs)
+        object._owner = self
+        object._owner_epoch = self._epoch
+        self._topology += 1
+        self._changed[object.id.root] = object
+        if self.edges is not None:
+            self.edges.bind(object)
+        if self.columns is not None:
+            self.columns.add(object)
+        if self.clock is not None and "_column_block" not in object.__dict__:
+            object.clock = ClockView.follow(
+                self.clock, object.clock, object.clock_rate
+            )
 
     def remove_object(self, object: "Object") -> None:
         """
@@ -161,6 +913,17 @@ class Space(AnarchyGraph):
             The object to remove from the space
         """
         self.remove_node(object.id.root)
+        self._topology += 1
+        self._changed.pop(object.id.root, None)
+        self._removed.add(object.id.root)
+        if self.edges is not None:
+            self.edges.unbind(object)
+            self.edges.remove_node(object.id.root)
+        if self.columns is not None:
+            self.columns.remove(object)
+        clock = object.clock
+        if isinstance(clock, ClockView) and clock.master is self.clock:
+            object.clock = clock.detach()
 
     def get_object(self, object_id: str) -> "Object":
         """
@@ -181,18 +944,154 @@ class Space(AnarchyGraph):
     def update(self) -> None:
         """
         Update the space and the objects in the space.
+
+        With an UpdateScheduler, objects are updated in dependency order, and
+        with an EventScheduler only the objects that are due are updated. In a
+        columnar space, objects of batched classes are updated by their block
+        after every other object has been updated. In a synchronous space,
+        Column writes are buffered and swapped in once every object is updated.
+        The spatial index is refreshed last.
+
+        A shared clock is stepped first, so objects update at the new time.
+        The effects of the tick are applied next, then the physics backend
+        moves the kinematic objects, so their update sees the new positions.
+        The phases of the update are timed by an enabled Profiler, see
+        bandit.profile.
+        """
+        with _profile.phase("space.update"):
+            if self.clock is not None:
+                self.clock.update()
+
+            if self.effects is not None:
+                with _profile.phase("space.effects"):
+                    self.effects.apply(self)
+
+            if self.physics is not None:
+                with _profile.phase("space.physics"):
+                    self.physics.integrate(self)
+
+            if self.synchronous:
+                self.columns.begin()
+
+            with _profile.phase("space.objects"):
+                if self.scheduler is not None:
+                    self.scheduler.update(self)
+                elif self.columns is None:
+                    for object in self.objects:
+                        self.edit(object).update()
+                else:
+                    for object in self.objects:
+                        if not self.columns.batched(object):
+                            object.update()
+
+            if self.columns is not None:
+                with _profile.phase("space.columns"):
+                    for block in self.columns.blocks.values():
+                        if block.batched:
+                            for object in block.objects:
+                                object.touch()
+                    self.columns.update()
+
+            if self.synchronous:
+                with _profile.phase("space.swap"):
+                    self.columns.swap()
+
+            if self.spatial is not None:
+                with _profile.phase("space.spatial"):
+                    self.spatial.refresh(self)
+
+    def _touch(self, object: "Object") -> None:
+        """
+        Marks an object as changed, called by Object.touch() before it changes.
+
+        A state of the object that was not built yet is built first.
         """
-        for object in self.objects:
-            object.update()
+        root = object.id.root
+        pending = self._pending.pop(root, None)
+        if pending is not None:
+            pending.get()
+        self._changed[root] = object
 
     def state(self) -> dict:
         """
         Return the state of the space and the state of the objects in the space
+
+        Object states are keyed by root ID, so states of forked spaces can be
+        compared object by object. They are a StateView: only the objects
+        that changed since the previous call are looked at, and the same
+        state is returned while nothing changes. An object that is updated
+        reuses the state recorded by its update. The state of any other
+        changed object is built when it is read.
+
+        Objects that are changed outside of update() must call touch()
+        before they change.
+        """
+        if self._state is not None and not self._changed and not self._removed:
+            return self._state
+
+        if self._view is None:
+            changed = {root: self[root] for root in self}
+            removed = set()
+        else:
+            changed = {}
+            for root in self._changed:
+                object = self.get(root)
+                if object is not None:
+                    changed[root] = object
+            removed = {root for root in self._removed if root in self._view}
+
+        own = {}
+        for root, object in changed.items():
+            if object.__dict__.get("_dirty", True):
+                pending = self._pending[root] = _Pending(object)
+                own[root] = pending
+            else:
+                own[root] = object._history_latest
+
+        self._view = StateView(self._view, own, removed)
+        self._changed.clear()
+        self._removed.clear()
+        self._state = {"object_count": len(self._view), "object_states": self._view}
+        return self._state
+
+    def save(self, path: str, history: bool = True) -> str:
+        """
+        Write a binary checkpoint of the space to a file, see bandit.checkpoint.
+
+        Parameters
+        ----------
+        path (str):
+            The file to write
+        history (bool):
+            Whether to save the history of every object
+
+        Returns
+        -------
+        str:
+            The path of the checkpoint
         """
-        return {
-            "object_count": self.object_count,
-            "object_states": {node: node.state() for node in self.objects},
-        }
+        from bandit.checkpoint import save
+
+        return save(self, path, history)
+
+    @classmethod
+    def load(cls, path: str) -> "Space":
+        """
+        Load a space from a checkpoint file written by save().
+
+        Parameters
+        ----------
+        path (str):
+            The checkpoint file
+
+        Returns
+        -------
+        Space:
+            The restored space
+        """
+        from bandit.checkpoint import _read
+
+        return _read(path)[0]
 
     @property
     def objects(self) -> Generator["Object", None, None]:
@@ -221,4 +1120,4 @@ class Space(AnarchyGraph):
         """
         Return the number of objects in the space.
         """
-        return len(self.nodes)
+        return len(self)
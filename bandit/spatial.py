@@ -0,0 +1,318 @@
+"""
+Spatial index over the positions of the objects in a Space.
+
+A SpatialGrid hashes every object into a uniform grid of cubic cells, keyed
+by the integer cell coordinates of its position. Neighbour and box queries
+only visit the cells that overlap the query, so their cost depends on the
+number of objects nearby and not on the size of the space.
+
+The grid is refreshed at the end of every ``Space.update()``. Cell
+coordinates are computed for all objects at once with NumPy and only objects
+that changed cell are moved, so a tick where few objects cross a cell border
+costs little more than reading the positions. In a columnar space the
+positions are read straight from the block arrays. Queries made during an
+update see the positions as they were at the start of the tick.
+
+With ``proximity`` set, the grid also rebuilds proximity interactions after
+every refresh: each object gets an interaction of that type with every object
+within the radius, and loses the ones that moved out of range. Interactions of
+other types are left as they are.
+
+Example
+-------
+    space = Space(spatial=SpatialGrid(cell_size=2.0))
+    ...
+    space.neighbors(ball, radius=1.5)
+    space.query_box((0, 0, 0), (10, 10, 10))
+
+A cell size close to the usual query radius works best.
+"""
+
+from itertools import product
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from bandit.object import Object
+    from bandit.space import Space
+
+Point = Union[np.ndarray, Iterable[float]]
+
+
+def _vector(value: Any) -> np.ndarray:
+    """
+    Returns a position as a float array. Iterables like fizicks Vectors are
+    unpacked.
+    """
+    if not isinstance(value, np.ndarray):
+        value = tuple(value)
+    return np.asarray(value, dtype=np.float64)
+
+
+class SpatialGrid:
+    """
+    A uniform grid over object positions for neighbour queries.
+
+    Parameters
+    ----------
+    cell_size (float):
+        The edge length of every cell
+    attribute (str):
+        The object attribute holding its position. Objects without it are
+        not indexed
+    proximity (float, optional):
+        Rebuild interactions between objects within this radius on refresh
+    interaction (str):
+        The type of the proximity interactions
+
+    Attributes
+    ----------
+    roots (list):
+        The root ID of every indexed object, in row order
+    positions (np.ndarray):
+        The [N, D] positions of the indexed objects at the last refresh
+    cells (dict[tuple, set[int]]):
+        The rows in every occupied cell
+
+    Methods
+    -------
+    refresh(space: Space) -> None:
+        Reads the positions of the objects and moves them between cells
+    neighbors(space: Space, position: Point, radius: float) -> list[Object]:
+        Returns the objects within a radius of a position
+    query_box(space: Space, low: Point, high: Point) -> list[Object]:
+        Returns the objects inside an axis-aligned box
+    clone() -> SpatialGrid:
+        Returns an empty grid with the same settings
+    """
+
+    def __init__(
+        self,
+        cell_size: float,
+        attribute: str = "position",
+        proximity: Optional[float] = None,
+        interaction: str = "proximity",
+    ) -> None:
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self.attribute = attribute
+        self.proximity = proximity
+        self.interaction = interaction
+        self.roots: list = []
+        self.rows: dict = {}
+        self.positions = np.empty((0, 0))
+        self.cells: dict[tuple, set[int]] = {}
+        self._keys = np.empty((0, 0), dtype=np.int64)
+        self._topology: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def clone(self) -> "SpatialGrid":
+        """
+        Returns an empty grid with the same settings, filled on first use.
+        """
+        return SpatialGrid(
+            self.cell_size, self.attribute, self.proximity, self.interaction
+        )
+
+    def _read(self, space: "Space") -> tuple[list, np.ndarray]:
+        """
+        Returns the root IDs and positions of every object with a position.
+        """
+        roots, chunks = [], []
+        columnar = set()
+        if space.columns is not None:
+            for block in space.columns.blocks.values():
+                if self.attribute in block.columns and block.size:
+                    roots.extend(obj.id.root for obj in block.objects)
+                    chunks.append(block.columns[self.attribute][: block.size])
+                    columnar.add(block.cls)
+
+        plain = [
+            obj
+            for obj in space.objects
+            if type(obj) not in columnar and hasattr(obj, self.attribute)
+        ]
+        if plain:
+            roots.extend(obj.id.root for obj in plain)
+            chunks.append(
+                np.array([_vector(getattr(obj, self.attribute)) for obj in plain])
+            )
+        if not chunks:
+            return [], np.empty((0, 0))
+        chunks = [chunk.reshape(len(chunk), -1) for chunk in chunks]
+        return roots, np.concatenate(chunks).astype(np.float64, copy=False)
+
+    def refresh(self, space: "Space") -> None:
+        """
+        Reads the positions of the objects and moves them between cells.
+
+        Only objects whose cell changed are moved. The grid is rebuilt when
+        objects were added or removed since the last refresh.
+
+        Parameters
+        ----------
+        space (Space):
+            The space the grid indexes
+        """
+        roots, positions = self._read(space)
+        keys = np.floor(positions / self.cell_size).astype(np.int64)
+
+        if roots != self.roots or keys.shape != self._keys.shape:
+            self.cells = {}
+            for row, key in enumerate(map(tuple, keys.tolist())):
+                self.cells.setdefault(key, set()).add(row)
+            self.roots = roots
+            self.rows = {root: row for row, root in enumerate(roots)}
+        elif len(keys):
+            moved = np.flatnonzero((keys != self._keys).any(axis=1))
+            for row, old, new in zip(
+                moved.tolist(),
+                map(tuple, self._keys[moved].tolist()),
+                map(tuple, keys[moved].tolist()),
+            ):
+                cell = self.cells[old]
+                cell.discard(row)
+                if not cell:
+                    del self.cells[old]
+                self.cells.setdefault(new, set()).add(row)
+
+        self.positions = positions
+        self._keys = keys
+        self._topology = space._topology
+        if self.proximity is not None:
+            self._link(space)
+
+    def _ensure(self, space: "Space") -> None:
+        """
+        Refreshes the grid if objects were added or removed since the last
+        refresh.
+        """
+        if self._topology != space._topology:
+            self.refresh(space)
+
+    def _candidates(self, low: np.ndarray, high: np.ndarray) -> list[int]:
+        """
+        Returns the rows in every cell overlapping a box.
+        """
+        low = np.floor(low / self.cell_size).astype(np.int64).tolist()
+        high = np.floor(high / self.cell_size).astype(np.int64).tolist()
+        spans = [range(lo, hi + 1) for lo, hi in zip(low, high)]
+        cells = self.cells
+        rows = []
+        if np.prod([len(span) for span in spans]) > len(cells):
+            # Fewer occupied cells than cells in the box
+            for key, members in cells.items():
+                if all(lo <= k <= hi for k, lo, hi in zip(key, low, high)):
+                    rows.extend(members)
+        else:
+            for key in product(*spans):
+                members = cells.get(key)
+                if members:
+                    rows.extend(members)
+        return rows
+
+    def _rows_within(self, position: np.ndarray, radius: float) -> np.ndarray:
+        rows = self._candidates(position - radius, position + radius)
+        rows = np.array(rows, dtype=np.int64)
+        if not len(rows):
+            return rows
+        offsets = self.positions[rows] - position
+        return rows[np.einsum("ij,ij->i", offsets, offsets) <= radius * radius]
+
+    def neighbors(
+        self, space: "Space", position: Union[Point, "Object"], radius: float
+    ) -> list["Object"]:
+        """
+        Returns the objects within a radius of a position.
+
+        Parameters
+        ----------
+        space (Space):
+            The space the grid indexes
+        position (Point | Object):
+            A position, or an object to find the neighbours of. An object is
+            not its own neighbour
+        radius (float):
+            The distance to search
+
+        Returns
+        -------
+        list[Object]:
+            The objects within the radius, nearest first
+        """
+        self._ensure(space)
+        exclude = None
+        if hasattr(position, "id") and hasattr(position, self.attribute):
+            exclude = self.rows.get(position.id.root)
+            if exclude is not None:
+                position = self.positions[exclude]
+            else:
+                position = getattr(position, self.attribute)
+        position = _vector(position)
+        rows = self._rows_within(position, radius)
+        if exclude is not None:
+            rows = rows[rows != exclude]
+        offsets = self.positions[rows] - position
+        rows = rows[np.argsort(np.einsum("ij,ij->i", offsets, offsets), kind="stable")]
+        return [space[self.roots[row]] for row in rows.tolist()]
+
+    def query_box(self, space: "Space", low: Point, high: Point) -> list["Object"]:
+        """
+        Returns the objects inside an axis-aligned box, borders included.
+
+        Parameters
+        ----------
+        space (Space):
+            The space the grid indexes
+        low (Point):
+            The lowest corner of the box
+        high (Point):
+            The highest corner of the box
+
+        Returns
+        -------
+        list[Object]:
+            The objects inside the box, in row order
+        """
+        self._ensure(space)
+        low, high = _vector(low), _vector(high)
+        rows = np.array(sorted(self._candidates(low, high)), dtype=np.int64)
+        if not len(rows):
+            return []
+        positions = self.positions[rows]
+        inside = ((positions >= low) & (positions <= high)).all(axis=1)
+        return [space[self.roots[row]] for row in rows[inside].tolist()]
+
+    def _link(self, space: "Space") -> None:
+        """
+        Rebuilds the proximity interactions of every indexed object.
+
+        Objects that already interact with a nearby object through another
+        type of interaction keep it and get no proximity interaction with it.
+        """
+        changed = False
+        for row, root in enumerate(self.roots):
+            near = self._rows_within(self.positions[row], self.proximity)
+            near = {self.roots[other] for other in near.tolist() if other != row}
+            obj = space[root]
+            current = set()
+            for target, edge in obj.interactions.items():
+                if edge.edge_type == self.interaction:
+                    current.add(target)
+                else:
+                    near.discard(target)
+            if near == current:
+                continue
+            obj = space.edit(obj)
+            for target in current - near:
+                obj.interactions.remove(target)
+            for target in near - current:
+                obj.interactions.add(target, space[target], self.interaction)
+            changed = True
+        if changed:
+            space._topology += 1
+            self._topology = space._topology
@@ -1,5 +1,399 @@
+"""
+States and their tensor layout.
+
+A State is a dict of arbitrary state data. To turn states into tensors every
+State type gets a StateSchema: the numeric leaves of the state, nested
+mappings included, each mapped to a fixed offset in a flat vector. Strings and
+other non-numeric values are not part of the tensor.
+
+The schema is built from the first state of a type and cached, keyed by the
+type and its top-level keys, in a cache that keeps the most recently used
+schemas. It reads the leaves with ``operator.itemgetter``, so ``tensor()``
+and ``State.stack()`` do not walk the state recursively, and ``stack()``
+reads every leaf of all states at once. A state whose nested layout differs
+from the cached schema (a missing key, an array of another length) rebuilds
+the schema.
+
+Example
+-------
+    state = ObjectState(clock=ClockState(cycle=2, step=1), mass=1.5)
+    state.tensor()                  # tensor([2., 1., 1.5])
+    state.decode(state.tensor() * 2)
+    State.stack(states)             # one [N, D] tensor
+"""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+from operator import itemgetter
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+import numpy as np
 import torch
 
+_NUMBERS = (bool, int, float, np.number, np.bool_)
+
+
+class Leaf(NamedTuple):
+    """
+    A numeric value of a state and where it is stored in the tensor.
+
+    Attributes
+    ----------
+    path (tuple):
+        The keys leading to the value
+    offset (int):
+        The position of the first element in the tensor
+    size (int):
+        The number of elements
+    kind (type):
+        The Python type of a number, or the container type of an array
+    shape (tuple):
+        The shape of an array, () for a number
+    """
+
+    path: tuple
+    offset: int
+    size: int
+    kind: type
+    shape: tuple
+
+
+def _is_numeric_array(value: Any) -> bool:
+    """
+    Whether a value is a non-empty array or sequence of numbers.
+    """
+    if isinstance(value, torch.Tensor):
+        return value.numel() > 0 and not value.is_complex()
+    if isinstance(value, np.ndarray):
+        return value.size > 0 and value.dtype.kind in "biuf"
+    if isinstance(value, (list, tuple)) and value:
+        try:
+            array = np.asarray(value)
+        except ValueError:
+            return False
+        return array.dtype.kind in "biuf"
+    return False
+
+
+def _numeric(array: np.ndarray) -> bool:
+    return array.dtype.kind in "biuf"
+
+
+def _ravel(value: Any) -> np.ndarray:
+    if isinstance(value, torch.Tensor):
+        return value.detach().cpu().numpy().ravel()
+    return np.asarray(value).ravel()
+
+
+def _getter(path: tuple) -> Callable[[Mapping], Any]:
+    """
+    Returns a function that reads the value at a nested path of a state.
+    """
+    if len(path) == 1:
+        return itemgetter(path[0])
+    getters = [itemgetter(key) for key in path]
+
+    def get(state: Mapping) -> Any:
+        for getter in getters:
+            state = getter(state)
+        return state
+
+    return get
+
+
+def _reader(leaves: list[Leaf]) -> Callable[[Mapping], Any]:
+    """
+    Returns a function that reads the values of some leaves of a state:
+    one array, sequence or number, or the numbers of one mapping at once.
+    """
+    parent = leaves[0].path[:-1]
+    if len(leaves) == 1:
+        get = _getter(leaves[0].path)
+        if leaves[0].shape and not (
+            len(leaves[0].shape) == 1 and leaves[0].kind in (list, tuple)
+        ):
+            return lambda state: _ravel(get(state))
+        return get
+    values = itemgetter(*(leaf.path[-1] for leaf in leaves))
+    if not parent:
+        return values
+    get_parent = _getter(parent)
+    return lambda state: values(get_parent(state))
+
+
+class StateSchema:
+    """
+    The tensor layout of a state and the readers of its numeric values.
+
+    Parameters
+    ----------
+    template (Mapping):
+        A state to take the layout from
+
+    Attributes
+    ----------
+    leaves (list[Leaf]):
+        Every numeric value in tensor order
+    size (int):
+        The number of elements in the tensor
+    types (dict[tuple, type]):
+        The mapping type at every nested path, () for the state itself
+
+    Methods
+    -------
+    array(states: Iterable[Mapping]) -> np.ndarray:
+        Returns many states as one [N, D] float32 array
+    tensor(state: Mapping) -> torch.Tensor:
+        Returns one state as a [D] tensor
+    stack(states: Iterable[Mapping]) -> torch.Tensor:
+        Returns many states as one [N, D] tensor
+    decode(tensor: torch.Tensor, base: Mapping = None) -> dict:
+        Returns the state described by a tensor
+    names() -> list[str]:
+        Returns a dotted name for every element of the tensor
+    """
+
+    def __init__(self, template: Mapping) -> None:
+        self.leaves: list[Leaf] = []
+        self.types: dict[tuple, type] = {}
+        self.size = 0
+        self._walk(template, ())
+        self._readers = self._build_readers()
+
+    def _walk(self, value: Mapping, path: tuple) -> None:
+        self.types[path] = type(value)
+        for key in _field_order(value):
+            item = value[key]
+            item_path = path + (key,)
+            if isinstance(item, Mapping):
+                self._walk(item, item_path)
+            elif isinstance(item, _NUMBERS):
+                kind = bool if isinstance(item, (bool, np.bool_)) else (
+                    int if isinstance(item, (int, np.integer)) else float
+                )
+                self.leaves.append(Leaf(item_path, self.size, 1, kind, ()))
+                self.size += 1
+            elif _is_numeric_array(item):
+                shape = tuple(np.shape(item))
+                size = int(np.prod(shape))
+                self.leaves.append(Leaf(item_path, self.size, size, type(item), shape))
+                self.size += size
+
+    def _build_readers(self) -> list[tuple[int, bool, Callable[[Mapping], Any]]]:
+        """
+        Builds the readers of the leaves, in tensor order, with the number of
+        values every reader returns and whether it returns a single number.
+
+        Every leaf is read by itemgetter, and consecutive numbers of one
+        mapping by a single itemgetter, so the keys can be any hashable value.
+        """
+        groups: list[list[Leaf]] = []
+        for leaf in self.leaves:
+            last = groups[-1][-1] if groups else None
+            if (
+                last is not None
+                and not leaf.shape
+                and not last.shape
+                and last.path[:-1] == leaf.path[:-1]
+            ):
+                groups[-1].append(leaf)
+            else:
+                groups.append([leaf])
+        return [
+            (
+                sum(leaf.size for leaf in group),
+                len(group) == 1 and not group[0].shape,
+                _reader(group),
+            )
+            for group in groups
+        ]
+
+    def array(self, states: Iterable[Mapping]) -> np.ndarray:
+        """
+        Returns many states as one [N, D] float32 array, one leaf or group of
+        numbers at a time.
+
+        Raises ValueError if a state does not match the schema.
+        """
+        states = states if isinstance(states, (list, tuple)) else list(states)
+        count = len(states)
+        if count == 1:
+            return self._row(states[0])[None]
+        result = np.empty((count, self.size), dtype=np.float32)
+        offset = 0
+        for size, _, read in self._readers:
+            column = np.asarray(list(map(read, states)))
+            if not _numeric(column) or column.ndim > 2 or column.size != count * size:
+                raise ValueError("State does not match the schema")
+            result[:, offset : offset + size] = column.reshape(count, size)
+            offset += size
+        return result
+
+    def _row(self, state: Mapping) -> np.ndarray:
+        """
+        Returns one state as a [D] float32 array.
+        """
+        row: list = []
+        for _, number, read in self._readers:
+            if number:
+                row.append(read(state))
+            else:
+                row.extend(read(state))
+        array = np.asarray(row)
+        if not _numeric(array) or array.shape != (self.size,):
+            raise ValueError("State does not match the schema")
+        return array.astype(np.float32)
+
+    def tensor(self, state: Mapping) -> torch.Tensor:
+        """
+        Returns one state as a [D] tensor.
+        """
+        return torch.from_numpy(self._row(state))
+
+    def stack(self, states: Iterable[Mapping]) -> torch.Tensor:
+        """
+        Returns many states as one [N, D] tensor.
+        """
+        return torch.from_numpy(self.array(states))
+
+    def decode(self, tensor: torch.Tensor, base: Optional[Mapping] = None) -> dict:
+        """
+        Returns the state described by a tensor.
+
+        Parameters
+        ----------
+        tensor (torch.Tensor):
+            A [D] tensor in the layout of the schema
+        base (Mapping, optional):
+            A state to take the non-numeric values from
+
+        Returns
+        -------
+        dict:
+            The state, with the same nested State types as the template
+        """
+        if tensor.shape[-1] != self.size:
+            raise ValueError(f"Expected {self.size} values, got {tensor.shape[-1]}")
+        values = tensor.detach().cpu().reshape(-1)
+        flat = values.tolist()
+        nested = _copy_tree(base, self.types) if base is not None else {}
+        for leaf in self.leaves:
+            node = nested
+            for key in leaf.path[:-1]:
+                node = node.setdefault(key, {})
+            if not leaf.shape:
+                value = flat[leaf.offset]
+                value = leaf.kind(round(value)) if leaf.kind is not float else value
+            else:
+                part = values[leaf.offset : leaf.offset + leaf.size].reshape(leaf.shape)
+                if leaf.kind is np.ndarray:
+                    value = part.numpy().copy()
+                elif leaf.kind is torch.Tensor:
+                    value = part.clone()
+                else:
+                    value = leaf.kind(part.tolist())
+            node[leaf.path[-1]] = value
+        return _retype(nested, self.types, ())
+
+    def names(self) -> list[str]:
+        """
+        Returns a dotted name for every element of the tensor.
+        """
+        names = []
+        for leaf in self.leaves:
+            name = ".".join(str(key) for key in leaf.path)
+            if leaf.size == 1 and not leaf.shape:
+                names.append(name)
+            else:
+                names.extend(f"{name}[{i}]" for i in range(leaf.size))
+        return names
+
+
+def _field_order(value: Mapping) -> list:
+    """
+    Returns the keys of a mapping, annotated State fields first.
+    """
+    annotations = {}
+    for cls in reversed(type(value).__mro__):
+        annotations.update(getattr(cls, "__annotations__", {}))
+    fields = [key for key in annotations if key in value]
+    return fields + [key for key in value if key not in annotations]
+
+
+def _copy_tree(value: Mapping, types: dict[tuple, type], path: tuple = ()) -> dict:
+    """
+    Copies the nested mappings of a state that are part of a schema.
+    """
+    return {
+        key: _copy_tree(item, types, path + (key,))
+        if path + (key,) in types and isinstance(item, Mapping)
+        else item
+        for key, item in value.items()
+    }
+
+
+def _retype(value: dict, types: dict[tuple, type], path: tuple) -> dict:
+    """
+    Restores the State types of decoded nested mappings.
+    """
+    for key, item in value.items():
+        if path + (key,) in types and isinstance(item, dict):
+            value[key] = _retype(item, types, path + (key,))
+    cls = types.get(path, dict)
+    return value if cls is dict else cls(value)
+
+
+# The most recently used schemas by state type and top-level keys
+_SCHEMAS: "OrderedDict[tuple, StateSchema]" = OrderedDict()
+_MAX_SCHEMAS = 256
+
+
+def _cache(key: tuple, schema: StateSchema) -> StateSchema:
+    """
+    Caches a schema, dropping the least recently used one if the cache is
+    full.
+    """
+    _SCHEMAS[key] = schema
+    _SCHEMAS.move_to_end(key)
+    if len(_SCHEMAS) > _MAX_SCHEMAS:
+        _SCHEMAS.popitem(last=False)
+    return schema
+
+
+def schema_of(state: Mapping) -> StateSchema:
+    """
+    Returns the cached schema of a state, building it on first use.
+
+    Parameters
+    ----------
+    state (Mapping):
+        The state
+
+    Returns
+    -------
+    StateSchema:
+        The schema of states of the same type and keys
+    """
+    key = (type(state), tuple(state))
+    schema = _SCHEMAS.get(key)
+    if schema is None:
+        return _cache(key, StateSchema(state))
+    _SCHEMAS.move_to_end(key)
+    return schema
+
+
+def _vector(state: Mapping) -> tuple[StateSchema, np.ndarray]:
+    """
+    Returns the schema of a state and its flattened values, rebuilding the
+    cached schema if the nested layout of the state changed.
+    """
+    schema = schema_of(state)
+    try:
+        return schema, schema._row(state)
+    except (KeyError, IndexError, TypeError, ValueError):
+        schema = _cache((type(state), tuple(state)), StateSchema(state))
+        return schema, schema._row(state)
+
 
 class State(dict):
     """
@@ -10,14 +404,17 @@ class State(dict):
     -------
     encode()
         Encodes the state to another state.
-    decode()
-        Decodes the state to another state.
+    decode(tensor)
+        Returns a state of the same layout from a tensor.
     tensor()
         Returns the state as a tensor.
+    stack(states)
+        Returns many states as one [N, D] tensor.
 
-    TODO
-    ----
-    - Provide a mapping as part of the _flatten method to reconstruct the state
+    Properties
+    ----------
+    schema
+        The tensor layout of the state
     """
 
     def __init__(self, *args, **kwargs) -> None:
@@ -29,21 +426,67 @@ class State(dict):
         """
         raise NotImplementedError("Haven't developed this yet")
 
-    def decode(self) -> dict:
+    def decode(self, tensor: torch.Tensor) -> "State":
         """
-        Decodes the state to another state.
+        Returns a state of the same layout from a tensor.
+
+        Numeric values are read from the tensor, non-numeric values are kept
+        from this state.
+
+        Parameters
+        ----------
+        tensor (torch.Tensor):
+            A [D] tensor, e.g. from tensor()
+
+        Returns
+        -------
+        State:
+            The decoded state
         """
-        raise NotImplementedError("Haven't developed this yet")
+        return self.schema.decode(tensor, base=self)
+
+    @property
+    def schema(self) -> StateSchema:
+        """
+        The tensor layout of the state.
+        """
+        return _vector(self)[0]
 
     def _flatten(self) -> list[float]:
         """
-        Flattens the state to a list of floats.
+        Flattens the numeric values of the state to a list, in schema order.
         """
-        return [value for value in self.values()]
+        return _vector(self)[1].tolist()
 
     def tensor(self) -> torch.Tensor:
         """
         Returns the state as a tensor.
         """
-        # Take the contents of the dict and flatten to a single tensor
-        return torch.tensor(self._flatten(), dtype=torch.float32)
+        return torch.from_numpy(_vector(self)[1])
+
+    @staticmethod
+    def stack(states: Iterable[Mapping]) -> torch.Tensor:
+        """
+        Returns many states of the same layout as one [N, D] tensor.
+
+        The rows are read by the schema of the first state, one leaf at a
+        time for every state.
+
+        Parameters
+        ----------
+        states (Iterable[Mapping]):
+            The states, e.g. the object states of a space
+
+        Returns
+        -------
+        torch.Tensor:
+            One row per state
+        """
+        states = states if isinstance(states, (list, tuple)) else list(states)
+        if not states:
+            return torch.empty((0, 0), dtype=torch.float32)
+        schema = _vector(states[0])[0]
+        try:
+            return schema.stack(states)
+        except (KeyError, IndexError, TypeError, ValueError) as error:
+            raise ValueError("States do not share a layout") from error
@@ -0,0 +1,357 @@
+"""
+Append-only trajectory log for long runs.
+
+The history of a TimeBandit only keeps the last ``temporal_depth`` states in
+memory. A TrajectoryLog streams every state to disk instead, so a run of any
+length can be read back afterwards:
+
+    with TrajectoryLog("run.traj") as log:
+        bandit.run(1_000_000, sink=log)
+        log["500:3"]      # the state at cycle 500, step 3
+        log[-10:]         # the last 10 states
+
+A log is a directory of chunk files and one index file. Every state is
+pickled and appended to the current chunk, a new chunk is started once the
+chunk reaches ``chunk_size`` bytes. The index holds one fixed-size record per
+step: the chunk, offset and length of the state and the cycle and step it was
+recorded at. Steps may be recorded out of time order, e.g. when a run is
+replayed from an earlier time, and a time then finds its latest step.
+
+Writing only buffers the current record, so memory stays constant however long
+the run is. Reading maps the chunks and the index into memory: ``raw()`` and
+``records()`` return memoryviews over the mapped files without copying, and
+the operating system only loads the pages that are read.
+"""
+
+import mmap
+import os
+import pickle
+from typing import Any, BinaryIO, Iterator, Optional, Union
+
+import numpy as np
+
+INDEX = np.dtype(
+    [
+        ("chunk", "<u4"),
+        ("length", "<u4"),
+        ("offset", "<u8"),
+        ("cycle", "<i8"),
+        ("step", "<i8"),
+    ]
+)
+
+
+def _parse_time(time: Union[str, tuple]) -> tuple[int, int]:
+    """
+    Returns the cycle and step of a "cycle:step" time.
+    """
+    if isinstance(time, str):
+        cycle, _, step = time.partition(":")
+        return int(cycle), int(step)
+    return int(time[0]), int(time[1])
+
+
+class TrajectoryLog:
+    """
+    Append-only, chunked and memory-mapped log of every state of a run.
+
+    Opening an existing log appends to it.
+
+    Parameters
+    ----------
+    path (str):
+        The directory of the log, created if it does not exist
+    chunk_size (int):
+        The size in bytes after which a new chunk file is started
+
+    Methods
+    -------
+    append(time: str, state: dict) -> int:
+        Appends the state of one step and returns its position
+    raw(index: int) -> memoryview:
+        Returns the encoded state of one step without copying it
+    records(start: int, stop: int) -> Iterator[memoryview]:
+        Yields the encoded states of a range of steps without copying them
+    find(time: str) -> int:
+        Returns the position of the latest step recorded at a time
+    flush() -> None:
+        Writes buffered states to disk
+    close() -> None:
+        Closes the files of the log
+
+    Properties
+    ----------
+    index
+        The index of every step as a structured array
+    times
+        The "cycle:step" time of every step
+    """
+
+    def __init__(self, path: str, chunk_size: int = 64 * 1024 * 1024) -> None:
+        self.path = path
+        self.chunk_size = chunk_size
+        os.makedirs(path, exist_ok=True)
+        self._index_file: BinaryIO = open(os.path.join(path, "index"), "ab")
+        self._count = self._index_file.tell() // INDEX.itemsize
+        # Drop a record left incomplete by an interrupted write
+        self._index_file.truncate(self._count * INDEX.itemsize)
+
+        # Mapped files are only remapped once the log grows past them
+        self._index_map: Optional[np.ndarray] = None
+        self._chunk_maps: dict[int, mmap.mmap] = {}
+
+        if self._count:
+            last = self.index[-1]
+            self._chunk = int(last["chunk"])
+            self._offset = int(last["offset"]) + int(last["length"])
+        else:
+            self._chunk = 0
+            self._offset = 0
+        self._chunk_file: BinaryIO = open(self._chunk_path(self._chunk), "ab")
+        self._chunk_file.truncate(self._offset)
+        self._record = np.zeros(1, dtype=INDEX)
+
+        # The sort keys of the steps read by find(), and the positions in
+        # time order once the steps were appended out of time order
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._key_count = 0
+        self._order: Optional[np.ndarray] = None
+        self._sorted_keys = self._keys
+
+    def __enter__(self) -> "TrajectoryLog":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _chunk_path(self, chunk: int) -> str:
+        return os.path.join(self.path, f"chunk-{chunk:06d}")
+
+    def append(self, time: Union[str, tuple], state: dict) -> int:
+        """
+        Appends the state of one step and returns its position.
+
+        Parameters
+        ----------
+        time (str):
+            The time of the step as "cycle:step"
+        state (dict):
+            The state of the step
+
+        Returns
+        -------
+        int:
+            The position of the step in the log
+        """
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._offset and self._offset + len(data) > self.chunk_size:
+            self._chunk_file.close()
+            self._chunk += 1
+            self._offset = 0
+            self._chunk_file = open(self._chunk_path(self._chunk), "ab")
+        self._chunk_file.write(data)
+
+        record = self._record
+        record["chunk"] = self._chunk
+        record["length"] = len(data)
+        record["offset"] = self._offset
+        record["cycle"], record["step"] = _parse_time(time)
+        self._index_file.write(record.data)
+
+        self._offset += len(data)
+        self._count += 1
+        return self._count - 1
+
+    def flush(self) -> None:
+        """
+        Writes buffered states to disk.
+        """
+        self._chunk_file.flush()
+        self._index_file.flush()
+
+    def close(self) -> None:
+        """
+        Closes the files of the log.
+
+        Arrays and memoryviews returned by the log keep their mapping open
+        until they are released.
+        """
+        self._index_file.close()
+        self._chunk_file.close()
+        self._index_map = None
+        self._chunk_maps.clear()
+
+    @property
+    def index(self) -> np.ndarray:
+        """
+        The index of every step as a structured array, mapped from disk.
+        """
+        if self._count == 0:
+            return np.zeros(0, dtype=INDEX)
+        if self._index_map is None or len(self._index_map) < self._count:
+            self._index_file.flush()
+            self._index_map = np.memmap(
+                self._index_file.name, dtype=INDEX, mode="r", shape=(self._count,)
+            )
+        return self._index_map[: self._count]
+
+    @property
+    def times(self) -> list[str]:
+        """
+        The "cycle:step" time of every step.
+        """
+        index = self.index
+        return [
+            f"{cycle}:{step}"
+            for cycle, step in zip(index["cycle"].tolist(), index["step"].tolist())
+        ]
+
+    def _map(self, chunk: int, end: int) -> mmap.mmap:
+        """
+        Returns the mapping of a chunk that covers at least end bytes.
+        """
+        mapped = self._chunk_maps.get(chunk)
+        if mapped is None or len(mapped) < end:
+            if chunk == self._chunk:
+                self._chunk_file.flush()
+            with open(self._chunk_path(chunk), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._chunk_maps[chunk] = mapped
+        return mapped
+
+    def _position(self, index: int) -> int:
+        position = index + self._count if index < 0 else index
+        if not 0 <= position < self._count:
+            raise IndexError("Trajectory index out of range")
+        return position
+
+    def raw(self, index: int) -> memoryview:
+        """
+        Returns the encoded state of one step without copying it.
+
+        Parameters
+        ----------
+        index (int):
+            The position of the step, negative from the end
+
+        Returns
+        -------
+        memoryview:
+            The pickled state, a view of the mapped chunk
+        """
+        record = self.index[self._position(index)]
+        offset = int(record["offset"])
+        end = offset + int(record["length"])
+        return memoryview(self._map(int(record["chunk"]), end))[offset:end]
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[memoryview]:
+        """
+        Yields the encoded states of a range of steps without copying them.
+
+        Parameters
+        ----------
+        start (int):
+            The position of the first step
+        stop (int, optional):
+            The position after the last step, defaults to the end of the log
+
+        Yields
+        ------
+        memoryview:
+            The pickled state of every step, a view of the mapped chunk
+        """
+        start, stop, _ = slice(start, stop).indices(self._count)
+        index = self.index[start:stop]
+        chunks = index["chunk"].tolist()
+        offsets = index["offset"].tolist()
+        lengths = index["length"].tolist()
+        views: dict[int, memoryview] = {}
+        for chunk, offset, length in zip(chunks, offsets, lengths):
+            view = views.get(chunk)
+            if view is None or len(view) < offset + length:
+                view = views[chunk] = memoryview(self._map(chunk, offset + length))
+            yield view[offset : offset + length]
+
+    def _time_keys(self) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Returns the sort key of every step in time order and, once steps
+        were not appended in time order, the positions in that order.
+
+        The keys of new steps are added to the keys of the steps already
+        read, so a lookup only reads the index once. The order is rebuilt
+        after steps were appended out of time order, e.g. by a replay after
+        ``TimeBandit.seek()``.
+        """
+        count = self._key_count
+        if count < self._count:
+            index = self.index[count:]
+            keys = index["cycle"] * (1 << 32) + index["step"]
+            if len(self._keys) < self._count:
+                grown = np.empty(max(self._count, 2 * len(self._keys)), dtype=np.int64)
+                grown[:count] = self._keys[:count]
+                self._keys = grown
+            self._keys[count : self._count] = keys
+            if self._order is None:
+                start = max(count - 1, 0)
+                if np.any(np.diff(self._keys[start : self._count]) <= 0):
+                    self._order = np.zeros(0, dtype=np.int64)
+            self._key_count = self._count
+        keys = self._keys[: self._count]
+        if self._order is None:
+            return keys, None
+        if len(self._order) < self._count:
+            self._order = np.argsort(keys, kind="stable")
+            self._sorted_keys = keys[self._order]
+        return self._sorted_keys, self._order
+
+    def find(self, time: Union[str, tuple]) -> int:
+        """
+        Returns the position of the step recorded at a time, the latest one
+        if the time was recorded more than once.
+
+        Parameters
+        ----------
+        time (str):
+            The time as "cycle:step"
+
+        Returns
+        -------
+        int:
+            The position of the step
+        """
+        cycle, step = _parse_time(time)
+        # cycle * 2**32 + step sorts the same as the time
+        key = cycle * (1 << 32) + step
+        keys, order = self._time_keys()
+        position = int(np.searchsorted(keys, key, side="right")) - 1
+        if position < 0 or keys[position] != key:
+            raise KeyError(time)
+        return position if order is None else int(order[position])
+
+    def __contains__(self, time: Union[str, tuple]) -> bool:
+        try:
+            self.find(time)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, index: Union[int, slice, str]) -> Union[dict, list[dict]]:
+        """
+        Returns the state of one step by position or time, or a list of
+        states for a slice of positions.
+        """
+        if isinstance(index, str):
+            index = self.find(index)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step == 1:
+                return [pickle.loads(data) for data in self.records(start, stop)]
+            return [pickle.loads(self.raw(i)) for i in range(start, stop, step)]
+        return pickle.loads(self.raw(index))
+
+    def __iter__(self) -> Iterator[dict]:
+        for data in self.records():
+            yield pickle.loads(data)
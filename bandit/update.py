@@ -1,8 +1,405 @@
 """
-Module to design and manage the idea of update systems. 
+Module to design and manage the idea of update systems.
 Also need to define standards and rules for how to update objects.
 Maybe update system is added to an object at init
 Should update always return the state of the object?
 Finalize a update process and sequence. Make it easy
 But how do I manage all these components and systems that may have interdependencies?
+
+Update Scheduler
+----------------
+The UpdateScheduler answers the interdependency question for a Space. An
+object depends on every object in its connections and interactions, so those
+are updated first. Objects that do not depend on each other, directly or
+through a chain of edges, are grouped into the same wave and can be updated
+as a batch, optionally on a thread pool.
+
+Edges that close a cycle are ignored when ordering, in the insertion order of
+the objects, so connected objects never share a wave and the order is the
+same on every run. The plan is cached on the space and only rebuilt when an
+object, connection or interaction is added or removed through the Space.
+
+Event Scheduler
+---------------
+The EventScheduler runs a Space in discrete-event mode: only the objects that
+are due are updated on a tick. Objects are due on every tick until they call
+``sleep()`` in their ``_update()``:
+
+- ``self.sleep(n)`` skips the next n ticks
+- ``self.sleep()`` sleeps until an event wakes the object
+
+An object that calls ``self.emit()`` wakes, on the next tick, every object
+that has it in its connections, so objects subscribe to the events of the
+objects they are connected to. ``scheduler.wake(object)`` wakes an object
+from outside the simulation.
+
+Sleeping objects wait in a calendar, a heap ordered by wake-up tick, and
+objects sleeping until an event are not kept anywhere, so a tick only costs
+the objects that are due. An object that wakes up has its own clock moved
+forward by the ticks it slept through before it is updated, so its cycle and
+step are the same as if it was updated on every tick. Objects that did not
+change keep their state in Space.state(), so the history of a TimeBandit
+stays consistent.
+
+    space = Space(scheduler=EventScheduler())
 """
+
+import heapq
+from concurrent.futures import Executor, ThreadPoolExecutor
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+if TYPE_CHECKING:
+    from bandit.object import Object
+    from bandit.space import Space
+
+
+class UpdateScheduler:
+    """
+    Updates the objects of a Space in waves of independent objects.
+
+    Parameters
+    ----------
+    workers (int):
+        The number of threads used to update each wave. 0 updates every wave
+        in the calling thread. Threads only run in parallel where _update
+        releases the GIL (e.g. NumPy work) or on a free-threaded Python.
+    executor (Executor, optional):
+        An executor to use instead of creating a thread pool. Objects are
+        updated in place, so it must share memory with the caller.
+
+    Methods
+    -------
+    plan(space: Space) -> list[list]:
+        Returns the update waves of a space as lists of root IDs
+    update(space: Space) -> None:
+        Updates every object in the space, one wave at a time
+    clone() -> UpdateScheduler:
+        Returns the scheduler for a fork of the space
+    close() -> None:
+        Shuts down the thread pool created by the scheduler
+    """
+
+    def __init__(self, workers: int = 0, executor: Optional[Executor] = None) -> None:
+        self.workers = workers
+        self._executor = executor
+        self._owns_executor = False
+
+    def __getstate__(self) -> dict:
+        return {**self.__dict__, "_executor": None, "_owns_executor": False}
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """
+        The executor used to update waves, None to update in the calling thread.
+        """
+        if self._executor is None and self.workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            self._owns_executor = True
+        return self._executor
+
+    def clone(self) -> "UpdateScheduler":
+        """
+        Returns the scheduler itself, its plan is cached on each space.
+        """
+        return self
+
+    def close(self) -> None:
+        """
+        Shuts down the thread pool created by the scheduler.
+        """
+        if self._owns_executor:
+            self._executor.shutdown()
+            self._executor = None
+            self._owns_executor = False
+
+    def plan(self, space: "Space") -> list[list]:
+        """
+        Returns the update waves of a space as lists of root IDs.
+
+        Every object comes after the objects it depends on, and objects in
+        the same wave are in insertion order.
+
+        Parameters
+        ----------
+        space (Space):
+            The space to plan
+
+        Returns
+        -------
+        list[list]:
+            The root IDs of every wave, in update order
+        """
+        cached = space.__dict__.get("_plan")
+        if cached is not None and cached[0] == space._topology:
+            return cached[1]
+
+        keys = list(space.keys())
+        order = {key: index for index, key in enumerate(keys)}
+        dependencies = {}
+        for key in keys:
+            obj = space[key]
+            dependencies[key] = [
+                root
+                for root in dict.fromkeys(chain(obj.connections, obj.interactions))
+                if root in order and root != key
+            ]
+
+        # Depth-first post-order puts dependencies before dependents. An edge
+        # back into the current path closes a cycle and is left out.
+        finished = []
+        visited = set()
+        for key in keys:
+            if key in visited:
+                continue
+            visited.add(key)
+            stack = [(key, iter(dependencies[key]))]
+            while stack:
+                current, remaining = stack[-1]
+                for dependency in remaining:
+                    if dependency not in visited:
+                        visited.add(dependency)
+                        stack.append((dependency, iter(dependencies[dependency])))
+                        break
+                else:
+                    stack.pop()
+                    finished.append(current)
+
+        level = {}
+        for key in finished:
+            level[key] = max(
+                (level[dep] + 1 for dep in dependencies[key] if dep in level),
+                default=0,
+            )
+
+        waves = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for key in keys:
+            waves[level[key]].append(key)
+
+        space._plan = (space._topology, waves)
+        return waves
+
+    def update(self, space: "Space") -> None:
+        """
+        Updates every object in the space, one wave at a time.
+
+        Objects updated by a columnar batch hook are left to the space.
+
+        Parameters
+        ----------
+        space (Space):
+            The space to update
+        """
+        executor = self.executor
+        for wave in self.plan(space):
+            objects = [space.edit(space[key]) for key in wave]
+            if space.columns is not None:
+                objects = [obj for obj in objects if not space.columns.batched(obj)]
+            if executor is None or len(objects) < 2:
+                for obj in objects:
+                    obj.update()
+            else:
+                chunks = _chunks(objects, self.workers or len(objects))
+                for _ in executor.map(_update_all, chunks):
+                    pass
+
+
+class EventScheduler:
+    """
+    Updates only the objects of a Space that are due on a tick.
+
+    See the module documentation for how objects sleep and wake up. Objects
+    are updated in the order they were added to the space. Objects updated
+    by a columnar batch hook are left to the space.
+
+    Attributes
+    ----------
+    tick (int):
+        The number of ticks updated, the tick of the last update()
+    updates (int):
+        The number of object updates done, to measure how idle the space is
+
+    Methods
+    -------
+    update(space: Space) -> None:
+        Updates the objects that are due on the next tick
+    wake(object: Object | Any, tick: int = None) -> None:
+        Makes an object due on a tick
+    clone() -> EventScheduler:
+        Returns an independent copy of the scheduler, for forks
+
+    Properties
+    ----------
+    awake
+        The root IDs of the objects due on every tick
+    """
+
+    def __init__(self) -> None:
+        self.tick = 0
+        self.updates = 0
+        self._topology: Optional[int] = None
+        self._order: dict[Any, int] = {}
+        self._added = 0
+        self._last: dict[Any, int] = {}
+        self._awake: dict[Any, None] = {}
+        self._calendar: list[tuple[int, int, Any]] = []
+        self._alarms: dict[Any, int] = {}
+        self._woken: dict[Any, None] = {}
+        self._subscribers: dict[Any, list] = {}
+
+    def clone(self) -> "EventScheduler":
+        """
+        Returns a copy of the scheduler whose objects sleep and wake up
+        independently.
+        """
+        clone = EventScheduler.__new__(EventScheduler)
+        clone.__dict__.update(
+            {
+                name: value.copy() if isinstance(value, (dict, list)) else value
+                for name, value in self.__dict__.items()
+            }
+        )
+        return clone
+
+    @property
+    def awake(self) -> list:
+        """
+        The root IDs of the objects due on every tick.
+        """
+        return list(self._awake)
+
+    def _sync(self, space: "Space") -> None:
+        """
+        Makes new objects due, forgets removed ones and rebuilds the
+        subscribers of every object.
+        """
+        order = self._order
+        keys = list(space.keys())
+        present = set(keys)
+        for root in [root for root in order if root not in present]:
+            for table in (order, self._last, self._awake, self._alarms, self._woken):
+                table.pop(root, None)
+        added = [root for root in keys if root not in order]
+        for root in added:
+            order[root] = self._added
+            self._added += 1
+            self._last[root] = self.tick - 1
+        if added:
+            self._awake.update(dict.fromkeys(added))
+            self._awake = dict.fromkeys(sorted(self._awake, key=order.__getitem__))
+
+        subscribers: dict[Any, list] = {}
+        for root in keys:
+            for target in space[root].connections:
+                if target in present and target != root:
+                    subscribers.setdefault(target, []).append(root)
+        self._subscribers = subscribers
+        self._topology = space._topology
+
+    def wake(self, object: Union["Object", Any], tick: Optional[int] = None) -> None:
+        """
+        Makes an object due on a tick.
+
+        Parameters
+        ----------
+        object (Object | Any):
+            The object, or its root ID
+        tick (int, optional):
+            The tick to update it on, the next tick by default
+        """
+        root = object.id.root if hasattr(object, "id") else object
+        if tick is None or tick <= self.tick + 1:
+            self._woken[root] = None
+        else:
+            self._schedule(root, tick)
+
+    def _schedule(self, root: Any, tick: int) -> None:
+        current = self._alarms.get(root)
+        if current is not None and current <= tick:
+            return
+        self._alarms[root] = tick
+        heapq.heappush(self._calendar, (tick, self._order.get(root, -1), root))
+
+    def _due(self, tick: int) -> list:
+        """
+        Returns the root IDs due on a tick, in the order they were added.
+        """
+        extra = {}
+        calendar = self._calendar
+        while calendar and calendar[0][0] <= tick:
+            alarm, _, root = heapq.heappop(calendar)
+            if self._alarms.get(root) == alarm:
+                del self._alarms[root]
+                extra[root] = None
+        for root in self._woken:
+            self._alarms.pop(root, None)
+            extra[root] = None
+        self._woken = {}
+
+        order = self._order
+        extra = [root for root in extra if root not in self._awake and root in order]
+        if not extra:
+            return list(self._awake)
+        extra.sort(key=order.__getitem__)
+        return list(heapq.merge(self._awake, extra, key=order.__getitem__))
+
+    def update(self, space: "Space") -> None:
+        """
+        Updates the objects that are due on the next tick.
+
+        Parameters
+        ----------
+        space (Space):
+            The space to update
+        """
+        self.tick += 1
+        tick = self.tick
+        if self._topology != space._topology:
+            self._sync(space)
+
+        columns = space.columns
+        last = self._last
+        awake = self._awake
+        woke = False
+        for root in self._due(tick):
+            obj = space.edit(space[root])
+            if columns is not None and columns.batched(obj):
+                continue
+            missed = tick - last[root] - 1
+            if missed:
+                obj.clock.advance(missed)
+            obj.update()
+            last[root] = tick
+            self.updates += 1
+
+            state = obj.__dict__
+            sleep = state.pop("_sleep", None)
+            if sleep is None:
+                if root not in awake:
+                    awake[root] = None
+                    woke = True
+            else:
+                awake.pop(root, None)
+                if sleep >= 0:
+                    self._schedule(root, tick + sleep + 1)
+            if state.pop("_emitted", False):
+                for subscriber in self._subscribers.get(root, ()):
+                    self._woken[subscriber] = None
+        if woke:
+            self._awake = dict.fromkeys(sorted(awake, key=self._order.__getitem__))
+
+
+def _update_all(objects: list["Object"]) -> None:
+    """
+    Updates a list of objects in order.
+    """
+    for obj in objects:
+        obj.update()
+
+
+def _chunks(items: list[Any], count: int) -> list[list[Any]]:
+    """
+    Splits a list into at most count contiguous chunks of similar size.
+    """
+    size = -(-len(items) // count)
+    return [items[i : i + size] for i in range(0, len(items), size)]
@@ -1,26 +1,24 @@
-import hashlib
+from typing import Any
 
+from bandit.content import digest
 
-def generate_hash(object_state) -> str:
+
+def generate_hash(object_state: Any) -> str:
     """
-    Generates a hash for the object with md5 encryption.
+    Generates a hash for the object state.
 
-    The hash is generated from the object state.
+    The hash is the BLAKE2b digest of the canonical encoding of the state, so
+    equal states have the same hash whatever the order of their keys. See
+    bandit.content.
 
     Parameters
     ----------
-    object_state (Object):
-        The object to generate a hash for
+    object_state (Any):
+        The state to generate a hash for
 
     Returns
     -------
     str:
-        The hash of the object
+        The hash of the state, as 32 hex characters
     """
-
-    object_state_str = str(object_state)
-    state_bytes = object_state_str.encode("utf-8")
-
-    hash_md5 = hashlib.md5()
-    hash_md5.update(state_bytes)
-    return hash_md5.hexdigest()
+    return digest(object_state).hex()
@@ -0,0 +1,39 @@
+"""
+Benchmarks of the simulation hot paths.
+
+The suite times ``Space.update()``, ``Space.state()``, physics steps, edge
+gathers, checkpoints and ``TimeBandit.run()`` on synthetic workloads, and scales each
+over one parameter: the object count, the edge density, the temporal depth
+or the state size. See benchmarks.suite for the cases and benchmarks.workloads
+for the objects they simulate.
+
+Usage
+-----
+    python -m benchmarks                          # 1k to 100k objects
+    python -m benchmarks --quick                  # smallest sizes only
+    python -m benchmarks --full                   # up to 1M objects
+    python -m benchmarks --only space.update      # cases by name prefix
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline baseline.json # exit 1 on a regression
+    python -m benchmarks --save-baseline baseline.json
+
+Results are written as JSON, one record per case and parameter value with
+the median and best time of a call. Comparing against a baseline reports the
+ratio of every median to the baseline and fails when one is slower than the
+threshold allows. Baselines are only comparable on the same machine, so a
+pull request should run the suite on its base commit first and compare
+against that.
+"""
+
+from benchmarks.runner import Result, compare, load_results, measure, run
+from benchmarks.suite import CASES, Case
+
+__all__ = [
+    "CASES",
+    "Case",
+    "Result",
+    "compare",
+    "load_results",
+    "measure",
+    "run",
+]
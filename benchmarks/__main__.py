@@ -0,0 +1,92 @@
+"""
+Command line entry point, see benchmarks for the usage.
+"""
+
+import argparse
+import json
+import sys
+from typing import Optional
+
+from benchmarks.runner import Result, compare, load_results, run
+from benchmarks.suite import CASES
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def _report(result: Result) -> None:
+    print(
+        f"{result.key:40} {_format_time(result.median)}"
+        f"   {_format_time(result.per_object)}/object",
+        flush=True,
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Benchmarks of the hot paths"
+    )
+    scale = parser.add_mutually_exclusive_group()
+    scale.add_argument("--quick", action="store_true", help="smallest sizes only")
+    scale.add_argument("--full", action="store_true", help="up to 1M objects")
+    parser.add_argument(
+        "--only", action="append", default=[], help="cases starting with a name"
+    )
+    parser.add_argument("--list", action="store_true", help="list the cases")
+    parser.add_argument("--repeat", type=int, default=5, help="timing rounds")
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="seconds spent per value"
+    )
+    parser.add_argument("--output", help="write the results to a JSON file")
+    parser.add_argument("--baseline", help="compare with earlier results")
+    parser.add_argument(
+        "--save-baseline", metavar="PATH", help="write the results as a baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed slowdown against the baseline, 0.1 is 10%%",
+    )
+    args = parser.parse_args(argv)
+
+    cases = [
+        case
+        for case in CASES
+        if not args.only or any(case.name.startswith(name) for name in args.only)
+    ]
+    if args.list:
+        for case in cases:
+            print(f"{case.name:20} {case.parameter:16} {case.description}")
+        return 0
+
+    scale = "quick" if args.quick else "full" if args.full else "default"
+    results = run(cases, scale, args.repeat, args.min_time, report=_report)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        rows, regressions = compare(
+            results, load_results(args.baseline), args.threshold
+        )
+        print()
+        for key, before, after, ratio in rows:
+            flag = "  SLOWER" if key in regressions else ""
+            print(
+                f"{key:40} {_format_time(before)} -> {_format_time(after)}"
+                f"  x{ratio:.2f}{flag}"
+            )
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Timing, results and baseline comparison for the benchmarks.
+"""
+
+import gc
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from benchmarks.suite import Case
+
+
+class Result(NamedTuple):
+    """
+    The timing of one case at one parameter value.
+
+    Attributes
+    ----------
+    name (str):
+        The name of the case
+    parameter (str):
+        The name of the scaled parameter
+    value (int):
+        The value of the parameter
+    median (float):
+        The median time of a call in seconds
+    best (float):
+        The best time of a call in seconds
+    calls (int):
+        The number of timed calls
+    objects (int):
+        The number of objects a call processes, to compare scales
+    """
+
+    name: str
+    parameter: str
+    value: int
+    median: float
+    best: float
+    calls: int
+    objects: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.parameter}={self.value}]"
+
+    @property
+    def per_object(self) -> float:
+        """
+        The median time of a call per object, in seconds.
+        """
+        return self.median / max(self.objects, 1)
+
+
+def measure(
+    function: Callable[[], object], repeat: int = 5, min_time: float = 0.2
+) -> tuple[float, float, int]:
+    """
+    Times a function with the garbage collector disabled.
+
+    The function is called once to warm up. Fast functions are called several
+    times per round so every round takes about min_time / repeat.
+
+    Parameters
+    ----------
+    function (Callable):
+        The function to time, called without arguments
+    repeat (int):
+        The number of rounds
+    min_time (float):
+        The total time to spend timing, in seconds, unless a single call
+        takes longer
+
+    Returns
+    -------
+    tuple[float, float, int]:
+        The median and best time of a call and the number of timed calls
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function()
+        first = time.perf_counter() - start
+        number = max(1, int(min_time / repeat / max(first, 1e-9)))
+        rounds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            rounds.append((time.perf_counter() - start) / number)
+    finally:
+        if enabled:
+            gc.enable()
+    return float(np.median(rounds)), min(rounds), repeat * number
+
+
+def _metadata() -> dict:
+    import torch
+
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "numpy": np.__version__,
+        "torch": torch.__version__,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run(
+    cases: Iterable["Case"],
+    scale: str = "default",
+    repeat: int = 5,
+    min_time: float = 0.2,
+    report: Optional[Callable[[Result], None]] = None,
+) -> dict:
+    """
+    Runs benchmark cases at every parameter value of a scale.
+
+    Parameters
+    ----------
+    cases (Iterable[Case]):
+        The cases to run
+    scale (str):
+        "quick", "default" or "full", see Case
+    repeat (int):
+        The number of timing rounds per value
+    min_time (float):
+        The time to spend timing every value, in seconds
+    report (Callable, optional):
+        Called with every result as soon as it is measured
+
+    Returns
+    -------
+    dict:
+        The results, {"meta": {...}, "results": [...]}, ready for JSON
+    """
+    results = []
+    for case in cases:
+        for value in case.values(scale):
+            function, objects = case.setup(value)
+            median, best, calls = measure(function, repeat, min_time)
+            result = Result(
+                case.name, case.parameter, value, median, best, calls, objects
+            )
+            results.append(result._asdict())
+            if report is not None:
+                report(result)
+            del function
+            gc.collect()
+    return {"meta": {**_metadata(), "scale": scale}, "results": results}
+
+
+def load_results(path: str) -> dict:
+    """
+    Loads results written by ``python -m benchmarks --output``.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def _results(data: dict) -> dict[str, Result]:
+    results = (Result(**result) for result in data["results"])
+    return {result.key: result for result in results}
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float = 0.1
+) -> tuple[list[tuple[str, float, float, float]], list[str]]:
+    """
+    Compares results with a baseline.
+
+    Parameters
+    ----------
+    results (dict):
+        The results of run()
+    baseline (dict):
+        Results of an earlier run
+    threshold (float):
+        The slowdown allowed before a result counts as a regression, 0.1 is
+        10% slower than the baseline
+
+    Returns
+    -------
+    tuple[list, list[str]]:
+        (key, baseline median, median, ratio) for every result in both, and
+        the keys of the regressions
+    """
+    current = _results(results)
+    before = _results(baseline)
+    rows, regressions = [], []
+    for key, result in current.items():
+        base = before.get(key)
+        if base is None:
+            continue
+        ratio = result.median / base.median if base.median else float("inf")
+        rows.append((key, base.median, result.median, ratio))
+        if ratio > 1 + threshold:
+            regressions.append(key)
+    return rows, regressions
@@ -0,0 +1,246 @@
+"""
+The benchmark cases.
+
+Every case times one call on a workload and scales one parameter. The values
+of the parameter depend on the scale the suite runs at:
+
+- quick: the smallest values, to check the suite runs
+- default: up to 100k objects
+- full: up to 1M objects, which needs several GB of memory
+"""
+
+import os
+import tempfile
+from typing import Callable, NamedTuple
+
+from benchmarks.workloads import (
+    ball_bandit,
+    ball_space,
+    body_space,
+    graph_space,
+    payload_space,
+)
+from bandit.checkpoint import load, save
+from bandit.edges import EdgeStore
+from bandit.main import TimeBandit
+from bandit.snapshot import Snapshots
+
+Setup = Callable[[int], tuple[Callable[[], object], int]]
+
+OBJECTS = {
+    "quick": [1_000],
+    "default": [1_000, 10_000, 100_000],
+    "full": [1_000, 10_000, 100_000, 1_000_000],
+}
+
+
+class Case(NamedTuple):
+    """
+    A benchmark case.
+
+    Attributes
+    ----------
+    name (str):
+        The name of the case, e.g. "space.update"
+    parameter (str):
+        The name of the scaled parameter
+    scales (dict[str, list[int]]):
+        The values of the parameter at every scale
+    setup (Setup):
+        Builds the workload for a value and returns the function to time and
+        the number of objects it processes
+    description (str):
+        What the case measures
+    """
+
+    name: str
+    parameter: str
+    scales: dict
+    setup: Setup
+    description: str
+
+    def values(self, scale: str) -> list[int]:
+        """
+        Returns the values of the parameter at a scale.
+        """
+        if scale not in self.scales:
+            raise ValueError(f"Unknown scale {scale!r}")
+        return self.scales[scale]
+
+
+def _space_update(count: int) -> tuple[Callable, int]:
+    space = ball_space(count)
+    space.update()
+    return space.update, count
+
+
+def _space_state(count: int) -> tuple[Callable, int]:
+    space = ball_space(count)
+    space.update()
+    space.state()
+    first = next(iter(space.objects))
+
+    def state() -> dict:
+        first.touch()
+        return space.state()
+
+    return state, count
+
+
+def _physics_integrate(count: int) -> tuple[Callable, int]:
+    space = body_space(count)
+    space.update()
+    return lambda: space.physics.integrate(space), count
+
+
+def _bandit_run(depth: int) -> tuple[Callable, int]:
+    count = 500
+    bandit = ball_bandit(count, temporal_depth=depth)
+    bandit.run(depth)
+    return lambda: bandit.run(1), count
+
+
+def _snapshot_run(interval: int) -> tuple[Callable, int]:
+    count = 500
+    bandit = TimeBandit(
+        ball_space(count), temporal_depth=100, snapshots=Snapshots(interval)
+    )
+    bandit.run(100)
+    return lambda: bandit.run(1), count
+
+
+def _snapshot_columnar(count: int) -> tuple[Callable, int]:
+    bandit = TimeBandit(body_space(count), temporal_depth=10)
+    bandit.run(10)
+    snapshots = Snapshots()
+    return lambda: snapshots.capture(bandit), count
+
+
+def _graph_update(degree: int) -> tuple[Callable, int]:
+    count = 10_000
+    space = graph_space(count, degree)
+    space.update()
+    return space.update, count
+
+
+def _graph_gather(degree: int) -> tuple[Callable, int]:
+    count = 10_000
+    space = graph_space(count, degree, edges=EdgeStore())
+    ids = [space.edges.index(root) for root in space]
+    return lambda: space.edges.gather("connections", ids), count
+
+
+def _state_size(fields: int) -> tuple[Callable, int]:
+    count = 1_000
+    bandit = TimeBandit(payload_space(count, fields), temporal_depth=10)
+    bandit.run(10)
+    return lambda: bandit.run(1), count
+
+
+def _checkpoint_save(count: int) -> tuple[Callable, int]:
+    space = ball_space(count)
+    space.update()
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, "space.ckpt")
+
+    def write() -> str:
+        # Keeps the directory alive as long as the function
+        directory.name
+        return save(space, path)
+
+    return write, count
+
+
+def _checkpoint_load(count: int) -> tuple[Callable, int]:
+    space = ball_space(count)
+    space.update()
+    directory = tempfile.TemporaryDirectory()
+    path = save(space, os.path.join(directory.name, "space.ckpt"))
+    del space
+
+    def read() -> object:
+        directory.name
+        return load(path)
+
+    return read, count
+
+
+CASES = [
+    Case(
+        "space.update",
+        "objects",
+        OBJECTS,
+        _space_update,
+        "One Space.update() of moving balls",
+    ),
+    Case(
+        "space.state",
+        "objects",
+        OBJECTS,
+        _space_state,
+        "Space.state() after one object changed",
+    ),
+    Case(
+        "physics.integrate",
+        "objects",
+        OBJECTS,
+        _physics_integrate,
+        "One physics step of columnar bodies bouncing in a box",
+    ),
+    Case(
+        "bandit.run",
+        "temporal_depth",
+        {"quick": [10], "default": [10, 100, 1000], "full": [10, 100, 1000, 10000]},
+        _bandit_run,
+        "One TimeBandit step of 500 balls with a full history",
+    ),
+    Case(
+        "snapshot.run",
+        "interval",
+        {"quick": [10], "default": [1, 10, 100], "full": [1, 10, 100, 1000]},
+        _snapshot_run,
+        "One TimeBandit step of 500 balls with a history of 100 and snapshots",
+    ),
+    Case(
+        "snapshot.columnar",
+        "objects",
+        OBJECTS,
+        _snapshot_columnar,
+        "Taking a snapshot of a columnar space of bodies",
+    ),
+    Case(
+        "graph.update",
+        "degree",
+        {"quick": [1, 16], "default": [1, 4, 16, 64], "full": [1, 4, 16, 64, 256]},
+        _graph_update,
+        "One Space.update() of 10k nodes reading their connections",
+    ),
+    Case(
+        "graph.gather",
+        "degree",
+        {"quick": [1, 16], "default": [1, 4, 16, 64], "full": [1, 4, 16, 64, 256]},
+        _graph_gather,
+        "Gathering the connections of 10k nodes from an EdgeStore",
+    ),
+    Case(
+        "state.size",
+        "fields",
+        {"quick": [4, 64], "default": [4, 64, 512], "full": [4, 64, 512, 4096]},
+        _state_size,
+        "One TimeBandit step of 1k objects with states of many fields",
+    ),
+    Case(
+        "checkpoint.save",
+        "objects",
+        OBJECTS,
+        _checkpoint_save,
+        "Writing a checkpoint of a space of balls",
+    ),
+    Case(
+        "checkpoint.load",
+        "objects",
+        OBJECTS,
+        _checkpoint_load,
+        "Loading a checkpoint of a space of balls",
+    ),
+]
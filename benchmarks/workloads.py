@@ -0,0 +1,199 @@
+"""
+Workloads for the benchmarks.
+
+- Ball: a ball moving at constant velocity, like simple_sim.py, with fizicks
+  vectors for its position and velocity
+- Node: a graph node that averages the values of the nodes it is connected
+  to, so its update cost grows with the edge density
+- Payload: an object with a state of a given number of numeric fields
+- Body: a kinematic ball with Column fields, moved by the physics backend
+"""
+
+import random
+
+from fizicks import Position, Vector, Velocity
+from fizicks.universe import Universe
+
+from bandit.columnar import Column
+from bandit.main import TimeBandit
+from bandit.object import Object
+from bandit.physics import Physics
+from bandit.space import Space
+
+
+class Ball(Object):
+    """
+    A ball moving at constant velocity.
+    """
+
+    def __init__(self, position: list, velocity: list, mass: float) -> None:
+        super().__init__()
+        self.position = Position(*position)
+        self.velocity = Velocity(*velocity)
+        self.mass = mass
+
+    def _update(self) -> None:
+        self.position = self.position + self.velocity
+
+    def state(self) -> dict:
+        return {
+            "x": self.position.x,
+            "y": self.position.y,
+            "z": self.position.z,
+            "mass": self.mass,
+            **super().state(),
+        }
+
+
+class Node(Object):
+    """
+    A graph node that moves its value towards the mean of its connections.
+    """
+
+    def __init__(self, value: float) -> None:
+        super().__init__()
+        self.value = value
+
+    def _update(self) -> None:
+        values = [
+            edge.node.value
+            for edge in self.connections.values()
+            if edge.node is not None
+        ]
+        if values:
+            self.value += 0.5 * (sum(values) / len(values) - self.value)
+
+    def state(self) -> dict:
+        return {"value": self.value, **super().state()}
+
+
+class Payload(Object):
+    """
+    An object whose state has a given number of numeric fields, one of which
+    changes on every update.
+    """
+
+    def __init__(self, fields: int) -> None:
+        super().__init__()
+        self.fields = {f"f{i}": float(i) for i in range(fields)}
+
+    def _update(self) -> None:
+        self.fields["f0"] += 1.0
+
+    def state(self) -> dict:
+        return {**self.fields, **super().state()}
+
+
+class Body(Object):
+    """
+    A ball in a column block, moved by the physics backend of its space.
+    """
+
+    kinematic = True
+    position = Column(3)
+    velocity = Column(3)
+    mass = Column()
+
+    def __init__(self, position: list, velocity: list, mass: float) -> None:
+        super().__init__()
+        self.position = position
+        self.velocity = velocity
+        self.mass = mass
+
+    @classmethod
+    def _update_batch(cls, block) -> None:
+        pass
+
+    def state(self) -> dict:
+        return {"mass": self.mass, **super().state()}
+
+
+def ball_space(count: int, seed: int = 0, **kwargs) -> Space:
+    """
+    Returns a space of balls at random positions and velocities.
+
+    Parameters
+    ----------
+    count (int):
+        The number of balls
+    seed (int):
+        The random seed
+    **kwargs:
+        Passed to Space
+
+    Returns
+    -------
+    Space:
+        The space
+    """
+    rng = random.Random(seed)
+    space = Space(**kwargs)
+    for _ in range(count):
+        position = [rng.uniform(0, 100) for _ in range(3)]
+        velocity = [rng.uniform(-1, 1) for _ in range(3)]
+        space.add_object(Ball(position, velocity, rng.uniform(1, 10)))
+    return space
+
+
+def body_space(count: int, seed: int = 0) -> Space:
+    """
+    Returns a columnar space of bodies in a 100 wide box, with a physics
+    backend.
+    """
+    rng = random.Random(seed)
+    physics = Physics(Universe(dimensions=Vector(100, 100, 100)))
+    space = Space(columnar=True, physics=physics)
+    for _ in range(count):
+        position = [rng.uniform(0, 100) for _ in range(3)]
+        velocity = [rng.uniform(-1, 1) for _ in range(3)]
+        space.add_object(Body(position, velocity, rng.uniform(1, 10)))
+    return space
+
+
+def graph_space(count: int, degree: int, seed: int = 0, **kwargs) -> Space:
+    """
+    Returns a space of nodes, each connected to degree random other nodes.
+
+    Parameters
+    ----------
+    count (int):
+        The number of nodes
+    degree (int):
+        The number of connections of every node
+    seed (int):
+        The random seed
+    **kwargs:
+        Passed to Space, like edges=EdgeStore()
+
+    Returns
+    -------
+    Space:
+        The space
+    """
+    rng = random.Random(seed)
+    space = Space(**kwargs)
+    nodes = [Node(rng.random()) for _ in range(count)]
+    for node in nodes:
+        space.add_object(node)
+    for node in nodes:
+        for other in rng.sample(nodes, min(degree, count)):
+            if other is not node:
+                node.connections.add(other.id.root, other, "near")
+    return space
+
+
+def payload_space(count: int, fields: int) -> Space:
+    """
+    Returns a space of objects with states of a given number of fields.
+    """
+    space = Space()
+    for _ in range(count):
+        space.add_object(Payload(fields))
+    return space
+
+
+def ball_bandit(count: int, temporal_depth: int) -> TimeBandit:
+    """
+    Returns a simulation of a space of balls.
+    """
+    return TimeBandit(ball_space(count), temporal_depth=temporal_depth)
@@ -1,11 +1,15 @@
-from fizicks import Motion, Position, Velocity
+from fizicks import Position, Velocity
+from fizicks.universe import Universe
 
 from bandit.object import Object
+from bandit.physics import Physics
 from bandit.space import Space
 
-space = Space()
+space = Space(physics=Physics(Universe()))
 
 class Ball(Object):
+    kinematic = True
+
     def __init__(self, position, velocity, mass):
         super().__init__()
         self.position = Position(*position)
@@ -14,7 +18,8 @@ class Ball(Object):
         self.debt = []
 
     def _update(self):
-        Motion.update(self)
+        # Moved by the physics backend of the space
+        pass
 
     def state(self):
         state = super().state()
@@ -0,0 +1,25 @@
+from benchmarks import CASES, compare, measure, run
+
+
+def test_measure_counts_calls():
+    calls = []
+    median, best, timed = measure(lambda: calls.append(1), repeat=3, min_time=0.01)
+    assert best <= median
+    assert timed == len(calls) - 1
+
+
+def test_run_and_compare():
+    case = next(case for case in CASES if case.name == "space.update")
+    case = case._replace(scales={"quick": [10]})
+    results = run([case], "quick", repeat=2, min_time=0.01)
+    (result,) = results["results"]
+    assert result["name"] == "space.update"
+    assert result["objects"] == 10
+
+    slower = {
+        "results": [{**result, "median": result["median"] / 2}],
+    }
+    rows, regressions = compare(results, slower, threshold=0.5)
+    assert rows[0][3] > 1.5
+    assert regressions == ["space.update[objects=10]"]
+    assert compare(results, results)[1] == []
@@ -0,0 +1,114 @@
+import pytest
+
+from bandit.branch import Branch
+from bandit.main import TimeBandit
+from bandit.object import Object
+from bandit.space import Space
+
+
+class Counter(Object):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+        self.seen = []
+
+    def _update(self):
+        self.count += 1
+        self.seen.append(self.count)
+
+    def state(self):
+        return {"count": self.count, **super().state()}
+
+
+@pytest.fixture
+def bandit():
+    space = Space()
+    for _ in range(5):
+        space.add_object(Counter())
+    bandit = TimeBandit(space)
+    bandit.run(3)
+    return bandit
+
+
+def test_branch_shares_objects(bandit):
+    branch = bandit.branch("what-if")
+    assert isinstance(branch, Branch)
+    assert branch.divergence == bandit.clock.time
+    assert branch.space.object_count == 5
+    for root in bandit.space:
+        assert branch.space[root] is bandit.space[root]
+    assert branch.state() is bandit.state()
+
+
+def test_branch_copies_on_write(bandit):
+    branch = bandit.branch()
+    branch.run(2)
+    bandit.run(1)
+    for root in bandit.space:
+        assert branch.space[root] is not bandit.space[root]
+        assert branch.space[root].count == 5
+        assert bandit.space[root].count == 4
+        assert bandit.space[root].seen == [1, 2, 3, 4]
+    assert branch.clock.time == "1:5"
+    assert bandit.clock.time == "1:4"
+
+
+def test_parent_write_keeps_fork_view(bandit):
+    branch = bandit.branch()
+    bandit.run(2)
+    for obj in branch.space.objects:
+        assert obj.count == 3
+        assert len(obj) == 3
+
+
+def test_branch_edit_is_private(bandit):
+    branch = bandit.branch()
+    root = next(iter(bandit.space))
+    edited = branch.space.edit(branch.space[root])
+    edited.count = 100
+    assert bandit.space[root].count == 3
+    assert branch.space[root].count == 100
+
+
+def test_branch_add_and_remove(bandit):
+    branch = bandit.branch()
+    removed = next(bandit.space.objects)
+    branch.space.remove_object(removed)
+    added = Counter()
+    branch.space.add_object(added)
+    assert removed.id.root not in branch.space
+    assert removed.id.root in bandit.space
+    assert added.id.root in branch.space
+    assert added.id.root not in bandit.space
+    assert branch.space.object_count == 5
+
+
+def test_parent_removal_keeps_fork_view(bandit):
+    branch = bandit.branch()
+    removed = next(bandit.space.objects)
+    bandit.space.remove_object(removed)
+    assert bandit.space.object_count == 4
+    assert branch.space.object_count == 5
+    assert branch.space[removed.id.root] is removed
+
+
+def test_nested_branches(bandit):
+    child = bandit.branch()
+    child.run(1)
+    grandchild = child.branch()
+    child.run(1)
+    bandit.run(3)
+    assert {obj.count for obj in grandchild.space.objects} == {4}
+    grandchild.run(1)
+    assert {obj.count for obj in grandchild.space.objects} == {5}
+    assert {obj.count for obj in child.space.objects} == {5}
+    assert {obj.count for obj in bandit.space.objects} == {6}
+
+
+def test_branch_history_is_shared(bandit):
+    branch = bandit.branch()
+    branch.run(1)
+    assert len(branch.time) == 4
+    assert len(bandit.time) == 3
+    assert branch.time["1:3"] == bandit.time["1:3"]
+    assert branch.time.buffer[0] is bandit.time.buffer[0]
@@ -0,0 +1,169 @@
+import numpy as np
+import pytest
+
+from bandit.checkpoint import load, save
+from bandit.columnar import Column, ColumnClock
+from bandit.main import TimeBandit
+from bandit.metrics import Max, Metrics, Sum
+from bandit.object import Object
+from bandit.snapshot import Snapshots
+from bandit.space import Space
+
+
+class Particle(Object):
+    def __init__(self, mass, leader=None):
+        super().__init__()
+        self.mass = mass
+        self.position = np.zeros(3)
+        self.velocity = np.array([1.0, 0.0, 0.0])
+        self.tags = {"kind": "particle"}
+        self.leader = leader
+
+    def _update(self):
+        self.position = self.position + self.velocity
+
+    def state(self):
+        return {"mass": self.mass, "x": float(self.position[0]), **super().state()}
+
+
+class Ball(Object):
+    position = Column(3)
+
+    def __init__(self, x):
+        super().__init__()
+        self.position = [x, 0, 0]
+
+    @classmethod
+    def _update_batch(cls, block):
+        block.position += 1
+
+    def state(self):
+        return {"x": float(self.position[0]), **super().state()}
+
+
+@pytest.fixture
+def bandit():
+    space = Space()
+    leader = Particle(1.0)
+    space.add_object(leader)
+    for i in range(4):
+        particle = Particle(float(i), leader)
+        space.add_object(particle)
+        space.add_connection(particle, leader, "follows")
+    space.add_interaction(leader, particle, "pulls")
+    bandit = TimeBandit(space)
+    bandit.run(3)
+    return bandit
+
+
+def test_space_round_trip(bandit, tmp_path):
+    path = bandit.space.save(str(tmp_path / "space.ckpt"))
+    space = Space.load(path)
+    assert list(space) == list(bandit.space)
+    assert space.state() == bandit.space.state()
+    leader = next(iter(space.objects))
+    for obj in space.objects:
+        assert obj.cycle == 4
+        assert obj.tags == {"kind": "particle"}
+        assert obj.position[0] == 3
+        assert len(obj) == 3
+        if obj is not leader:
+            assert obj.leader is leader
+            assert obj.connections[leader.id.root].node is leader
+            assert obj.connections[leader.id.root].edge_type == "follows"
+    assert len(leader.interactions) == 1
+
+
+def test_restored_space_keeps_running(bandit, tmp_path):
+    restored = TimeBandit.load(bandit.save(str(tmp_path / "run.ckpt")))
+    assert restored.clock.time == bandit.clock.time
+    assert restored.state() == bandit.state()
+    assert len(restored.time) == len(bandit.time)
+    restored.run(2)
+    bandit.run(2)
+    assert restored.state()["object_states"] == bandit.state()["object_states"]
+
+
+def test_save_without_history(bandit, tmp_path):
+    space = load(save(bandit.space, str(tmp_path / "space.ckpt"), history=False))
+    for obj in space.objects:
+        assert len(obj) == 0
+        assert obj.position[0] == 3
+
+
+def test_columnar_round_trip(tmp_path):
+    space = Space(columnar=True)
+    for i in range(5):
+        space.add_object(Ball(i))
+    space.update()
+    space.remove_object(next(iter(space.objects)))
+
+    restored = load(save(space, str(tmp_path / "columns.ckpt")))
+    block = restored.columns[Ball]
+    assert block.size == 4
+    assert np.array_equal(block.position[:, 0], [2, 3, 4, 5])
+    assert all(isinstance(obj.clock, ColumnClock) for obj in restored.objects)
+    restored.update()
+    restored.add_object(Ball(10))
+    assert np.array_equal(block.position[:, 0], [3, 4, 5, 6, 10])
+    assert [obj.cycle for obj in restored.objects] == [3, 3, 3, 3, 1]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other"
+    path.write_bytes(b"not a checkpoint" * 4)
+    with pytest.raises(ValueError):
+        load(str(path))
+
+
+def test_shared_clock_round_trip(tmp_path):
+    space = Space(shared_clock=True)
+    for i in range(3):
+        space.add_object(Particle(float(i)))
+    bandit = TimeBandit(space)
+    bandit.run(4)
+
+    restored = load(save(bandit, str(tmp_path / "shared.ckpt")))
+    assert restored.clock is restored.space.clock
+    assert restored.clock.time == bandit.clock.time
+    restored.run(2)
+    for obj in restored.space.objects:
+        assert obj.clock.master is restored.clock
+        assert (obj.cycle, obj.step) == (7, 0)
+
+
+def total_mass(particle):
+    return particle.mass
+
+
+class Rows(list):
+    def append(self, time, values):
+        super().append(time)
+
+
+def positions(space):
+    return {root: list(obj.position) for root, obj in space.items()}
+
+
+def test_bandit_keeps_snapshots_and_metrics(tmp_path):
+    space = Space()
+    for i in range(4):
+        space.add_object(Particle(float(i)))
+    sink = Rows()
+    metrics = Metrics(sink=sink, mass=Sum(total_mass), x=Max("position"))
+    bandit = TimeBandit(space, snapshots=Snapshots(3), metrics=metrics, record=False)
+    bandit.run(7)
+    expected = positions(bandit.space)
+    bandit.run(1)
+
+    restored = TimeBandit.load(bandit.save(str(tmp_path / "run.ckpt")))
+    assert restored.record is False and len(restored.time) == 0
+    assert restored.metrics.sink is None and len(sink) == 8
+    assert restored.metrics.latest["mass"] == 6.0
+    assert [snapshot.ticks for snapshot in restored.snapshots] == [0, 3, 6]
+    assert bandit.snapshots.latest.space is not None
+
+    restored.seek(1, 7)
+    assert positions(restored.space) == expected
+    restored.run(2)
+    assert list(restored.metrics.latest["x"]) == [9.0, 0.0, 0.0]
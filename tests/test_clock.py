@@ -1,6 +1,9 @@
+import pickle
 import time
 
-from bandit.clock import Clock
+import pytest
+
+from bandit.clock import Clock, ClockView
 
 
 def test_clock_update():
@@ -56,6 +59,20 @@ def test_clock_multiple_updates():
     assert clock.time == "2:0"
 
 
+def test_clock_advance():
+    clock = Clock(steps_per_cycle=4)
+    stepped = Clock(steps_per_cycle=4)
+    clock.update()
+    stepped.update()
+    clock.advance(9)
+    for _ in range(9):
+        stepped.update()
+    assert (clock.cycle, clock.step) == (stepped.cycle, stepped.step) == (3, 2)
+    assert clock.time == "3:2"
+    clock.advance(0)
+    assert clock.time == "3:2"
+
+
 def test_clock_real_time_multiple_updates():
     clock = Clock(10)
     initial_real_time = clock.real_time
@@ -65,3 +82,47 @@ def test_clock_real_time_multiple_updates():
     time.sleep(1)
     clock.update()
     assert clock.real_time > initial_real_time + 1
+
+
+def test_clock_view_follows_master():
+    master = Clock(10)
+    own = Clock(3)
+    own.update()
+    view = ClockView.follow(master, own)
+    assert view.time == "1:1"
+    view.update()
+    assert view.time == "1:1"
+    for _ in range(5):
+        master.update()
+    assert (view.cycle, view.step) == (3, 0)
+    assert view.ticks == 6
+    detached = view.detach()
+    master.update()
+    assert detached.time == "3:0"
+    assert view.time == "3:1"
+
+
+def test_clock_view_rate():
+    master = Clock()
+    view = master.view(steps_per_cycle=4, rate=2)
+    assert master.view(4, 0, 2) is view
+    for _ in range(3):
+        master.update()
+    assert view.time == "2:2"
+    with pytest.raises(RuntimeError):
+        view.reset()
+    detached = view.detach()
+    detached.reset()
+    assert detached.time == "1:0"
+
+
+def test_clock_view_pickles_with_master():
+    master = Clock()
+    view = master.view(3, 1)
+    master.update()
+    master2, view2 = pickle.loads(pickle.dumps((master, view)))
+    assert view2.master is master2
+    assert view2.time == "1:2"
+    master2.update()
+    assert view2.time == "2:0"
+    assert view.time == "1:2"
@@ -0,0 +1,204 @@
+import numpy as np
+import pytest
+
+from bandit.columnar import Column, ColumnClock
+from bandit.object import Object
+from bandit.space import Space
+
+
+class Ball(Object):
+    position = Column(3)
+    velocity = Column(3)
+    mass = Column()
+
+    def __init__(self, position, velocity, mass):
+        super().__init__()
+        self.position = position
+        self.velocity = velocity
+        self.mass = mass
+
+    def _update(self):
+        self.position = self.position + self.velocity
+
+    def state(self):
+        return {"position": list(self.position), **super().state()}
+
+
+class BatchBall(Ball):
+    @classmethod
+    def _update_batch(cls, block):
+        block.position += block.velocity
+
+
+@pytest.fixture
+def space():
+    return Space(columnar=True)
+
+
+def test_plain_space_keeps_attributes():
+    space = Space()
+    ball = Ball([0, 0, 0], [1, 0, 0], 2)
+    space.add_object(ball)
+    assert ball.position == [0, 0, 0]
+    assert space.columns is None
+
+
+def test_columns_hold_fields(space):
+    balls = [Ball([i, 0, 0], [1, 0, 0], i) for i in range(3)]
+    for ball in balls:
+        space.add_object(ball)
+    block = space.columns[Ball]
+    assert block.size == 3
+    assert np.array_equal(block.position[:, 0], [0, 1, 2])
+    assert balls[2].mass == 2
+    assert isinstance(balls[0].clock, ColumnClock)
+
+
+def test_object_view_writes_through(space):
+    ball = Ball([0, 0, 0], [1, 2, 3], 1)
+    space.add_object(ball)
+    ball.position[1] = 5
+    ball.mass = 4
+    block = space.columns[Ball]
+    assert block.position[0, 1] == 5
+    assert block.mass[0] == 4
+
+
+def test_per_object_update(space):
+    ball = Ball([0, 0, 0], [1, 0, 0], 1)
+    space.add_object(ball)
+    space.update()
+    space.update()
+    assert list(ball.position) == [2, 0, 0]
+    assert ball.cycle == 3
+    assert ball.id.temporal == f"{ball.id.root}.3.0"
+
+
+def test_batch_update(space):
+    balls = [BatchBall([0, 0, 0], [i, 1, 0], 1) for i in range(5)]
+    for ball in balls:
+        space.add_object(ball)
+    space.update()
+    block = space.columns[BatchBall]
+    assert np.array_equal(block.position[:, 0], [0, 1, 2, 3, 4])
+    assert np.array_equal(block.cycle, [2] * 5)
+    assert list(balls[3].position) == [3, 1, 0]
+    assert balls[3].cycle == 2
+    assert balls[3].state()["cycle"] == 2
+
+
+def test_assigning_views_of_a_column(space):
+    for i in range(4):
+        space.add_object(Ball([i, 0, i * 10], [1, 0, 0], float(i)))
+    block = space.columns[Ball]
+    block.mass = block.mass[::-1]
+    block.position = block.position[:, ::-1]
+    assert list(block.mass) == [3.0, 2.0, 1.0, 0.0]
+    assert np.array_equal(block.position[:, 0], [0, 10, 20, 30])
+    block.position[:, 1] += 1
+    block.position = block.position
+    block.mass = block.mass[::2].repeat(2)
+    assert np.array_equal(block.position[:, 1], [1] * 4)
+    assert list(block.mass) == [3.0, 3.0, 1.0, 1.0]
+
+
+def test_block_grows(space):
+    balls = [BatchBall([i, 0, 0], [0, 0, 0], 1) for i in range(1500)]
+    for ball in balls:
+        space.add_object(ball)
+    assert space.columns[BatchBall].capacity >= 1500
+    assert balls[1499].position[0] == 1499
+
+
+def test_remove_object(space):
+    balls = [Ball([i, 0, 0], [0, 0, 0], i) for i in range(3)]
+    for ball in balls:
+        space.add_object(ball)
+    space.remove_object(balls[0])
+    block = space.columns[Ball]
+    assert block.size == 2
+    assert balls[2].mass == 2
+    assert balls[2]._column_row == 0
+    assert balls[0].mass == 0
+    assert list(balls[0].position) == [0, 0, 0]
+    assert not isinstance(balls[0].clock, ColumnClock)
+
+
+class Follower(Object):
+    position = Column()
+
+    def __init__(self, position, leader=None):
+        super().__init__()
+        self.position = position
+        self.leader = leader
+
+    def _update(self):
+        if self.leader is not None:
+            self.position = self.leader.position
+        else:
+            self.position = self.position + 1
+
+
+def test_synchronous_reads_previous_tick():
+    space = Space(synchronous=True)
+    leader = Follower(0)
+    followers = [Follower(0, leader)]
+    followers.append(Follower(0, followers[0]))
+    for obj in (*reversed(followers), leader):
+        space.add_object(obj)
+    space.update()
+    assert [leader.position, followers[0].position, followers[1].position] == [1, 0, 0]
+    space.update()
+    assert [leader.position, followers[0].position, followers[1].position] == [2, 1, 0]
+
+
+def test_synchronous_swaps_arrays():
+    space = Space(synchronous=True)
+    for i in range(3):
+        space.add_object(Ball([i, 0, 0], [1, 0, 0], 1))
+    block = space.columns[Ball]
+    front = block.columns["position"]
+    mass = block.columns["mass"]
+    space.update()
+    assert block.columns["position"] is not front
+    assert block.columns["mass"] is mass
+    assert np.array_equal(block.position[:, 0], [1, 2, 3])
+    space.update()
+    assert block.columns["position"] is front
+    assert np.array_equal(block.position[:, 0], [2, 3, 4])
+
+
+def test_synchronous_front_is_read_only():
+    space = Space(synchronous=True)
+    ball = BatchBall([0, 0, 0], [1, 0, 0], 1)
+    space.add_object(ball)
+    block = space.columns[BatchBall]
+    block.begin()
+    block.position = block.position + block.velocity
+    assert ball.position[0] == 0
+    with pytest.raises(ValueError):
+        block.position[:, 0] += 1
+    block.swap()
+    assert ball.position[0] == 1
+
+
+class InPlaceBall(Ball):
+    def _update(self):
+        self.position += self.velocity
+        self.mass *= 2
+
+
+def test_synchronous_in_place_operators():
+    space = Space(synchronous=True)
+    balls = [BatchBall([i, 0, 0], [1, 0, 0], 1) for i in range(3)]
+    balls.append(InPlaceBall([0, 0, 0], [0, 2, 0], 1))
+    for ball in balls:
+        space.add_object(ball)
+    block = space.columns[BatchBall]
+    front = block.columns["position"]
+    space.update()
+    space.update()
+    assert block.columns["position"] is front
+    assert np.array_equal(block.position[:, 0], [2, 3, 4])
+    assert type(block.position) is np.ndarray
+    assert list(balls[-1].position) == [0, 4, 0] and balls[-1].mass == 4
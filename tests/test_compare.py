@@ -0,0 +1,142 @@
+import math
+
+import numpy as np
+import pytest
+
+from bandit.compare import compare, compare_branches
+from bandit.content import StateStore
+from bandit.main import TimeBandit
+from bandit.object import Object
+from bandit.space import Space
+from bandit.state import _vector
+
+
+class Mover(Object):
+    def __init__(self, speed=1.0):
+        super().__init__()
+        self.speed = speed
+        self.value = 0.0
+
+    def _update(self):
+        self.value += self.speed
+
+    def state(self):
+        return {
+            "value": self.value,
+            "trail": np.array([self.value, 2 * self.value]),
+            **super().state(),
+        }
+
+
+def make(store=None, count=6, keyframe_interval=4):
+    space = Space()
+    movers = [Mover(speed=0.0 if i % 2 else 1.0) for i in range(count)]
+    for mover in movers:
+        space.add_object(mover)
+    bandit = TimeBandit(
+        space, temporal_depth=50, keyframe_interval=keyframe_interval, store=store
+    )
+    bandit.run(3)
+    return bandit, [mover.id.root for mover in movers]
+
+
+def reference(a, b):
+    """
+    Compares two histories state by state.
+    """
+    times, changed, distances = [], [], []
+    for time in [entry[0] for entry in a.time.buffer]:
+        if time not in b.time:
+            continue
+        before = a.time[time]["object_states"]
+        after = b.time[time]["object_states"]
+        differ, distance = set(), {}
+        for root in before.keys() | after.keys():
+            old, new = before.get(root), after.get(root)
+            if old is None or new is None:
+                differ.add(root)
+                continue
+            x, y = _vector(old)[1], _vector(new)[1]
+            if not all(
+                np.array_equal(old[key], new[key]) if isinstance(old[key], np.ndarray)
+                else old[key] == new[key]
+                for key in old
+            ):
+                differ.add(root)
+                distance[root] = float(np.sqrt(np.square(x - y, dtype=np.float64).sum()))
+        times.append(time)
+        changed.append(differ)
+        distances.append(distance)
+    return times, changed, distances
+
+
+def check(divergence, a, b):
+    times, changed, distances = reference(a, b)
+    assert divergence.times == times
+    assert [set(step) for step in divergence.changed] == changed
+    for found, expected in zip(divergence.distances, distances):
+        assert found == pytest.approx(expected)
+    assert divergence.distance == pytest.approx(
+        [math.sqrt(sum(d * d for d in step.values())) for step in distances]
+    )
+
+
+def test_identical_branch_never_differs():
+    bandit, _ = make(StateStore())
+    branch = bandit.branch()
+    bandit.run(6)
+    branch.run(6)
+    divergence = branch.compare()
+    assert len(divergence) == 9
+    assert divergence.first is None
+    assert divergence.objects == set()
+    assert not divergence.distance.any()
+
+
+def test_divergence_matches_state_by_state_comparison():
+    bandit, roots = make()
+    branch = bandit.branch()
+    branch.space.edit(branch.space[roots[1]]).speed = 0.5
+    later = Mover(2.0)
+    branch.space.add_object(later)
+    bandit.run(5)
+    branch.run(2)
+    # roots[0] differs for one step only
+    branch.space.edit(branch.space[roots[1]]).speed = 0.0
+    branch.space.edit(branch.space[roots[0]]).value = 100.0
+    branch.run(1)
+    branch.space.edit(branch.space[roots[0]]).value = 6.0
+    branch.run(2)
+
+    divergence = compare(bandit, branch)
+    check(divergence, bandit, branch)
+    assert divergence.first == "1:4"
+    assert divergence.first_difference(roots[1]) == "1:4"
+    assert divergence.first_difference(roots[2]) is None
+    assert later.id.root in divergence.changed[-1]
+    assert later.id.root not in divergence.distances[-1]
+    assert roots[0] in divergence.changed[-3]
+    assert roots[0] not in divergence.changed[-1]
+    assert divergence.distances[3][roots[1]] == pytest.approx(0.5 * math.sqrt(6))
+
+
+def test_compare_many_branches():
+    bandit, roots = make(keyframe_interval=1)
+    branches = [bandit.branch(str(speed)) for speed in (1.0, 2.0, 3.0)]
+    for branch, speed in zip(branches, (1.0, 2.0, 3.0)):
+        branch.space.edit(branch.space[roots[1]]).speed = speed
+        branch.run(4)
+    bandit.run(4)
+
+    divergences = compare_branches(bandit, branches)
+    for branch, divergence in zip(branches, divergences):
+        check(divergence, bandit, branch)
+        assert divergence.objects == {roots[1]}
+    last = [divergence.distance[-1] for divergence in divergences]
+    assert last[0] < last[1] < last[2]
+
+
+def test_only_histories_can_be_compared():
+    bandit, _ = make()
+    with pytest.raises(TypeError):
+        compare(bandit, bandit.space)
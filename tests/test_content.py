@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+import torch
+from fizicks import Position
+
+from bandit.content import StateStore, _canonical, _dumps, digest, encode
+from bandit.util import generate_hash
+
+
+def test_digest_is_canonical():
+    assert digest({"a": 1, "b": {"c": [1.0, 2.0]}}) == digest(
+        {"b": {"c": [1.0, 2.0]}, "a": 1}
+    )
+    assert digest({1: "a", "b": 2}) == digest({"b": 2, 1: "a"})
+    assert digest({3, 1, 2}) == digest({1, 2, 3})
+    assert encode(np.float64(1.5)) == encode(1.5)
+    assert len(digest({})) == 16
+    assert generate_hash({"a": 1}) == digest({"a": 1}).hex()
+
+
+def test_digest_distinguishes_types_and_values():
+    values = [1, 1.0, True, "1", b"1", [1], (1,), {1}, np.array([1]), None]
+    assert len({digest(value) for value in values}) == len(values)
+    assert digest(np.arange(3.0)) != digest(np.arange(3.0).reshape(3, 1))
+    assert digest(np.zeros(1000)) != digest(np.eye(1, 1000))
+
+
+def test_digest_of_arrays_and_objects():
+    assert digest(torch.ones(2)) == digest(np.ones(2, dtype=np.float32))
+    assert digest(Position(1, 2, 3)) == digest(Position(1, 2, 3))
+    assert digest(Position(1, 2, 3)) != digest(Position(1, 2, 4))
+
+
+def test_flat_states_encode_like_nested_ones():
+    states = [
+        {"b": [1.0, 2.0], "a": 1, "c": None, "d": ()},
+        {2: "x", 1: (1, "y")},
+        {"a": 1, 2: "b"},
+        {"a": [{"c": 1, "b": 2}]},
+    ]
+    for state in states:
+        assert encode(state) == _dumps(_canonical(state, set()))
+    assert encode({"a": [{"c": 1, "b": 2}]}) == encode({"a": [{"b": 2, "c": 1}]})
+
+
+def test_cyclic_states_are_rejected():
+    state = {"a": 1}
+    state["self"] = [state]
+    with pytest.raises(ValueError):
+        digest(state)
+    shared = [1.0]
+    assert digest({"a": shared, "b": shared}) == digest({"a": [1.0], "b": [1.0]})
+
+
+def test_store_interns_equal_states():
+    store = StateStore()
+    key, first = store.intern({"a": 1})
+    again, second = store.intern({"a": 1})
+    assert key == again and second is first
+    assert (store.hits, store.misses, len(store)) == (1, 1, 1)
+    store.release(key)
+    assert key in store
+    store.release(key)
+    assert key not in store
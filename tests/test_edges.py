@@ -0,0 +1,188 @@
+import random
+
+import numpy as np
+from anarchy import Anarchy
+
+from bandit import edges as edges_module
+from bandit.checkpoint import load, save
+from bandit.edges import EdgeStore, EdgeView
+from bandit.object import Object
+from bandit.physics import Physics, Spring
+from bandit.space import Space
+from bandit.spatial import SpatialGrid
+
+
+class Node(Object):
+    def __init__(self, value=0, position=(0, 0, 0)):
+        super().__init__()
+        self.value = value
+        self.position = list(position)
+        self.velocity = [0, 0, 0]
+
+    def _update(self):
+        self.value = sum(edge.node.value for edge in self.connections.values())
+
+    def state(self):
+        return {"value": self.value, **super().state()}
+
+
+class Body(Node):
+    kinematic = True
+
+
+def graph(count, edges=None, seed=0):
+    rng = random.Random(seed)
+    space = Space(edges=edges)
+    nodes = [Node(i) for i in range(count)]
+    for node in nodes:
+        space.add_object(node)
+    return space, nodes, rng
+
+
+def reference(space, kind):
+    """
+    The edges of a space read object by object.
+    """
+    return {
+        (root, target, edge.edge_type)
+        for root in space
+        for target, edge in getattr(space[root], kind).items()
+    }
+
+
+def test_views_read_like_anarchy():
+    space, (a, b, c), _ = graph(3, EdgeStore())
+    space.add_connection(a, b, "near")
+    space.add_connection(a, c, "far")
+    space.add_connection(a, b, "ignored")
+    space.add_interaction(c, a, "pulls")
+
+    assert isinstance(a.connections, EdgeView)
+    assert set(a.connections) == {b.id.root, c.id.root}
+    edge = a.connections[b.id.root]
+    assert edge.node is b and edge.edge_type == "near"
+    assert a.connections.get(a.id.root) is None
+    assert len(space.connections) == 1
+    assert len(space.interactions) == 1
+
+    space.remove_connection(a, b)
+    assert list(a.connections) == [c.id.root]
+    assert b.id.root not in a.connections
+
+
+def test_vectorized_queries_match_objects(monkeypatch):
+    monkeypatch.setattr(edges_module, "_REBUILD", 8)
+    store = EdgeStore()
+    space, nodes, rng = graph(50, store)
+    for _ in range(400):
+        source, target = rng.sample(nodes, 2)
+        if rng.random() < 0.3:
+            space.remove_connection(source, target)
+        else:
+            space.add_connection(source, target, rng.choice(["a", "b"]))
+    space.remove_object(nodes[7])
+
+    expected = reference(space, "connections")
+    sources, targets, labels = store.edges("connections")
+    roots, names = store.roots, store.labels
+    found = {
+        (roots[s], roots[t], names[l])
+        for s, t, l in zip(sources.tolist(), targets.tolist(), labels.tolist())
+    }
+    assert found == expected
+    assert len(sources) == store.count("connections")
+    assert not sources.flags.writeable
+
+    ids = np.array([store.index(node.id.root) for node in nodes if node is not nodes[7]])
+    degree = store.degree("connections")
+    incoming = store.degree("connections", incoming=True)
+    for id in ids.tolist():
+        root = roots[id]
+        assert degree[id] == len(space[root].connections)
+        assert incoming[id] == sum(target == root for _, target, _ in expected)
+
+    indptr, csr_targets, _ = store.csr("connections")
+    owners, gathered, _ = store.gather("connections", ids[::-1])
+    for position, id in enumerate(ids[::-1].tolist()):
+        row = csr_targets[indptr[id] : indptr[id + 1]].tolist()
+        assert gathered[owners == position].tolist() == row
+
+    a_sources, _, a_labels = store.edges("connections", "a")
+    assert set(a_labels.tolist()) <= {store.label("a")}
+    assert len(a_sources) == sum(name == "a" for _, _, name in expected)
+
+
+def test_removing_an_object_removes_its_edges():
+    space, (a, b, c), _ = graph(3, EdgeStore())
+    space.add_connection(a, b, "near")
+    space.add_connection(b, a, "near")
+    space.add_connection(b, c, "near")
+    space.remove_object(a)
+
+    assert isinstance(a.connections, Anarchy)
+    assert a.connections[b.id.root].edge_type == "near"
+    assert list(b.connections) == [c.id.root]
+    assert space.edges.count("connections") == 1
+
+    space.add_object(a)
+    assert set(space[a.id.root].connections) == {b.id.root}
+    assert list(b.connections) == [c.id.root]
+
+
+def test_forks_have_their_own_edges():
+    space, (a, b, c), _ = graph(3, EdgeStore())
+    space.add_connection(a, b, "near")
+    fork = space.fork()
+    fork.add_connection(fork[a.id.root], c, "near")
+    space.remove_connection(space[a.id.root], b)
+    space.add_connection(space[b.id.root], c, "near")
+
+    assert set(space[a.id.root].connections) == set()
+    assert set(fork[a.id.root].connections) == {b.id.root, c.id.root}
+    assert set(fork[b.id.root].connections) == set()
+    assert space.edges.count("connections") == 1
+    assert fork.edges.count("connections") == 2
+
+
+def test_update_and_checkpoint_match_anarchy(tmp_path):
+    results = []
+    for store in (None, EdgeStore()):
+        space, nodes, rng = graph(30, store, seed=3)
+        for node in nodes:
+            for other in rng.sample(nodes, 3):
+                if other is not node:
+                    space.add_connection(node, other, "near")
+        space.update()
+        restored = load(save(space, str(tmp_path / "edges.ckpt")))
+        restored.update()
+        assert reference(restored, "connections") == reference(space, "connections")
+        assert (restored.edges is None) == (store is None)
+        results.append(sorted(obj.value for obj in restored.objects))
+    assert results[0] == results[1]
+
+
+def test_physics_and_proximity_use_the_store():
+    results = []
+    for store in (None, EdgeStore()):
+        space = Space(
+            edges=store,
+            physics=Physics(forces={"spring": Spring(0.5)}),
+            spatial=SpatialGrid(2.0, proximity=1.5),
+        )
+        first, second = Body(position=(0, 0, 0)), Body(position=(1, 0, 0))
+        far = Body(position=(10, 0, 0))
+        for body in (first, second, far):
+            space.add_object(body)
+        space.add_interaction(first, far, "spring")
+        space.update()
+        space.update()
+        names = {first.id.root: "first", second.id.root: "second", far.id.root: "far"}
+        results.append(
+            [
+                (list(body.position), sorted(names[root] for root in body.interactions))
+                for body in space.objects
+            ]
+        )
+    assert results[0] == results[1]
+    assert results[1][0][1] == ["far"]
+    assert results[1][1][1] == []
@@ -0,0 +1,202 @@
+import pytest
+from fizicks import Position, Velocity
+
+from bandit.checkpoint import load, save
+from bandit.columnar import Column
+from bandit.effect import Below, Decay, Effect, EffectEngine, Push
+from bandit.object import Object
+from bandit.physics import Physics
+from bandit.space import Space
+
+
+class Room(Object):
+    def __init__(self, temperature):
+        super().__init__()
+        self.temperature = temperature
+        self.debt = []
+
+    def _update(self):
+        pass
+
+    def state(self):
+        return {"temperature": self.temperature, **super().state()}
+
+
+class ColumnRoom(Object):
+    temperature = Column()
+    debt = Column(3)
+
+    def __init__(self, temperature):
+        super().__init__()
+        self.temperature = temperature
+
+    @classmethod
+    def _update_batch(cls, block):
+        pass
+
+    def state(self):
+        return super().state()
+
+
+class Ball(Object):
+    kinematic = True
+
+    def __init__(self, velocity):
+        super().__init__()
+        self.position = Position(0, 0, 0)
+        self.velocity = Velocity(*velocity)
+        self.debt = []
+
+    def _update(self):
+        pass
+
+    def state(self):
+        return super().state()
+
+
+class Counted(Effect):
+    """
+    Counts the batches and effects it is applied in.
+    """
+
+    batches = []
+
+    def apply(self, target):
+        target.temperature += 1
+
+    @classmethod
+    def apply_batch(cls, space, effects):
+        cls.batches.append(len(effects))
+        super().apply_batch(space, effects)
+
+
+@pytest.fixture
+def space():
+    return Space(effects=EffectEngine())
+
+
+def temperatures(space, rooms):
+    return [space[room.id.root].temperature for room in rooms]
+
+
+def test_effects_apply_between_start_and_stop(space):
+    rooms = [Room(0) for _ in range(3)]
+    for room in rooms:
+        space.add_object(room)
+    space.add_effect(Counted(rooms[0]))
+    space.add_effect(Counted(rooms[1], start=3, stop=5))
+    space.add_effect(Counted(rooms[2], start=2, duration=1))
+    Counted.batches = []
+
+    seen = []
+    for _ in range(6):
+        space.update()
+        seen.append(temperatures(space, rooms))
+
+    assert seen == [
+        [1, 0, 0],
+        [2, 0, 1],
+        [3, 1, 1],
+        [4, 2, 1],
+        [5, 2, 1],
+        [6, 2, 1],
+    ]
+    assert Counted.batches == [1, 2, 2, 2, 1, 1]
+    assert len(space.effects) == 1
+
+
+def test_conditions_and_removal(space):
+    room = Room(0)
+    other = Room(0)
+    space.add_object(room)
+    space.add_object(other)
+    space.add_effect(Counted(room, condition=Below("temperature", 3)))
+    later = space.add_effect(Counted(other, start=3))
+    space.update()
+    space.remove_effect(later)
+    for _ in range(4):
+        space.update()
+
+    assert room.temperature == 3
+    assert other.temperature == 0
+    assert len(space.effects) == 1
+    assert [type(effect) for effect in space.effects.active()] == [Counted]
+
+
+def test_removed_objects_drop_their_effects(space):
+    room = Room(0)
+    space.add_object(room)
+    space.add_effect(Counted(room))
+    space.update()
+    space.remove_object(room)
+    space.update()
+    assert space.effects.active() == []
+
+
+def test_waiting_effects_of_removed_objects_are_dropped(space):
+    room = Room(0)
+    space.add_object(room)
+    space.add_effect(Counted(room, start=3))
+    space.update()
+    space.remove_object(room)
+    for _ in range(3):
+        space.update()
+    assert space.effects.active() == [] and len(space.effects) == 0
+
+
+def test_decay_and_push_on_columns():
+    space = Space(columnar=True, effects=EffectEngine())
+    rooms = [ColumnRoom(100.0) for _ in range(3)]
+    plain = Room(100.0)
+    for room in rooms + [plain]:
+        space.add_object(room)
+    space.add_effect(Decay(rooms[0], "temperature", 0.5))
+    space.add_effect(Decay(rooms[0], "temperature", 0.5))
+    space.add_effect(Decay(rooms[2], "temperature", 0.1, stop=2))
+    space.add_effect(Decay(plain, "temperature", 0.5))
+    space.add_effect(Push(rooms[1], (1, 0, 0)))
+    space.add_effect(Push(plain, (0, 1, 0)))
+    space.update()
+    space.update()
+
+    assert [room.temperature for room in rooms] == pytest.approx([6.25, 100, 90])
+    assert plain.temperature == 25
+    assert list(rooms[1].debt) == [2, 0, 0]
+    assert plain.debt == [(0, 1, 0), (0, 1, 0)]
+
+
+def test_push_feeds_physics():
+    space = Space(effects=EffectEngine(), physics=Physics())
+    ball = Ball((0, 0, 0))
+    space.add_object(ball)
+    space.add_effect(Push(ball, (0, -1, 0), duration=2))
+    for _ in range(3):
+        space.update()
+    assert tuple(ball.velocity) == (0, -2, 0)
+    assert tuple(ball.position) == (0, -5, 0)
+    assert ball.debt == []
+
+
+def test_forks_and_checkpoints_keep_effects(space, tmp_path):
+    room = Room(0)
+    space.add_object(room)
+    decay = space.add_effect(Decay(room, "temperature", 0.5, start=2))
+    room.temperature = 8
+    space.update()
+
+    fork = space.fork()
+    fork.remove_effect(decay)
+    fork.update()
+    space.update()
+    assert fork[room.id.root].temperature == 8
+    assert space[room.id.root].temperature == 4
+
+    restored = load(save(space, str(tmp_path / "effects.ckpt")))
+    restored.update()
+    assert restored.effects.tick == 3
+    assert restored[room.id.root].temperature == 2
+
+
+def test_space_without_engine():
+    with pytest.raises(ValueError):
+        Space().add_effect(Counted("root"))
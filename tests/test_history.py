@@ -0,0 +1,111 @@
+import pytest
+
+from bandit.content import StateStore, digest
+from bandit.history import REMOVED, Delta, DeltaHistory, diff, patch
+
+
+def test_diff_changed_keys():
+    delta = diff({"a": 1, "b": 2}, {"a": 1, "b": 3, "c": 4})
+    assert delta == {"b": 3, "c": 4}
+
+
+def test_diff_removed_keys():
+    delta = diff({"a": 1, "b": 2}, {"a": 1})
+    assert delta == {"b": REMOVED}
+
+
+def test_diff_nested():
+    old = {"objects": {"x": {"p": 1, "q": 2}, "y": {"p": 1}}}
+    new = {"objects": {"x": {"p": 1, "q": 5}, "y": {"p": 1}}}
+    delta = diff(old, new)
+    assert delta == {"objects": {"x": {"q": 5}}}
+    assert isinstance(delta["objects"]["x"], Delta)
+
+
+def test_patch_round_trip():
+    old = {"objects": {"x": {"p": 1, "q": 2}, "y": {"p": 1}}, "n": 2}
+    new = {"objects": {"x": {"p": 1, "q": 5}}, "n": 1}
+    patched = patch(old, diff(old, new))
+    assert patched == new
+    assert old["objects"]["x"]["q"] == 2
+
+
+def test_history_random_access():
+    history = DeltaHistory(temporal_depth=50, keyframe_interval=4)
+    for i in range(20):
+        history.update({"step": i, "static": "x"}, f"t{i}")
+    assert history.current == {"step": 19, "static": "x"}
+    assert history[0]["step"] == 19
+    assert history[7]["step"] == 12
+    assert history["t3"] == {"step": 3, "static": "x"}
+    assert [state["step"] for state in history] == list(range(20))
+    assert history.keyframes() == 5
+
+
+def test_history_eviction():
+    history = DeltaHistory(temporal_depth=5, keyframe_interval=3)
+    for i in range(12):
+        history.update({"step": i}, f"t{i}")
+    assert len(history) == 5
+    assert "t6" not in history
+    assert history["t7"] == {"step": 7}
+    assert history.buffer[0][1]
+    with pytest.raises(IndexError):
+        history[5]
+
+
+def test_history_stores_only_changes():
+    world = {str(i): {"value": i} for i in range(1000)}
+    history = DeltaHistory(temporal_depth=100, keyframe_interval=50)
+    for step in range(100):
+        world = {**world, "0": {"value": step}}
+        history.update({"objects": world}, str(step))
+    for temporal_id, is_keyframe, payload in history.buffer:
+        if not is_keyframe:
+            assert payload == {"objects": {"0": {"value": int(temporal_id)}}}
+    assert history.keyframes() == 2
+    assert history["10"]["objects"]["0"] == {"value": 10}
+    assert history["10"]["objects"]["999"] == {"value": 999}
+
+
+def test_history_interns_keyframes():
+    store = StateStore()
+    history = DeltaHistory(temporal_depth=6, keyframe_interval=2, store=store)
+    for step in range(6):
+        history.update({"value": step // 4, "nested": {"a": [1, 2]}}, f"1:{step}")
+    keyframes = [entry[2] for entry in history.buffer if entry[1]]
+    assert len(keyframes) == 3
+    assert keyframes[0] is keyframes[1]
+    assert len(store) == 2
+    assert history.buffer[1][2] is history.buffer[3][2]
+
+    assert history.digest(0) == history.digest("1:4") == digest(history[0])
+    assert history.digest("1:0") == history.digest("1:1")
+    assert history.digest("1:0") != history.digest("1:5")
+
+    fork = history.fork()
+    for step in range(6, 12):
+        history.update({"value": 9}, f"1:{step}")
+    assert len(store) == 3
+    assert fork[0] == {"value": 1, "nested": {"a": [1, 2]}}
+    del fork
+
+
+def test_history_truncate():
+    store = StateStore()
+    history = DeltaHistory(temporal_depth=10, keyframe_interval=3, store=store)
+    for i in range(8):
+        history.update({"step": i}, f"t{i}")
+    history.truncate("t4")
+    assert history.current == {"step": 4}
+    assert "t5" not in history and len(history) == 5
+    assert len(store) == 2
+    history.update({"step": 50}, "t5")
+    assert not history.buffer[-1][1]
+    assert history["t5"] == {"step": 50}
+    assert [state["step"] for state in history] == [0, 1, 2, 3, 4, 50]
+
+    with pytest.raises(KeyError):
+        history.truncate("t9")
+    history.truncate()
+    assert len(history) == 0 and len(store) == 0
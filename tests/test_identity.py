@@ -1,5 +1,14 @@
+import pickle
+import subprocess
+import sys
+
+import pytest
+
+from bandit.checkpoint import load, save
 from bandit.clock import Clock
-from bandit.identity import Identity
+from bandit.identity import CompactIdentity, Identity, IdentityRegistry
+from bandit.object import Object
+from bandit.space import Space
 
 
 def test_identity():
@@ -19,3 +28,112 @@ def test_identity_call():
     identity = Identity()
     assert identity() == identity.temporal
     assert identity(root=True) == identity.root
+
+
+def test_compact_identity():
+    identity = CompactIdentity()
+    assert isinstance(identity.root, int)
+    assert identity.temporal == (identity.root, 1, 0)
+    clock = Clock()
+    clock.update()
+    identity.update(clock)
+    assert identity.temporal == (identity.root, 1, 1)
+    assert identity.format() == f"{identity.uuid}.1.1"
+    assert identity.format(temporal=False) == identity.uuid
+    assert CompactIdentity(identity.uuid).root == identity.root
+
+
+def test_registry_claim():
+    registry = IdentityRegistry()
+    assert registry.register("a") == 0
+    assert registry.register("a") == 0
+    assert registry.claim(5, "b") == 5
+    assert registry.uuid(5) == "b"
+    assert registry.register("c") == 6
+    with pytest.raises(ValueError):
+        registry.claim(0, "d")
+    with pytest.raises(KeyError):
+        registry.uuid(3)
+
+
+def test_compact_identity_pickles_with_uuid():
+    identity = CompactIdentity()
+    restored = pickle.loads(pickle.dumps(identity))
+    assert restored.root == identity.root
+    assert restored.uuid == identity.uuid
+
+
+class CompactCounter(Object):
+    compact_identity = True
+
+    def _update(self):
+        pass
+
+    def state(self):
+        return super().state()
+
+
+def test_compact_objects(tmp_path):
+    space = Space()
+    objects = [CompactCounter() for _ in range(3)]
+    for obj in objects:
+        space.add_object(obj)
+    space.add_connection(objects[0], objects[1], "next to")
+    space.update()
+    obj = space[objects[0].id.root]
+    assert obj.id.temporal == (obj.id.root, 2, 0)
+    assert obj[(obj.id.root, 2, 0)]["cycle"] == 2
+
+    restored = load(save(space, str(tmp_path / "compact.ckpt")))
+    assert list(restored) == list(space)
+    assert objects[1].id.root in restored[obj.id.root].connections
+
+
+SAVE = """
+import pickle, sys
+from bandit.identity import registry
+from bandit.main import TimeBandit
+from bandit.space import Space
+from tests.test_identity import CompactCounter
+
+for _ in range(int(sys.argv[2])):
+    registry.register()
+space = Space()
+for _ in range(3):
+    space.add_object(CompactCounter())
+bandit = TimeBandit(space)
+bandit.run(3)
+bandit.save(sys.argv[1] + ".ckpt")
+with open(sys.argv[1] + ".pickle", "wb") as f:
+    pickle.dump(list(space.values()), f)
+print(" ".join(obj.id.uuid for obj in space.values()))
+"""
+
+
+def test_handles_are_mapped_between_processes(tmp_path):
+    from bandit.identity import registry
+    from bandit.main import TimeBandit
+
+    path = str(tmp_path / "run")
+    # Whatever handles the saving process used are already taken here
+    for _ in range(20):
+        registry.register()
+    uuids = subprocess.run(
+        [sys.executable, "-c", SAVE, path, "7"],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+
+    bandit = TimeBandit.load(path + ".ckpt")
+    roots = [registry.register(uuid) for uuid in uuids]
+    assert list(bandit.space) == roots
+    assert list(bandit.state()["object_states"]) == roots
+    for root in roots:
+        obj = bandit.space[root]
+        assert obj.id.temporal == (root, 4, 0)
+        assert obj[obj.id.temporal]["root_id"] == root
+        assert set(obj.id_index) == {(root, cycle, 0) for cycle in range(2, 5)}
+
+    with open(path + ".pickle", "rb") as f:
+        objects = pickle.load(f)
+    assert [obj.id.root for obj in objects] == roots
+    assert objects[0][objects[0].id.temporal]["temporal_id"] == (roots[0], 4, 0)
@@ -0,0 +1,137 @@
+import pytest
+
+from bandit import merge as merge_module
+from bandit.edges import EdgeStore
+from bandit.main import TimeBandit
+from bandit.merge import Conflict, merge
+from bandit.object import Object
+from bandit.space import Space
+
+
+class Item(Object):
+    def __init__(self, value=0, color="red"):
+        super().__init__()
+        self.value = value
+        self.color = color
+        self.tags = []
+
+    def _update(self):
+        pass
+
+    def state(self):
+        return {"value": self.value, "color": self.color, **super().state()}
+
+
+def make(count=4, edges=None):
+    space = Space(edges=edges)
+    items = [Item(i) for i in range(count)]
+    for item in items:
+        space.add_object(item)
+    return TimeBandit(space), [item.id.root for item in items]
+
+
+def edges(space, root, kind="connections"):
+    return {target: edge.edge_type for target, edge in getattr(space[root], kind).items()}
+
+
+@pytest.mark.parametrize("store", [False, True])
+def test_non_conflicting_changes_are_applied(store):
+    bandit, (a, b, c, d) = make(edges=EdgeStore() if store else None)
+    space = bandit.space
+    space.add_connection(space[a], space[b], "near")
+    space.add_connection(space[a], space[c], "near")
+    branch = bandit.branch()
+    fork = branch.space
+
+    fork.edit(fork[a]).value = 10
+    fork.edit(fork[b]).tags.append("seen")
+    fork.remove_connection(fork[a], fork[b])
+    fork.add_interaction(fork[c], fork[d], "pulls")
+    fork.remove_object(fork[d])
+    added = Item(99)
+    fork.add_object(added)
+    fork.add_connection(added, fork[c], "near")
+
+    space.edit(space[a]).color = "blue"
+    space.add_connection(space[a], space[d], "far")
+    space.edit(space[c]).value = 30
+
+    result = branch.merge()
+    assert result.clean
+    assert result.changed[a] == ["value", ("connections", b)]
+    assert result.removed == [d]
+    assert result.added == [added.id.root]
+
+    assert (space[a].value, space[a].color) == (10, "blue")
+    assert space[b].tags == ["seen"] and fork[b].tags is not space[b].tags
+    assert space[c].value == 30
+    assert d not in space
+    assert space[added.id.root] is not added
+    assert edges(space, added.id.root) == {c: "near"}
+    assert space[added.id.root].connections[c].node is space[c]
+    assert edges(space, a) == ({c: "near"} if store else {c: "near", d: "far"})
+    # the branch did not change
+    assert fork[a].color == "red" and d not in fork
+
+
+def test_conflicts_are_reported_per_field():
+    bandit, (a, b, c, _) = make()
+    space = bandit.space
+    branch = bandit.branch()
+    fork = branch.space
+
+    fork.edit(fork[a]).value = 1
+    fork.edit(fork[a]).color = "green"
+    space.edit(space[a]).value = 2
+    space.edit(space[a]).color = "green"
+    fork.edit(fork[b]).value = 5
+    space.remove_object(space[b])
+    fork.remove_object(fork[c])
+    space.edit(space[c]).color = "blue"
+
+    preview = branch.merge(apply=False)
+    assert space[a].value == 2
+    assert preview.conflicts == [
+        Conflict(a, "value", 0, 2, 1),
+        Conflict(b, None, preview.conflicts[1].base, None, fork[b]),
+        Conflict(c, None, preview.conflicts[2].base, space[c], None),
+    ]
+    assert preview.changed == {}
+
+    result = branch.merge()
+    assert not result.clean
+    assert space[a].value == 2 and b not in space and c in space
+
+    result = branch.merge(prefer="theirs")
+    assert len(result.conflicts) == 3
+    assert space[a].value == 1 and space[b].value == 5 and c not in space
+
+
+def test_merge_only_visits_changed_objects(monkeypatch):
+    bandit, roots = make(count=2000)
+    branch = bandit.branch()
+    bandit.run(1)
+    fork = branch.space
+    for root in roots[:3]:
+        fork.edit(fork[root]).value = -1
+
+    visited = []
+    fields = merge_module._fields
+    monkeypatch.setattr(
+        merge_module, "_fields", lambda object: visited.append(object) or fields(object)
+    )
+    result = merge(bandit, branch)
+    assert set(result.changed) == set(roots[:3])
+    assert len(visited) == 9
+    assert [bandit.space[root].value for root in roots[:4]] == [-1, -1, -1, 3]
+
+
+def test_only_forks_can_be_merged():
+    bandit, _ = make()
+    other, _ = make()
+    with pytest.raises(ValueError):
+        merge(bandit, other)
+    with pytest.raises(ValueError):
+        merge(bandit, bandit.branch(), prefer="mine")
+    with pytest.raises(TypeError):
+        merge(bandit, object())
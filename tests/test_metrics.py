@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from bandit import metrics as metrics_module
+from bandit.columnar import Column
+from bandit.main import TimeBandit
+from bandit.metrics import Count, Max, Mean, Metrics, Min, Sum
+from bandit.object import Object
+from bandit.space import Space
+from bandit.trajectory import TrajectoryLog
+
+
+class Ball(Object):
+    velocity = Column(2)
+    mass = Column()
+
+    def __init__(self, speed, mass):
+        super().__init__()
+        self.velocity = np.array([speed, 0.0])
+        self.mass = mass
+
+    def _update(self):
+        self.velocity = self.velocity * 2
+
+    def state(self):
+        return {"velocity": list(self.velocity), **super().state()}
+
+
+class Marker(Object):
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+    def _update(self):
+        self.value += 1
+
+    def state(self):
+        return {"value": self.value, **super().state()}
+
+
+class Rows(list):
+    def append(self, time, values):
+        super().append((time, values))
+
+
+def energy(ball):
+    return 0.5 * ball.mass * (ball.velocity**2).sum(-1)
+
+
+def make(columnar=False, **kwargs):
+    space = Space(columnar=columnar)
+    for i in range(4):
+        space.add_object(Ball(i + 1.0, 2.0))
+    for i in range(2):
+        space.add_object(Marker(i))
+    return TimeBandit(space, **kwargs)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_reducers(columnar):
+    space = make(columnar).space
+    assert Count()(space) == {"Ball": 4, "Marker": 2}
+    assert Count(Ball)(space) == 4
+    assert list(Mean("velocity", Ball)(space)) == [2.5, 0.0]
+    assert Sum(energy, Ball)(space) == 30.0
+    assert (Min("value")(Space()), Sum("value")(Space())) == (None, 0)
+    assert Max("value", Marker)(space) == 1
+
+    space.add_object(Ball(5.0, 1.0))
+    assert Count(Ball)(space) == 5
+    assert Sum(energy, Ball)(space) == 42.5
+
+
+def test_objects_are_only_collected_when_the_topology_changes(monkeypatch):
+    bandit = make(True, metrics=Metrics(speed=Mean("velocity", Ball)))
+    collected = []
+    collect = metrics_module.Aggregate._collect
+    monkeypatch.setattr(
+        metrics_module.Aggregate,
+        "_collect",
+        lambda self, space: collected.append(space) or collect(self, space),
+    )
+    bandit.run(3)
+    assert len(collected) == 1
+    assert list(bandit.metrics.latest["speed"]) == [20.0, 0.0]
+    bandit.space.remove_object(next(iter(bandit.space.values())))
+    bandit.run(1)
+    assert len(collected) == 2
+    assert list(bandit.metrics.latest["speed"]) == [48.0, 0.0]
+
+
+def test_metrics_without_recording(tmp_path):
+    with TrajectoryLog(str(tmp_path / "metrics")) as log:
+        metrics = Metrics(sink=log, balls=Count(Ball), energy=Sum(energy, Ball))
+        metrics.add("markers", lambda space: Count()(space)["Marker"] * 2 + 1)
+        bandit = make(metrics=metrics, record=False)
+        bandit.run(2)
+        assert len(bandit.time) == 0
+        assert len(log) == 2
+        assert log["1:2"] == {"balls": 4, "energy": 480.0, "markers": 5}
+        assert bandit.state()["object_count"] == 6
+
+        streamed = list(bandit.stream(2))
+        assert [time for time, _ in streamed] == ["1:3", "1:4"]
+        assert streamed[-1][1] == log[-1] == metrics.latest
+        assert metrics.latest["energy"] == 30.0 * 4**4
+
+    with pytest.raises(ValueError):
+        next(make().stream(1))
+
+
+def test_branches_compute_their_own_metrics():
+    sink = Rows()
+    metrics = Metrics(sink=sink)
+    metrics.add("value", Sum("value", Marker))
+    bandit = make(metrics=metrics)
+    bandit.run(1)
+    branch = bandit.branch()
+    marker = next(obj for obj in branch.space.values() if isinstance(obj, Marker))
+    branch.space.edit(marker).value = 10
+    branch.run(1)
+    bandit.run(1)
+    assert branch.metrics.sink is None
+    assert (branch.metrics.latest["value"], bandit.metrics.latest["value"]) == (14, 5)
+    assert [time for time, _ in sink] == ["1:1", "1:2"]
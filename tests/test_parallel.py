@@ -0,0 +1,68 @@
+import pickle
+
+from bandit.main import TimeBandit
+from bandit.object import Object
+from bandit.parallel import run_branches
+from bandit.space import Space
+
+
+class Counter(Object):
+    def __init__(self, step=1):
+        super().__init__()
+        self.count = 0
+        self.increment = step
+
+    def _update(self):
+        self.count += self.increment
+
+    def state(self):
+        return {"count": self.count, **super().state()}
+
+
+def total(bandit):
+    return sum(obj.count for obj in bandit.space.objects)
+
+
+def make_bandit():
+    space = Space()
+    for _ in range(4):
+        space.add_object(Counter())
+    bandit = TimeBandit(space)
+    bandit.run(2)
+    return bandit
+
+
+def test_run_branches_matches_serial():
+    bandit = make_bandit()
+    branches = [bandit.branch(str(i)) for i in range(3)]
+    for i, branch in enumerate(branches):
+        for obj in branch.space.objects:
+            branch.space.edit(obj).increment = i + 1
+
+    results = list(run_branches(branches, 5, workers=2, metrics={"total": total}))
+    assert sorted(result.index for result in results) == [0, 1, 2]
+    for result in results:
+        assert result.name == str(result.index)
+        assert result.time == "1:7"
+        assert result.metrics["total"] == 4 * (2 + 5 * (result.index + 1))
+        counts = {s["count"] for s in result.state["object_states"].values()}
+        assert counts == {2 + 5 * (result.index + 1)}
+
+    # The branches in this process are left at the divergence point
+    assert total(branches[0]) == 8
+
+
+def test_run_branches_without_state():
+    bandit = make_bandit()
+    results = list(run_branches([bandit.branch()], 1, workers=1, state=False))
+    assert results[0].state is None
+
+
+def test_branch_pickles_with_parent():
+    bandit = make_bandit()
+    branch = bandit.branch()
+    branch.run(1)
+    restored = pickle.loads(pickle.dumps(branch))
+    assert restored.space.object_count == 4
+    assert total(restored) == 12
+    assert total(restored.parent) == 8
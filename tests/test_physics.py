@@ -0,0 +1,222 @@
+import logging
+import random
+
+import numpy as np
+import pytest
+from fizicks import Force, Position, Vector, Velocity
+from fizicks.motion import Motion
+from fizicks.universe import Universe
+
+from bandit.checkpoint import load, save
+from bandit.columnar import Column
+from bandit.object import Object
+from bandit.physics import Gravity, Physics, Spring
+from bandit.space import Space
+
+
+class Ball(Object):
+    kinematic = True
+
+    def __init__(self, position, velocity, mass=1.0, radius=1.0):
+        super().__init__()
+        self.position = Position(*position)
+        self.velocity = Velocity(*velocity)
+        self.mass = mass
+        self.radius = radius
+        self.debt = []
+
+    def _update(self):
+        pass
+
+    def state(self):
+        return {"position": tuple(self.position), **super().state()}
+
+
+class Rock(Ball):
+    kinematic = False
+
+
+class ColumnBall(Object):
+    kinematic = True
+    position = Column(3)
+    velocity = Column(3)
+    mass = Column()
+
+    def __init__(self, position, velocity, mass=1.0):
+        super().__init__()
+        self.position = position
+        self.velocity = velocity
+        self.mass = mass
+
+    @classmethod
+    def _update_batch(cls, block):
+        pass
+
+    def state(self):
+        return super().state()
+
+
+class Matter:
+    """
+    The attributes fizicks Motion needs.
+    """
+
+    def __init__(self, position, velocity, mass=1.0, radius=1.0):
+        self.position = Position(*position)
+        self.velocity = Velocity(*velocity)
+        self.mass = mass
+        self.radius = radius
+        self.debt = []
+        self.time = 0
+        self.id = "matter"
+
+    def description(self, short=True):
+        return "matter"
+
+
+def values(obj):
+    return tuple(obj.position) + tuple(obj.velocity)
+
+
+@pytest.mark.parametrize("toroidal", [False, True])
+def test_matches_fizicks_motion(toroidal):
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(0)
+    universe = Universe(dimensions=Vector(20, 20, 20), toroidal=toroidal)
+    space = Space(physics=Physics(universe))
+    balls, matter = [], []
+    for _ in range(20):
+        position = [rng.uniform(0, 20) for _ in range(3)]
+        velocity = [rng.uniform(-3, 3) for _ in range(3)]
+        balls.append(Ball(position, velocity))
+        matter.append(Matter(position, velocity))
+        space.add_object(balls[-1])
+
+    try:
+        for step in range(20):
+            if step % 5 == 0:
+                for ball, other in zip(balls, matter):
+                    ball.debt.append(Force(0.5, -0.5, 0.25))
+                    other.debt.append(Force(0.5, -0.5, 0.25))
+            space.update()
+            for other in matter:
+                Motion.update(other, universe)
+                other.debt = []
+    finally:
+        logging.disable(logging.NOTSET)
+
+    for ball, other in zip(balls, matter):
+        assert values(ball) == pytest.approx(values(other))
+        assert type(ball.position) is Position
+        assert type(ball.velocity) is Velocity
+
+
+def test_only_kinematic_objects_move():
+    space = Space(physics=Physics())
+    ball = Ball([0, 0, 0], [1, 2, 0])
+    rock = Rock([0, 0, 0], [1, 2, 0])
+    space.add_object(ball)
+    space.add_object(rock)
+    space.update()
+
+    assert tuple(ball.position) == (1, 2, 0)
+    assert tuple(rock.position) == (0, 0, 0)
+    assert ball.current["position"] == (1, 2, 0)
+
+    late = Ball([5, 5, 5], [0, 0, -1])
+    space.add_object(late)
+    space.update()
+    assert tuple(late.position) == (5, 5, 4)
+    assert len(space.physics) == 2
+
+
+def test_debt_is_applied_once():
+    space = Space(physics=Physics())
+    ball = Ball([0, 0, 0], [0, 0, 0])
+    space.add_object(ball)
+    ball.debt.append(Force(1, 0, 0))
+    ball.debt.append(Force(1, 0, 0))
+    space.update()
+    space.update()
+
+    assert ball.debt == []
+    assert tuple(ball.velocity) == (2, 0, 0)
+    assert tuple(ball.position) == (4, 0, 0)
+
+
+@pytest.mark.parametrize("synchronous", [False, True])
+def test_interaction_forces(synchronous):
+    physics = Physics(forces={"spring": Spring(0.5)})
+    space = Space(columnar=True, synchronous=synchronous, physics=physics)
+    first = ColumnBall([0, 0, 0], [0, 0, 0])
+    second = ColumnBall([10, 0, 0], [0, 0, 0], mass=2.0)
+    ball = Ball([0, 4, 0], [1, 0, 0])
+    for obj in (first, second, ball):
+        space.add_object(obj)
+    space.add_interaction(first, second, "spring")
+    space.add_interaction(ball, first, "spring")
+    space.add_interaction(second, ball, "ignored")
+    space.update()
+
+    assert list(first.velocity) == [5, 0, 0]
+    assert list(first.position) == [5, 0, 0]
+    assert list(second.position) == [10, 0, 0]
+    assert tuple(ball.velocity) == (1, -2, 0)
+    assert tuple(ball.position) == (1, 2, 0)
+
+
+def test_gravity_pulls_towards_mass():
+    physics = Physics(forces={"gravity": Gravity(1.0, softening=0)})
+    space = Space(physics=physics)
+    light = Ball([0, 0, 0], [0, 0, 0], mass=1.0)
+    heavy = Ball([2, 0, 0], [0, 0, 0], mass=8.0)
+    space.add_object(light)
+    space.add_object(heavy)
+    space.add_interaction(light, heavy, "gravity")
+    space.add_interaction(heavy, light, "gravity")
+    space.update()
+
+    assert tuple(light.velocity) == pytest.approx((2, 0, 0))
+    assert tuple(heavy.velocity) == pytest.approx((-0.25, 0, 0))
+
+
+def test_fork_and_checkpoint_keep_physics(tmp_path):
+    space = Space(physics=Physics(Universe(dimensions=Vector(10, 10, 10))))
+    ball = Ball([5, 5, 5], [1, 0, 0])
+    space.add_object(ball)
+    space.update()
+
+    fork = space.fork()
+    fork.update()
+    assert fork.physics is not space.physics
+    assert tuple(fork[ball.id.root].position) == (7, 5, 5)
+    assert tuple(ball.position) == (6, 5, 5)
+
+    restored = load(save(space, str(tmp_path / "physics.ckpt")))
+    assert restored.physics.universe.dimensions == Vector(10, 10, 10)
+    restored.update()
+    assert tuple(restored[ball.id.root].position) == (7, 5, 5)
+
+
+def test_array_positions_keep_their_type():
+    class Dot(Object):
+        kinematic = True
+
+        def __init__(self, position, velocity):
+            super().__init__()
+            self.position = np.array(position, dtype=np.float32)
+            self.velocity = list(velocity)
+
+        def _update(self):
+            pass
+
+        def state(self):
+            return super().state()
+
+    space = Space(physics=Physics(dt=0.5))
+    dot = Dot([0, 0], [2, 2])
+    space.add_object(dot)
+    space.update()
+    assert dot.position.dtype == np.float32
+    assert list(dot.position) == [1, 1]
+    assert dot.velocity == [2, 2]
@@ -0,0 +1,88 @@
+import json
+
+from bandit import profile
+from bandit.columnar import Column
+from bandit.main import TimeBandit
+from bandit.object import Object
+from bandit.profile import Profiler
+from bandit.space import Space
+
+
+class Counter(Object):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def _update(self):
+        self.count += 1
+
+    def state(self):
+        return {"count": self.count, **super().state()}
+
+
+class Ball(Object):
+    position = Column()
+
+    def __init__(self):
+        super().__init__()
+        self.position = 0.0
+
+    @classmethod
+    def _update_batch(cls, block):
+        block.position += 1
+
+    def state(self):
+        return {"x": float(self.position), **super().state()}
+
+
+def make_bandit():
+    space = Space(columnar=True)
+    for _ in range(3):
+        space.add_object(Counter())
+        space.add_object(Ball())
+    return TimeBandit(space)
+
+
+def test_profiler_records_phases(tmp_path):
+    bandit = make_bandit()
+    with Profiler() as profiler:
+        assert profile.active is profiler
+        bandit.run(4)
+    assert profile.active is None
+    bandit.run(1)
+
+    stats = profiler.stats
+    assert len(stats.ticks) == 4
+    (name, owner, update), = stats.query("object.update", Counter)
+    assert (name, owner, update.calls) == ("object.update", "Counter", 12)
+    assert {phase for phase, _, _ in stats.query("object", "Counter")} == {
+        "object.update",
+        "object.clock",
+        "object.state",
+        "object.history",
+    }
+    assert stats.query("block.update", "Ball")[0][2].calls == 4
+    assert stats.query("tick")[0][2].calls == 4
+    assert [owner for owner, _ in stats.by_class()] == ["Counter"]
+    assert stats.total("object") <= stats.total("tick")
+    assert "space.objects" in stats.table()
+    counters = [obj for obj in bandit.space.objects if isinstance(obj, Counter)]
+    assert [obj.count for obj in counters] == [5, 5, 5]
+
+    trace = json.load(open(profiler.export_chrome_trace(str(tmp_path / "t.json"))))
+    events = trace["traceEvents"]
+    assert sum(event["name"] == "tick" for event in events) == 4
+    counters = [event for event in events if event["ph"] == "C"]
+    assert len(counters) == 4 and "Counter" in counters[0]["args"]
+
+
+def test_profiler_counts_allocations():
+    space = Space()
+    space.add_object(Counter())
+    with Profiler(allocations=True, trace=False) as profiler:
+        space.update()
+    stats = profiler.stats
+    assert len(stats.ticks) == 1
+    assert stats.query("space.update")[0][2].calls == 1
+    assert stats.query("object.state")[0][2].allocations > 0
+    assert profiler._events == []
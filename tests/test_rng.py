@@ -0,0 +1,118 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from bandit.columnar import Column
+from bandit.main import TimeBandit
+from bandit.object import Object
+from bandit.rng import RandomStreams
+from bandit.space import Space
+
+
+class Walker(Object):
+    x = Column()
+
+    def __init__(self):
+        super().__init__()
+        self.x = 0.0
+
+    def _update(self):
+        self.x = self.x + self.rng.normal(0.0, 1.0) + self.rng.random()
+
+    def state(self):
+        return {"x": float(self.x), **super().state()}
+
+
+class BatchWalker(Walker):
+    @classmethod
+    def _update_batch(cls, block):
+        rng = block.rng
+        block.x += rng.normal(block, 0.0, 1.0)
+        block.x += rng.random(block, offset=2)
+
+
+def run(walkers, steps=5, **kwargs):
+    space = Space(rng=RandomStreams(7), **kwargs)
+    for walker in walkers:
+        space.add_object(walker)
+    bandit = TimeBandit(space)
+    bandit.run(steps)
+    return {root: float(obj.x) for root, obj in space.items()}, bandit
+
+
+def copies(walkers, cls=Walker):
+    walkers = pickle.loads(pickle.dumps(walkers))
+    for walker in walkers:
+        walker.__class__ = cls
+    return walkers
+
+
+def test_scalar_and_population_draws_match():
+    streams = RandomStreams(3)
+    stream = streams.stream("a", 1, 0)
+    scalars = [stream.random() for _ in range(4)] + [stream.normal(), stream.integers(5, 9)]
+    stream = streams.stream("a", 1, 0)
+    arrays = list(stream.random(4)) + [stream.normal(size=1)[0], stream.integers(5, 9, 1)[0]]
+    assert scalars == arrays and 5 <= scalars[-1] < 9
+
+    walkers = [Walker() for _ in range(4)]
+    rows = streams.uniform(walkers, -1.0, 1.0, size=3)
+    assert rows.shape == (4, 3)
+    for walker, row in zip(walkers, rows):
+        stream = streams.stream(walker.id.root, 1, 0)
+        assert list(row) == [stream.uniform(-1.0, 1.0) for _ in range(3)]
+    assert not np.array_equal(rows[0], rows[1])
+    assert streams.stream("a", 1, 0).random() != streams.stream("a", 1, 1).random()
+    assert RandomStreams(4).stream("a", 1, 0).random() != scalars[0]
+
+
+def test_draws_do_not_depend_on_update_order():
+    walkers = [Walker() for _ in range(6)]
+    forward, _ = run(copies(walkers))
+    backward, _ = run(copies(walkers)[::-1])
+    assert forward == backward
+    assert len(set(forward.values())) == 6
+
+
+def test_batch_update_draws_the_same_numbers():
+    walkers = [Walker() for _ in range(6)]
+    serial, _ = run(copies(walkers))
+    columnar, _ = run(copies(walkers), columnar=True)
+    batched, _ = run(copies(walkers, BatchWalker), columnar=True)
+    assert serial == columnar == batched
+
+
+def test_branches_replay_or_reseed():
+    _, bandit = run([Walker() for _ in range(4)], steps=2)
+    same, other = bandit.branch(), bandit.branch()
+    other.reseed(8)
+    for simulation in (bandit, same, other):
+        simulation.run(3)
+    values = {
+        name: [float(obj.x) for obj in simulation.space.values()]
+        for name, simulation in [("parent", bandit), ("same", same), ("other", other)]
+    }
+    assert values["same"] == values["parent"]
+    assert values["other"] != values["parent"]
+    assert other.space.rng.seed == 8 and bandit.space.rng.seed == 7
+
+
+def test_checkpoint_keeps_the_streams(tmp_path):
+    _, bandit = run([Walker() for _ in range(3)], steps=2)
+    restored = TimeBandit.load(bandit.save(str(tmp_path / "run.ckpt")))
+    assert restored.space.rng.seed == 7
+    bandit.run(2)
+    restored.run(2)
+    assert [float(obj.x) for obj in restored.space.values()] == [
+        float(obj.x) for obj in bandit.space.values()
+    ]
+
+
+def test_objects_need_a_space_with_streams():
+    walker = Walker()
+    with pytest.raises(ValueError):
+        walker.rng
+    Space().add_object(walker)
+    with pytest.raises(ValueError):
+        walker.rng
@@ -0,0 +1,156 @@
+import random
+
+import pytest
+
+from bandit.columnar import Column
+from bandit.edges import EdgeStore
+from bandit.main import TimeBandit
+from bandit.object import Object
+from bandit.snapshot import Snapshots
+from bandit.space import Space
+
+
+class Walker(Object):
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+    def _update(self):
+        neighbors = [edge.node.value for edge in self.connections.values()]
+        # reads the neighbors updated before it in this tick
+        self.value = (self.value * 3 + sum(neighbors)) % 1009
+
+    def state(self):
+        return {"value": self.value, **super().state()}
+
+
+class ColumnWalker(Walker):
+    value = Column()
+
+
+def make(snapshots=None, count=12, cls=Walker, **kwargs):
+    space = Space(**kwargs)
+    walkers = [cls(i) for i in range(count)]
+    for walker in walkers:
+        space.add_object(walker)
+    rng = random.Random(1)
+    for walker in walkers:
+        for other in rng.sample(walkers, 2):
+            if other is not walker:
+                space.add_connection(walker, other, "near")
+    return TimeBandit(space, keyframe_interval=4, snapshots=snapshots)
+
+
+def observe(bandit):
+    return (
+        bandit.clock.time,
+        [
+            (obj.value, obj.clock.time, obj.id.temporal[len(root) :])
+            for root, obj in bandit.space.items()
+        ],
+    )
+
+
+def reference(steps, **kwargs):
+    bandit = make(**kwargs)
+    observed = [observe(bandit)]
+    for _ in range(steps):
+        bandit.update()
+        observed.append(observe(bandit))
+    return observed
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"shared_clock": True},
+        {"edges": EdgeStore()},
+        {"columnar": True, "cls": ColumnWalker},
+    ],
+)
+def test_seek_restores_every_step(kwargs):
+    expected = reference(60, **kwargs)
+    bandit = make(Snapshots(7), **kwargs)
+    bandit.run(60)
+    for ticks in [60, 3, 0, 59, 21, 22, 14, 45, 45, 7, 33]:
+        cycle, step = divmod(ticks, bandit.clock.steps_per_cycle)
+        state = bandit.seek(cycle + 1, step)
+        assert observe(bandit) == expected[ticks]
+        assert bandit.state() is state
+        assert [
+            state["object_states"][root]["value"] for root in bandit.space
+        ] == [value for value, _, _ in expected[ticks][1]]
+        if ticks:
+            assert bandit.time.buffer[-1][0] == bandit.clock.time
+
+    bandit.run(5)
+    assert observe(bandit) == expected[38]
+
+
+def test_running_after_seek_replaces_the_future():
+    bandit = make(Snapshots(5))
+    bandit.run(30)
+    bandit.seek(2, 2)
+    assert bandit.snapshots.latest.ticks == 30
+    assert "4:0" not in bandit.time
+
+    bandit.space.edit(bandit.space[next(iter(bandit.space))]).value = 500
+    bandit.run(1)
+    assert bandit.snapshots.latest.ticks == 10
+    bandit.run(10)
+    assert bandit.snapshots.latest.ticks == 20
+    changed = observe(bandit)
+    bandit.seek(1, 0)
+    assert bandit.seek(3, 3) and observe(bandit) == changed
+
+
+def test_snapshots_are_thinned_and_release_versions():
+    bandit = make(Snapshots(2, limit=4))
+    bandit.run(40)
+    snapshots = bandit.snapshots
+    assert len(snapshots) <= 4
+    assert snapshots.interval == 16
+    assert [snapshot.ticks for snapshot in snapshots] == [0, 16, 32]
+    space = bandit.space
+    assert len(space._children) == 3
+    assert all(len(versions) <= 3 for versions in space._versions.values())
+
+    expected = reference(40)
+    bandit.seek(2, 7)
+    assert observe(bandit) == expected[17]
+
+
+def test_seek_without_snapshots_only_goes_forward():
+    bandit = make()
+    bandit.run(3)
+    assert bandit.seek(1, 5)["object_count"] == 12
+    assert bandit.clock.time == "1:5"
+    with pytest.raises(ValueError):
+        bandit.seek(1, 2)
+
+
+def test_branches_share_earlier_snapshots():
+    bandit = make(Snapshots(4))
+    bandit.run(8)
+    branch = bandit.branch()
+    branch.run(4)
+    bandit.run(4)
+    assert [snapshot.ticks for snapshot in branch.snapshots] == [0, 4, 8, 12]
+    assert branch.snapshots.latest is not bandit.snapshots.latest
+    branch.seek(1, 6)
+    bandit.seek(1, 6)
+    assert observe(branch) == observe(bandit)
+
+
+def test_columnar_snapshots_are_compact():
+    bandit = make(Snapshots(5), columnar=True, cls=ColumnWalker)
+    bandit.run(12)
+    first = bandit.snapshots.find(0)
+    assert first.space is None and isinstance(first.data, bytes)
+    restored = first.restore()
+    assert restored.columns is not None and restored is not first.restore()
+    assert [float(obj.value) for obj in restored.values()] == list(range(12))
+    expected = reference(12, columnar=True, cls=ColumnWalker)
+    bandit.seek(1, 7)
+    assert observe(bandit) == expected[7]
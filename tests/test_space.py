@@ -1,7 +1,11 @@
 import pytest
 
+from bandit.clock import Clock, ClockView
+from bandit.history import DeltaHistory
+from bandit.main import TimeBandit
 from bandit.object import Object
 from bandit.space import Space
+from bandit.update import EventScheduler
 
 
 @pytest.fixture
@@ -94,3 +98,219 @@ def test_state(space, objects):
     state = space.state()
     assert state["object_count"] == 3
     assert "object_states" in state
+
+
+class Tracked(Object):
+    builds = 0
+
+    def __init__(self, step_size=1):
+        super().__init__(step_size)
+        self.value = 0
+
+    def _update(self):
+        self.value += 1
+
+    def state(self):
+        Tracked.builds += 1
+        return {"value": self.value, **super().state()}
+
+
+@pytest.fixture
+def tracked(space):
+    objects = [Tracked() for _ in range(4)]
+    for obj in objects:
+        space.add_object(obj)
+    return objects
+
+
+def test_state_is_cached_until_a_change(space, tracked):
+    first = space.state()
+    assert space.state() is first
+    tracked[0].touch()
+    second = space.state()
+    assert second is not first
+    assert second["object_states"].changed == {tracked[0].id.root}
+
+
+def test_state_is_built_lazily(space, tracked):
+    Tracked.builds = 0
+    states = space.state()["object_states"]
+    assert Tracked.builds == 0
+    root = tracked[1].id.root
+    assert states[root]["value"] == 0
+    assert Tracked.builds == 1
+
+    # An unread state is built before the object changes
+    obj = tracked[2]
+    obj.touch()
+    later = space.state()["object_states"]
+    obj.touch()
+    obj.value = 10
+    assert later[obj.id.root]["value"] == 0
+    assert space.state()["object_states"][obj.id.root]["value"] == 10
+
+
+def test_update_reuses_recorded_states(space, tracked):
+    space.state()
+    space.update()
+    Tracked.builds = 0
+    states = space.state()["object_states"]
+    assert {state["value"] for state in states.values()} == {1}
+    assert Tracked.builds == 0
+
+
+def test_state_after_remove(space, tracked):
+    before = space.state()
+    space.remove_object(tracked[0])
+    after = space.state()
+    assert before["object_count"] == 4
+    assert tracked[0].id.root in before["object_states"]
+    assert after["object_count"] == 3
+    assert tracked[0].id.root not in after["object_states"]
+    assert list(after["object_states"]) == [obj.id.root for obj in tracked[1:]]
+
+
+def test_state_views_keep_their_entries(space, tracked):
+    views, expected = [], []
+    for tick in range(40):
+        obj = tracked[tick % 4]
+        obj.touch()
+        obj.value = tick
+        if tick == 20:
+            space.remove_object(tracked[3])
+        view = space.state()["object_states"]
+        views.append(view)
+        expected.append({root: state["value"] for root, state in view.items()})
+    # Only the newest view holds every entry, in the same dict as the first
+    assert views[-1]._entries is not None
+    assert all(view._entries is None for view in views[:-1])
+    assert [
+        {root: state["value"] for root, state in view.items()} for view in views
+    ] == expected
+    assert tracked[3].id.root in views[19] and tracked[3].id.root not in views[20]
+    assert repr(views[5]) == repr(dict(views[5].items()))
+    assert views[0].summary() == "StateView(4 objects, 4 changed)"
+
+    fork = space.fork()
+    for target, obj, value in ((fork, tracked[0], -1), (space, tracked[1], -2)):
+        obj = target.edit(obj)
+        obj.touch()
+        obj.value = value
+    forked, own = fork.state()["object_states"], space.state()["object_states"]
+    assert forked[tracked[0].id.root]["value"] == -1
+    assert own[tracked[1].id.root]["value"] == -2
+    assert (own[tracked[0].id.root]["value"], forked[tracked[1].id.root]["value"]) == (36, 37)
+
+
+def test_history_diffs_changed_objects_only(tracked):
+    space = Space()
+    for obj in tracked:
+        space.add_object(obj)
+    history = DeltaHistory()
+    history.update(space.state())
+    space.edit(tracked[0]).update()
+    history.update(space.state())
+    delta = history.buffer[-1][2]
+    assert list(delta["object_states"]) == [tracked[0].id.root]
+    assert history.current["object_states"][tracked[0].id.root]["value"] == 1
+    assert history[1]["object_states"][tracked[0].id.root]["value"] == 0
+
+
+def test_shared_clock_matches_own_clocks():
+    own, shared = Space(), Space(shared_clock=True)
+    for space in (own, shared):
+        for step_size in (1, 3):
+            space.add_object(Tracked(step_size))
+    late = Tracked(3)
+    late.clock.update()
+    for _ in range(4):
+        own.update()
+        shared.update()
+    shared.add_object(late)
+    for _ in range(2):
+        own.update()
+        shared.update()
+
+    assert isinstance(late.clock, ClockView)
+    assert late.clock.master is shared.clock
+    assert late.clock.time == "2:0"
+    own_states = [(obj.cycle, obj.step, obj.value) for obj in own.objects]
+    shared_states = [(obj.cycle, obj.step, obj.value) for obj in shared.objects]
+    assert shared_states[:2] == own_states
+
+    shared.remove_object(late)
+    shared.update()
+    assert type(late.clock) is Clock
+    assert late.clock.time == "2:0"
+
+
+def test_shared_clock_forks():
+    space = Space(shared_clock=True)
+    space.add_object(Tracked())
+    space.update()
+    fork = space.fork()
+    fork.update()
+    fork.update()
+    assert list(space.objects)[0].clock.time == "2:0"
+    assert list(fork.objects)[0].clock.time == "4:0"
+    assert list(fork.objects)[0].clock.master is fork.clock
+    bandit = TimeBandit(space)
+    bandit.update()
+    assert bandit.clock is space.clock
+    assert bandit.clock.time == "1:2"
+
+
+class Follower(Object):
+    def __init__(self):
+        super().__init__()
+        self.value = 0
+
+    def _update(self):
+        self.value = 1 + sum(edge.node.value for edge in self.connections.values())
+
+
+def test_forks_do_not_change_what_edges_read():
+    results = []
+    for fork in (False, True):
+        space = Space()
+        first, second = Follower(), Follower()
+        space.add_object(first)
+        space.add_object(second)
+        space.add_connection(second, first, "follows")
+        forks = [space.fork()] if fork else []
+        space.update()
+        forks.append(space.fork())
+        space.update()
+        second = space[second.id.root]
+        assert second.connections[first.id.root].node is space[first.id.root]
+        results.append([obj.value for obj in space.objects])
+    assert results[0] == results[1] == [1, 2]
+
+
+class Napper(Follower):
+    def __init__(self, awake=False):
+        super().__init__()
+        self.awake = awake
+
+    def _update(self):
+        super()._update()
+        if not self.awake:
+            self.sleep()
+
+
+def test_forks_copy_only_edited_objects_with_edges():
+    space = Space(scheduler=EventScheduler())
+    nappers = [Napper(awake=i == 1) for i in range(100)]
+    for obj in nappers:
+        space.add_object(obj)
+    space.add_connection(nappers[1], nappers[0], "follows")
+    space.update()
+    fork = space.fork()
+    space.update()
+    # Only the object updated after the fork is copied
+    assert sum(len(versions) for versions in space._versions.values()) == 1
+    second = space[nappers[1].id.root]
+    assert second is not nappers[1] and second.value == 2
+    first = space.edit(nappers[0])
+    assert space.edit(second).connections[first.id.root].node is first
+    assert fork[second.id.root].connections[first.id.root].node is nappers[0]
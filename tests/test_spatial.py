@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+from fizicks import Position
+
+from bandit.checkpoint import load, save
+from bandit.columnar import Column
+from bandit.object import Object
+from bandit.space import Space
+from bandit.spatial import SpatialGrid
+
+
+class Dot(Object):
+    def __init__(self, position, velocity=(0, 0)):
+        super().__init__()
+        self.position = np.array(position, dtype=float)
+        self.velocity = np.array(velocity, dtype=float)
+
+    def _update(self):
+        self.position = self.position + self.velocity
+
+    def state(self):
+        return super().state()
+
+
+class ColumnDot(Object):
+    position = Column(2)
+
+    def __init__(self, position):
+        super().__init__()
+        self.position = position
+
+    @classmethod
+    def _update_batch(cls, block):
+        block.position += 1
+
+
+def brute(objects, position, radius):
+    return {
+        obj.id.root
+        for obj in objects
+        if np.linalg.norm(np.asarray(obj.position) - position) <= radius
+    }
+
+
+@pytest.fixture
+def dots():
+    rng = np.random.default_rng(0)
+    space = Space(spatial=SpatialGrid(cell_size=1.0))
+    for position in rng.uniform(-5, 5, size=(200, 2)):
+        space.add_object(Dot(position))
+    return space
+
+
+def test_neighbors_match_brute_force(dots):
+    target = next(iter(dots.objects))
+    found = dots.neighbors(target, 1.5)
+    expected = brute(dots.objects, target.position, 1.5) - {target.id.root}
+    assert {obj.id.root for obj in found} == expected
+    distances = [np.linalg.norm(obj.position - target.position) for obj in found]
+    assert distances == sorted(distances)
+    assert {obj.id.root for obj in dots.neighbors((0, 0), 2.5)} == brute(
+        dots.objects, np.zeros(2), 2.5
+    )
+
+
+def test_query_box(dots):
+    found = {obj.id.root for obj in dots.query_box((-1, -2), (1, 0))}
+    expected = {
+        obj.id.root
+        for obj in dots.objects
+        if -1 <= obj.position[0] <= 1 and -2 <= obj.position[1] <= 0
+    }
+    assert found == expected
+    assert dots.query_box((100, 100), (101, 101)) == []
+
+
+def test_index_follows_moves():
+    space = Space(spatial=SpatialGrid(cell_size=1.0))
+    mover = Dot((0, 0), (1, 0))
+    still = Dot((3, 0))
+    space.add_object(mover)
+    space.add_object(still)
+    assert space.neighbors(still, 1.5) == []
+    space.update()
+    space.update()
+    assert space.neighbors(still, 1.5) == [space[mover.id.root]]
+    added = Dot((3, 1))
+    space.add_object(added)
+    assert len(space.neighbors(still, 1.5)) == 2
+
+
+def test_proximity_interactions():
+    space = Space(spatial=SpatialGrid(cell_size=1.0, proximity=1.0))
+    mover = Dot((0, 0), (1, 0))
+    still = Dot((2, 0))
+    space.add_object(mover)
+    space.add_object(still)
+    space.update()
+    mover, still = space[mover.id.root], space[still.id.root]
+    assert set(still.interactions) == {mover.id.root}
+    assert still.interactions[mover.id.root].edge_type == "proximity"
+    space.update()
+    space.update()
+    space.update()
+    assert not space[still.id.root].interactions
+
+
+def test_proximity_keeps_other_interactions():
+    space = Space(spatial=SpatialGrid(cell_size=1.0, proximity=1.0))
+    first, second = Dot((0, 0)), Dot((0.5, 0))
+    space.add_object(first)
+    space.add_object(second)
+    space.edit(first).interactions.add(second.id.root, second, "bonded")
+    space.update()
+    topology = space._topology
+    space.update()
+    space.update()
+    assert space._topology == topology
+    first, second = space[first.id.root], space[second.id.root]
+    assert first.interactions[second.id.root].edge_type == "bonded"
+    assert second.interactions[first.id.root].edge_type == "proximity"
+
+
+def test_columnar_positions():
+    space = Space(columnar=True, spatial=SpatialGrid(cell_size=1.0))
+    dots = [ColumnDot((i, 0)) for i in range(5)]
+    for dot in dots:
+        space.add_object(dot)
+    space.add_object(Dot((0, 5)))
+    space.update()
+    assert [dot.position[0] for dot in space.neighbors((3, 1), 1.1)] == [3, 2, 4]
+    assert len(space.query_box((0, 4), (2, 6))) == 1
+
+
+def test_fizicks_positions():
+    space = Space(spatial=SpatialGrid(cell_size=1.0))
+    for x in range(3):
+        dot = Dot((0, 0, 0))
+        dot.position = Position(x, 0, 0)
+        space.add_object(dot)
+    assert len(space.neighbors((0, 0, 0), 1.0)) == 2
+
+
+def test_requires_index():
+    with pytest.raises(ValueError):
+        Space().neighbors((0, 0), 1)
+
+
+def test_checkpoint_keeps_the_grid(dots, tmp_path):
+    dots.spatial.proximity = 0.5
+    dots.spatial.refresh(dots)
+    target = next(iter(dots.objects))
+    restored = load(save(dots, str(tmp_path / "dots.ckpt")))
+    grid = restored.spatial
+    assert (grid.cell_size, grid.proximity, len(grid)) == (1.0, 0.5, 200)
+    assert [obj.id.root for obj in restored.neighbors(restored[target.id.root], 1.5)] == [
+        obj.id.root for obj in dots.neighbors(target, 1.5)
+    ]
+    assert set(restored[target.id.root].interactions) == set(target.interactions)
+    assert restored.query_box((-1, -1), (1, 1))
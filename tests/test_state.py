@@ -1,8 +1,17 @@
 # test_state.py
+import numpy as np
 import pytest
 import torch
 
+from bandit.data import (
+    ClockState,
+    ConnectionsState,
+    IdentityState,
+    InteractionsState,
+    ObjectState,
+)
 from bandit.object import Object
+from bandit import state as state_module
 from bandit.state import State
 
 
@@ -13,6 +22,9 @@ class MockObject(Object):
     def _update(self):
         pass
 
+    def state(self):
+        return super().state()
+
 
 # State Tests
 def test_state():
@@ -46,3 +58,75 @@ def test_state_flatten():
 def test_state_tensor():
     state = State({"a": 1, "b": 2})
     assert torch.equal(state.tensor(), torch.tensor([1.0, 2.0], dtype=torch.float32))
+
+
+def test_nested_state_tensor_and_decode():
+    state = ObjectState(
+        clock=ClockState(cycle=3, step=1),
+        id=IdentityState(root="abc", temporal="abc.3.1"),
+        connections=ConnectionsState(),
+        interactions=InteractionsState(),
+        position=np.array([1.0, 2.0]),
+        alive=True,
+    )
+    tensor = state.tensor()
+    assert tensor.tolist() == [3.0, 1.0, 1.0, 2.0, 1.0]
+    assert state.schema.names() == [
+        "clock.cycle",
+        "clock.step",
+        "position[0]",
+        "position[1]",
+        "alive",
+    ]
+    decoded = state.decode(tensor * 2)
+    assert isinstance(decoded, ObjectState)
+    assert isinstance(decoded["clock"], ClockState)
+    assert decoded["clock"] == {"cycle": 6, "step": 2}
+    assert decoded["id"]["root"] == "abc"
+    assert np.array_equal(decoded["position"], [2.0, 4.0])
+    assert decoded["alive"] is True
+    assert state["clock"]["cycle"] == 3
+
+
+def test_schema_is_cached_and_rebuilt():
+    first = State({"a": 1, "b": {"c": [1, 2]}})
+    assert first.schema is State({"a": 5, "b": {"c": [3, 4]}}).schema
+    changed = State({"a": 1, "b": {"c": [1, 2, 3]}})
+    assert changed.tensor().tolist() == [1.0, 1.0, 2.0, 3.0]
+    assert changed.schema.size == 4
+
+
+def test_keys_without_a_literal_repr():
+    class Key:
+        pass
+
+    key = Key()
+    state = State({key: 1.5, "nested": {key: [1, 2]}, "label": "x"})
+    assert state.tensor().tolist() == [1.5, 1.0, 2.0]
+    assert State.stack([state, state]).shape == (2, 3)
+
+
+def test_schema_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(state_module, "_SCHEMAS", type(state_module._SCHEMAS)())
+    monkeypatch.setattr(state_module, "_MAX_SCHEMAS", 3)
+    first = State({"a": 1})
+    schema = first.schema
+    for i in range(5):
+        State({f"k{i}": i}).tensor()
+        assert first.schema is schema
+    assert len(state_module._SCHEMAS) == 3
+    for i in range(5, 8):
+        State({f"k{i}": i}).tensor()
+    assert State({"a": 1}).schema is not schema
+
+
+def test_stack_object_states():
+    objects = [MockObject() for _ in range(3)]
+    for i, obj in enumerate(objects):
+        for _ in range(i):
+            obj.update()
+    stacked = State.stack(obj.state() for obj in objects)
+    assert stacked.shape == (3, 3)
+    assert stacked[:, 1].tolist() == [1.0, 2.0, 3.0]
+    with pytest.raises(ValueError):
+        State.stack([State({"a": 1}), State({"a": "x"})])
@@ -0,0 +1,85 @@
+import pytest
+
+from bandit.main import TimeBandit
+from bandit.object import Object
+from bandit.space import Space
+from bandit.trajectory import TrajectoryLog
+
+
+class Counter(Object):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def _update(self):
+        self.count += 1
+
+    def state(self):
+        return {"count": self.count, **super().state()}
+
+
+@pytest.fixture
+def bandit():
+    space = Space()
+    for _ in range(3):
+        space.add_object(Counter())
+    return TimeBandit(space, temporal_depth=5)
+
+
+def counts(state):
+    return {s["count"] for s in state["object_states"].values()}
+
+
+def test_run_streams_every_step(bandit, tmp_path):
+    with TrajectoryLog(str(tmp_path / "run"), chunk_size=1024) as log:
+        bandit.run(30, sink=log)
+        assert len(log) == 30
+        assert len(bandit.time) == 5
+        assert counts(log[0]) == {1}
+        assert counts(log[-1]) == {30}
+        assert log["1:5"] == log[4]
+        assert [counts(state) for state in log[10:13]] == [{11}, {12}, {13}]
+        assert log.times[:3] == ["1:1", "1:2", "1:3"]
+        assert log.index["chunk"].max() > 0
+
+
+def test_records_are_zero_copy(bandit, tmp_path):
+    with TrajectoryLog(str(tmp_path / "run")) as log:
+        bandit.run(4, sink=log)
+        records = list(log.records(1, 3))
+        assert len(records) == 2
+        assert all(isinstance(record, memoryview) for record in records)
+        assert records[0].readonly
+        assert records[0].obj is records[1].obj
+        assert bytes(log.raw(2)) == bytes(records[1])
+        del records
+
+
+def test_reopen_appends(bandit, tmp_path):
+    path = str(tmp_path / "run")
+    with TrajectoryLog(path) as log:
+        bandit.run(3, sink=log)
+    with TrajectoryLog(path) as log:
+        assert len(log) == 3
+        bandit.run(2, sink=log)
+        assert len(log) == 5
+        assert counts(log["1:5"]) == {5}
+        assert "1:6" not in log
+        assert [counts(state) for state in log] == [{i} for i in range(1, 6)]
+
+
+def test_find_after_a_replay(tmp_path):
+    path = str(tmp_path / "run")
+    with TrajectoryLog(path) as log:
+        for step in range(1, 5):
+            log.append(f"1:{step}", {"run": 0, "step": step})
+        assert log.find("1:3") == 2
+        # A replay from step 2 records steps 3 and 4 again
+        for step in (3, 4, 5):
+            log.append(f"1:{step}", {"run": 1, "step": step})
+        assert [log.find(f"1:{step}") for step in range(1, 6)] == [0, 1, 4, 5, 6]
+        assert log["1:4"] == {"run": 1, "step": 4}
+        log.append("2:0", {"run": 1, "step": 0})
+        assert log.find("2:0") == 7 and "1:6" not in log
+    with TrajectoryLog(path) as log:
+        assert log.find("1:3") == 4 and log.find("1:1") == 0
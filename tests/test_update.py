@@ -0,0 +1,170 @@
+import pytest
+
+from bandit.main import TimeBandit
+from bandit.object import Object
+from bandit.space import Space
+from bandit.update import EventScheduler, UpdateScheduler
+
+log = []
+
+
+class Recorder(Object):
+    def _update(self):
+        log.append(self.id.root)
+
+
+@pytest.fixture
+def space():
+    log.clear()
+    space = Space(scheduler=UpdateScheduler())
+    return space
+
+
+@pytest.fixture
+def objects(space):
+    objects = [Recorder() for _ in range(5)]
+    for obj in objects:
+        space.add_object(obj)
+    return objects
+
+
+def roots(objects):
+    return [obj.id.root for obj in objects]
+
+
+def test_independent_objects_share_a_wave(space, objects):
+    assert space.scheduler.plan(space) == [roots(objects)]
+
+
+def test_dependencies_come_first(space, objects):
+    a, b, c, d, e = objects
+    space.add_connection(a, b, "reads")
+    space.add_interaction(b, c, "pulls")
+    space.add_connection(d, c, "reads")
+    waves = space.scheduler.plan(space)
+    assert waves == [roots([c, e]), roots([b, d]), roots([a])]
+
+
+def test_cycles_are_ordered_deterministically(space, objects):
+    a, b, c, d, e = objects
+    space.add_connection(a, b, "next to")
+    space.add_connection(b, a, "next to")
+    space.add_connection(b, c, "next to")
+    space.add_connection(c, a, "next to")
+    waves = space.scheduler.plan(space)
+    assert waves == [roots([c, d, e]), roots([b]), roots([a])]
+
+
+def test_plan_is_cached_until_topology_changes(space, objects):
+    first = space.scheduler.plan(space)
+    assert space.scheduler.plan(space) is first
+    space.add_connection(objects[0], objects[1], "reads")
+    assert space.scheduler.plan(space) is not first
+    assert len(space.scheduler.plan(space)) == 2
+
+
+def test_update_follows_plan(space, objects):
+    a, b, c, d, e = objects
+    space.add_connection(a, b, "reads")
+    space.add_connection(b, c, "reads")
+    space.update()
+    assert log == roots([c, d, e, b, a])
+    assert all(obj.cycle == 2 for obj in space.objects)
+
+
+def test_threaded_update(objects):
+    log.clear()
+    space = Space(scheduler=UpdateScheduler(workers=2))
+    for obj in objects:
+        space.add_object(obj)
+    space.add_connection(objects[0], objects[1], "reads")
+    space.update()
+    space.scheduler.close()
+    assert sorted(log) == sorted(roots(objects))
+    assert log[-1] == objects[0].id.root
+
+
+class Sleeper(Object):
+    """
+    Sleeps for a fixed number of ticks after every update, or until an
+    event with None. Emits on every update when loud.
+    """
+
+    def __init__(self, ticks=None, loud=False):
+        super().__init__(step_size=4)
+        self.ticks = ticks
+        self.loud = loud
+        self.count = 0
+
+    def _update(self):
+        log.append(self.id.root)
+        self.count += 1
+        if self.ticks != 0:
+            self.sleep(self.ticks)
+        if self.loud:
+            self.emit()
+
+    def state(self):
+        return {"count": self.count, **super().state()}
+
+
+def test_event_scheduler_updates_due_objects():
+    log.clear()
+    space = Space(scheduler=EventScheduler())
+    always, every3, waiting = Sleeper(0), Sleeper(2), Sleeper(None)
+    for obj in (always, every3, waiting):
+        space.add_object(obj)
+    for _ in range(7):
+        space.update()
+
+    assert [always.count, every3.count, waiting.count] == [7, 3, 1]
+    assert space.scheduler.updates == 11
+    assert space.scheduler.awake == [always.id.root]
+    assert log[:3] == roots([always, every3, waiting])
+
+    # Clocks catch up with the ticks slept through on wake up
+    space.scheduler.wake(waiting)
+    space.update()
+    assert waiting.count == 2
+    assert (waiting.cycle, waiting.step) == (always.cycle, always.step) == (3, 0)
+    assert (every3.cycle, every3.step) == (2, 3)
+
+
+def test_emit_wakes_connected_objects():
+    log.clear()
+    space = Space(scheduler=EventScheduler())
+    source, listener, other = Sleeper(2, loud=True), Sleeper(None), Sleeper(None)
+    for obj in (source, listener, other):
+        space.add_object(obj)
+    space.add_connection(listener, source, "listens")
+    for _ in range(7):
+        space.update()
+
+    # The source runs on ticks 1, 4, 7 and wakes the listener the tick after
+    assert source.count == 3
+    assert listener.count == 3
+    assert other.count == 1
+
+
+def test_event_history_matches_fixed_ticks():
+    def run(scheduler):
+        space = Space(scheduler=scheduler)
+        objects = [Sleeper(ticks) for ticks in (0, 1, 3, None)]
+        for obj in objects:
+            space.add_object(obj)
+        bandit = TimeBandit(space)
+        bandit.run(10)
+        return bandit, objects
+
+    bandit, objects = run(EventScheduler())
+    counts = [obj.count for obj in objects]
+    assert counts == [10, 5, 3, 1]
+    states = bandit.state()["object_states"]
+    assert [states[obj.id.root]["count"] for obj in objects] == counts
+
+    fork = bandit.space.fork()
+    fork.scheduler.wake(objects[3])
+    fork.update()
+    bandit.space.update()
+    assert fork[objects[3].id.root].count == 2
+    assert objects[3].count == 1